@@ -1,7 +1,15 @@
 # eventlet.monkey_patch() DEBE estar antes de cualquier otro import
-# para que las operaciones de red funcionen de forma asíncrona con Socket.IO
-import eventlet
-eventlet.monkey_patch()
+# para que las operaciones de red funcionen de forma asíncrona con Socket.IO.
+# Los workers HTTP (WEB_ROLE=http, gthread) no usan eventlet.
+import os
+
+if os.environ.get('WEB_ROLE', 'all').lower() != 'http':
+    import eventlet
+    eventlet.monkey_patch()
+
+# psycopg2 es una extensión C: sin el wait callback sus queries bloquean el hub
+from app.utils.offload import make_db_driver_green  # noqa: E402
+make_db_driver_green()
 
 from app import create_app       # noqa: E402
 from app.extensions import socketio  # noqa: E402, F401
@@ -44,34 +44,15 @@ def create_app(test_config=None):
     init_celery(app)
 
     # Socket.IO
-    # Intentar usar Redis como message broker (requerido con múltiples workers).
-    # Si Redis no está disponible, usamos message_queue=None (solo funciona con workers=1).
-    _redis_url = app.config.get('REDIS_URL', 'redis://redis:6379/0')
-    try:
-        import redis as _redis_lib
-        _r = _redis_lib.from_url(_redis_url, socket_connect_timeout=2, socket_timeout=2)
-        _r.ping()
-        _mq = _redis_url
-    except Exception:
-        app.logger.warning('[SocketIO] Redis no disponible — message_queue=None (single-worker mode)')
-        _mq = None
-
-    if app.config.get('TESTING'):
-        _async_mode = 'threading'
-        _mq = None
-    else:
-        try:
-            import eventlet  # noqa: F401
-            _async_mode = 'eventlet'
-        except ImportError:
-            _async_mode = 'threading'
+    # El message queue (Redis) y el async_mode dependen de WEB_ROLE; ver
+    # app/sockets/message_queue.py. Con varios procesos Redis es obligatorio.
+    from app.sockets.message_queue import socketio_options
     socketio.init_app(
         app,
-        async_mode=_async_mode,
-        message_queue=_mq,
         cors_allowed_origins='*',
         logger=False,
         engineio_logger=False,
+        **socketio_options(app),
     )
     from app.sockets import register_socket_handlers
     register_socket_handlers(socketio)
@@ -1,6 +1,9 @@
 from app.extensions import celery
 from celery.schedules import crontab
 
+# Cola del worker dedicado a renderizar lotes de documentos
+DOCUMENTS_QUEUE = 'documents'
+
 
 def init_celery(app):
     """
@@ -17,6 +20,18 @@ def init_celery(app):
         task_time_limit=app.config.get('CELERY_TASK_TIME_LIMIT', 300),
         task_soft_time_limit=app.config.get('CELERY_TASK_SOFT_TIME_LIMIT', 240),
         broker_connection_retry_on_startup=True,
+        # Guarda el nombre de la tarea con su estado: los endpoints de estado
+        # verifican que el task_id sea de su tarea (app/utils/task_results.py)
+        result_extended=True,
+
+        # ── Colas ─────────────────────────────────────────────────────────────
+        # Los lotes de documentos renderizan en un ProcessPoolExecutor, y los
+        # procesos del pool prefork son daemon (no pueden tener hijos). Van a
+        # la cola 'documents', que atiende un worker con -P solo (servicio
+        # celery-documents en docker/docker-compose.*.yml).
+        task_routes={
+            'app.tasks.documents.generate_documents_batch': {'queue': DOCUMENTS_QUEUE},
+        },
 
         # ── Redbeat: scheduler con respaldo en Redis ──────────────────────────
         # Permite editar el schedule en tiempo real desde la UI sin reiniciar.
@@ -60,6 +75,11 @@ def init_celery(app):
                 'task': 'app.tasks.events.dispatch_reminders_2h',
                 'schedule': crontab(minute='*/15'),
             },
+            # Reconcilia el inventario de archivos (tamaño/hash) con el disco — domingos a las 03:00
+            'reconcile-file-inventory': {
+                'task': 'app.tasks.maintenance.reconcile_file_inventory',
+                'schedule': crontab(hour=3, minute=0, day_of_week=0),
+            },
         },
     )
 
@@ -70,6 +90,10 @@ def init_celery(app):
         'app.tasks.maintenance',
         'app.tasks.notifications',
         'app.tasks.events',
+        'app.tasks.purge',
+        'app.tasks.documents',
+        'app.tasks.transition',
+        'app.tasks.students',
     ]
 
     # Hace que cada tarea se ejecute dentro del contexto de la app Flask
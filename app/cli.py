@@ -159,6 +159,79 @@ def register_cli(app):
             click.echo(click.style('Sin errores.', fg='green'))
         click.echo('')
 
+    @app.cli.command('event-image-variants')
+    @click.option('--sync', is_flag=True, help='Generar aquí en lugar de encolar en Celery')
+    @with_appcontext
+    def event_image_variants(sync):
+        """
+        Genera las derivadas responsivas de imágenes de eventos que aún no las
+        tienen (subidas antes de existir el pipeline): covers/galería sin
+        `variants` y fotos de hosts externos.
+
+        Uso:
+            flask event-image-variants
+            flask event-image-variants --sync
+        """
+        from app.models.event import EventHost, EventImage
+        from app.services.events_service import EventsService
+        from app.utils.image_processing import ImageProcessingError
+
+        jobs = [
+            (path, image_id)
+            for image_id, path in EventImage.query
+            .filter(EventImage.variants.is_(None))
+            .with_entities(EventImage.id, EventImage.path)
+        ]
+        jobs += [
+            (path, None)
+            for (path,) in EventHost.query
+            .filter(EventHost.external_photo_path.isnot(None))
+            .with_entities(EventHost.external_photo_path)
+            .distinct()
+        ]
+        click.echo(f'Imágenes por procesar: {len(jobs)}')
+
+        errors = 0
+        for path, image_id in jobs:
+            if not sync:
+                EventsService.enqueue_image_variants(path, image_id)
+                continue
+            try:
+                EventsService.build_image_variants(path, image_id)
+            except ImageProcessingError as e:
+                errors += 1
+                click.echo(click.style(f'  ERROR {path}: {e}', fg='red'))
+        click.echo(click.style('Listo.' if not errors else f'Listo con {errors} errores.',
+                               fg='green' if not errors else 'yellow'))
+
+    @app.cli.command('reconcile-file-inventory')
+    @click.option('--if-pending', is_flag=True,
+                  help='Solo si hay filas sin inventario (para el arranque del despliegue)')
+    @click.option('--verify-hashes', is_flag=True, help='Recalcular sha256 de todos los archivos')
+    @with_appcontext
+    def reconcile_file_inventory(if_pending, verify_hashes):
+        """
+        Compara el inventario de archivos con el disco y rellena tamaño, hash
+        y mime de las filas anteriores a las columnas de inventario (lo mismo
+        que la tarea semanal reconcile_file_inventory, aquí y ahora).
+
+        Uso:
+            flask reconcile-file-inventory
+            flask reconcile-file-inventory --if-pending
+        """
+        from app.services import file_inventory_service
+
+        pending = file_inventory_service.pending_inventory_count()
+        click.echo(f'Filas sin inventario: {pending}')
+        if if_pending and not pending:
+            click.echo(click.style('Nada que reconciliar.', fg='green'))
+            return
+
+        stats = file_inventory_service.reconcile(verify_hashes=verify_hashes)
+        for name, values in stats.items():
+            click.echo(f'  {name}: {values}')
+        click.echo(click.style('Listo.', fg='green'))
+
     @app.cli.command('clean-test-data')
     @click.option('--confirm', is_flag=True, help='Confirmar la ejecucion sin prompt')
     @with_appcontext
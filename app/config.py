@@ -30,6 +30,14 @@ class Config:
     MAX_EVENT_IMAGE_BYTES = 5 * 1024 * 1024  # 5 MB
     MAX_CONTENT_LENGTH = 5 * 1024 * 1024  # 5 MB (antes 3 MB, subido por imágenes de eventos)
 
+    # Descargas protegidas: Flask valida el acceso y nginx envía el archivo
+    # (X-Accel-Redirect a locations `internal` bajo X_ACCEL_PREFIX). Sin nginx
+    # delante se deja en False y se usa send_file.
+    X_ACCEL_REDIRECT = os.environ.get('X_ACCEL_REDIRECT', 'False').lower() == 'true'
+    X_ACCEL_PREFIX = os.environ.get('X_ACCEL_PREFIX', '/_protected')
+    # Avatares: nombre uuid por subida → caché del navegador de un año
+    AVATAR_CACHE_MAX_AGE = int(os.environ.get('AVATAR_CACHE_MAX_AGE', str(365 * 24 * 3600)))
+
     # ===== SEGURIDAD =====
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-key-CHANGE-IN-PRODUCTION')
     
@@ -45,6 +53,7 @@ class Config:
     MS_CLIENT_ID = os.environ.get('MS_CLIENT_ID', '')
     MS_CLIENT_SECRET = os.environ.get('MS_CLIENT_SECRET', '')
     MS_REDIRECT_URI = os.environ.get('MS_REDIRECT_URI', 'http://localhost/admin/emails/callback')
+    MS_GRAPH_BASE_URL = os.environ.get('MS_GRAPH_BASE_URL', 'https://graph.microsoft.com/v1.0')
     
     # ===== SESIONES Y COOKIES =====
     SESSION_COOKIE_NAME = "siiap_session"
@@ -66,8 +75,34 @@ class Config:
     GUNICORN_WORKERS = int(os.environ.get('GUNICORN_WORKERS', '4'))
     GUNICORN_TIMEOUT = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
 
+    # Trabajo de CPU fuera del hub de eventlet (app/utils/offload.py)
+    OFFLOAD_MAX_CONCURRENCY = int(os.environ.get('OFFLOAD_MAX_CONCURRENCY', str(os.cpu_count() or 2)))
+    OFFLOAD_SLOW_SECONDS = float(os.environ.get('OFFLOAD_SLOW_SECONDS', '5'))
+    # Hilos para hashear contraseñas en el alta masiva por CSV (app/services/student_bulk_service.py)
+    STUDENT_IMPORT_HASH_WORKERS = int(os.environ.get('STUDENT_IMPORT_HASH_WORKERS', str(os.cpu_count() or 1)))
+    # Procesos de render por lote de documentos (app/services/document_generation_service.py);
+    # corre en el worker celery-documents, que debe usar -P solo/threads
+    DOCUMENT_BATCH_WORKERS = int(os.environ.get('DOCUMENT_BATCH_WORKERS', str(min(4, os.cpu_count() or 1))))
+
     # ===== REDIS =====
     REDIS_URL = os.environ.get('REDIS_URL', 'redis://redis:6379/0')
+    # Segundos que se guardan en Redis las métricas de dashboards (app/utils/dashboard_cache.py)
+    DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', '10'))
+    # Segundos que vale la caché local de permisos mientras no se puede leer la
+    # versión global en Redis (caído o circuit breaker abierto) (app/utils/permission_cache.py)
+    PERMISSION_CACHE_UNVERIFIED_MAX_AGE = int(os.environ.get('PERMISSION_CACHE_UNVERIFIED_MAX_AGE', '30'))
+
+    # ===== DESPLIEGUE / SOCKET.IO =====
+    # all: un proceso eventlet (HTTP + Socket.IO) | http: workers gthread
+    # escalables | socketio: proceso dedicado a /socket.io/ (ver docker-compose.scale.yml)
+    WEB_ROLE = os.environ.get('WEB_ROLE', 'all')
+    # None → obligatorio en cualquier rol distinto de 'all'
+    SOCKETIO_REQUIRE_MQ = (
+        os.environ['SOCKETIO_REQUIRE_MQ'].lower() == 'true'
+        if os.environ.get('SOCKETIO_REQUIRE_MQ') else None
+    )
+    SOCKETIO_MQ_RETRIES = int(os.environ.get('SOCKETIO_MQ_RETRIES', '10'))
+    SOCKETIO_MQ_RETRY_DELAY = float(os.environ.get('SOCKETIO_MQ_RETRY_DELAY', '0.5'))
 
     # ===== CELERY =====
     # DB 1 para el broker, DB 2 para los resultados
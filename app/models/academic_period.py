@@ -1,4 +1,5 @@
 from app import db
+from app.utils import period_calendar
 from app.utils.datetime_utils import now_local
 
 class AcademicPeriod(db.Model):
@@ -89,8 +90,14 @@ class AcademicPeriod(db.Model):
         """
         Obtiene el periodo activo actual.
         Retorna None si no hay ninguno activo.
+
+        El id sale del calendario en memoria (app.utils.period_calendar); la
+        instancia se toma del identity map de la sesión cuando ya está cargada.
         """
-        return AcademicPeriod.query.filter_by(is_active=True).first()
+        active = period_calendar.get_period_calendar().active
+        if active is None:
+            return None
+        return db.session.get(AcademicPeriod, active.id)
 
     def activate(self):
         """
@@ -24,6 +24,12 @@ class AcceptanceDocument(db.Model):
     user_program_id = db.Column(db.Integer, db.ForeignKey('user_program.id'), nullable=False)
     document_type = db.Column(db.String(30), nullable=False)
     file_path = db.Column(db.String(500), nullable=True)
+    # Inventario del archivo: se llena al subir (app/utils/files.py) y lo
+    # revisa reconcile_file_inventory; NULL en filas anteriores al inventario
+    size_bytes = db.Column(db.BigInteger, nullable=True)
+    sha256 = db.Column(db.String(64), nullable=True)
+    mime = db.Column(db.String(100), nullable=True)
+    file_missing = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
 
     uploaded_by_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
     uploaded_at = db.Column(db.DateTime, nullable=True)
@@ -25,6 +25,11 @@ class EmailQueue(db.Model):
     sent_at = db.Column(db.DateTime, nullable=True)
     next_retry_at = db.Column(db.DateTime, nullable=True)
     
+    # Selección de pendientes / reintentos por el worker de correo
+    __table_args__ = (
+        db.Index('ix_email_queue_status_retry', 'status', 'next_retry_at'),
+    )
+
     user = db.relationship('User', backref='email_queue')
     notification = db.relationship('Notification', backref='email_queue_item')
     
@@ -134,6 +134,12 @@ class EventAttendance(db.Model):
     attended_at = db.Column(db.DateTime, nullable=True)
     notes = db.Column(db.Text, nullable=True)
 
+    __table_args__ = (
+        db.Index('ix_event_attendance_event_user', 'event_id', 'user_id'),
+        # Eventos en los que está registrado un usuario (visibilidad / contadores)
+        db.Index('ix_event_attendance_user_event', 'user_id', 'event_id'),
+    )
+
     # Relaciones
     event = db.relationship('Event')
     user = db.relationship('User')
@@ -163,6 +169,12 @@ class EventInvitation(db.Model):
     responded_at = db.Column(db.DateTime)
     notes = db.Column(db.Text)
     
+    __table_args__ = (
+        # Eventos a los que fue invitado un usuario (cubre event_id)
+        db.Index('ix_event_invitation_user_event', 'user_id', 'event_id'),
+        db.Index('ix_event_invitation_event_user', 'event_id', 'user_id'),
+    )
+
     # Relaciones
     event = db.relationship('Event', foreign_keys=[event_id])
     user = db.relationship('User', foreign_keys=[user_id])
@@ -237,6 +249,18 @@ class EventImage(db.Model):
     is_cover = db.Column(db.Boolean, nullable=False, default=False)
     display_order = db.Column(db.Integer, nullable=False, default=0)
     uploaded_at = db.Column(db.DateTime, nullable=False, default=now_local)
+    # Derivadas responsivas (app/tasks/events.py: generate_event_image_variants).
+    # NULL mientras la tarea no ha corrido: se sirve el original.
+    width = db.Column(db.Integer, nullable=True)
+    height = db.Column(db.Integer, nullable=True)
+    variants = db.Column(db.JSON, nullable=True)      # [{w, h, format, path, bytes}]
+    placeholder = db.Column(db.Text, nullable=True)   # data URI WebP de ~24px
+    # Inventario del archivo: se llena al subir (app/utils/files.py) y lo
+    # revisa reconcile_file_inventory; NULL en filas anteriores al inventario
+    size_bytes = db.Column(db.BigInteger, nullable=True)
+    sha256 = db.Column(db.String(64), nullable=True)
+    mime = db.Column(db.String(100), nullable=True)
+    file_missing = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
 
     event = db.relationship(
         'Event',
@@ -256,6 +280,10 @@ class EventImage(db.Model):
             'is_cover': self.is_cover,
             'display_order': self.display_order,
             'uploaded_at': self.uploaded_at.isoformat() if self.uploaded_at else None,
+            'width': self.width,
+            'height': self.height,
+            'widths': sorted({v['w'] for v in self.variants or []}),
+            'placeholder': self.placeholder,
         }
 
 
@@ -31,6 +31,17 @@ class Notification(db.Model):
     read_at = db.Column(db.DateTime, nullable=True)
     expires_at = db.Column(db.DateTime, nullable=True)
     
+    # Feed del usuario (no borradas, más recientes primero) y, parcial,
+    # solo las no leídas para el badge y el filtro "no leídas".
+    __table_args__ = (
+        db.Index('ix_notification_user_feed', 'user_id', 'is_deleted', 'created_at'),
+        db.Index(
+            'ix_notification_user_unread', 'user_id', 'created_at',
+            postgresql_where=db.text('is_read = false AND is_deleted = false'),
+            sqlite_where=db.text('is_read = 0 AND is_deleted = 0'),
+        ),
+    )
+
     user = db.relationship('User', backref='notifications')
     invitation = db.relationship('EventInvitation', backref='notification_ref', uselist=False)
     
@@ -55,6 +55,11 @@ class SemesterEnrollment(db.Model):
         db.DateTime, default=now_local, onupdate=now_local, nullable=False
     )
 
+    # Inscripción de un estudiante en un periodo (transición, permanencia)
+    __table_args__ = (
+        db.Index('ix_semester_enrollment_up_period', 'user_program_id', 'academic_period_id'),
+    )
+
     # Relaciones
     user_program = db.relationship(
         'UserProgram', back_populates='semester_enrollments'
@@ -25,12 +25,25 @@ class Submission(db.Model):
     uploaded_by_role = db.Column(db.String(20))  # 'student' | 'coordinator'
     deadline_at = db.Column(db.DateTime)         # fecha límite efectiva (si hay prórroga)
     is_in_extension = db.Column(db.Boolean, default=False, nullable=False)
+    # Inventario del archivo: se llena al subir (app/utils/files.py) y lo
+    # revisa reconcile_file_inventory; NULL en filas anteriores al inventario
+    size_bytes = db.Column(db.BigInteger, nullable=True)
+    sha256 = db.Column(db.String(64), nullable=True)
+    mime = db.Column(db.String(100), nullable=True)
+    file_missing = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
 
     # FK nullable: solo submissions de permanencia con ventana configurada
     document_deadline_id = db.Column(
         db.Integer, db.ForeignKey('document_deadline.id'), nullable=True
     )
 
+    __table_args__ = (
+        # Documento vigente de un usuario para un archive (vistas de pasos / revisión)
+        db.Index('ix_submission_user_archive', 'user_id', 'archive_id'),
+        # Entregas de una ventana de permanencia por estado
+        db.Index('ix_submission_deadline_status', 'document_deadline_id', 'status'),
+    )
+
     user          = db.relationship('User',foreign_keys=[user_id],back_populates='submissions')
     reviewer      = db.relationship('User',foreign_keys=[reviewer_id],back_populates='reviews')
     archive       = db.relationship('Archive',back_populates='submissions')
@@ -16,6 +16,9 @@ TASK_DISPLAY_NAMES = {
     'app.tasks.maintenance.cleanup_old_notifications':       'Limpiar notificaciones antiguas',
     'app.tasks.notifications.send_bulk_notification':        'Envío masivo de notificaciones',
     'app.tasks.notifications.send_bulk_notification_by_filter': 'Envío masivo por filtro',
+    'app.tasks.notifications.send_emails_batch_async':       'Envío de correos en lote',
+    'app.tasks.purge.build_purge_run':                       'Generar respaldo ZIP de purga',
+    'app.tasks.documents.generate_documents_batch':          'Generación de documentos por lote',
 }
 
 
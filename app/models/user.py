@@ -4,6 +4,8 @@ from flask_login import UserMixin
 from datetime import datetime, timezone
 from app.utils.datetime_utils import now_local
 from werkzeug.security import generate_password_hash
+from app.utils.offload import offload_cpu
+from app.utils import permission_cache
 
 class User(db.Model, UserMixin):
     __tablename__ = 'user'
@@ -98,7 +100,7 @@ class User(db.Model, UserMixin):
         self.last_name = last_name
         self.mother_last_name = mother_last_name
         self.username = username
-        self.password = generate_password_hash(password)
+        self.password = offload_cpu(generate_password_hash, password, label='password_hash')
         self.email = email
         self.registration_date = now_local()
         self.last_login = now_local()
@@ -148,65 +150,15 @@ class User(db.Model, UserMixin):
           2. Overrides activos del rol (RolePermissionOverride)
           3. Permisos directos activos y no vencidos (UserPermission)
 
-        Caché por request (flask.g) para evitar N+1 queries.
+        Los permisos se compilan una vez por proceso (app.utils.permission_cache)
+        y se invalidan por versión; el resultado por (user_id, program_id) se
+        memoriza además en flask.g para la request actual.
         Si program_id se especifica, los UserPermission deben tener
         ese program_id o NULL (global).
         """
         cache_key = f'_perm_cache_{self.id}_{program_id}'
         if not hasattr(g, cache_key):
-            from app.models.role_permission import RolePermission, RolePermissionOverride
-            from app.models.user_permission import UserPermission
-            from app.utils.datetime_utils import now_local
-
-            codenames = set()
-
-            # 1. Permisos base del rol
-            if self.role_id:
-                base = (
-                    db.session.query(RolePermission)
-                    .join(RolePermission.permission)
-                    .filter(RolePermission.role_id == self.role_id)
-                    .all()
-                )
-                codenames.update(rp.permission.codename for rp in base)
-
-            # 2. Overrides activos del rol
-            if self.role_id:
-                overrides = (
-                    db.session.query(RolePermissionOverride)
-                    .join(RolePermissionOverride.permission)
-                    .filter(
-                        RolePermissionOverride.role_id == self.role_id,
-                        RolePermissionOverride.is_active == True
-                    )
-                    .all()
-                )
-                codenames.update(ov.permission.codename for ov in overrides)
-
-            # 3. Permisos directos del usuario (activos y no vencidos)
-            now = now_local()
-            direct_q = (
-                db.session.query(UserPermission)
-                .join(UserPermission.permission)
-                .filter(
-                    UserPermission.user_id == self.id,
-                    UserPermission.is_active == True,
-                    db.or_(
-                        UserPermission.expires_at == None,
-                        UserPermission.expires_at > now
-                    ),
-                )
-            )
-            if program_id is not None:
-                direct_q = direct_q.filter(
-                    db.or_(
-                        UserPermission.program_id == None,
-                        UserPermission.program_id == program_id
-                    )
-                )
-            codenames.update(up.permission.codename for up in direct_q.all())
-
-            setattr(g, cache_key, codenames)
+            setattr(g, cache_key, permission_cache.effective_codenames(self, program_id))
 
         return codename in getattr(g, cache_key)
     
@@ -227,28 +179,10 @@ class User(db.Model, UserMixin):
         if self.has_permission('academic_periods.api.create'):
             return None
 
-        pids = set()
-        for p in self.coordinated_programs:
-            pids.add(p.id)
-
-        from app.models.user_permission import UserPermission
-        from app.utils.datetime_utils import now_local
-        now = now_local()
-        delegated = (
-            db.session.query(UserPermission)
-            .filter(
-                UserPermission.user_id == self.id,
-                UserPermission.is_active == True,
-                UserPermission.program_id.isnot(None),
-                db.or_(
-                    UserPermission.expires_at == None,
-                    UserPermission.expires_at > now
-                ),
-            )
-            .all()
-        )
-        for up in delegated:
-            pids.add(up.program_id)
+        pids = set(permission_cache.coordinated_program_ids(self.id))
+        for _codename, program_id in permission_cache.user_grants(self.id):
+            if program_id is not None:
+                pids.add(program_id)
 
         return pids
 
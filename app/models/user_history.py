@@ -1,6 +1,7 @@
 # app/models/user_history.py
 from app import db
 from datetime import datetime, timezone
+from sqlalchemy.dialects.postgresql import JSONB
 from app.utils.datetime_utils import now_local
 
 class UserHistory(db.Model):
@@ -15,7 +16,22 @@ class UserHistory(db.Model):
     action = db.Column(db.String(50), nullable=False)
     details = db.Column(db.Text, nullable=True)
     timestamp = db.Column(db.DateTime, default=now_local, nullable=False)
-    
+
+    # Detalles estructurados (mismo contenido que `details` cuando es un dict)
+    details_json = db.Column(db.JSON().with_variant(JSONB(), 'postgresql'), nullable=True)
+
+    # Usuario SOBRE el que se hizo la acción (student_id / affected_user_id /
+    # deleted_user_id de los detalles). Sin FK: el registro debe sobrevivir
+    # a la eliminación del usuario.
+    subject_user_id = db.Column(db.Integer, nullable=True)
+
+    __table_args__ = (
+        # Historial de un usuario ordenado por fecha
+        db.Index('ix_user_history_user_timestamp', 'user_id', 'timestamp'),
+        # Acciones realizadas sobre un usuario (get_actions_on_user)
+        db.Index('ix_user_history_subject_timestamp', 'subject_user_id', 'timestamp'),
+    )
+
     # Relaciones
     user = db.relationship('User', foreign_keys=[user_id], overlaps="histories")
     admin = db.relationship('User', foreign_keys=[admin_id])
@@ -29,6 +45,7 @@ class UserHistory(db.Model):
             'action': self.action,
             'action_label': self.get_action_label(),
             'details': self.details,
+            'subject_user_id': self.subject_user_id,
             'timestamp': self.timestamp.isoformat()
         }
     
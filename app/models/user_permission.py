@@ -30,6 +30,8 @@ class UserPermission(db.Model):
             'user_id', 'permission_id', 'program_id',
             name='uq_user_permission_active'
         ),
+        # Compilación de delegaciones activas por usuario (permission_cache)
+        db.Index('ix_user_permission_user_active', 'user_id', 'is_active', 'program_id'),
     )
 
     # Relationships
@@ -2,6 +2,9 @@ from app import db
 from datetime import datetime
 from app.utils.datetime_utils import now_local
 
+_UNSET = object()
+
+
 class UserProgram(db.Model):
     """
     Modelo que representa la relacion entre un usuario y un programa.
@@ -50,6 +53,11 @@ class UserProgram(db.Model):
     # Beca CONACyT — True si el estudiante es becario activo (Módulo C, Permanencia)
     has_conacyt_scholarship = db.Column(db.Boolean, default=False, nullable=False)
 
+    # Listados por programa filtrados por estado de admisión
+    __table_args__ = (
+        db.Index('ix_user_program_program_status', 'program_id', 'admission_status'),
+    )
+
     # Relaciones
     user = db.relationship('User', foreign_keys=[user_id], back_populates='user_program')
     program = db.relationship('Program', back_populates='user_program')
@@ -59,16 +67,22 @@ class UserProgram(db.Model):
     semester_enrollments = db.relationship('SemesterEnrollment', back_populates='user_program', lazy='dynamic', order_by='SemesterEnrollment.semester_number')
     enrollment_deferrals = db.relationship('EnrollmentDeferral', back_populates='user_program', lazy='dynamic', order_by='EnrollmentDeferral.deferral_number')
     
-    def to_dict(self, include_deliberation=False):
+    def to_dict(self, include_deliberation=False, last_semester_number=_UNSET):
         # Derivar current_semester del ultimo SemesterEnrollment confirmado.
         # Si no existen registros aun (pre-Fase 6), se usa el valor en columna
         # (= 1, asignado al momento de la transicion a estudiante).
-        from app.models.semester_enrollment import SemesterEnrollment
-        last_se = (SemesterEnrollment.query
-                   .filter_by(user_program_id=self.id)
-                   .order_by(SemesterEnrollment.semester_number.desc())
-                   .first())
-        current_sem = last_se.semester_number if last_se else self.current_semester
+        # last_semester_number permite pasarlo precalculado (listados masivos);
+        # None = sin SemesterEnrollment.
+        if last_semester_number is not _UNSET:
+            current_sem = (last_semester_number if last_semester_number is not None
+                           else self.current_semester)
+        else:
+            from app.models.semester_enrollment import SemesterEnrollment
+            last_se = (SemesterEnrollment.query
+                       .filter_by(user_program_id=self.id)
+                       .order_by(SemesterEnrollment.semester_number.desc())
+                       .first())
+            current_sem = last_se.semester_number if last_se else self.current_semester
 
         data = {
             'id': self.id,
@@ -21,13 +21,35 @@ api_acceptance = Blueprint(
 @login_required
 @permission_required('acceptance.api.list_applicants', program_id_kwarg='program_id')
 def api_get_accepted_applicants(program_id):
-    """Obtiene aspirantes aceptados con estado de sus documentos."""
+    """
+    Obtiene aspirantes aceptados con estado de sus documentos.
+    Filtro opcional: tab (pending_docs, receipt_submitted, completed).
+    Paginación opcional: page, per_page (max 200). Sin `page` se devuelve
+    la lista completa.
+    """
+    tab = request.args.get('tab')
+    if tab and tab not in svc.ACCEPTANCE_TABS:
+        return jsonify({
+            "data": None,
+            "error": {"code": "INVALID_TAB", "message": f"tab debe ser uno de {', '.join(svc.ACCEPTANCE_TABS)}"},
+            "meta": {}
+        }), 400
+    page = request.args.get('page', type=int)
+    per_page = min(max(request.args.get('per_page', 50, type=int), 1), 200)
+
     try:
-        data = svc.get_accepted_applicants(program_id)
+        data, total = svc.get_accepted_applicants(program_id, tab=tab, page=page, per_page=per_page)
+        meta = {"count": len(data), "total": total}
+        if page:
+            meta.update({
+                "page": page,
+                "per_page": per_page,
+                "pages": (total + per_page - 1) // per_page,
+            })
         return jsonify({
             "data": data,
             "error": None,
-            "meta": {"count": len(data)}
+            "meta": meta
         }), 200
 
     except Exception as e:
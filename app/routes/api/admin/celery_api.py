@@ -137,6 +137,7 @@ _RUNNABLE_TASKS = {
     'check_deferral_expirations':       'app.tasks.maintenance.check_deferral_expirations',
     'notify_pending_permanence_docs':   'app.tasks.maintenance.notify_pending_permanence_docs',
     'send_bulk_notification_by_filter': 'app.tasks.notifications.send_bulk_notification_by_filter',
+    'generate_documents_batch':         'app.tasks.documents.generate_documents_batch',
 }
 
 
@@ -4,8 +4,11 @@ API de limpieza de datos — endpoints de preview para el panel de administraci
 
 La ejecución real de limpieza se delega a los Celery tasks en maintenance.py.
 Estos endpoints sólo permiten previsualizar candidatos antes de ejecutar.
+
+Paginación opcional en los listados: page, per_page (max 200). Sin `page`
+se devuelve la lista completa; `total` siempre es el total de candidatos.
 """
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from flask_login import login_required
 from app.utils.permissions import permission_required
 
@@ -23,6 +26,12 @@ def _err(msg, code=400):
     return jsonify({'ok': False, 'error': msg}), code
 
 
+def _page_args():
+    page = request.args.get('page', type=int)
+    per_page = min(max(request.args.get('per_page', 50, type=int), 1), 200)
+    return page, per_page
+
+
 @api_cleanup.get('/expired-candidates')
 @login_required
 @permission_required('admin_cleanup.api.expired_candidates')
@@ -35,8 +44,9 @@ def get_expired_candidates():
     """
     try:
         from app.services.data_cleanup_service import DataCleanupService
-        candidates = DataCleanupService.get_expired_candidates()
-        return _ok(candidates, total=len(candidates))
+        page, per_page = _page_args()
+        candidates, total = DataCleanupService.get_expired_candidates(page=page, per_page=per_page)
+        return _ok(candidates, total=total)
     except Exception as e:
         return _err(str(e), 500)
 
@@ -53,7 +63,8 @@ def get_inactive_students():
     """
     try:
         from app.services.data_cleanup_service import DataCleanupService
-        students = DataCleanupService.get_inactive_students()
-        return _ok(students, total=len(students))
+        page, per_page = _page_args()
+        students, total = DataCleanupService.get_inactive_students(page=page, per_page=per_page)
+        return _ok(students, total=total)
     except Exception as e:
         return _err(str(e), 500)
@@ -3,11 +3,35 @@ from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 from app.utils.permissions import permission_required
 from app.services.user_history_service import UserHistoryService
-from app.services.history_retention_service import HistoryRetentionService
+from app.services.history_retention_service import DELETE_CHUNK_SIZE, HistoryRetentionService
 from app.utils.history_formatter import HistoryFormatter
+from app.utils.task_results import get_task_result
 
 api_admin_history = Blueprint('api_admin_history', __name__, url_prefix='/api/v1/admin/history')
 
+# A partir de cuántos registros a eliminar la limpieza corre en Celery
+# (202 + task_id) en lugar de dentro del request. El cliente puede forzarlo
+# con "async".
+ASYNC_THRESHOLD = 20000
+
+# Límites para el chunk_size que manda el cliente (filas por DELETE/commit)
+MIN_CHUNK_SIZE = 100
+MAX_CHUNK_SIZE = 50000
+
+
+def _chunk_size_arg(data):
+    """chunk_size del body acotado a [MIN_CHUNK_SIZE, MAX_CHUNK_SIZE]; None si no es entero."""
+    value = data.get('chunk_size')
+    if value is None or value == '':
+        return DELETE_CHUNK_SIZE
+    if isinstance(value, bool):
+        return None
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return min(max(value, MIN_CHUNK_SIZE), MAX_CHUNK_SIZE)
+
 @api_admin_history.route('/statistics', methods=['GET'])
 @login_required
 @permission_required('admin_history.api.statistics')
@@ -64,10 +88,42 @@ def execute_cleanup():
             "error": "Debe confirmar la operación con 'confirm': true"
         }), 400
     
+    archive = bool(data.get('archive', False))
+    chunk_size = _chunk_size_arg(data)
+    if chunk_size is None:
+        return jsonify({
+            "ok": False,
+            "error": "'chunk_size' debe ser un número entero"
+        }), 400
+
     try:
+        run_async = data.get('async')
+        if run_async is None:
+            preview = HistoryRetentionService.cleanup_old_history(
+                dry_run=True,
+                retention_config=retention_config
+            )
+            run_async = preview['entries_to_delete'] >= ASYNC_THRESHOLD
+
+        if run_async:
+            from app.tasks.maintenance import cleanup_user_history
+            task = cleanup_user_history.apply_async(kwargs={
+                'retention_config': retention_config,
+                'archive': archive,
+                'chunk_size': chunk_size,
+            })
+            return jsonify({
+                "ok": True,
+                "task_id": task.id,
+                "status_url": f'/api/v1/admin/history/cleanup/tasks/{task.id}',
+                "message": "Limpieza en segundo plano. Consulte el progreso con status_url."
+            }), 202
+
         cleanup_stats = HistoryRetentionService.cleanup_old_history(
             dry_run=False,
-            retention_config=retention_config
+            retention_config=retention_config,
+            chunk_size=chunk_size,
+            archive=archive
         )
         return jsonify({
             "ok": True,
@@ -82,6 +138,38 @@ def execute_cleanup():
             "error": str(e)
         }), 500
 
+@api_admin_history.route('/cleanup/tasks/<task_id>', methods=['GET'])
+@login_required
+@permission_required('admin_history.api.cleanup_execute')
+def cleanup_task_status(task_id):
+    """Estado de una limpieza asíncrona (cleanup_user_history)"""
+    from app.tasks.maintenance import cleanup_user_history
+
+    try:
+        result = get_task_result(task_id, cleanup_user_history)
+        if result is None:
+            return jsonify({
+                "ok": False,
+                "error": "Tarea no encontrada"
+            }), 404
+        state = result.state
+        payload = {"ok": True, "task_id": task_id, "state": state, "progress": None, "cleanup_results": None}
+
+        if state == 'PROGRESS':
+            payload["progress"] = result.info or {}
+        elif state == 'SUCCESS':
+            payload["cleanup_results"] = result.result
+        elif state == 'FAILURE':
+            payload["ok"] = False
+            payload["error"] = str(result.result)
+
+        return jsonify(payload), 200
+    except Exception as e:
+        return jsonify({
+            "ok": False,
+            "error": str(e)
+        }), 500
+
 @api_admin_history.route('/actions/critical', methods=['GET'])
 @login_required
 @permission_required('admin_history.api.critical_actions')
@@ -3,29 +3,46 @@
 API REST para respaldo ZIP previo a purga física de archivos.
 
 Endpoints:
-  GET    /api/v1/admin/purge/candidates?category=...
+  GET    /api/v1/admin/purge/candidates?category=...[&page=&per_page=]
   POST   /api/v1/admin/purge/start
+  GET    /api/v1/admin/purge/tasks/<task_id>
   GET    /api/v1/admin/purge/<run_id>/archive.zip
   POST   /api/v1/admin/purge/<run_id>/confirm
   POST   /api/v1/admin/purge/<run_id>/cancel
   GET    /api/v1/admin/purge/runs
+  GET    /api/v1/admin/purge/storage-report
 
 Permisos:
-  admin.api.purge_view     — listar candidatos y runs
+  admin.api.purge_view     — listar candidatos, runs y reporte de almacenamiento
   admin.api.purge_archive  — crear/descargar/cancelar
   admin.api.purge_confirm  — confirmar purga física
 """
 
 from pathlib import Path
 
-from flask import Blueprint, jsonify, request, send_file, after_this_request
+from flask import Blueprint, jsonify, request, after_this_request
 from flask_login import login_required, current_user
 
+from app.utils.files import send_stored_file
 from app.utils.permissions import permission_required
+from app.utils.task_results import get_task_result
+from app.services import file_inventory_service
 import app.services.applicant_archive_service as svc
 
 api_purge = Blueprint('api_purge', __name__, url_prefix='/api/v1/admin/purge')
 
+# A partir de cuántos UserProgram el ZIP se genera en Celery (202 + task_id)
+# en lugar de dentro del request. El cliente puede forzarlo con "async".
+ASYNC_THRESHOLD = 50
+
+
+def _run_links(run_id):
+    return {
+        "archive_url": f'/api/v1/admin/purge/{run_id}/archive.zip',
+        "confirm_url": f'/api/v1/admin/purge/{run_id}/confirm',
+        "cancel_url": f'/api/v1/admin/purge/{run_id}/cancel',
+    }
+
 
 # ---------------------------------------------------------------------------
 # GET /candidates
@@ -35,7 +52,13 @@ api_purge = Blueprint('api_purge', __name__, url_prefix='/api/v1/admin/purge')
 @login_required
 @permission_required('admin.api.purge_view')
 def list_candidates():
+    """
+    Candidatos a purga de una categoría. Paginación opcional: page,
+    per_page (max 200). Sin `page` se devuelve la lista completa.
+    """
     category = request.args.get('category', type=str)
+    page = request.args.get('page', type=int)
+    per_page = min(max(request.args.get('per_page', 50, type=int), 1), 200)
     if not category:
         return jsonify({
             "data": None,
@@ -43,11 +66,18 @@ def list_candidates():
             "meta": {}
         }), 400
     try:
-        items = svc.list_candidates(category)
+        items, total = svc.list_candidates_page(category, page=page, per_page=per_page)
+        meta = {"count": len(items), "total": total, "category": category}
+        if page:
+            meta.update({
+                "page": page,
+                "per_page": per_page,
+                "pages": (total + per_page - 1) // per_page,
+            })
         return jsonify({
             "data": items,
             "error": None,
-            "meta": {"count": len(items), "category": category}
+            "meta": meta
         }), 200
     except svc.InvalidPurgeType as e:
         return jsonify({
@@ -63,6 +93,33 @@ def list_candidates():
         }), 500
 
 
+# ---------------------------------------------------------------------------
+# GET /storage-report
+# ---------------------------------------------------------------------------
+
+@api_purge.get('/storage-report')
+@login_required
+@permission_required('admin.api.purge_view')
+def storage_report():
+    try:
+        rows = file_inventory_service.storage_report()
+        return jsonify({
+            "data": rows,
+            "error": None,
+            "meta": {
+                "files": sum(r['files'] for r in rows),
+                "bytes": sum(r['bytes'] for r in rows),
+                "pending": sum(r['pending'] for r in rows),
+            }
+        }), 200
+    except Exception as e:
+        return jsonify({
+            "data": None,
+            "error": {"code": "SERVER_ERROR", "message": str(e)},
+            "meta": {}
+        }), 500
+
+
 # ---------------------------------------------------------------------------
 # POST /start
 # ---------------------------------------------------------------------------
@@ -89,6 +146,45 @@ def start_purge_run():
             "meta": {}
         }), 400
 
+    run_async = body.get('async')
+    if run_async is None:
+        run_async = len(user_program_ids) >= ASYNC_THRESHOLD
+
+    if run_async:
+        if purge_type not in svc.PURGE_TYPES:
+            return jsonify({
+                "data": None,
+                "error": {"code": "INVALID_PURGE_TYPE", "message": f'purge_type inválido: {purge_type}'},
+                "meta": {}
+            }), 400
+        try:
+            from app.tasks.purge import build_purge_run
+            task = build_purge_run.apply_async(kwargs={
+                'user_program_ids': user_program_ids,
+                'purge_type': purge_type,
+                'initiated_by_id': current_user.id,
+                'notes': notes,
+            })
+        except Exception as e:
+            return jsonify({
+                "data": None,
+                "flash": [{"level": "danger", "message": "No se pudo encolar la generación del respaldo"}],
+                "error": {"code": "QUEUE_ERROR", "message": str(e)},
+                "meta": {}
+            }), 503
+        return jsonify({
+            "data": {
+                "task_id": task.id,
+                "status_url": f'/api/v1/admin/purge/tasks/{task.id}',
+            },
+            "flash": [{
+                "level": "info",
+                "message": "Generando respaldo en segundo plano. Esto puede tardar unos minutos."
+            }],
+            "error": None,
+            "meta": {"item_count": len(user_program_ids)}
+        }), 202
+
     try:
         run = svc.create_purge_run(
             user_program_ids=user_program_ids,
@@ -99,9 +195,7 @@ def start_purge_run():
         return jsonify({
             "data": {
                 "run": run.to_dict(),
-                "archive_url": f'/api/v1/admin/purge/{run.run_id}/archive.zip',
-                "confirm_url": f'/api/v1/admin/purge/{run.run_id}/confirm',
-                "cancel_url": f'/api/v1/admin/purge/{run.run_id}/cancel',
+                **_run_links(run.run_id),
             },
             "flash": [{
                 "level": "success",
@@ -135,6 +229,57 @@ def start_purge_run():
         }), 500
 
 
+# ---------------------------------------------------------------------------
+# GET /tasks/<task_id>
+# ---------------------------------------------------------------------------
+
+@api_purge.get('/tasks/<task_id>')
+@login_required
+@permission_required('admin.api.purge_archive')
+def purge_task_status(task_id):
+    """Estado de una generación asíncrona (build_purge_run)."""
+    from app.tasks.purge import build_purge_run
+
+    try:
+        result = get_task_result(task_id, build_purge_run)
+        if result is None:
+            return jsonify({
+                "data": None,
+                "error": {"code": "NOT_FOUND", "message": "Tarea no encontrada"},
+                "meta": {}
+            }), 404
+        state = result.state
+        data = {"task_id": task_id, "state": state, "progress": None, "run": None}
+
+        if state == 'PROGRESS':
+            data["progress"] = result.info or {}
+        elif state == 'SUCCESS':
+            run = svc.get_run((result.result or {}).get('run_id'))
+            data["run"] = run.to_dict()
+            data.update(_run_links(run.run_id))
+        elif state == 'FAILURE':
+            return jsonify({
+                "data": data,
+                "flash": [{"level": "danger", "message": "Error al generar respaldo"}],
+                "error": {"code": "TASK_FAILED", "message": str(result.result)},
+                "meta": {}
+            }), 200
+
+        return jsonify({"data": data, "error": None, "meta": {}}), 200
+    except svc.PurgeRunNotFound as e:
+        return jsonify({
+            "data": None,
+            "error": {"code": "NOT_FOUND", "message": str(e)},
+            "meta": {}
+        }), 404
+    except Exception as e:
+        return jsonify({
+            "data": None,
+            "error": {"code": "SERVER_ERROR", "message": str(e)},
+            "meta": {}
+        }), 500
+
+
 # ---------------------------------------------------------------------------
 # GET /<run_id>/archive.zip
 # ---------------------------------------------------------------------------
@@ -167,6 +312,8 @@ def download_archive(run_id):
             "meta": {}
         }), 400
 
+    # Con X-Accel-Redirect la respuesta de Flask va vacía y se cierra al
+    # entregarla a nginx: el callback marca la descarga en ese momento.
     @after_this_request
     def _mark_downloaded(response):
         try:
@@ -175,13 +322,12 @@ def download_archive(run_id):
             pass
         return response
 
-    return send_file(
+    return send_stored_file(
         path,
         mimetype='application/zip',
         as_attachment=True,
         download_name=f'purge_{run_id}.zip',
         max_age=0,
-        conditional=True,
     )
 
 
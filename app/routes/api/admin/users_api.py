@@ -9,6 +9,7 @@ from app.models.user_program import UserProgram
 from app.services.user_history_service import UserHistoryService
 from app.utils.permissions import permission_required
 from werkzeug.security import generate_password_hash
+from app.utils.offload import offload_cpu
 from app.utils.datetime_utils import now_local
 import json
 import re
@@ -236,7 +237,7 @@ def reset_password(user_id):
         }), 403
     
     # Resetear contraseña
-    user.password = generate_password_hash('tecno#2K')
+    user.password = offload_cpu(generate_password_hash, 'tecno#2K', label='password_hash')
     user.must_change_password = True
     
     # Registrar en historial
@@ -3,6 +3,7 @@ from flask import Blueprint, request, jsonify, session, redirect, url_for
 from flask_login import login_user, logout_user, login_required, current_user
 from datetime import datetime, timezone
 from werkzeug.security import check_password_hash, generate_password_hash
+from app.utils.offload import offload_cpu
 from app.models.user import User
 from app.services.user_history_service import UserHistoryService
 from app.utils.csrf import generate_csrf_token
@@ -54,7 +55,7 @@ def api_login():
     
     user = User.query.filter_by(username=username).first()
     
-    if not user or not check_password_hash(user.password, password):
+    if not user or not offload_cpu(check_password_hash, user.password, password, label='password_check'):
         return jsonify({
             "data": None, 
             "error": {
@@ -128,7 +129,7 @@ def change_password():
         }), 400
     
     # Validación 2: Contraseña actual correcta
-    if not check_password_hash(current_user.password, current_password):
+    if not offload_cpu(check_password_hash, current_user.password, current_password, label='password_check'):
         return jsonify({
             "data": None,
             "flash": [{
@@ -189,7 +190,7 @@ def change_password():
         }), 400
     
     # Validación 6: Nueva contraseña diferente a la actual
-    if check_password_hash(current_user.password, new_password):
+    if offload_cpu(check_password_hash, current_user.password, new_password, label='password_check'):
         return jsonify({
             "data": None,
             "flash": [{
@@ -204,7 +205,7 @@ def change_password():
         }), 400
     
     # Todo OK, cambiar contraseña
-    current_user.password = generate_password_hash(new_password)
+    current_user.password = offload_cpu(generate_password_hash, new_password, label='password_hash')
     current_user.must_change_password = False  # Ya cambió su contraseña
     db.session.commit()
     
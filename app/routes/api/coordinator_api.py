@@ -1,12 +1,12 @@
 # app/routes/api/coordinator_api.py
 from flask import Blueprint, request, jsonify, current_app
 from flask_login import login_required, current_user
-from sqlalchemy import select, and_, or_, func
+from sqlalchemy import select, and_, or_, func, case, false
 from datetime import datetime, timezone
 
 from app import db
 from app.utils.permissions import permission_required, any_permission_required
-from app.utils.files import save_user_doc  # Importar tu función de archivos
+from app.utils.files import record_file_inventory, save_user_doc  # Importar tu función de archivos
 from app.services.user_history_service import UserHistoryService
 from app.utils.history_formatter import HistoryFormatter
 from app.models.user import User
@@ -21,7 +21,9 @@ from app.models.program_step import ProgramStep
 from app.models.appointment import Appointment
 from app.models.semester_enrollment import SemesterEnrollment
 from app.models.academic_period import AcademicPeriod
-from app.services.admission_service import get_admission_state
+from app.models.extension_request import ExtensionRequest
+from app.utils.datetime_utils import now_local
+from app.services.admission_service import get_admission_state, get_admission_states_bulk
 
 api_coordinator = Blueprint('api_coordinator', __name__, url_prefix='/api/v1/coordinator')
 
@@ -32,12 +34,18 @@ def list_students():
     """
     Lista estudiantes que el coordinador puede ver/gestionar.
     Filtros: program_id, phase, status, search, show_other
+    Paginación opcional: page, per_page (max 200). Sin `page` se devuelve
+    la lista completa (compatibilidad con las vistas que la consumen entera).
+    `status` se resuelve en SQL (ver _overall_status_filter), así que solo
+    phase=permanence/conclusion obliga a evaluar filas en Python.
     """
     program_id = request.args.get('program_id', type=int)
     phase = request.args.get('phase')  # admission, permanence, conclusion
     status = request.args.get('status')  # pending, review, approved, rejected
     search = request.args.get('search', '').strip()
     show_other = request.args.get('show_other') == 'true'
+    page = request.args.get('page', type=int)
+    per_page = min(max(request.args.get('per_page', 50, type=int), 1), 200)
     
     # Base query: usuarios con programas (aspirantes y estudiantes ya inscritos)
     query = db.session.query(User, UserProgram, Program).join(
@@ -56,7 +64,7 @@ def list_students():
     if managed_programs is not None:
         if not show_other:
             if not managed_programs:
-                return jsonify({"students": []}), 200
+                return jsonify({"students": [], "meta": _students_meta(0, page, per_page)}), 200
             query = query.filter(Program.id.in_(managed_programs))
     
     # Filtros adicionales
@@ -72,18 +80,49 @@ def list_students():
                 User.email.ilike(search_term)
             )
         )
-    
-    results = query.all()
-    students = []
+
+    # La fase depende de admission_status: 'admission' se resuelve en SQL,
+    # permanence/conclusion solo necesitan distinguir por semestres completados.
+    if phase == 'admission':
+        query = query.filter(UserProgram.admission_status != 'enrolled')
+    elif phase in ('permanence', 'conclusion'):
+        query = query.filter(UserProgram.admission_status == 'enrolled')
+
+    if status:
+        query = query.filter(_overall_status_filter(status))
+
+    query = query.order_by(User.last_name, User.first_name, UserProgram.id)
+
+    # Si todos los filtros se resolvieron en SQL, se pagina en la BD y solo
+    # se evalúa el estado de la página pedida.
+    needs_row_filter = phase in ('permanence', 'conclusion')
+    if page and not needs_row_filter:
+        total = query.order_by(None).count()
+        results = query.offset((page - 1) * per_page).limit(per_page).all()
+    else:
+        results = query.all()
+        total = None
 
     active_period = AcademicPeriod.get_active_period()
     active_period_id = active_period.id if active_period else None
 
+    admission_states = get_admission_states_bulk(
+        (user.id, program.id, user_program) for user, user_program, program in results
+    )
+    completed_by_up, current_by_up = _prefetch_permanence(
+        [user_program.id for _u, user_program, _p in results], active_period_id
+    )
+
+    students = []
     for user, user_program, program in results:
         # Calcular estado actual del estudiante
-        admission_state = get_admission_state(user.id, program.id, user_program)
+        admission_state = admission_states[(user.id, program.id)]
         # Métricas de permanencia basadas en SemesterEnrollment + duración del programa
-        perm = _compute_permanence_metrics(user_program, program, active_period_id)
+        perm = _compute_permanence_metrics(
+            user_program, program, active_period_id,
+            completed=completed_by_up.get(user_program.id, 0),
+            current_enrollment=current_by_up.get(user_program.id),
+        )
         # Determinar fase actual basada en estado
         current_phase = _determine_current_phase(admission_state, user_program, perm)
         
@@ -131,13 +170,25 @@ def list_students():
             "conclusion_status": "pending"
         }
         
-        # Filtro por status
-        if status and student_data["overall_status"] != status:
-            continue
-            
         students.append(student_data)
+
+    if total is None:
+        total = len(students)
+        if page:
+            students = students[(page - 1) * per_page: page * per_page]
     
-    return jsonify({"students": students}), 200
+    return jsonify({"students": students, "meta": _students_meta(total, page, per_page)}), 200
+
+
+def _students_meta(total, page, per_page):
+    if not page:
+        return {"total": total}
+    return {
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "pages": (total + per_page - 1) // per_page,
+    }
 
 @api_coordinator.route('/manageable-students', methods=['GET'])
 @login_required
@@ -324,6 +375,8 @@ def upload_for_student():
 
         # Marcar reviewer_id si la decisión es revisar (no solo subir)
         submission.reviewer_id = current_user.id
+        if file_relative_path:
+            record_file_inventory(submission, file_relative_path)
 
         db.session.add(submission)
         db.session.commit()
@@ -700,10 +753,50 @@ def _get_missing_documents(documents_by_step):
     return missing
 # ==================== FUNCIONES AUXILIARES ====================
 
-def _compute_permanence_metrics(user_program, program, active_period_id):
+def _prefetch_permanence(user_program_ids, active_period_id):
+    """
+    Carga en dos queries los datos de permanencia de muchos UserProgram.
+
+    Returns:
+      (completed_by_up, current_by_up):
+        - completed_by_up: user_program_id → # de SemesterEnrollment 'completed'
+        - current_by_up:   user_program_id → SemesterEnrollment del periodo activo
+    """
+    if not user_program_ids:
+        return {}, {}
+    completed_by_up = dict(
+        db.session.query(SemesterEnrollment.user_program_id, func.count(SemesterEnrollment.id))
+        .filter(
+            SemesterEnrollment.user_program_id.in_(user_program_ids),
+            SemesterEnrollment.status == 'completed',
+        )
+        .group_by(SemesterEnrollment.user_program_id)
+        .all()
+    )
+    current_by_up = {}
+    if active_period_id is not None:
+        for se in (SemesterEnrollment.query
+                   .filter(
+                       SemesterEnrollment.user_program_id.in_(user_program_ids),
+                       SemesterEnrollment.academic_period_id == active_period_id,
+                   )
+                   .order_by(SemesterEnrollment.id)
+                   .all()):
+            current_by_up.setdefault(se.user_program_id, se)
+    return completed_by_up, current_by_up
+
+
+_UNSET = object()
+
+
+def _compute_permanence_metrics(user_program, program, active_period_id,
+                                completed=None, current_enrollment=_UNSET):
     """
     Calcula métricas reales de permanencia para un UserProgram.
 
+    `completed` y `current_enrollment` pueden venir precargados
+    (ver _prefetch_permanence) para evitar queries por fila en listados.
+
     Returns dict con:
       - current_semester: número de semestre actual del UserProgram
       - completed_semesters: cantidad de SemesterEnrollment con status='completed'
@@ -717,21 +810,23 @@ def _compute_permanence_metrics(user_program, program, active_period_id):
     total = max(int(program.duration_semesters or 4), 1)
     current_semester = user_program.current_semester or 1
 
-    completed = (
-        SemesterEnrollment.query
-        .filter_by(user_program_id=user_program.id, status='completed')
-        .count()
-    )
+    if completed is None:
+        completed = (
+            SemesterEnrollment.query
+            .filter_by(user_program_id=user_program.id, status='completed')
+            .count()
+        )
     completed = min(completed, total)
 
     # Enrollment del periodo activo (si existe) define el estado funcional + segmento parpadeante
-    current_enrollment = None
-    if active_period_id is not None:
-        current_enrollment = (
-            SemesterEnrollment.query
-            .filter_by(user_program_id=user_program.id, academic_period_id=active_period_id)
-            .first()
-        )
+    if current_enrollment is _UNSET:
+        current_enrollment = None
+        if active_period_id is not None:
+            current_enrollment = (
+                SemesterEnrollment.query
+                .filter_by(user_program_id=user_program.id, academic_period_id=active_period_id)
+                .first()
+            )
 
     if current_enrollment is not None:
         academic_status = current_enrollment.status
@@ -785,6 +880,83 @@ def _determine_overall_status(admission_state):
     return "pending"
 
 
+# Prioridad de cada estado en _determine_overall_status (mayor gana);
+# 'extended' no decide el estado general
+_OVERALL_STATUS_RANK = {'rejected': 4, 'review': 3, 'pending': 2, 'approved': 1}
+
+
+def _overall_status_filter(status):
+    """
+    Condición SQL equivalente a `_determine_overall_status(...) == status`,
+    correlacionada con UserProgram para filtrar antes de paginar y contar.
+
+    Mismo criterio que status_count en admission_service: por cada archive
+    de admisión que cuenta para el progreso (secuencia ≠ 0), 'extended' si
+    la extensión del archive (la más antigua) está vigente; si no, el estado
+    de la última submission, o 'pending' si no hay. El estado general es el
+    de mayor prioridad (rejected > review > pending > approved) y 'pending'
+    si no hay ninguno.
+    """
+    now = now_local().replace(tzinfo=None)
+    progress = (
+        select(ProgramStep.program_id, Archive.id.label('archive_id'))
+        .join(Step, Step.id == ProgramStep.step_id)
+        .join(Phase, Phase.id == Step.phase_id)
+        .join(Archive, Archive.step_id == Step.id)
+        .where(
+            Phase.name == 'admission',
+            or_(ProgramStep.sequence.is_(None), ProgramStep.sequence != 0),
+        )
+        .subquery()
+    )
+    submission_status = (
+        select(Submission.status)
+        .where(
+            Submission.user_id == UserProgram.user_id,
+            Submission.archive_id == progress.c.archive_id,
+        )
+        .order_by(Submission.id.desc())
+        .limit(1)
+        .correlate_except(Submission)
+        .scalar_subquery()
+    )
+    extension_active = (
+        select(case(
+            (and_(ExtensionRequest.status == 'granted',
+                  ExtensionRequest.granted_until > now), 1),
+            else_=0,
+        ))
+        .where(
+            ExtensionRequest.user_id == UserProgram.user_id,
+            ExtensionRequest.archive_id == progress.c.archive_id,
+        )
+        .order_by(ExtensionRequest.created_at.asc())
+        .limit(1)
+        .correlate_except(ExtensionRequest)
+        .scalar_subquery()
+    )
+    rank = case(
+        (extension_active == 1, 0),
+        else_=case(
+            _OVERALL_STATUS_RANK,
+            value=func.coalesce(submission_status, 'pending'),
+            else_=0,
+        ),
+    )
+    overall_rank = func.coalesce(
+        select(func.max(rank))
+        .where(progress.c.program_id == UserProgram.program_id)
+        .correlate(UserProgram)
+        .scalar_subquery(),
+        0,
+    )
+    if status == 'pending':
+        return overall_rank.in_((0, _OVERALL_STATUS_RANK['pending']))
+    if status in _OVERALL_STATUS_RANK:
+        return overall_rank == _OVERALL_STATUS_RANK[status]
+    return false()
+
+
 @api_coordinator.route('/students/<int:student_id>/history', methods=['GET'])
 @login_required
 @permission_required('coordinator.api.list_students')
@@ -792,6 +964,9 @@ def get_student_history(student_id):
     """
     Obtiene el historial formateado de un estudiante específico.
     Solo coordinadores y administradores pueden ver el historial de estudiantes.
+
+    Incluye las acciones del estudiante y las realizadas sobre él. Paginación
+    por cursor: `before` = meta.next_cursor de la página anterior.
     """
     try:
         # Verificar que el estudiante existe y el coordinador tiene acceso
@@ -815,13 +990,20 @@ def get_student_history(student_id):
         # Parámetros de consulta
         format_type = request.args.get('format', 'formatted')
         limit = min(int(request.args.get('limit', 50)), 100)
+        before = request.args.get('before') or None
         
         # Obtener el historial del estudiante
-        history_entries = UserHistoryService.get_user_history(
-            user_id=student_id,
-            limit=limit,
-            order_by='desc'
-        )
+        try:
+            history_entries = UserHistoryService.get_actions_on_user(
+                student_id,
+                limit=limit,
+                before=before
+            )
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
         
         # Formatear las entradas si se solicita
         formatted_history = []
@@ -830,10 +1012,11 @@ def get_student_history(student_id):
         for entry in history_entries:
             entry_dict = entry.to_dict()
             
-            # Agregar información del coordinador que realizó la acción
-            if entry.performed_by_id:
-                entry_dict['performed_by_name'] = f"{entry.performed_by.first_name} {entry.performed_by.last_name}"
-                entry_dict['performed_by_role'] = entry.performed_by.role.name if entry.performed_by.role else None
+            # Agregar información de quien realizó la acción
+            performer = entry.admin or entry.user
+            if performer:
+                entry_dict['performed_by_name'] = f"{performer.first_name} {performer.last_name}"
+                entry_dict['performed_by_role'] = performer.role.name if performer.role else None
             
             # Agregar descripción formateada si se solicita
             if format_type == 'formatted':
@@ -857,7 +1040,11 @@ def get_student_history(student_id):
             'meta': {
                 'viewed_by': current_user.id,
                 'ordered_by': 'timestamp_desc',
-                'limit_applied': limit
+                'limit_applied': limit,
+                'next_cursor': (
+                    UserHistoryService.encode_cursor(history_entries[-1])
+                    if len(history_entries) == limit else None
+                )
             }
         }), 200
         
@@ -71,8 +71,23 @@ def add_window(event_id:int):
 @permission_required('events.api.generate_slots')
 def generate_slots(window_id:int):
     try:
-        slots = EventsService.generate_slots(window_id)
-        return jsonify({"ok": True, "created": len(slots)}), 201
+        result = EventsService.generate_slots(window_id)
+        return jsonify({"ok": True, **result}), 201
+    except Exception as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
+@api_events.route('/<int:event_id>/generate-slots', methods=['POST'])
+@login_required
+@permission_required('events.api.generate_slots')
+def generate_event_slots(event_id:int):
+    """Genera los slots de todas las ventanas del evento y reporta solapes."""
+    data = request.get_json(silent=True) or {}
+    try:
+        result = EventsService.generate_slots_bulk(
+            event_id,
+            skip_conflicts=bool(data.get('skip_conflicts', True))
+        )
+        return jsonify({"ok": True, **result}), 201
     except Exception as e:
         return jsonify({"ok": False, "error": str(e)}), 400
 
@@ -189,6 +204,8 @@ def delete_event(event_id: int):
         program_id = event.program_id
         title = event.title
         db.session.delete(event)
+        from app.utils import user_counters
+        user_counters.queue_invalidate(user_counters.NEW_EVENTS)
         db.session.commit()
 
         from app.sockets.emitters import emit_broadcast
@@ -446,7 +463,7 @@ def list_public_events():
                 photo_url = None
                 if h.external_photo_path:
                     filename = h.external_photo_path.split('/')[-1]
-                    photo_url = f"/files/event/{event.id}/hosts/{filename}"
+                    photo_url = f"/files/event/{event.id}/hosts/{filename}?w=320"
                 hosts_summary.append({
                     'name': h.external_name,
                     'photo_url': photo_url,
@@ -793,6 +810,7 @@ def upload_host_photo(event_id: int):
     try:
         from app.utils.files import save_event_image
         path = save_event_image(file_storage, event_id, 'host')
+        EventsService.enqueue_image_variants(path)
         return jsonify({"ok": True, "path": path}), 201
     except Exception as e:
         return jsonify({"ok": False, "error": str(e)}), 500
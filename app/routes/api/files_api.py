@@ -1,19 +1,20 @@
 # app/routes/api/files_api.py
 from pathlib import Path
-from flask import Blueprint, current_app, send_file, abort
+from flask import Blueprint, current_app, abort, request
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
-from app.utils.files import abs_path_from_db
+from app.utils.files import abs_path_from_db, event_image_variant, send_stored_file, user_docs_root
 
 api_files = Blueprint('api_files', __name__, url_prefix='/files')
 
 INLINE_EXT = {'pdf'}  # muestra inline; el resto descarga
 
-def _send_safe(base: Path, rel_path: str, inline: bool):
+def _send_safe(base: Path, rel_path: str, inline: bool, max_age: int | None = None):
     """
     base: carpeta base permitida (Path)
     rel_path: ruta relativa guardada en BD/URL (p.ej. '42/admission/mi_archivo.pdf')
     inline: True -> inline, False -> attachment
+    max_age: caché larga (inmutable) para archivos con nombre único
     """
     try:
         abs_path = abs_path_from_db(rel_path, base)  # safe_join
@@ -24,11 +25,12 @@ def _send_safe(base: Path, rel_path: str, inline: bool):
     if not p.is_file():
         abort(404)
 
-    # send_file con ETag/If-Modified-Since
-    return send_file(
-        str(p),
+    # El ACL ya lo hizo la ruta: nginx (X-Accel-Redirect) o send_file con ETag/Range
+    return send_stored_file(
+        p,
         as_attachment=not inline,
-        conditional=True
+        max_age=max_age,
+        immutable=max_age is not None,
     )
 
 @api_files.route('/avatar/<int:user_id>/<path:filename>', methods=['GET'])
@@ -39,8 +41,10 @@ def avatar(user_id: int, filename: str):
     filename = secure_filename(filename)
     rel = f"{user_id}/{filename}"
     base: Path = current_app.config['AVATAR_FOLDER']
-    # imágenes -> inline
-    return _send_safe(base, rel, inline=True)
+    # imágenes -> inline; upload_photo genera un nombre nuevo en cada subida,
+    # así que la URL identifica el contenido y se puede cachear largo
+    return _send_safe(base, rel, inline=True,
+                      max_age=current_app.config.get('AVATAR_CACHE_MAX_AGE', 365 * 24 * 3600))
 
 @api_files.route('/doc/<int:user_id>/<phase>/<path:filename>', methods=['GET'])
 @login_required
@@ -56,7 +60,7 @@ def user_doc(user_id: int, phase: str, filename: str):
 
     filename = secure_filename(filename)
     rel = f"{user_id}/{phase}/{filename}"
-    base: Path = current_app.config['USER_DOCS_FOLDER']
+    base: Path = user_docs_root()
 
     # inline sólo para ciertas extensiones (PDF por ahora)
     ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
@@ -80,6 +84,8 @@ def event_image(event_id: int, kind: str, filename: str):
     kind: 'cover' (archivo directo en <event_id>/) | 'gallery' | 'hosts'
     Para cover, filename ej: cover.webp → rel = <event_id>/cover.webp
     Para gallery/hosts, rel = <event_id>/<kind>/<filename>
+    ?w=<px>: ancho que necesita el cliente; se sirve la derivada más cercana
+    (WebP si el Accept lo admite). Sin derivadas aún → original.
     """
     from app.models.event import Event
     from app import db as _db
@@ -108,5 +114,11 @@ def event_image(event_id: int, kind: str, filename: str):
     else:
         rel = f"{event_id}/{kind}/{filename}"
 
+    width = request.args.get('w', type=int)
+    accept_webp = 'image/webp' in request.headers.get('Accept', '')
+    rel = event_image_variant(rel, width, accept_webp)
+
     base: Path = current_app.config['EVENTS_FOLDER']
-    return _send_safe(base, rel, inline=True)
+    response = _send_safe(base, rel, inline=True)
+    response.vary.add('Accept')
+    return response
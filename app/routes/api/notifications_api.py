@@ -201,6 +201,9 @@ def respond_invitation(notification_id):
         db.session.add(attendance)
     
     # Marcar notificación como leída
+    if not notification.is_read and not notification.is_deleted:
+        from app.utils import user_counters
+        user_counters.queue_delta(user_counters.UNREAD, [current_user.id], -1)
     notification.is_read = True
     notification.read_at = db.func.now()
     
@@ -7,6 +7,7 @@ from flask import Blueprint, jsonify, request
 from flask_login import login_required, current_user
 from app import db
 from app.utils.permissions import permission_required
+from app.utils.task_results import get_task_result
 from app.models.user_program import UserProgram
 from app.services import permanence_service as svc
 import app.services.semester_transition_service as tsvc
@@ -1020,6 +1021,67 @@ def api_toggle_conacyt_scholarship(user_program_id):
 
 # ── Transición semestral (Pasar Semestre) ─────────────────────────────────────
 
+def _enqueue_transition_task(task_fn, kwargs, message):
+    """Encola una tarea de app.tasks.transition y responde 202 con su task_id."""
+    try:
+        task = task_fn.apply_async(kwargs=kwargs)
+    except Exception as e:
+        return jsonify({
+            "data": None,
+            "flash": [{"level": "danger", "message": "No se pudo encolar la transición semestral"}],
+            "error": {"code": "QUEUE_ERROR", "message": str(e)},
+            "meta": {}
+        }), 503
+    return jsonify({
+        "data": {
+            "task_id": task.id,
+            "status_url": f'/api/v1/permanence/transition/tasks/{task.id}',
+        },
+        "flash": [{"level": "info", "message": message}],
+        "error": None,
+        "meta": {}
+    }), 202
+
+
+@api_permanence.get('/transition/tasks/<task_id>')
+@login_required
+@permission_required('permanence.api.advance_bulk')
+def api_transition_task_status(task_id):
+    """Estado de un preview/ejecución asíncrona (app.tasks.transition)."""
+    from app.tasks.transition import build_transition_preview, run_semester_transition
+
+    try:
+        result = get_task_result(task_id, build_transition_preview, run_semester_transition)
+        if result is None:
+            return jsonify({
+                "data": None,
+                "error": {"code": "NOT_FOUND", "message": "Tarea no encontrada"},
+                "meta": {}
+            }), 404
+        state = result.state
+        data = {"task_id": task_id, "state": state, "progress": None, "result": None}
+
+        if state == 'PROGRESS':
+            data["progress"] = result.info or {}
+        elif state == 'SUCCESS':
+            data["result"] = result.result
+        elif state == 'FAILURE':
+            return jsonify({
+                "data": data,
+                "flash": [{"level": "danger", "message": "Error en la transición semestral"}],
+                "error": {"code": "TASK_FAILED", "message": str(result.result)},
+                "meta": {}
+            }), 200
+
+        return jsonify({"data": data, "error": None, "meta": {}}), 200
+    except Exception as e:
+        return jsonify({
+            "data": None,
+            "error": {"code": "SERVER_ERROR", "message": str(e)},
+            "meta": {}
+        }), 500
+
+
 @api_permanence.get('/transition/preview')
 @login_required
 @permission_required('permanence.api.advance_bulk')
@@ -1031,6 +1093,7 @@ def api_transition_preview():
         program_id  (int|"all") — omitido o "all" → preview global
         source_period_id (int) — periodo origen
         target_period_id (int) — periodo destino
+        async (1|true, opcional) — encola app.tasks.transition y responde 202
     """
     program_id_raw = request.args.get('program_id')
     source_period_id = request.args.get('source_period_id', type=int)
@@ -1045,19 +1108,29 @@ def api_transition_preview():
         }), 400
 
     global_mode = (not program_id_raw or str(program_id_raw).strip().lower() == 'all')
+    program_id = None
+    if not global_mode:
+        try:
+            program_id = int(program_id_raw)
+        except (TypeError, ValueError):
+            return jsonify({
+                "data": None,
+                "error": {"code": "INVALID_PARAM", "message": "program_id debe ser un entero o 'all'"},
+                "meta": {}
+            }), 400
+
+    if request.args.get('async', '').lower() in ('1', 'true'):
+        from app.tasks.transition import build_transition_preview
+        return _enqueue_transition_task(build_transition_preview, {
+            'source_period_id': source_period_id,
+            'target_period_id': target_period_id,
+            'program_id': program_id,
+        }, 'Generando vista previa en segundo plano.')
 
     try:
         if global_mode:
             data = tsvc.preview_global(source_period_id, target_period_id)
         else:
-            try:
-                program_id = int(program_id_raw)
-            except (TypeError, ValueError):
-                return jsonify({
-                    "data": None,
-                    "error": {"code": "INVALID_PARAM", "message": "program_id debe ser un entero o 'all'"},
-                    "meta": {}
-                }), 400
             data = tsvc.preview_program(program_id, source_period_id, target_period_id)
 
         return jsonify({"data": data, "error": None, "meta": {}}), 200
@@ -1100,6 +1173,7 @@ def api_transition_execute():
         source_period_id (int) — requerido
         target_period_id (int) — requerido
         program_id       (int, opcional) — omitido → ejecuta en todos los programas
+        async            (bool, opcional) — encola app.tasks.transition y responde 202
     """
     data = request.get_json() or {}
     source_period_id = data.get('source_period_id')
@@ -1125,16 +1199,27 @@ def api_transition_execute():
             "meta": {}
         }), 400
 
+    if program_id:
+        try:
+            program_id = int(program_id)
+        except (TypeError, ValueError):
+            return jsonify({
+                "data": None,
+                "error": {"code": "INVALID_PARAM", "message": "program_id debe ser un entero"},
+                "meta": {}
+            }), 400
+
+    if data.get('async'):
+        from app.tasks.transition import run_semester_transition
+        return _enqueue_transition_task(run_semester_transition, {
+            'source_period_id': source_period_id,
+            'target_period_id': target_period_id,
+            'coordinator_id': current_user.id,
+            'program_id': program_id or None,
+        }, 'Ejecutando la transición semestral en segundo plano.')
+
     try:
         if program_id:
-            try:
-                program_id = int(program_id)
-            except (TypeError, ValueError):
-                return jsonify({
-                    "data": None,
-                    "error": {"code": "INVALID_PARAM", "message": "program_id debe ser un entero"},
-                    "meta": {}
-                }), 400
             result = tsvc.execute_program_transition(
                 program_id=program_id,
                 source_period_id=source_period_id,
@@ -1149,43 +1234,14 @@ def api_transition_execute():
             )
 
         # ── Respaldo preventivo (snapshot) de aspirantes Δ=2 expirados ──
-        archive_block = None
-        if program_id:
-            expired_ids = result.get('expired_user_program_ids') or []
-            stats_for_response = result
-        else:
-            expired_ids = (result.get('total') or {}).get('expired_user_program_ids') or []
-            stats_for_response = result
-
-        if expired_ids:
-            try:
-                import app.services.applicant_archive_service as archive_svc
-                run = archive_svc.create_purge_run(
-                    user_program_ids=expired_ids,
-                    purge_type='transition_snapshot',
-                    initiated_by_id=current_user.id,
-                    program_id=program_id if program_id else None,
-                    source_period_id=source_period_id,
-                    target_period_id=target_period_id,
-                    notes=(
-                        f'Snapshot preventivo de transición '
-                        f'{source_period_id}→{target_period_id}'
-                    ),
-                )
-                archive_block = {
-                    'run_id': run.run_id,
-                    'archive_url': f'/api/v1/admin/purge/{run.run_id}/archive.zip',
-                    'expires_at': run.expires_at.isoformat() if run.expires_at else None,
-                    'item_count': len(expired_ids),
-                    'size_bytes': run.archive_size_bytes,
-                }
-            except Exception as e:
-                # Snapshot fallido no debe romper la transición ya commiteada.
-                archive_block = {'error': f'No se pudo generar snapshot: {e}'}
+        archive_block = tsvc.snapshot_expired_applicants(
+            result, program_id or None, source_period_id, target_period_id,
+            initiated_by_id=current_user.id,
+        )
 
         return jsonify({
             "data": {
-                **(stats_for_response if isinstance(stats_for_response, dict) else {}),
+                **(result if isinstance(result, dict) else {}),
                 "archive": archive_block,
             },
             "error": None,
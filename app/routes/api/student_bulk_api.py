@@ -10,6 +10,7 @@ Endpoints:
   POST /api/v1/student-bulk/create          — Alta individual de estudiante
   POST /api/v1/student-bulk/csv/preview     — Valida CSV y devuelve filas con errores
   POST /api/v1/student-bulk/csv/execute     — Ejecuta filas válidas del preview
+  GET  /api/v1/student-bulk/csv/tasks/<id>  — Estado de una ejecución asíncrona
   GET  /api/v1/student-bulk/csv/template    — Descarga plantilla CSV
 """
 
@@ -18,6 +19,7 @@ import io
 from flask import Blueprint, jsonify, request, Response
 from flask_login import login_required, current_user
 from app.utils.permissions import permission_required
+from app.utils.task_results import get_task_result
 import app.services.student_bulk_service as svc
 
 api_student_bulk = Blueprint(
@@ -26,6 +28,11 @@ api_student_bulk = Blueprint(
     url_prefix='/api/v1/student-bulk',
 )
 
+# Con este número de filas válidas o más, /csv/execute se ejecuta en Celery
+# (app.tasks.students) en lugar de dentro del request. El cliente puede
+# forzarlo con "async".
+ASYNC_THRESHOLD = 200
+
 
 # ---------------------------------------------------------------------------
 # POST /validate — validar payload individual
@@ -171,8 +178,10 @@ def api_csv_preview():
 @permission_required('student_bulk.api.csv_execute')
 def api_csv_execute():
     """
-    Recibe las filas previamente validadas (JSON {rows: [...]}) y ejecuta
-    las que tienen valid=True. Cada fila es atómica; errores son aislados.
+    Recibe las filas previamente validadas (JSON {rows: [...], async?: bool})
+    y ejecuta las que tienen valid=True. Cada fila es atómica; errores son
+    aislados. Con `async` (o ASYNC_THRESHOLD filas válidas o más) se encola
+    en Celery y responde 202 con el task_id.
     """
     body = request.get_json(silent=True) or {}
     rows = body.get('rows')
@@ -185,6 +194,35 @@ def api_csv_execute():
             'meta': {},
         }), 400
 
+    run_async = body.get('async')
+    if run_async is None:
+        run_async = sum(1 for r in rows if isinstance(r, dict) and r.get('valid')) >= ASYNC_THRESHOLD
+
+    if run_async:
+        from app.tasks.students import import_students_csv
+
+        try:
+            task = import_students_csv.apply_async(kwargs={
+                'rows': rows,
+                'created_by_id': current_user.id,
+            })
+        except Exception as e:
+            return jsonify({
+                'data': None,
+                'flash': [{'level': 'danger', 'message': 'No se pudo encolar el alta masiva.'}],
+                'error': {'code': 'QUEUE_ERROR', 'message': str(e)},
+                'meta': {},
+            }), 503
+        return jsonify({
+            'data': {
+                'task_id': task.id,
+                'status_url': f'/api/v1/student-bulk/csv/tasks/{task.id}',
+            },
+            'flash': [{'level': 'info', 'message': 'Creando estudiantes en segundo plano.'}],
+            'error': None,
+            'meta': {},
+        }), 202
+
     try:
         result = svc.execute_csv(rows, created_by_id=current_user.id)
         created = result['created']
@@ -219,6 +257,49 @@ def api_csv_execute():
         }), 500
 
 
+# ---------------------------------------------------------------------------
+# GET /csv/tasks/<task_id> — estado de una ejecución asíncrona
+# ---------------------------------------------------------------------------
+
+@api_student_bulk.get('/csv/tasks/<task_id>')
+@login_required
+@permission_required('student_bulk.api.csv_execute')
+def api_csv_task_status(task_id):
+    """Estado y avance de una ejecución encolada (app.tasks.students)."""
+    from app.tasks.students import import_students_csv
+
+    try:
+        result = get_task_result(task_id, import_students_csv)
+        if result is None:
+            return jsonify({
+                'data': None,
+                'error': {'code': 'NOT_FOUND', 'message': 'Tarea no encontrada'},
+                'meta': {},
+            }), 404
+        state = result.state
+        data = {'task_id': task_id, 'state': state, 'progress': None, 'result': None}
+
+        if state == 'PROGRESS':
+            data['progress'] = result.info or {}
+        elif state == 'SUCCESS':
+            data['result'] = result.result
+        elif state == 'FAILURE':
+            return jsonify({
+                'data': data,
+                'flash': [{'level': 'danger', 'message': 'Error al ejecutar el CSV.'}],
+                'error': {'code': 'TASK_FAILED', 'message': str(result.result)},
+                'meta': {},
+            }), 200
+
+        return jsonify({'data': data, 'error': None, 'meta': {}}), 200
+    except Exception as e:
+        return jsonify({
+            'data': None,
+            'error': {'code': 'SERVER_ERROR', 'message': str(e)},
+            'meta': {},
+        }), 500
+
+
 # ---------------------------------------------------------------------------
 # GET /csv/template — descargar plantilla CSV
 # ---------------------------------------------------------------------------
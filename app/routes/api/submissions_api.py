@@ -4,7 +4,7 @@ from flask_login import login_required, current_user
 from app.utils.permissions import permission_required
 from app import db
 from app.models import Program, Archive, Submission, UserProgram, ProgramStep
-from app.utils.files import save_user_doc
+from app.utils.files import record_file_inventory, save_user_doc
 from app.services.admission_service import get_admission_state
 from app.services.user_history_service import UserHistoryService
 import logging
@@ -107,6 +107,7 @@ def upload_submission():
     sub.upload_date = db.func.now()
     sub.file_path   = rel
     sub.status      = 'pending'
+    record_file_inventory(sub, rel)
 
     db.session.add(sub)
     db.session.commit()
@@ -2,6 +2,7 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import current_user, login_required
 from werkzeug.security import generate_password_hash, check_password_hash
+from app.utils.offload import offload_cpu
 from datetime import datetime, timezone
 from app.models.user import User
 from app.models.role import Role
@@ -16,7 +17,7 @@ def check_default_password(password: str) -> bool:
     Verifica si el usuario está usando la contraseña por defecto.
     La contraseña por defecto es 'tecno#2K' hasheada.
     """
-    return check_password_hash(password, "tecno#2K")
+    return offload_cpu(check_password_hash, password, "tecno#2K", label='password_check')
 
 
 @pages_auth.route("/reset-password/<token>", methods=["GET"])
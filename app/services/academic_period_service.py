@@ -2,6 +2,7 @@
 from datetime import date
 from app import db
 from app.models.academic_period import AcademicPeriod
+from app.utils.period_calendar import bump_period_version
 
 
 class AcademicPeriodNotFound(Exception):
@@ -183,6 +184,7 @@ def create_academic_period(data: dict, created_by: int = None):
 
     db.session.add(period)
     db.session.commit()
+    bump_period_version()
 
     return period
 
@@ -254,6 +256,7 @@ def update_academic_period(period_id: int, data: dict):
             period.status = data['status']
 
     db.session.commit()
+    bump_period_version()
 
     return period
 
@@ -274,6 +277,7 @@ def activate_period(period_id: int):
     period = get_academic_period_by_id(period_id)
     period.activate()
     db.session.commit()
+    bump_period_version()
 
     # Notificar a todos los admins en tiempo real
     try:
@@ -310,6 +314,7 @@ def deactivate_period(period_id: int):
     period = get_academic_period_by_id(period_id)
     period.is_active = False
     db.session.commit()
+    bump_period_version()
 
     # Notificar a todos los admins en tiempo real
     try:
@@ -349,6 +354,7 @@ def delete_academic_period(period_id: int):
 
     db.session.delete(period)
     db.session.commit()
+    bump_period_version()
 
     return True
 
@@ -14,11 +14,13 @@ Flujo:
 from app import db
 from app.models import UserProgram, User, Program, ExtensionRequest, Submission, ProgramStep
 from app.models.acceptance_document import AcceptanceDocument
+from app.models.semester_enrollment import SemesterEnrollment
 from app.services.notification_service import NotificationService
 from app.services.user_history_service import UserHistoryService
-from app.utils.files import save_user_doc
+from app.utils.files import record_file_inventory, save_user_doc
 from app.utils.datetime_utils import now_local, to_local_timezone
-from sqlalchemy import and_
+from sqlalchemy import and_, case, func
+from sqlalchemy.orm import contains_eager
 
 
 VALID_DOC_TYPES = {'acceptance_letter', 'course_schedule', 'enrollment_receipt', 'acceptance_opinion'}
@@ -92,70 +94,134 @@ def _get_or_create_doc(user_program_id: int, document_type: str) -> AcceptanceDo
     return doc
 
 
+# ---------------------------------------------------------------------------
+# Lectura en bloque (pestañas de aceptación del coordinador)
+# ---------------------------------------------------------------------------
+
+# Pestañas de la vista de aceptación, según el estado de la boleta
+ACCEPTANCE_TABS = ('pending_docs', 'receipt_submitted', 'completed')
+
+_DOCS_CHUNK = 1000
+
+
+def _empty_doc(doc_type: str) -> dict:
+    return {
+        'id': None, 'document_type': doc_type, 'status': 'pending',
+        'file_path': None, 'uploaded_at': None, 'review_notes': None,
+    }
+
+
+def _docs_by_user_program(user_program_ids) -> dict:
+    """
+    {user_program_id: {doc_type: AcceptanceDocument}} con una consulta por
+    bloque de IDs. Si hubiera duplicados de un tipo se toma el más antiguo.
+    """
+    ids = list(dict.fromkeys(user_program_ids))
+    pivot = {up_id: {} for up_id in ids}
+    for i in range(0, len(ids), _DOCS_CHUNK):
+        docs = (
+            AcceptanceDocument.query
+            .filter(
+                AcceptanceDocument.user_program_id.in_(ids[i:i + _DOCS_CHUNK]),
+                AcceptanceDocument.document_type.in_(VALID_DOC_TYPES),
+            )
+            .order_by(AcceptanceDocument.id)
+            .all()
+        )
+        for doc in docs:
+            pivot[doc.user_program_id].setdefault(doc.document_type, doc)
+    return pivot
+
+
+def _docs_dict(docs: dict) -> dict:
+    return {
+        doc_type: docs[doc_type].to_dict() if doc_type in docs else _empty_doc(doc_type)
+        for doc_type in VALID_DOC_TYPES
+    }
+
+
+def _receipt_status_is(*statuses):
+    return db.session.query(AcceptanceDocument.id).filter(
+        AcceptanceDocument.user_program_id == UserProgram.id,
+        AcceptanceDocument.document_type == 'enrollment_receipt',
+        AcceptanceDocument.status.in_(statuses),
+    ).exists()
+
+
 def get_acceptance_status(user_program_id: int) -> dict:
     """
-    Retorna el estado de los 3 documentos de aceptacion para un UserProgram.
+    Retorna el estado de los documentos de aceptacion para un UserProgram.
 
     Returns:
         Dict con doc_type -> {doc_id, status, file_path, uploaded_at, review_notes}
     """
     up = _get_user_program_by_id(user_program_id)
+    return _docs_dict(_docs_by_user_program([up.id])[up.id])
 
-    result = {}
-    for doc_type in VALID_DOC_TYPES:
-        doc = AcceptanceDocument.query.filter_by(
-            user_program_id=user_program_id,
-            document_type=doc_type
-        ).first()
-
-        if doc:
-            result[doc_type] = doc.to_dict()
-        else:
-            result[doc_type] = {
-                'id': None,
-                'document_type': doc_type,
-                'status': 'pending',
-                'file_path': None,
-                'uploaded_at': None,
-                'review_notes': None,
-            }
 
-    return result
+def get_accepted_applicants(program_id: int, tab: str | None = None,
+                            page: int | None = None, per_page: int = 50):
+    """
+    Obtiene los aspirantes aceptados de un programa con su estado de documentos.
 
+    Número fijo de consultas sin importar el tamaño de la generación:
+    aspirantes (con su usuario), documentos de aceptación de la página y
+    último semestre inscrito.
 
-def get_accepted_applicants(program_id: int):
-    """
-    Obtiene todos los aspirantes aceptados de un programa con su estado de documentos.
+    Args:
+        tab: filtra por pestaña (ACCEPTANCE_TABS) según el estado de la boleta
+        page / per_page: paginación opcional; sin `page` se devuelven todos
 
     Returns:
-        Lista de dicts con user, user_program y acceptance_docs
+        (lista de dicts con user, user_program y acceptance_docs, total)
     """
-    user_programs = UserProgram.query.join(
+    query = UserProgram.query.join(
         User, UserProgram.user_id == User.id
+    ).options(
+        contains_eager(UserProgram.user)
     ).filter(
         and_(
             UserProgram.program_id == program_id,
             UserProgram.admission_status == 'accepted',
             User.is_active == True,  # noqa: E712 — excluir cuentas desactivadas
         )
-    ).order_by(UserProgram.decision_at.desc()).all()
+    )
+
+    if tab == 'receipt_submitted':
+        query = query.filter(_receipt_status_is('uploaded'))
+    elif tab == 'completed':
+        query = query.filter(_receipt_status_is('approved'))
+    elif tab == 'pending_docs':
+        query = query.filter(~_receipt_status_is('uploaded', 'approved'))
+
+    query = query.order_by(UserProgram.decision_at.desc(), UserProgram.id.desc())
+    if page:
+        total = query.order_by(None).count()
+        user_programs = query.offset((page - 1) * per_page).limit(per_page).all()
+    else:
+        user_programs = query.all()
+        total = len(user_programs)
+
+    up_ids = [up.id for up in user_programs]
+    docs = _docs_by_user_program(up_ids)
+    last_semester = dict(
+        db.session.query(
+            SemesterEnrollment.user_program_id,
+            func.max(SemesterEnrollment.semester_number),
+        )
+        .filter(SemesterEnrollment.user_program_id.in_(up_ids))
+        .group_by(SemesterEnrollment.user_program_id)
+        .all()
+    ) if up_ids else {}
 
     result = []
     for up in user_programs:
         user = up.user
-        docs = {}
-        for doc_type in VALID_DOC_TYPES:
-            doc = AcceptanceDocument.query.filter_by(
-                user_program_id=up.id,
-                document_type=doc_type
-            ).first()
-            docs[doc_type] = doc.to_dict() if doc else {
-                'id': None, 'document_type': doc_type, 'status': 'pending',
-                'file_path': None, 'uploaded_at': None, 'review_notes': None
-            }
-
         result.append({
-            'user_program': up.to_dict(include_deliberation=True),
+            'user_program': up.to_dict(
+                include_deliberation=True,
+                last_semester_number=last_semester.get(up.id),
+            ),
             'user': {
                 'id': user.id,
                 'full_name': f"{user.first_name} {user.last_name} {user.mother_last_name or ''}".strip(),
@@ -163,59 +229,61 @@ def get_accepted_applicants(program_id: int):
                 'curp': user.curp,
                 'control_number': user.control_number,
             },
-            'acceptance_docs': docs,
+            'acceptance_docs': _docs_dict(docs[up.id]),
         })
 
-    return result
+    return result, total
 
 
 def get_acceptance_stats(program_id: int) -> dict:
     """
-    Estadisticas de documentos de aceptacion para un programa.
+    Estadisticas de documentos de aceptacion para un programa, en una sola
+    consulta agregada (estado de cada documento por UserProgram y conteo
+    por categoria).
 
     Returns:
         Dict con conteos: pending_docs, receipt_submitted, completed
     """
-    accepted = UserProgram.query.filter_by(
-        program_id=program_id,
-        admission_status='accepted'
-    ).all()
-
-    pending_docs = 0
-    receipt_submitted = 0
-    completed = 0
-
-    for up in accepted:
-        letter = AcceptanceDocument.query.filter_by(
-            user_program_id=up.id, document_type='acceptance_letter'
-        ).first()
-        schedule = AcceptanceDocument.query.filter_by(
-            user_program_id=up.id, document_type='course_schedule'
-        ).first()
-        receipt = AcceptanceDocument.query.filter_by(
-            user_program_id=up.id, document_type='enrollment_receipt'
-        ).first()
+    def _has(doc_type, *statuses):
+        return func.max(case(
+            (and_(AcceptanceDocument.document_type == doc_type,
+                  AcceptanceDocument.status.in_(statuses)), 1),
+            else_=0,
+        ))
+
+    per_up = (
+        db.session.query(
+            UserProgram.id.label('up_id'),
+            _has('acceptance_letter', 'uploaded', 'approved').label('letter_ok'),
+            _has('course_schedule', 'uploaded', 'approved').label('schedule_ok'),
+            _has('enrollment_receipt', 'uploaded').label('receipt_uploaded'),
+            _has('enrollment_receipt', 'approved').label('receipt_approved'),
+        )
+        .outerjoin(AcceptanceDocument, AcceptanceDocument.user_program_id == UserProgram.id)
+        .filter(
+            UserProgram.program_id == program_id,
+            UserProgram.admission_status == 'accepted',
+        )
+        .group_by(UserProgram.id)
+        .subquery()
+    )
+
+    docs_ok = and_(per_up.c.letter_ok == 1, per_up.c.schedule_ok == 1)
+    submitted = and_(docs_ok, per_up.c.receipt_uploaded == 1)
+    completed = and_(docs_ok, per_up.c.receipt_uploaded == 0, per_up.c.receipt_approved == 1)
 
-        letter_ok = letter and letter.status in ('uploaded', 'approved')
-        schedule_ok = schedule and schedule.status in ('uploaded', 'approved')
-        receipt_uploaded = receipt and receipt.status in ('uploaded',)
-        receipt_approved = receipt and receipt.status == 'approved'
-
-        if not letter_ok or not schedule_ok:
-            pending_docs += 1
-        elif receipt_uploaded:
-            receipt_submitted += 1
-        elif receipt_approved:
-            completed += 1
-        else:
-            # Tiene carta y tira pero no ha subido boleta
-            pending_docs += 1
+    total, receipt_submitted, completed_count = db.session.query(
+        func.count(per_up.c.up_id),
+        func.coalesce(func.sum(case((submitted, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((completed, 1), else_=0)), 0),
+    ).one()
 
     return {
-        'total_accepted': len(accepted),
-        'pending_docs': pending_docs,
+        'total_accepted': total,
+        # Sin carta/tira, o con ambas pero sin boleta enviada ni aprobada
+        'pending_docs': total - receipt_submitted - completed_count,
         'receipt_submitted': receipt_submitted,
-        'completed': completed,
+        'completed': completed_count,
     }
 
 
@@ -255,6 +323,7 @@ def upload_coordinator_doc(user_id: int, program_id: int, document_type: str,
     doc = _get_or_create_doc(up.id, document_type)
     was_pending = doc.status != 'uploaded'  # False si ya estaba subido (re-subida)
     doc.file_path = file_path
+    record_file_inventory(doc, file_path)
     doc.uploaded_by_id = coordinator_id
     doc.uploaded_at = now_local()
     doc.status = 'uploaded'
@@ -368,6 +437,7 @@ def submit_enrollment_receipt(user_id: int, program_id: int,
         )
 
     doc.file_path = file_path
+    record_file_inventory(doc, file_path)
     doc.uploaded_by_id = aspirant_id
     doc.uploaded_at = now_local()
     doc.status = 'uploaded'
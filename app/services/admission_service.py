@@ -20,6 +20,44 @@ def _add_months(dt, months):
     day = min(dt.day, calendar.monthrange(year, month)[1])
     return dt.replace(year=year, month=month, day=day)
 
+_ACCEPTANCE_DOC_TYPES = ('acceptance_letter', 'course_schedule', 'enrollment_receipt', 'acceptance_opinion')
+_INTERVIEW_APPT_STATUSES = ('scheduled', 'done', 'no_show')
+
+
+def _load_admission_steps(program_id: int) -> list:
+    """Pasos de la fase de admisión del programa, con archives y program_steps precargados."""
+    return (
+        Step.query
+        .join(ProgramStep)
+        .join(Phase)
+        .filter(
+            ProgramStep.program_id == program_id,
+            Phase.name == 'admission'
+        )
+        .options(selectinload(Step.archives), selectinload(Step.program_steps))
+        .order_by(ProgramStep.sequence)
+        .all()
+    )
+
+
+def _interview_rows(user_ids):
+    """(applicant_id, event.program_id) de citas de entrevista no canceladas."""
+    from app.models.appointment import Appointment
+    return db.session.execute(
+        select(Appointment.applicant_id, Event.program_id)
+        .join(EventSlot, Appointment.slot_id == EventSlot.id)
+        .join(EventWindow, EventSlot.event_window_id == EventWindow.id)
+        .join(Event, EventWindow.event_id == Event.id)
+        .where(
+            and_(
+                Appointment.applicant_id.in_(user_ids),
+                Appointment.status.in_(_INTERVIEW_APPT_STATUSES),
+                Event.type == 'interview'
+            )
+        )
+    ).all()
+
+
 def get_admission_state(user_id: int, program_id: int, up) -> dict:
     """
     Devuelve todo lo necesario para la vista de Admisión:
@@ -31,22 +69,134 @@ def get_admission_state(user_id: int, program_id: int, up) -> dict:
       - progress_segments, status_count, progress_pct, pending_items, timeline
     """
     # 1) Traer pasos + archivos
-    steps = (
-        Step.query
-        .join(ProgramStep)
-        .join(Phase)
-        .filter(
-            ProgramStep.program_id == program_id,
-            Phase.name == 'admission'
-        )
-        .options(selectinload(Step.archives))
-        .order_by(ProgramStep.sequence)
-        .all()
-    )
+    steps = _load_admission_steps(program_id)
 
     # 2) Map submissions del usuario
     archive_ids = [a.id for step in steps for a in step.archives]
-    
+    subs = {
+        s.archive_id: s
+        for s in Submission.query
+                          .filter_by(user_id=user_id)
+                          .filter(Submission.archive_id.in_(archive_ids))
+                          .all()
+    }
+
+    # 3) Extensiones del usuario (la más antigua por archive gana, como siempre)
+    all_extensions = {
+        e.archive_id: e
+        for e in ExtensionRequest.query
+                                .filter_by(user_id=user_id)
+                                .filter(ExtensionRequest.archive_id.in_(archive_ids))
+                                .order_by(ExtensionRequest.created_at.desc())
+                                .all()
+    }
+
+    # 4) Entrevista asignada o realizada
+    # Cualquier cita no cancelada cuenta: scheduled (pendiente), done (realizada), no_show
+    has_interview = any(
+        pid is None or pid == program_id
+        for _uid, pid in _interview_rows([user_id])
+    )
+
+    # 5) Documentos de aceptación (solo si está aceptado)
+    acceptance_docs = {}
+    if up.admission_status == 'accepted':
+        try:
+            from app.models.acceptance_document import AcceptanceDocument
+            for doc_type in _ACCEPTANCE_DOC_TYPES:
+                doc = AcceptanceDocument.query.filter_by(
+                    user_program_id=up.id,
+                    document_type=doc_type
+                ).first()
+                acceptance_docs[doc_type] = doc.to_dict() if doc else None
+        except Exception:
+            pass
+
+    return _build_admission_state(steps, subs, all_extensions, has_interview, up, acceptance_docs)
+
+
+def get_admission_states_bulk(entries) -> dict:
+    """
+    Versión por lotes de get_admission_state para listados (coordinador, dashboards).
+
+    Args:
+        entries: iterable de tuplas (user_id, program_id, UserProgram).
+
+    Returns:
+        dict (user_id, program_id) → mismo dict que get_admission_state.
+
+    En lugar de ~6 queries por alumno hace un número fijo de queries:
+    pasos una vez por programa, y submissions, extensiones, citas de entrevista
+    y documentos de aceptación con un `IN` cada uno.
+    """
+    entries = list(entries)
+    if not entries:
+        return {}
+
+    program_ids = {pid for _uid, pid, _up in entries}
+    user_ids = list({uid for uid, _pid, _up in entries})
+
+    steps_by_program = {pid: _load_admission_steps(pid) for pid in program_ids}
+    archive_ids_by_program = {
+        pid: {a.id for step in steps for a in step.archives}
+        for pid, steps in steps_by_program.items()
+    }
+    all_archive_ids = set().union(*archive_ids_by_program.values())
+
+    subs_by_user = {}
+    exts_by_user = {}
+    if all_archive_ids:
+        for s in (Submission.query
+                  .filter(Submission.user_id.in_(user_ids),
+                          Submission.archive_id.in_(all_archive_ids))
+                  .all()):
+            subs_by_user.setdefault(s.user_id, []).append(s)
+        for e in (ExtensionRequest.query
+                  .filter(ExtensionRequest.user_id.in_(user_ids),
+                          ExtensionRequest.archive_id.in_(all_archive_ids))
+                  .order_by(ExtensionRequest.created_at.desc())
+                  .all()):
+            exts_by_user.setdefault(e.user_id, []).append(e)
+
+    interviews = set()
+    for uid, pid in _interview_rows(user_ids):
+        interviews.add((uid, pid))
+
+    accepted_up_ids = [up.id for _uid, _pid, up in entries if up.admission_status == 'accepted']
+    docs_by_up = {}
+    if accepted_up_ids:
+        try:
+            from app.models.acceptance_document import AcceptanceDocument
+            for doc in (AcceptanceDocument.query
+                        .filter(AcceptanceDocument.user_program_id.in_(accepted_up_ids),
+                                AcceptanceDocument.document_type.in_(_ACCEPTANCE_DOC_TYPES))
+                        .order_by(AcceptanceDocument.id)
+                        .all()):
+                # .first() por tipo → el de menor id gana
+                docs_by_up.setdefault(doc.user_program_id, {}).setdefault(doc.document_type, doc)
+        except Exception:
+            docs_by_up = {}
+
+    result = {}
+    for uid, pid, up in entries:
+        archive_ids = archive_ids_by_program[pid]
+        subs = {s.archive_id: s for s in subs_by_user.get(uid, ()) if s.archive_id in archive_ids}
+        all_extensions = {e.archive_id: e for e in exts_by_user.get(uid, ()) if e.archive_id in archive_ids}
+        has_interview = (uid, pid) in interviews or (uid, None) in interviews
+        acceptance_docs = {}
+        if up.admission_status == 'accepted':
+            docs = docs_by_up.get(up.id, {})
+            acceptance_docs = {
+                t: (docs[t].to_dict() if t in docs else None) for t in _ACCEPTANCE_DOC_TYPES
+            }
+        result[(uid, pid)] = _build_admission_state(
+            steps_by_program[pid], subs, all_extensions, has_interview, up, acceptance_docs
+        )
+    return result
+
+
+def _build_admission_state(steps, subs, all_extensions, has_interview, up, acceptance_docs) -> dict:
+    """Arma el dict de estado de admisión a partir de datos ya cargados (sin queries)."""
     # Separar archivos de secuencia 0 (informativos) de los que cuentan para progreso
     informative_archive_ids = []
     progress_archive_ids = []
@@ -58,14 +208,6 @@ def get_admission_state(user_id: int, program_id: int, up) -> dict:
                 informative_archive_ids.append(archive.id)
             else:
                 progress_archive_ids.append(archive.id)
-    
-    subs = {
-        s.archive_id: s
-        for s in Submission.query
-                          .filter_by(user_id=user_id)
-                          .filter(Submission.archive_id.in_(archive_ids))
-                          .all()
-    }
 
     # 2.5) Calcular documentos con validez vencida (basado en archive.validity_months)
     # Solo aplica a submissions aprobadas cuya vigencia configurada ya expiró.
@@ -78,18 +220,9 @@ def get_admission_state(user_id: int, program_id: int, up) -> dict:
             if expiry_dt < now_local():
                 expired_archive_ids.add(aid)
 
-    # 3) Map extensiones activas del usuario (solo para archivos que cuentan para progreso)
     # Usar hora local de Ciudad Juárez
     now = now_local()
-    all_extensions = {
-        e.archive_id: e
-        for e in ExtensionRequest.query
-                                .filter_by(user_id=user_id)
-                                .filter(ExtensionRequest.archive_id.in_(archive_ids))
-                                .order_by(ExtensionRequest.created_at.desc())
-                                .all()
-    }
-    
+
     # Extensiones activas (solo granted y no expiradas)
     active_extensions = {}
     for aid, ext in all_extensions.items():
@@ -144,28 +277,6 @@ def get_admission_state(user_id: int, program_id: int, up) -> dict:
 
     lock_info = { step.id: _is_locked(step) for step in steps }
 
-    # 4.5) Verificar si el usuario tiene entrevista asignada o realizada
-    def _has_interview_assigned():
-        from app.models.appointment import Appointment
-        # Cualquier cita no cancelada cuenta: scheduled (pendiente), done (realizada), no_show
-        appt = db.session.execute(
-            select(Appointment)
-            .join(EventSlot, Appointment.slot_id == EventSlot.id)
-            .join(EventWindow, EventSlot.event_window_id == EventWindow.id)
-            .join(Event, EventWindow.event_id == Event.id)
-            .where(
-                and_(
-                    Appointment.applicant_id == user_id,
-                    Appointment.status.in_(['scheduled', 'done', 'no_show']),
-                    or_(Event.program_id == program_id, Event.program_id.is_(None)),
-                    Event.type == 'interview'
-                )
-            )
-        ).scalar_one_or_none()
-        return bool(appt)
-    
-    has_interview = _has_interview_assigned()
-
     # 5) Estado resumido por paso (incluyendo extensiones y entrevistas)
     def _step_state(step):
         # Determinar si este es el último paso (entrevista/defensa)
@@ -408,20 +519,6 @@ def get_admission_state(user_id: int, program_id: int, up) -> dict:
     
     # ========== FIN NUEVO ==========
 
-    # Documentos de aceptación (solo si está aceptado)
-    acceptance_docs = {}
-    if up.admission_status == 'accepted':
-        try:
-            from app.models.acceptance_document import AcceptanceDocument
-            for doc_type in ['acceptance_letter', 'course_schedule', 'enrollment_receipt', 'acceptance_opinion']:
-                doc = AcceptanceDocument.query.filter_by(
-                    user_program_id=up.id,
-                    document_type=doc_type
-                ).first()
-                acceptance_docs[doc_type] = doc.to_dict() if doc else None
-        except Exception:
-            pass
-
     return {
         'steps': steps,  # mantener original para compatibilidad
         'processed_steps': processed_steps,  # NUEVO: lista procesada
@@ -7,7 +7,8 @@ Política unificada: ningún `os.remove` ocurre sin (1) ZIP descargado y
 
 Categorías soportadas (`purge_type`):
   - admission_expired_with_files: UserProgram con admission_status='expired'
-    y submissions con file_path en disco.
+    y submissions con archivo presente según el inventario
+    (app/services/file_inventory_service.py).
   - admission_delta3_plus: aspirantes con periodo de inscripción ≥ 2 periodos
     cerrados atrás (equivalente al cleanup task original).
   - retention_policy: enrolled/rejected viejos según RetentionPolicy.keep_years.
@@ -28,9 +29,8 @@ import os
 import shutil
 import uuid
 import zipfile
-from datetime import timedelta
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Callable, Iterable, Optional
 
 from app import db
 from app.config import Config
@@ -40,8 +40,11 @@ from app.models.user_program import UserProgram
 from app.models.academic_period import AcademicPeriod
 from app.models.user_history import UserHistory
 from app.models.retention_policy import RetentionPolicy
+from app.services import cleanup_candidate_service
 from app.services.user_history_service import UserHistoryService
 from app.utils.datetime_utils import now_local
+from app.utils.files import user_doc_path, user_docs_root
+from app.utils.offload import is_green, offload_cpu
 
 logger = logging.getLogger(__name__)
 
@@ -86,43 +89,11 @@ def _archive_path_for(run_id: str) -> Path:
 # Candidate listing
 # ---------------------------------------------------------------------------
 
-def _periods_elapsed_since(period_code: str) -> int:
-    """Cuenta cuántos periodos cerraron su admisión después de period_code."""
-    from datetime import datetime
-    return (
-        AcademicPeriod.query
-        .filter(
-            AcademicPeriod.code > period_code,
-            AcademicPeriod.admission_end_date < datetime.utcnow(),
-        )
-        .count()
-    )
-
-
-def _files_count_for(user_program: UserProgram) -> tuple:
-    """Devuelve (count, total_bytes) de archivos físicamente en disco para este UP."""
-    subs = Submission.query.filter_by(
-        user_id=user_program.user_id,
-    ).all()
-    # Filtrar a los del programa via program_step
-    from app.models.program_step import ProgramStep
-    program_step_ids = {
-        ps.id for ps in ProgramStep.query.filter_by(
-            program_id=user_program.program_id
-        ).all()
-    }
-    count = 0
-    total = 0
-    for s in subs:
-        if s.program_step_id not in program_step_ids:
-            continue
-        if not s.file_path:
-            continue
-        full = Path(Config.UPLOAD_FOLDER) / s.file_path
-        if full.exists():
-            count += 1
-            total += full.stat().st_size
-    return count, total
+PURGE_CATEGORIES = (
+    'admission_expired_with_files',
+    'admission_delta3_plus',
+    'retention_policy',
+)
 
 
 def list_candidates(category: str) -> list:
@@ -135,122 +106,22 @@ def list_candidates(category: str) -> list:
         'files_count', 'total_size_bytes',
     }
     """
-    if category not in (
-        'admission_expired_with_files',
-        'admission_delta3_plus',
-        'retention_policy',
-    ):
+    items, _total = list_candidates_page(category)
+    return items
+
+
+def list_candidates_page(category: str, page: Optional[int] = None,
+                         per_page: int = 50) -> tuple[list, int]:
+    """
+    Como list_candidates pero paginado: (items, total). Cada categoría es
+    una sola consulta (ver cleanup_candidate_service).
+    """
+    if category not in PURGE_CATEGORIES:
         raise InvalidPurgeType(f'Categoría desconocida: {category}')
 
     sweep_expired_runs()  # housekeeping
 
-    if category == 'admission_expired_with_files':
-        ups = UserProgram.query.filter(
-            UserProgram.admission_status == 'expired',
-        ).all()
-        result = []
-        for up in ups:
-            count, total = _files_count_for(up)
-            if count == 0:
-                continue
-            ap = (
-                AcademicPeriod.query.get(up.admission_period_id)
-                if up.admission_period_id else None
-            )
-            result.append({
-                'user_program_id': up.id,
-                'user_id': up.user_id,
-                'name': _full_name(up.user),
-                'email': up.user.email,
-                'program_name': up.program.name if up.program else None,
-                'admission_status': up.admission_status,
-                'admission_period': ap.name if ap else None,
-                'periods_elapsed': None,
-                'files_count': count,
-                'total_size_bytes': total,
-            })
-        return result
-
-    if category == 'admission_delta3_plus':
-        candidates = (
-            UserProgram.query
-            .filter(
-                UserProgram.admission_status.in_(
-                    ['in_progress', 'interview_completed', 'deliberation']
-                ),
-                UserProgram.admission_period_id.isnot(None),
-            )
-            .all()
-        )
-        result = []
-        for up in candidates:
-            ap = AcademicPeriod.query.get(up.admission_period_id)
-            if not ap:
-                continue
-            elapsed = _periods_elapsed_since(ap.code)
-            if elapsed < 2:
-                continue
-            count, total = _files_count_for(up)
-            result.append({
-                'user_program_id': up.id,
-                'user_id': up.user_id,
-                'name': _full_name(up.user),
-                'email': up.user.email,
-                'program_name': up.program.name if up.program else None,
-                'admission_status': up.admission_status,
-                'admission_period': ap.name,
-                'periods_elapsed': elapsed,
-                'files_count': count,
-                'total_size_bytes': total,
-            })
-        return result
-
-    # retention_policy
-    from datetime import datetime
-    policies = RetentionPolicy.query.filter_by(keep_forever=False).all()
-    result = []
-    for policy in policies:
-        if not policy.keep_years:
-            continue
-        cutoff = datetime.utcnow() - timedelta(days=policy.keep_years * 365)
-        ups = UserProgram.query.filter(
-            UserProgram.admission_status == policy.apply_after,
-            UserProgram.updated_at < cutoff,
-        ).all()
-        for up in ups:
-            subs = Submission.query.filter_by(
-                user_id=up.user_id,
-                archive_id=policy.archive_id,
-            ).all()
-            count = 0
-            total = 0
-            for s in subs:
-                if not s.file_path:
-                    continue
-                full = Path(Config.UPLOAD_FOLDER) / s.file_path
-                if full.exists():
-                    count += 1
-                    total += full.stat().st_size
-            if count == 0:
-                continue
-            result.append({
-                'user_program_id': up.id,
-                'user_id': up.user_id,
-                'name': _full_name(up.user),
-                'email': up.user.email,
-                'program_name': up.program.name if up.program else None,
-                'admission_status': up.admission_status,
-                'admission_period': None,
-                'periods_elapsed': None,
-                'files_count': count,
-                'total_size_bytes': total,
-                'policy': {
-                    'archive_id': policy.archive_id,
-                    'keep_years': policy.keep_years,
-                    'apply_after': policy.apply_after,
-                },
-            })
-    return result
+    return cleanup_candidate_service.get_candidates(category, page=page, per_page=per_page)
 
 
 def _full_name(user) -> str:
@@ -261,11 +132,95 @@ def _full_name(user) -> str:
 # Archive build
 # ---------------------------------------------------------------------------
 
-def _serialize_user_program(up: UserProgram) -> dict:
+# Formatos que ya vienen comprimidos: DEFLATE solo gasta CPU sin reducir
+# tamaño, así que se guardan tal cual (ZIP_STORED).
+_STORED_EXTENSIONS = frozenset({
+    '.pdf', '.docx', '.xlsx', '.pptx', '.odt', '.zip',
+    '.jpg', '.jpeg', '.png', '.webp', '.gif',
+})
+
+# Lectura de archivos en paralelo (I/O de disco) mientras el hilo principal
+# escribe el ZIP. Por debajo de _PARALLEL_MIN_FILES no compensa el pool.
+_READ_WORKERS = 4
+_PARALLEL_MIN_FILES = 16
+# Archivos más grandes que esto no se cargan en memoria: se copian en streaming
+_INLINE_READ_LIMIT = 8 * 1024 * 1024
+
+_PREFETCH_CHUNK = 500
+_PROGRESS_EVERY = 25
+
+
+def _chunks(seq: list, size: int = _PREFETCH_CHUNK):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+def _prefetch_archive_data(ups: list) -> dict:
+    """
+    Carga en bloque todo lo que el ZIP necesita de los UserProgram dados:
+    submissions e historial por usuario, pasos por programa y periodos.
+    Son un puñado de queries por lote en lugar de varias por UserProgram.
+    """
+    from collections import defaultdict
+    from sqlalchemy.orm import selectinload
+    from app.models.program_step import ProgramStep
+
+    user_ids = sorted({up.user_id for up in ups})
+    program_ids = sorted({up.program_id for up in ups if up.program_id})
+    period_ids = sorted({up.admission_period_id for up in ups if up.admission_period_id})
+
+    submissions = defaultdict(list)
+    history = defaultdict(list)
+    for chunk in _chunks(user_ids):
+        for s in (
+            Submission.query
+            .filter(Submission.user_id.in_(chunk))
+            .order_by(Submission.id)
+        ):
+            submissions[s.user_id].append(s)
+        for h in (
+            UserHistory.query
+            .options(selectinload(UserHistory.admin))
+            .filter(UserHistory.user_id.in_(chunk))
+            .order_by(UserHistory.id)
+        ):
+            history[h.user_id].append(h)
+
+    step_ids = defaultdict(set)
+    if program_ids:
+        rows = (
+            db.session.query(ProgramStep.program_id, ProgramStep.id)
+            .filter(ProgramStep.program_id.in_(program_ids))
+            .all()
+        )
+        for pid, ps_id in rows:
+            step_ids[pid].add(ps_id)
+
+    periods = {
+        ap.id: ap for ap in (
+            AcademicPeriod.query.filter(AcademicPeriod.id.in_(period_ids)).all()
+            if period_ids else []
+        )
+    }
+
+    return {
+        'submissions': submissions,
+        'history': history,
+        'step_ids': step_ids,
+        'periods': periods,
+    }
+
+
+def _serialize_user_program(
+    up: UserProgram,
+    submissions: Optional[list] = None,
+    history: Optional[list] = None,
+) -> dict:
     user = up.user
-    submissions = (
-        Submission.query.filter_by(user_id=up.user_id).all()
-    )
+    if submissions is None:
+        submissions = Submission.query.filter_by(user_id=up.user_id).all()
+    if history is None:
+        history = UserHistory.query.filter_by(user_id=up.user_id).all()
     sub_rows = [
         {
             'id': s.id,
@@ -283,11 +238,7 @@ def _serialize_user_program(up: UserProgram) -> dict:
         }
         for s in submissions
     ]
-    history_rows = [
-        h.to_dict() for h in (
-            UserHistory.query.filter_by(user_id=up.user_id).all()
-        )
-    ]
+    history_rows = [h.to_dict() for h in history]
     return {
         'user_program_id': up.id,
         'user': {
@@ -315,29 +266,24 @@ def _serialize_user_program(up: UserProgram) -> dict:
     }
 
 
-def _walk_user_files(up: UserProgram) -> list:
+def _user_files(up: UserProgram, submissions: list, step_ids: set) -> list:
     """
-    Devuelve [(rel_path_in_zip, abs_path_on_disk, submission_id), ...] para
-    todos los archivos físicos del UserProgram que existen en disco.
+    Devuelve [(rel_path_in_zip, abs_path_on_disk, size), ...] para los
+    archivos físicos del UserProgram que existen en disco (un solo stat
+    por archivo).
     """
-    from app.models.program_step import ProgramStep
-    program_step_ids = {
-        ps.id for ps in ProgramStep.query.filter_by(
-            program_id=up.program_id
-        ).all()
-    }
+    docs_root = user_docs_root()
     out = []
-    subs = Submission.query.filter_by(user_id=up.user_id).all()
-    for s in subs:
-        if s.program_step_id not in program_step_ids:
+    for s in submissions:
+        if s.program_step_id not in step_ids or not s.file_path:
             continue
-        if not s.file_path:
-            continue
-        abs_path = Path(Config.UPLOAD_FOLDER) / s.file_path
-        if not abs_path.exists():
+        abs_path = docs_root / s.file_path
+        try:
+            size = abs_path.stat().st_size
+        except OSError:
             continue
         rel = f'documents/user_{up.user_id}/{Path(s.file_path).name}'
-        out.append((rel, abs_path, s.id))
+        out.append((rel, abs_path, size))
     return out
 
 
@@ -364,12 +310,119 @@ def _build_summary_csv(items: list) -> str:
     return buf.getvalue()
 
 
-def _sha256_of_file(path: Path) -> str:
-    h = hashlib.sha256()
-    with open(path, 'rb') as f:
-        for chunk in iter(lambda: f.read(64 * 1024), b''):
-            h.update(chunk)
-    return h.hexdigest()
+class _HashingWriter:
+    """
+    Envoltura de solo-escritura que calcula SHA-256 y tamaño conforme se
+    escriben los bytes del ZIP, para no releer el archivo al terminar.
+
+    No expone `seek`: zipfile la trata como stream no-seekable y escribe
+    cada entrada una sola vez (con data descriptor) en lugar de regresar a
+    reescribir los headers locales, así el hash coincide con el archivo final.
+    """
+
+    def __init__(self, fp):
+        self._fp = fp
+        self._hash = hashlib.sha256()
+        self._pos = 0
+
+    def write(self, data) -> int:
+        self._fp.write(data)
+        self._hash.update(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self) -> None:
+        self._fp.flush()
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+def _compress_type_for(rel_path: str) -> int:
+    if Path(rel_path).suffix.lower() in _STORED_EXTENSIONS:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def _read_if_small(entry: tuple) -> Optional[bytes]:
+    _rel, abs_path, size = entry
+    if size > _INLINE_READ_LIMIT:
+        return None
+    with open(abs_path, 'rb') as f:
+        return f.read()
+
+
+def _iter_file_payloads(files: list):
+    """
+    Genera (entry, data) en el mismo orden de `files`. Con muchos archivos,
+    un pool de hilos lee por adelantado (ventana acotada) mientras el
+    llamador escribe el ZIP; `data` es None para archivos grandes, que se
+    copian en streaming desde disco.
+    """
+    # Bajo eventlet los hilos del pool serían greenlets y la lectura de disco
+    # no cede: no hay nada que solapar.
+    if len(files) < _PARALLEL_MIN_FILES or is_green():
+        for entry in files:
+            yield entry, _read_if_small(entry)
+        return
+
+    from collections import deque
+    from concurrent.futures import ThreadPoolExecutor
+
+    window = _READ_WORKERS * 2
+    with ThreadPoolExecutor(
+        max_workers=_READ_WORKERS, thread_name_prefix='purge-zip'
+    ) as pool:
+        pending = deque()
+        it = iter(files)
+        for entry in it:
+            pending.append((entry, pool.submit(_read_if_small, entry)))
+            if len(pending) >= window:
+                break
+        while pending:
+            entry, fut = pending.popleft()
+            yield entry, fut.result()
+            nxt = next(it, None)
+            if nxt is not None:
+                pending.append((nxt, pool.submit(_read_if_small, nxt)))
+
+
+def _write_archive(
+    tmp_path: Path,
+    manifest: dict,
+    summary_csv: str,
+    files: list,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+) -> tuple:
+    """
+    Escribe el ZIP en tmp_path en una sola pasada. Devuelve (size, sha256).
+    """
+    total = len(files)
+    with open(tmp_path, 'wb') as raw:
+        out = _HashingWriter(raw)
+        with zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr(
+                'manifest.json',
+                json.dumps(manifest, ensure_ascii=False, indent=2),
+            )
+            zf.writestr('summary.csv', summary_csv)
+
+            for done, (entry, data) in enumerate(_iter_file_payloads(files), 1):
+                rel, abs_path, _size = entry
+                compress_type = _compress_type_for(rel)
+                if data is None:
+                    zf.write(abs_path, arcname=rel, compress_type=compress_type)
+                else:
+                    zinfo = zipfile.ZipInfo.from_file(abs_path, arcname=rel)
+                    zinfo.compress_type = compress_type
+                    zf.writestr(zinfo, data)
+                if progress_callback and (done % _PROGRESS_EVERY == 0 or done == total):
+                    progress_callback(done, total)
+        out.flush()
+        return out.tell(), out.hexdigest()
 
 
 def create_purge_run(
@@ -380,17 +433,28 @@ def create_purge_run(
     source_period_id: Optional[int] = None,
     target_period_id: Optional[int] = None,
     notes: Optional[str] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
 ) -> PurgeRun:
     """
     Crea un PurgeRun con su ZIP en instance/backups/purge/<run_id>.zip.
 
     Estado inicial: 'pending_download'. expires_at = now + 7d.
+
+    Para lotes grandes usar la task `app.tasks.purge.build_purge_run`, que
+    llama a esta función fuera del request y reporta avance vía
+    `progress_callback(archivos_escritos, total_archivos)`.
     """
+    from sqlalchemy.orm import selectinload
+
     if purge_type not in PURGE_TYPES:
         raise InvalidPurgeType(f'purge_type inválido: {purge_type}')
 
     ups = (
         UserProgram.query
+        .options(
+            selectinload(UserProgram.user),
+            selectinload(UserProgram.program),
+        )
         .filter(UserProgram.id.in_(list(user_program_ids)))
         .all()
     )
@@ -401,14 +465,17 @@ def create_purge_run(
     archive_path = _archive_path_for(run_id)
     tmp_path = archive_path.with_suffix('.zip.tmp')
 
+    data = _prefetch_archive_data(ups)
+
     # Construir lista de items (similar al list_candidates pero por id)
     items_meta = []
+    manifest_items = []
+    files = []
     for up in ups:
-        count, total = _files_count_for(up)
-        ap = (
-            AcademicPeriod.query.get(up.admission_period_id)
-            if up.admission_period_id else None
-        )
+        subs = data['submissions'].get(up.user_id, [])
+        up_files = _user_files(up, subs, data['step_ids'].get(up.program_id, set()))
+        files.extend(up_files)
+        ap = data['periods'].get(up.admission_period_id)
         items_meta.append({
             'user_program_id': up.id,
             'user_id': up.user_id,
@@ -417,9 +484,12 @@ def create_purge_run(
             'program_name': up.program.name if up.program else None,
             'admission_status': up.admission_status,
             'admission_period': ap.name if ap else None,
-            'files_count': count,
-            'total_size_bytes': total,
+            'files_count': len(up_files),
+            'total_size_bytes': sum(size for _r, _p, size in up_files),
         })
+        manifest_items.append(_serialize_user_program(
+            up, subs, data['history'].get(up.user_id, []),
+        ))
 
     manifest = {
         'run_id': run_id,
@@ -430,23 +500,17 @@ def create_purge_run(
         'source_period_id': source_period_id,
         'target_period_id': target_period_id,
         'item_count': len(ups),
-        'items': [_serialize_user_program(up) for up in ups],
+        'items': manifest_items,
     }
 
     try:
-        with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-            zf.writestr(
-                'manifest.json',
-                json.dumps(manifest, ensure_ascii=False, indent=2),
-            )
-            zf.writestr(
-                'summary.csv',
-                _build_summary_csv(items_meta),
-            )
-            for up in ups:
-                for rel, abs_path, _sub_id in _walk_user_files(up):
-                    zf.write(abs_path, arcname=rel)
-
+        # zipfile + hashing fuera del hub de eventlet
+        size_bytes, sha = offload_cpu(
+            _write_archive,
+            tmp_path, manifest, _build_summary_csv(items_meta), files,
+            progress_callback=progress_callback,
+            label='purge_archive',
+        )
         os.replace(tmp_path, archive_path)
     except Exception:
         if tmp_path.exists():
@@ -456,9 +520,6 @@ def create_purge_run(
                 pass
         raise
 
-    size_bytes = archive_path.stat().st_size
-    sha = _sha256_of_file(archive_path)
-
     run = PurgeRun(
         run_id=run_id,
         initiated_by=initiated_by_id,
@@ -614,7 +675,7 @@ def confirm_purge(run_id: str, confirmer_user_id: int) -> dict:
 
             for s in subs:
                 if s.file_path:
-                    full = Path(Config.UPLOAD_FOLDER) / s.file_path
+                    full = user_doc_path(s.file_path)
                     if full.exists():
                         try:
                             full.unlink()
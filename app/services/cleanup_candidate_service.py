@@ -0,0 +1,351 @@
+# app/services/cleanup_candidate_service.py
+"""
+Candidatos a limpieza y purga, una sentencia SQL por categoría.
+
+Cada categoría se expresa como una sola consulta con joins a usuario,
+programa y periodo, conteo de archivos como subconsulta agrupada
+(file_inventory_service.submission_totals_*) y el total en la misma
+sentencia (COUNT(*) OVER ()). La cantidad de consultas no depende del
+número de candidatos.
+
+Categorías:
+  - admission_expired_with_files: aspirantes 'expired' con archivos presentes
+  - admission_delta3_plus:        admisión sin terminar con 2+ periodos
+                                  cerrados desde su periodo de admisión
+                                  (suma acumulada por ventana sobre el código)
+  - retention_policy:             UserProgram vencidos por alguna
+                                  RetentionPolicy con archivos en su archive
+                                  (una rama UNION ALL por política)
+  - inactive_students:            inscritos sin inscripción semestral
+                                  confirmada en el periodo activo
+
+Uso:
+  - get_candidates(category, page, per_page) → (items, total)
+  - iter_candidates(category) → recorre todos en streaming (yield_per)
+"""
+
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
+
+from sqlalchemy import and_, case, func, literal, or_, select, union_all
+
+from app import db
+from app.models.academic_period import AcademicPeriod
+from app.models.program import Program
+from app.models.retention_policy import RetentionPolicy
+from app.models.semester_enrollment import SemesterEnrollment
+from app.models.user import User
+from app.models.user_program import UserProgram
+from app.services.file_inventory_service import (
+    submission_totals_by_archive, submission_totals_by_program,
+)
+from app.utils.period_calendar import get_period_calendar
+
+DEFAULT_PER_PAGE = 50
+STREAM_BATCH_SIZE = 500
+
+# Estados de admisión sin terminar (mismo criterio que
+# cleanup_expired_admission_files)
+PENDING_ADMISSION_STATUSES = ('in_progress', 'interview_completed', 'deliberation')
+MIN_PERIODS_ELAPSED = 2
+
+
+class UnknownCategory(ValueError):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# Piezas comunes
+# ---------------------------------------------------------------------------
+
+def _candidate_select(*extra_columns):
+    """SELECT de UserProgram con usuario y programa, más las columnas dadas."""
+    return (
+        select(
+            UserProgram.id.label('user_program_id'),
+            UserProgram.user_id.label('user_id'),
+            User.first_name.label('first_name'),
+            User.last_name.label('last_name'),
+            User.mother_last_name.label('mother_last_name'),
+            User.email.label('email'),
+            Program.name.label('program_name'),
+            UserProgram.admission_status.label('admission_status'),
+            *extra_columns,
+        )
+        .select_from(UserProgram)
+        .join(User, User.id == UserProgram.user_id)
+        .outerjoin(Program, Program.id == UserProgram.program_id)
+    )
+
+
+def _periods_elapsed():
+    """
+    Subconsulta (period_id, name, elapsed): periodos con código posterior
+    cuya admisión ya cerró, igual que PeriodCalendar.closed_since. Es una
+    suma acumulada sobre los periodos ordenados por código descendente,
+    excluyendo la fila actual.
+    """
+    today = datetime.utcnow().date()
+    closed = case((AcademicPeriod.admission_end_date <= today, 1), else_=0)
+    elapsed = func.sum(closed).over(
+        order_by=AcademicPeriod.code.desc(),
+        rows=(None, -1),
+    )
+    return select(
+        AcademicPeriod.id.label('period_id'),
+        AcademicPeriod.name.label('name'),
+        func.coalesce(elapsed, 0).label('elapsed'),
+    ).subquery()
+
+
+def _full_name(row) -> str:
+    return f"{row.first_name} {row.last_name} {row.mother_last_name or ''}".strip()
+
+
+def _item(row, **extra) -> dict:
+    item = {
+        'user_program_id': row.user_program_id,
+        'user_id': row.user_id,
+        'name': _full_name(row),
+        'email': row.email,
+        'program_name': row.program_name,
+        'admission_status': row.admission_status,
+    }
+    item.update(extra)
+    return item
+
+
+# ---------------------------------------------------------------------------
+# Categorías: cada una devuelve (subconsulta, orden, fila→dict) o None si
+# no puede haber candidatos (sin periodo activo, sin políticas)
+# ---------------------------------------------------------------------------
+
+def _expired_with_files():
+    totals = submission_totals_by_program()
+    rows = (
+        _candidate_select(
+            AcademicPeriod.name.label('admission_period'),
+            totals.c.files.label('files_count'),
+            totals.c.bytes.label('total_size_bytes'),
+        )
+        .join(totals, and_(
+            totals.c.user_id == UserProgram.user_id,
+            totals.c.program_id == UserProgram.program_id,
+        ))
+        .outerjoin(AcademicPeriod, AcademicPeriod.id == UserProgram.admission_period_id)
+        .where(UserProgram.admission_status == 'expired')
+        .subquery()
+    )
+
+    def to_dict(row):
+        return _item(
+            row,
+            admission_period=row.admission_period,
+            periods_elapsed=None,
+            files_count=row.files_count,
+            total_size_bytes=int(row.total_size_bytes),
+        )
+
+    return rows, [rows.c.user_program_id], to_dict
+
+
+def _admission_delta3_plus():
+    totals = submission_totals_by_program()
+    periods = _periods_elapsed()
+    rows = (
+        _candidate_select(
+            periods.c.name.label('admission_period'),
+            periods.c.elapsed.label('periods_elapsed'),
+            func.coalesce(totals.c.files, 0).label('files_count'),
+            func.coalesce(totals.c.bytes, 0).label('total_size_bytes'),
+        )
+        .join(periods, periods.c.period_id == UserProgram.admission_period_id)
+        .outerjoin(totals, and_(
+            totals.c.user_id == UserProgram.user_id,
+            totals.c.program_id == UserProgram.program_id,
+        ))
+        .where(
+            UserProgram.admission_status.in_(PENDING_ADMISSION_STATUSES),
+            periods.c.elapsed >= MIN_PERIODS_ELAPSED,
+        )
+        .subquery()
+    )
+
+    def to_dict(row):
+        return _item(
+            row,
+            admission_period=row.admission_period,
+            periods_elapsed=row.periods_elapsed,
+            files_count=row.files_count,
+            total_size_bytes=int(row.total_size_bytes),
+        )
+
+    return rows, [rows.c.user_program_id], to_dict
+
+
+def _retention_policy():
+    policies = [
+        p for p in (
+            RetentionPolicy.query
+            .filter_by(keep_forever=False)
+            .order_by(RetentionPolicy.id)
+            .all()
+        )
+        if p.keep_years
+    ]
+    if not policies:
+        return None
+
+    totals = submission_totals_by_archive()
+    now = datetime.utcnow()
+    branches = []
+    for order, policy in enumerate(policies):
+        cutoff = now - timedelta(days=policy.keep_years * 365)
+        branches.append(
+            _candidate_select(
+                literal(order).label('policy_order'),
+                literal(policy.archive_id).label('archive_id'),
+                literal(policy.keep_years).label('keep_years'),
+                literal(policy.apply_after).label('apply_after'),
+                totals.c.files.label('files_count'),
+                totals.c.bytes.label('total_size_bytes'),
+            )
+            .join(totals, and_(
+                totals.c.user_id == UserProgram.user_id,
+                totals.c.archive_id == policy.archive_id,
+            ))
+            .where(
+                UserProgram.admission_status == policy.apply_after,
+                UserProgram.updated_at < cutoff,
+            )
+        )
+    rows = union_all(*branches).subquery()
+
+    def to_dict(row):
+        return _item(
+            row,
+            admission_period=None,
+            periods_elapsed=None,
+            files_count=row.files_count,
+            total_size_bytes=int(row.total_size_bytes),
+            policy={
+                'archive_id': row.archive_id,
+                'keep_years': row.keep_years,
+                'apply_after': row.apply_after,
+            },
+        )
+
+    return rows, [rows.c.policy_order, rows.c.user_program_id], to_dict
+
+
+def _inactive_students():
+    active = get_period_calendar().active
+    if active is None:
+        return None
+
+    # Primera inscripción del periodo activo por UserProgram
+    first = func.row_number().over(
+        partition_by=SemesterEnrollment.user_program_id,
+        order_by=SemesterEnrollment.id,
+    )
+    enrollment = (
+        select(
+            SemesterEnrollment.user_program_id,
+            SemesterEnrollment.status,
+            SemesterEnrollment.enrollment_confirmed,
+            first.label('rn'),
+        )
+        .where(SemesterEnrollment.academic_period_id == active.id)
+        .subquery()
+    )
+    rows = (
+        _candidate_select(
+            UserProgram.current_semester.label('current_semester'),
+            enrollment.c.user_program_id.label('enrollment_up_id'),
+            enrollment.c.status.label('enrollment_status'),
+        )
+        .outerjoin(enrollment, and_(
+            enrollment.c.user_program_id == UserProgram.id,
+            enrollment.c.rn == 1,
+        ))
+        .where(
+            UserProgram.admission_status == 'enrolled',
+            or_(
+                enrollment.c.user_program_id.is_(None),
+                enrollment.c.enrollment_confirmed.is_(False),
+            ),
+        )
+        .subquery()
+    )
+
+    def to_dict(row):
+        return _item(
+            row,
+            current_semester=row.current_semester,
+            active_period=active.name,
+            has_enrollment=row.enrollment_up_id is not None,
+            enrollment_status=row.enrollment_status,
+        )
+
+    return rows, [rows.c.user_program_id], to_dict
+
+
+_CATEGORIES = {
+    'admission_expired_with_files': _expired_with_files,
+    'admission_delta3_plus': _admission_delta3_plus,
+    'retention_policy': _retention_policy,
+    'inactive_students': _inactive_students,
+}
+
+CATEGORIES = tuple(_CATEGORIES)
+
+
+def _build(category: str):
+    builder = _CATEGORIES.get(category)
+    if builder is None:
+        raise UnknownCategory(f'Categoría desconocida: {category}')
+    return builder()
+
+
+# ---------------------------------------------------------------------------
+# API pública
+# ---------------------------------------------------------------------------
+
+def get_candidates(category: str, page: Optional[int] = None,
+                   per_page: int = DEFAULT_PER_PAGE) -> tuple[list, int]:
+    """
+    Candidatos de una categoría ordenados por UserProgram, y el total.
+    Sin `page` devuelve todos. El total sale de la misma consulta; solo si
+    la página pedida queda fuera de rango se cuenta aparte.
+    """
+    built = _build(category)
+    if built is None:
+        return [], 0
+    rows, order_by, to_dict = built
+
+    stmt = select(rows, func.count().over().label('total')).order_by(*order_by)
+    if page:
+        stmt = stmt.limit(per_page).offset((max(page, 1) - 1) * per_page)
+    result = db.session.execute(stmt).all()
+
+    if result:
+        total = result[0].total
+    elif page and page > 1:
+        total = db.session.execute(select(func.count()).select_from(rows)).scalar()
+    else:
+        total = 0
+    return [to_dict(row) for row in result], total
+
+
+def iter_candidates(category: str, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[dict]:
+    """Recorre todos los candidatos de una categoría sin materializar la lista."""
+    built = _build(category)
+    if built is None:
+        return
+    rows, order_by, to_dict = built
+
+    result = db.session.execute(
+        select(rows).order_by(*order_by).execution_options(yield_per=batch_size)
+    )
+    for row in result:
+        yield to_dict(row)
@@ -1,11 +1,20 @@
 # app/services/dashboard_service.py
 
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, case
 from app import db
 from app.models import User, Program, Submission, UserProgram, Event, EventSlot, ProgramStep, Step, Phase
 from datetime import datetime, timedelta
+from app.utils import dashboard_cache
 from app.utils.datetime_utils import now_local
 
+# Estados en los que se evalúa si la solicitud está aprobada o rechazada
+_IN_REVIEW_STATUSES = ('in_progress', 'interview_completed', 'deliberation')
+
+_METRIC_KEYS = (
+    'total_applicants', 'pending_reviews', 'approved_applications',
+    'rejected_applications', 'interviews_scheduled', 'total_submissions',
+)
+
 
 class DashboardService:
     """Servicio para obtener métricas y datos de los dashboards"""
@@ -170,87 +179,115 @@ class DashboardService:
         Returns:
             dict con métricas de admisión
         """
-        # Total de solicitantes activos en este programa (no rechazados ni expirados,
-        # cuentas desactivadas se excluyen)
-        total_applicants = db.session.query(func.count(UserProgram.user_id)).join(
+        metrics = dashboard_cache.get_program_metrics(
+            [program_id], DashboardService._compute_program_metrics
+        )
+        return DashboardService._finalize_metrics(metrics.get(program_id, {}))
+
+    @staticmethod
+    def _finalize_metrics(counts):
+        metrics = {key: counts.get(key, 0) for key in _METRIC_KEYS}
+        metrics['in_process'] = (
+            metrics['total_applicants']
+            - metrics['approved_applications']
+            - metrics['rejected_applications']
+        )
+        return metrics
+
+    @staticmethod
+    def _compute_program_metrics(program_ids):
+        """
+        Calcula las métricas de varios programas con cuatro consultas agrupadas
+        por programa, sin importar cuántos programas o solicitantes haya.
+
+        Solo cuentan solicitantes con cuenta activa. Una solicitud está
+        aprobada si todos sus documentos del programa están en 'approved'
+        y rechazada si no lo está y alguno está en 'rejected'.
+
+        Returns:
+            dict {program_id: {métrica: valor}} (sin 'in_process')
+        """
+        from app.models.event import EventWindow
+
+        program_ids = list(program_ids)
+        result = {pid: dict.fromkeys(_METRIC_KEYS, 0) for pid in program_ids}
+        if not program_ids:
+            return result
+
+        # Solicitantes activos por programa (no rechazados ni expirados)
+        applicants = db.session.query(
+            UserProgram.program_id, func.count(UserProgram.user_id)
+        ).join(
             User, UserProgram.user_id == User.id
         ).filter(
-            UserProgram.program_id == program_id,
+            UserProgram.program_id.in_(program_ids),
             UserProgram.admission_status.notin_(['rejected', 'expired']),
             User.is_active == True,  # noqa: E712
-        ).scalar() or 0
-
-        # Documentos pendientes de revisión (submissions con status 'review')
-        pending_reviews = db.session.query(func.count(Submission.id)).join(
+        ).group_by(UserProgram.program_id).all()
+        for pid, total in applicants:
+            result[pid]['total_applicants'] = total
+
+        # Documentos totales y pendientes de revisión por programa
+        submissions = db.session.query(
+            ProgramStep.program_id,
+            func.count(Submission.id),
+            func.sum(case((Submission.status == 'review', 1), else_=0)),
+        ).join(
             ProgramStep, Submission.program_step_id == ProgramStep.id
         ).filter(
-            ProgramStep.program_id == program_id,
-            Submission.status == 'review'
-        ).scalar() or 0
-
-        # Solicitudes aprobadas (todos los documentos en 'approved')
-        # Obtener usuarios con todas sus submissions aprobadas
-        approved_count = 0
-        rejected_count = 0
-
-        applicants = db.session.query(UserProgram).join(
+            ProgramStep.program_id.in_(program_ids)
+        ).group_by(ProgramStep.program_id).all()
+        for pid, total, review in submissions:
+            result[pid]['total_submissions'] = total
+            result[pid]['pending_reviews'] = int(review or 0)
+
+        # Estado de cada solicitud: MIN/MAX sobre CASE equivalen a
+        # bool_and / bool_or y funcionan también en SQLite
+        per_applicant = db.session.query(
+            UserProgram.program_id.label('program_id'),
+            func.min(case((Submission.status == 'approved', 1), else_=0)).label('all_approved'),
+            func.max(case((Submission.status == 'rejected', 1), else_=0)).label('has_rejected'),
+        ).join(
             User, UserProgram.user_id == User.id
+        ).join(
+            Submission, Submission.user_id == UserProgram.user_id
+        ).join(
+            ProgramStep, and_(
+                Submission.program_step_id == ProgramStep.id,
+                ProgramStep.program_id == UserProgram.program_id,
+            )
         ).filter(
-            UserProgram.program_id == program_id,
-            UserProgram.admission_status.in_(['in_progress', 'interview_completed', 'deliberation']),
+            UserProgram.program_id.in_(program_ids),
+            UserProgram.admission_status.in_(_IN_REVIEW_STATUSES),
             User.is_active == True,  # noqa: E712
-        ).all()
-
-        for applicant in applicants:
-            # Obtener submissions del usuario para este programa
-            submissions = db.session.query(Submission).join(
-                ProgramStep, Submission.program_step_id == ProgramStep.id
-            ).filter(
-                Submission.user_id == applicant.user_id,
-                ProgramStep.program_id == program_id
-            ).all()
-
-            if submissions:
-                # Verificar si todos están aprobados
-                all_approved = all(s.status == 'approved' for s in submissions)
-                has_rejected = any(s.status == 'rejected' for s in submissions)
-
-                if all_approved:
-                    approved_count += 1
-                elif has_rejected:
-                    rejected_count += 1
-
-        # Entrevistas programadas (EventSlots con status 'booked' para este programa)
-        from app.models.event import EventWindow
-        interviews_scheduled = db.session.query(func.count(EventSlot.id)).join(
+        ).group_by(UserProgram.program_id, UserProgram.user_id).subquery()
+
+        outcomes = db.session.query(
+            per_applicant.c.program_id,
+            func.sum(case((per_applicant.c.all_approved == 1, 1), else_=0)),
+            func.sum(case((and_(per_applicant.c.all_approved == 0,
+                                per_applicant.c.has_rejected == 1), 1), else_=0)),
+        ).group_by(per_applicant.c.program_id).all()
+        for pid, approved, rejected in outcomes:
+            result[pid]['approved_applications'] = int(approved or 0)
+            result[pid]['rejected_applications'] = int(rejected or 0)
+
+        # Entrevistas programadas (EventSlots con status 'booked')
+        interviews = db.session.query(
+            Event.program_id, func.count(EventSlot.id)
+        ).join(
             EventWindow, EventSlot.event_window_id == EventWindow.id
         ).join(
             Event, EventWindow.event_id == Event.id
         ).filter(
-            Event.program_id == program_id,
+            Event.program_id.in_(program_ids),
             Event.type == 'interview',
             EventSlot.status == 'booked'
-        ).scalar() or 0
-
-        # Solicitudes rechazadas
-        # Ya calculado arriba
-
-        # Documentos totales subidos
-        total_submissions = db.session.query(func.count(Submission.id)).join(
-            ProgramStep, Submission.program_step_id == ProgramStep.id
-        ).filter(
-            ProgramStep.program_id == program_id
-        ).scalar() or 0
+        ).group_by(Event.program_id).all()
+        for pid, total in interviews:
+            result[pid]['interviews_scheduled'] = total
 
-        return {
-            'total_applicants': total_applicants,
-            'pending_reviews': pending_reviews,
-            'approved_applications': approved_count,
-            'rejected_applications': rejected_count,
-            'interviews_scheduled': interviews_scheduled,
-            'total_submissions': total_submissions,
-            'in_process': total_applicants - approved_count - rejected_count
-        }
+        return result
 
     @staticmethod
     def get_postgraduate_admin_metrics():
@@ -260,59 +297,51 @@ class DashboardService:
         Returns:
             dict con métricas globales de todos los programas
         """
-        # Total de programas activos
-        total_programs = db.session.query(func.count(Program.id)).scalar() or 0
-
-        # Total de solicitantes activos en todos los programas (no rechazados ni expirados)
-        total_applicants = db.session.query(func.count(UserProgram.id)).filter(
-            UserProgram.admission_status.notin_(['rejected', 'expired'])
-        ).scalar() or 0
-
-        # Total de estudiantes inscritos
-        total_students = db.session.query(func.count(UserProgram.id)).filter(
-            UserProgram.admission_status == 'enrolled'
-        ).scalar() or 0
-
-        # Documentos pendientes de revisión globalmente
-        pending_reviews = db.session.query(func.count(Submission.id)).filter(
-            Submission.status == 'review'
-        ).scalar() or 0
-
-        # Entrevistas pendientes de programar
-        # (usuarios con documentos aprobados pero sin entrevista)
-        interviews_pending = 0  # Simplificado por ahora
-
-        # Métricas por programa
-        programs = db.session.query(Program).all()
-        programs_stats = []
-
-        for program in programs:
-            applicants_count = db.session.query(func.count(UserProgram.user_id)).filter(
-                UserProgram.program_id == program.id,
-                UserProgram.admission_status.notin_(['rejected', 'expired'])
-            ).scalar() or 0
-
-            pending_docs = db.session.query(func.count(Submission.id)).join(
+        return dashboard_cache.get_global_metrics(DashboardService._compute_postgraduate_metrics)
+
+    @staticmethod
+    def _compute_postgraduate_metrics():
+        """Métricas globales con tres consultas (agrupadas por programa)."""
+        programs = db.session.query(Program.id, Program.name, Program.slug).all()
+
+        # Solicitantes (no rechazados ni expirados) e inscritos por programa
+        enrollment_rows = db.session.query(
+            UserProgram.program_id,
+            func.sum(case((UserProgram.admission_status.notin_(['rejected', 'expired']), 1), else_=0)),
+            func.sum(case((UserProgram.admission_status == 'enrolled', 1), else_=0)),
+        ).group_by(UserProgram.program_id).all()
+        applicants_by_program = {pid: int(applicants or 0) for pid, applicants, _ in enrollment_rows}
+        total_students = sum(int(enrolled or 0) for _, _, enrolled in enrollment_rows)
+
+        # Documentos pendientes de revisión por programa
+        pending_by_program = dict(
+            db.session.query(
+                ProgramStep.program_id, func.count(Submission.id)
+            ).join(
                 ProgramStep, Submission.program_step_id == ProgramStep.id
             ).filter(
-                ProgramStep.program_id == program.id,
                 Submission.status == 'review'
-            ).scalar() or 0
+            ).group_by(ProgramStep.program_id).all()
+        )
 
-            programs_stats.append({
+        programs_stats = [
+            {
                 'id': program.id,
                 'name': program.name,
                 'slug': program.slug,
-                'applicants': applicants_count,
-                'pending_docs': pending_docs
-            })
+                'applicants': applicants_by_program.get(program.id, 0),
+                'pending_docs': pending_by_program.get(program.id, 0),
+            }
+            for program in programs
+        ]
 
         return {
-            'total_programs': total_programs,
-            'total_applicants': total_applicants,
+            'total_programs': len(programs),
+            'total_applicants': sum(applicants_by_program.values()),
             'total_students': total_students,
-            'pending_reviews': pending_reviews,
-            'interviews_pending': interviews_pending,
+            'pending_reviews': sum(pending_by_program.values()),
+            # Entrevistas pendientes de programar: simplificado por ahora
+            'interviews_pending': 0,
             'programs_stats': programs_stats
         }
 
@@ -362,86 +391,14 @@ class DashboardService:
         Returns:
             dict con métricas combinadas
         """
-        if not program_ids:
-            return {
-                'total_applicants': 0,
-                'pending_reviews': 0,
-                'approved_applications': 0,
-                'rejected_applications': 0,
-                'interviews_scheduled': 0,
-                'total_submissions': 0,
-                'in_process': 0
-            }
-
-        # Total de solicitantes activos en los programas seleccionados (no rechazados ni expirados)
-        total_applicants = db.session.query(func.count(UserProgram.user_id)).filter(
-            UserProgram.program_id.in_(program_ids),
-            UserProgram.admission_status.notin_(['rejected', 'expired'])
-        ).scalar() or 0
-
-        # Documentos pendientes de revisión en todos los programas
-        pending_reviews = db.session.query(func.count(Submission.id)).join(
-            ProgramStep, Submission.program_step_id == ProgramStep.id
-        ).filter(
-            ProgramStep.program_id.in_(program_ids),
-            Submission.status == 'review'
-        ).scalar() or 0
-
-        # Total de submissions en todos los programas
-        total_submissions = db.session.query(func.count(Submission.id)).join(
-            ProgramStep, Submission.program_step_id == ProgramStep.id
-        ).filter(
-            ProgramStep.program_id.in_(program_ids)
-        ).scalar() or 0
-
-        # Calcular aprobados y rechazados
-        approved_count = 0
-        rejected_count = 0
-
-        for program_id in program_ids:
-            applicants = db.session.query(UserProgram).filter(
-                UserProgram.program_id == program_id,
-                UserProgram.admission_status.in_(['in_progress', 'interview_completed', 'deliberation'])
-            ).all()
-
-            for applicant in applicants:
-                submissions = db.session.query(Submission).join(
-                    ProgramStep, Submission.program_step_id == ProgramStep.id
-                ).filter(
-                    Submission.user_id == applicant.user_id,
-                    ProgramStep.program_id == program_id
-                ).all()
-
-                if submissions:
-                    all_approved = all(s.status == 'approved' for s in submissions)
-                    has_rejected = any(s.status == 'rejected' for s in submissions)
-
-                    if all_approved:
-                        approved_count += 1
-                    elif has_rejected:
-                        rejected_count += 1
-
-        # Entrevistas programadas en todos los programas
-        from app.models.event import EventWindow
-        interviews_scheduled = db.session.query(func.count(EventSlot.id)).join(
-            EventWindow, EventSlot.event_window_id == EventWindow.id
-        ).join(
-            Event, EventWindow.event_id == Event.id
-        ).filter(
-            Event.program_id.in_(program_ids),
-            Event.type == 'interview',
-            EventSlot.status == 'booked'
-        ).scalar() or 0
-
-        return {
-            'total_applicants': total_applicants,
-            'pending_reviews': pending_reviews,
-            'approved_applications': approved_count,
-            'rejected_applications': rejected_count,
-            'interviews_scheduled': interviews_scheduled,
-            'total_submissions': total_submissions,
-            'in_process': total_applicants - approved_count - rejected_count
+        per_program = dashboard_cache.get_program_metrics(
+            program_ids, DashboardService._compute_program_metrics
+        )
+        combined = {
+            key: sum(metrics.get(key, 0) for metrics in per_program.values())
+            for key in _METRIC_KEYS
         }
+        return DashboardService._finalize_metrics(combined)
 
     @staticmethod
     def get_recent_submissions_multiple(program_ids, limit=5):
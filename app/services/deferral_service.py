@@ -27,6 +27,7 @@ from app.services.notification_service import NotificationService
 from app.services.user_history_service import UserHistoryService
 from app.sockets.emitters import emit_user_and_coordinators, emit_to_coordinators
 from app.utils.datetime_utils import now_local
+from app.utils.period_calendar import get_period_calendar
 
 logger = logging.getLogger(__name__)
 
@@ -74,18 +75,12 @@ def _count_active_or_used_deferrals(user_program_id: int) -> int:
 def _get_next_period(current_period_id: int) -> Optional[AcademicPeriod]:
     """
     Retorna el siguiente periodo académico disponible (por start_date)
-    posterior al periodo actual.
+    posterior al periodo actual. Se busca en el calendario de periodos.
     """
-    current = AcademicPeriod.query.get(current_period_id)
-    if not current:
+    following = get_period_calendar().next(current_period_id)
+    if following is None:
         return None
-
-    return (
-        AcademicPeriod.query
-        .filter(AcademicPeriod.start_date > current.start_date)
-        .order_by(AcademicPeriod.start_date.asc())
-        .first()
-    )
+    return db.session.get(AcademicPeriod, following.id)
 
 
 def _reset_docs_for_deferral(user_program_id: int) -> None:
@@ -252,7 +252,7 @@ def accept_applicant(user_id: int, program_id: int, decision_by: int, notes: str
         UserProgram actualizado
     """
     from app.models.acceptance_document import AcceptanceDocument
-    from app.utils.files import save_user_doc
+    from app.utils.files import record_file_inventory, save_user_doc
 
     up = get_user_program(user_id, program_id)
 
@@ -286,6 +286,7 @@ def accept_applicant(user_id: int, program_id: int, decision_by: int, notes: str
             )
             db.session.add(dictamen)
         dictamen.file_path = file_path
+        record_file_inventory(dictamen, file_path)
         dictamen.uploaded_by_id = decision_by
         dictamen.uploaded_at = now_local()
         dictamen.status = 'uploaded'
@@ -14,12 +14,41 @@ Variables disponibles:
   {{period_code}}, {{period_name}},
   {{acceptance_date}}, {{coordinator_name}}, {{current_date}},
   {{control_number}}
+
+Caché de plantillas compiladas:
+  Cada archivo de plantilla se compila una sola vez por proceso y se
+  invalida cuando cambia su mtime/tamaño en disco:
+    - HTML → lista de segmentos (texto literal / nombre de variable); la
+      sustitución es una sola pasada con ''.join.
+    - DOCX → bytes del archivo en memoria; al rellenar se hace una sola
+      sustitución regex por run (solo en runs que contienen '{{').
+  La FontConfiguration de weasyprint también se reutiliza entre renders,
+  una por hilo (no es segura para usarse desde varios hilos a la vez).
+
+Lotes (generate_batch):
+  Resuelve la plantilla y los datos de toda la cohorte en pocas queries y
+  renderiza en un ProcessPoolExecutor. Devuelve la lista de archivos y,
+  opcionalmente, un ZIP con todos. Si un worker del pool muere, los
+  documentos sin terminar se reintentan aislados y solo el que vuelve a
+  tirar el proceso queda en `errors`.
+  Un proceso daemon no puede crear el pool (worker prefork de Celery): la
+  tarea generate_documents_batch va a la cola 'documents', atendida por un
+  worker -P solo (ver app/tasks/documents.py); si aun así no se puede
+  crear, se renderiza en serie.
 """
+import io
 import locale
+import logging
 import os
-from typing import Optional
+import re
+import threading
+import zipfile
+from typing import Iterable, Optional
 
 from app.utils.datetime_utils import now_local
+from app.utils.offload import offload_cpu
+
+logger = logging.getLogger(__name__)
 
 
 # Nombre de los meses en español (fallback si locale no está disponible)
@@ -34,6 +63,157 @@ def _fecha_larga(dt) -> str:
     return f"{dt.day} de {_MESES[dt.month]} de {dt.year}"
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Compilación de plantillas (caché por proceso, invalidada por mtime)
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Mismo formato de marcador que antes: {{variable}} sin espacios
+_PLACEHOLDER_RE = re.compile(r'\{\{(\w+)\}\}')
+
+_MAX_CACHED_TEMPLATES = 64
+
+# template_abs → ((mtime_ns, size), compilado)
+_compiled_cache: dict = {}
+_compiled_lock = threading.Lock()
+
+# FontConfiguration de weasyprint, una por hilo: offload_cpu renderiza en
+# hilos del tpool y la configuración de fontconfig/pango no es thread-safe
+_font_local = threading.local()
+
+
+def _file_signature(path: str) -> tuple:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _compile_html(path: str) -> tuple:
+    """
+    Divide el HTML en segmentos alternos: texto literal en posiciones pares
+    y nombres de variable en las impares.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return tuple(_PLACEHOLDER_RE.split(f.read()))
+
+
+def _compile_docx(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _get_compiled(path: str, compiler):
+    signature = _file_signature(path)
+    entry = _compiled_cache.get(path)
+    if entry is not None and entry[0] == signature:
+        return entry[1]
+    compiled = compiler(path)
+    with _compiled_lock:
+        if len(_compiled_cache) >= _MAX_CACHED_TEMPLATES:
+            _compiled_cache.clear()
+        _compiled_cache[path] = (signature, compiled)
+    return compiled
+
+
+def _render_segments(segments: tuple, variables: dict) -> str:
+    """Sustituye todas las variables en una sola pasada."""
+    out = list(segments)
+    for i in range(1, len(out), 2):
+        name = out[i]
+        out[i] = str(variables[name]) if name in variables else f'{{{{{name}}}}}'
+    return ''.join(out)
+
+
+def _substitute(text: str, variables: dict) -> str:
+    if '{{' not in text:
+        return text
+    return _PLACEHOLDER_RE.sub(
+        lambda m: str(variables[m.group(1)]) if m.group(1) in variables else m.group(0),
+        text,
+    )
+
+
+def _get_font_config():
+    font_config = getattr(_font_local, 'font_config', None)
+    if font_config is None:
+        from weasyprint.text.fonts import FontConfiguration
+        font_config = _font_local.font_config = FontConfiguration()
+    return font_config
+
+
+def _render_html_file(template_abs: str, variables: dict, output_path: str) -> str:
+    """Render HTML → PDF. Función de módulo para poder usarse en el pool."""
+    try:
+        from weasyprint import HTML
+    except ImportError:
+        raise RuntimeError(
+            "weasyprint no está instalado. "
+            "Ejecuta: pip install weasyprint"
+        )
+
+    segments = _get_compiled(template_abs, _compile_html)
+    html_content = _render_segments(segments, variables)
+    font_config = _get_font_config()
+    HTML(string=html_content, base_url=os.path.dirname(template_abs)).write_pdf(
+        output_path, font_config=font_config,
+    )
+    return output_path
+
+
+def _render_docx_file(template_abs: str, variables: dict, output_path: str) -> str:
+    """Rellena DOCX. Función de módulo para poder usarse en el pool."""
+    try:
+        from docx import Document
+    except ImportError:
+        raise RuntimeError(
+            "python-docx no está instalado. "
+            "Ejecuta: pip install python-docx"
+        )
+
+    doc = Document(io.BytesIO(_get_compiled(template_abs, _compile_docx)))
+
+    def fill(paragraphs):
+        for para in paragraphs:
+            for run in para.runs:
+                if '{{' in run.text:
+                    run.text = _substitute(run.text, variables)
+
+    # Párrafos del documento principal
+    fill(doc.paragraphs)
+
+    # Celdas de tablas
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                fill(cell.paragraphs)
+
+    # Encabezados y pies de página
+    for section in doc.sections:
+        fill(section.header.paragraphs)
+        fill(section.footer.paragraphs)
+
+    doc.save(output_path)
+    return output_path
+
+
+# Mensaje para los documentos cuyo proceso de render muere también al
+# reintentarse aislado
+_POOL_CRASH_ERROR = 'El proceso de render terminó inesperadamente'
+
+_RENDERERS = {
+    'html': (_render_html_file, 'pdf'),
+    'docx': (_render_docx_file, 'docx'),
+}
+
+
+def _render_job(args: tuple) -> tuple:
+    """Trabajo del pool: (user_id, file_type, template_abs, variables, output_path)."""
+    user_id, file_type, template_abs, variables, output_path = args
+    try:
+        _RENDERERS[file_type][0](template_abs, variables, output_path)
+        return user_id, output_path, None
+    except Exception as e:
+        return user_id, None, str(e)
+
+
 class DocumentGenerationService:
 
     # Mapa de variables → funciones (user, program, academic_period) → valor
@@ -89,8 +269,6 @@ class DocumentGenerationService:
         from app.models.program import Program
         from app.models.academic_period import AcademicPeriod
         from app.models.user_program import UserProgram
-        from app.models.document_template import DocumentTemplate
-        from flask import current_app
 
         user = User.query.get_or_404(user_id)
         program = Program.query.get_or_404(program_id)
@@ -99,6 +277,131 @@ class DocumentGenerationService:
             user_id=user_id, program_id=program_id
         ).first()
 
+        template_abs, file_type = DocumentGenerationService._resolve_template(
+            program_id, document_type
+        )
+
+        variables = DocumentGenerationService.get_variables(
+            user, program, period, user_program
+        )
+
+        output_dir = DocumentGenerationService._output_dir_for(user_id)
+
+        timestamp = now_local().strftime('%Y%m%d_%H%M%S')
+        safe_type = document_type.replace('_', '-')
+
+        if file_type == 'html':
+            output_path, filename = DocumentGenerationService._from_html(
+                template_abs, variables, output_dir, safe_type, timestamp
+            )
+            return {'output_path': output_path, 'file_type': 'pdf', 'filename': filename}
+
+        output_path, filename = DocumentGenerationService._from_docx(
+            template_abs, variables, output_dir, safe_type, timestamp
+        )
+        return {'output_path': output_path, 'file_type': 'docx', 'filename': filename}
+
+    @staticmethod
+    def generate_batch(
+        user_ids: Iterable[int],
+        program_id: int,
+        document_type: str,
+        period_id: Optional[int] = None,
+        as_zip: bool = True,
+        max_workers: Optional[int] = None,
+    ) -> dict:
+        """
+        Genera el mismo tipo de documento para varios estudiantes del programa
+        (p.ej. cartas de aceptación de toda una cohorte) en un solo trabajo.
+
+        La plantilla se resuelve y compila una vez; usuarios, UserProgram y
+        coordinador se cargan en bloque. El render corre en un pool de
+        procesos de max_workers (por defecto DOCUMENT_BATCH_WORKERS;
+        1 → en el mismo proceso).
+
+        Returns:
+            {
+                'file_type': 'pdf' | 'docx',
+                'files':     [{'user_id', 'output_path', 'filename'}, ...],
+                'errors':    {user_id: mensaje},
+                'zip_path':  str | None,   # solo si as_zip=True y hubo archivos
+            }
+
+        Raises:
+            ValueError: si no hay plantilla configurada o el archivo no existe.
+        """
+        from flask import current_app
+        from app.models.user import User
+        from app.models.program import Program
+        from app.models.academic_period import AcademicPeriod
+        from app.models.user_program import UserProgram
+
+        if max_workers is None:
+            max_workers = current_app.config.get('DOCUMENT_BATCH_WORKERS')
+        user_ids = list(dict.fromkeys(int(uid) for uid in user_ids))
+        program = Program.query.get_or_404(program_id)
+        period = AcademicPeriod.query.get(period_id) if period_id else None
+
+        template_abs, file_type = DocumentGenerationService._resolve_template(
+            program_id, document_type
+        )
+        render_fn, ext = _RENDERERS[file_type]
+
+        users = {u.id: u for u in User.query.filter(User.id.in_(user_ids)).all()} if user_ids else {}
+        user_programs = {
+            up.user_id: up for up in UserProgram.query.filter(
+                UserProgram.program_id == program_id,
+                UserProgram.user_id.in_(user_ids),
+            ).all()
+        } if user_ids else {}
+
+        timestamp = now_local().strftime('%Y%m%d_%H%M%S')
+        safe_type = document_type.replace('_', '-')
+        filename = f"{safe_type}_{timestamp}.{ext}"
+
+        errors = {}
+        jobs = []
+        for uid in user_ids:
+            user = users.get(uid)
+            if user is None:
+                errors[uid] = 'Usuario no encontrado'
+                continue
+            variables = DocumentGenerationService.get_variables(
+                user, program, period, user_programs.get(uid)
+            )
+            output_path = os.path.join(
+                DocumentGenerationService._output_dir_for(uid), filename
+            )
+            jobs.append((uid, file_type, template_abs, variables, output_path))
+
+        files = []
+        for uid, output_path, error in DocumentGenerationService._run_jobs(jobs, max_workers):
+            if error:
+                errors[uid] = error
+            else:
+                files.append({'user_id': uid, 'output_path': output_path, 'filename': filename})
+
+        zip_path = None
+        if as_zip and files:
+            zip_path = DocumentGenerationService._zip_batch(files, safe_type, timestamp)
+
+        return {
+            'file_type': ext,
+            'files': files,
+            'errors': errors,
+            'zip_path': zip_path,
+        }
+
+    # ──────────────────────────────────────────────────────────────────────────
+    # Métodos privados
+    # ──────────────────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _resolve_template(program_id: int, document_type: str) -> tuple:
+        """Devuelve (ruta absoluta, file_type) de la plantilla activa."""
+        from app.models.document_template import DocumentTemplate
+        from flask import current_app
+
         template = DocumentTemplate.get_for_program(program_id, document_type)
         if not template:
             raise ValueError(
@@ -115,104 +418,122 @@ class DocumentGenerationService:
             raise ValueError(
                 f"El archivo de plantilla no existe en disco: {template.file_path}"
             )
+        if template.file_type not in _RENDERERS:
+            raise ValueError(f"Tipo de plantilla no soportado: {template.file_type}")
+        return template_abs, template.file_type
 
-        variables = DocumentGenerationService.get_variables(
-            user, program, period, user_program
-        )
+    @staticmethod
+    def _output_dir_for(user_id: int) -> str:
+        from flask import current_app
 
         output_dir = os.path.join(
             current_app.instance_path, 'uploads', 'generated', str(user_id)
         )
         os.makedirs(output_dir, exist_ok=True)
+        return output_dir
 
-        timestamp = now_local().strftime('%Y%m%d_%H%M%S')
-        safe_type = document_type.replace('_', '-')
+    @staticmethod
+    def _run_jobs(jobs: list, max_workers: Optional[int]) -> list:
+        """
+        Ejecuta los renders en un pool de procesos (o en serie si no conviene).
+        La espera ocurre fuera del hub de eventlet (offload_cpu).
+        """
+        return offload_cpu(
+            DocumentGenerationService._run_jobs_blocking, jobs, max_workers,
+            label='document_batch',
+        )
 
-        if template.file_type == 'html':
-            output_path, filename = DocumentGenerationService._from_html(
-                template_abs, variables, output_dir, safe_type, timestamp
+    @staticmethod
+    def _run_jobs_blocking(jobs: list, max_workers: Optional[int]) -> list:
+        if max_workers is None:
+            max_workers = min(4, os.cpu_count() or 1)
+        if max_workers <= 1 or len(jobs) <= 1:
+            return [_render_job(job) for job in jobs]
+
+        try:
+            return DocumentGenerationService._run_in_pool(jobs, max_workers)
+        except (AssertionError, OSError) as e:
+            # Dentro de un worker prefork de Celery (daemon) no se pueden
+            # crear procesos hijos: la tarea debe ir a la cola 'documents'.
+            logger.warning(
+                f"[generate_batch] Pool de procesos no disponible ({e}); render en "
+                f"serie. ¿El worker de la cola 'documents' corre con -P solo?"
             )
-            return {'output_path': output_path, 'file_type': 'pdf', 'filename': filename}
+            return [_render_job(job) for job in jobs]
 
-        if template.file_type == 'docx':
-            output_path, filename = DocumentGenerationService._from_docx(
-                template_abs, variables, output_dir, safe_type, timestamp
+    @staticmethod
+    def _run_in_pool(jobs: list, max_workers: int) -> list:
+        """
+        Renderiza en un ProcessPoolExecutor conservando el orden de `jobs`.
+
+        Si un worker muere (BrokenProcessPool: OOM, segfault de pango...),
+        todos los renders sin terminar fallan con él sin saber cuál lo tiró.
+        Esos se reintentan uno a uno, cada uno en su propio pool de un
+        worker, de modo que solo el documento que vuelve a tirar el proceso
+        se reporta como fallido; los ya generados se conservan.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        from concurrent.futures.process import BrokenProcessPool
+
+        results = {}
+        broken = []
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = []
+            for idx, job in enumerate(jobs):
+                try:
+                    futures.append((idx, job, pool.submit(_render_job, job)))
+                except BrokenProcessPool:
+                    broken.append((idx, job))
+            for idx, job, future in futures:
+                try:
+                    results[idx] = future.result()
+                except BrokenProcessPool:
+                    broken.append((idx, job))
+
+        if broken:
+            logger.warning(
+                f"[generate_batch] Pool de procesos roto con {len(broken)} "
+                f"documentos sin terminar; se reintentan uno a uno"
             )
-            return {'output_path': output_path, 'file_type': 'docx', 'filename': filename}
+        for idx, job in broken:
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                try:
+                    results[idx] = pool.submit(_render_job, job).result()
+                except BrokenProcessPool:
+                    results[idx] = (job[0], None, _POOL_CRASH_ERROR)
 
-        raise ValueError(f"Tipo de plantilla no soportado: {template.file_type}")
+        return [results[idx] for idx in range(len(jobs))]
 
-    # ──────────────────────────────────────────────────────────────────────────
-    # Métodos privados
-    # ──────────────────────────────────────────────────────────────────────────
+    @staticmethod
+    def _zip_batch(files: list, doc_type: str, timestamp: str) -> str:
+        from flask import current_app
+
+        batch_dir = os.path.join(
+            current_app.instance_path, 'uploads', 'generated', 'batches'
+        )
+        os.makedirs(batch_dir, exist_ok=True)
+        zip_path = os.path.join(batch_dir, f"{doc_type}_{timestamp}.zip")
+        # PDF/DOCX ya vienen comprimidos
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_STORED) as zf:
+            for item in files:
+                zf.write(
+                    item['output_path'],
+                    arcname=f"{item['user_id']}_{item['filename']}",
+                )
+        return zip_path
 
     @staticmethod
     def _from_html(template_abs, variables, output_dir, doc_type, timestamp):
         """Renderiza plantilla HTML con variables y convierte a PDF via weasyprint."""
-        try:
-            from weasyprint import HTML, CSS
-        except ImportError:
-            raise RuntimeError(
-                "weasyprint no está instalado. "
-                "Ejecuta: pip install weasyprint"
-            )
-
-        with open(template_abs, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-
-        # Sustituir marcadores {{variable}}
-        for var_name, var_value in variables.items():
-            html_content = html_content.replace(f'{{{{{var_name}}}}}', str(var_value))
-
         filename = f"{doc_type}_{timestamp}.pdf"
         output_path = os.path.join(output_dir, filename)
-
-        HTML(string=html_content, base_url=os.path.dirname(template_abs)).write_pdf(
-            output_path
-        )
+        offload_cpu(_render_html_file, template_abs, variables, output_path, label='pdf_render')
         return output_path, filename
 
     @staticmethod
     def _from_docx(template_abs, variables, output_dir, doc_type, timestamp):
         """Rellena plantilla DOCX sustituyendo marcadores {{variable}} en párrafos y tablas."""
-        try:
-            from docx import Document
-        except ImportError:
-            raise RuntimeError(
-                "python-docx no está instalado. "
-                "Ejecuta: pip install python-docx"
-            )
-
-        doc = Document(template_abs)
-
-        def replace_in_text(text):
-            for var_name, var_value in variables.items():
-                text = text.replace(f'{{{{{var_name}}}}}', str(var_value))
-            return text
-
-        # Párrafos del documento principal
-        for para in doc.paragraphs:
-            for run in para.runs:
-                run.text = replace_in_text(run.text)
-
-        # Celdas de tablas
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for para in cell.paragraphs:
-                        for run in para.runs:
-                            run.text = replace_in_text(run.text)
-
-        # Encabezados y pies de página
-        for section in doc.sections:
-            for header_para in section.header.paragraphs:
-                for run in header_para.runs:
-                    run.text = replace_in_text(run.text)
-            for footer_para in section.footer.paragraphs:
-                for run in footer_para.runs:
-                    run.text = replace_in_text(run.text)
-
         filename = f"{doc_type}_{timestamp}.docx"
         output_path = os.path.join(output_dir, filename)
-        doc.save(output_path)
+        offload_cpu(_render_docx_file, template_abs, variables, output_path, label='docx_render')
         return output_path, filename
@@ -1,10 +1,13 @@
 from app import db
 from app.models.email_queue import EmailQueue
 from app.models.user import User
-from app.utils.ms_graph import graph_send_mail, acquire_token_silent, is_connected
+from app.utils.ms_graph import (
+    BATCH_LIMIT, get_access_token, graph_send_mail, is_connected, send_mail_batch,
+)
 from app.utils.datetime_utils import now_local
 from datetime import timedelta
-from typing import Optional
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import func, insert
 import logging
 
 logger = logging.getLogger(__name__)
@@ -50,16 +53,119 @@ class EmailService:
 
         return email_item
 
+    @staticmethod
+    def queue_emails_bulk(user_ids: Iterable[int], subject: str, html_content: str,
+                          notification_ids: Optional[Dict[int, int]] = None,
+                          chunk_size: int = 500) -> List[int]:
+        """
+        Encola el MISMO correo para muchos usuarios.
+
+        Por bloque: una query para resolver emails, un INSERT multi-fila en
+        email_queue, UNA tarea Celery (send_emails_batch_async) para todo el
+        bloque y un solo recálculo de contadores para el panel de admin.
+        Los usuarios sin email se omiten (queue_email lanzaría ValueError).
+        No hace commit: el llamador controla la transacción.
+
+        Returns:
+            Lista de ids de EmailQueue creados.
+        """
+        notification_ids = notification_ids or {}
+        unique_ids = list(dict.fromkeys(uid for uid in user_ids if uid))
+        stmt = insert(EmailQueue).returning(EmailQueue.id)
+        now = now_local()
+
+        queued = []
+        for start in range(0, len(unique_ids), chunk_size):
+            chunk = unique_ids[start:start + chunk_size]
+            recipients = (
+                db.session.query(User.id, User.email)
+                .filter(User.id.in_(chunk), User.email.isnot(None), User.email != '')
+                .all()
+            )
+            if not recipients:
+                continue
+            rows = [
+                {
+                    'user_id': uid,
+                    'notification_id': notification_ids.get(uid),
+                    'recipient_email': email,
+                    'subject': subject,
+                    'html_content': html_content,
+                    'status': 'pending',
+                    'attempts': 0,
+                    'max_attempts': 3,
+                    'created_at': now,
+                }
+                for uid, email in recipients
+            ]
+            chunk_ids = [row[0] for row in db.session.execute(stmt, rows).all()]
+            queued.extend(chunk_ids)
+            EmailService.dispatch_batch(chunk_ids)
+
+        return queued
+
+    @staticmethod
+    def insert_messages_bulk(messages: Iterable[Dict], chunk_size: int = 500) -> List[int]:
+        """
+        Inserta en la cola correos DISTINTOS por destinatario (dicts con
+        user_id, recipient_email, subject y html_content) con un INSERT
+        multi-fila por bloque. No los despacha ni hace commit: el llamador
+        invoca dispatch_batch() con los ids cuando su transacción es segura.
+
+        Returns:
+            Lista de ids de EmailQueue creados.
+        """
+        messages = list(messages)
+        stmt = insert(EmailQueue).returning(EmailQueue.id)
+        now = now_local()
+
+        queued = []
+        for start in range(0, len(messages), chunk_size):
+            rows = [
+                {
+                    'user_id': msg['user_id'],
+                    'notification_id': msg.get('notification_id'),
+                    'recipient_email': msg['recipient_email'],
+                    'subject': msg['subject'],
+                    'html_content': msg['html_content'],
+                    'status': 'pending',
+                    'attempts': 0,
+                    'max_attempts': 3,
+                    'created_at': now,
+                }
+                for msg in messages[start:start + chunk_size]
+            ]
+            queued.extend(row[0] for row in db.session.execute(stmt, rows).all())
+        return queued
+
+    @staticmethod
+    def dispatch_batch(email_queue_ids: List[int]) -> None:
+        """Encola UNA tarea Celery para enviar los correos dados y avisa al panel."""
+        if not email_queue_ids:
+            return
+        # countdown=1 para dar tiempo a que la transacción principal haga commit
+        try:
+            from app.tasks.notifications import send_emails_batch_async
+            send_emails_batch_async.apply_async(args=[list(email_queue_ids)], countdown=1)
+        except Exception as err:
+            logger.warning(f"No se pudo encolar la tarea de emails en lote: {err}")
+
+        EmailService._emit_queue_update()
+
     @staticmethod
     def _emit_queue_update():
         """Emite el estado actual de la cola al panel de admin vía WebSocket."""
         try:
             from app.extensions import socketio
-            pending = EmailQueue.query.filter_by(status='pending').count()
-            failed = EmailQueue.query.filter_by(status='failed').count()
+            counts = dict(
+                db.session.query(EmailQueue.status, func.count(EmailQueue.id))
+                .filter(EmailQueue.status.in_(('pending', 'failed')))
+                .group_by(EmailQueue.status)
+                .all()
+            )
             socketio.emit(
                 'email:queue_update',
-                {'pending': pending, 'failed': failed},
+                {'pending': counts.get('pending', 0), 'failed': counts.get('failed', 0)},
                 room='role:postgraduate_admin',
             )
         except Exception:
@@ -72,7 +178,7 @@ class EmailService:
         Retorna True si se envió exitosamente.
         """
         try:
-            token = acquire_token_silent()
+            token = get_access_token()
             if not token:
                 logger.warning(f"No hay token para enviar email {email_item.id}")
                 return False
@@ -86,9 +192,7 @@ class EmailService:
             )
             
             if response.status_code in (200, 202):
-                email_item.status = 'sent'
-                email_item.sent_at = now_local()
-                email_item.error_message = None
+                EmailService._mark_sent(email_item)
                 db.session.flush()
                 logger.info(f"Email {email_item.id} enviado exitosamente")
                 return True
@@ -97,22 +201,67 @@ class EmailService:
                 
         except Exception as e:
             logger.error(f"Error enviando email {email_item.id}: {str(e)}")
-            email_item.attempts += 1
-            email_item.error_message = str(e)
-            
-            if email_item.attempts >= email_item.max_attempts:
-                email_item.status = 'failed'
-            else:
-                # Reintentar en 5 minutos
-                email_item.next_retry_at = now_local() + timedelta(minutes=5)
-            
+            EmailService._mark_failed(email_item, str(e))
             db.session.flush()
             return False
+
+    @staticmethod
+    def _send_batch(email_items: List[EmailQueue]) -> int:
+        """
+        Envía varios correos de la cola con /$batch de Graph (BATCH_LIMIT por
+        petición, con espera ante 429) y marca cada uno como enviado o con
+        error. Retorna cuántos se enviaron. No hace commit.
+        """
+        if not email_items:
+            return 0
+        if not get_access_token():
+            logger.warning(f"No hay token para enviar {len(email_items)} correos")
+            return 0
+
+        results = send_mail_batch([
+            {
+                'id': item.id,
+                'subject': item.subject,
+                'content_html': item.html_content,
+                'to_list': [item.recipient_email],
+            }
+            for item in email_items
+        ])
+
+        sent = 0
+        for item in email_items:
+            error = results.get(item.id, 'Sin respuesta de Graph')
+            if error is None:
+                EmailService._mark_sent(item)
+                sent += 1
+            else:
+                logger.error(f"Error enviando email {item.id}: {error}")
+                EmailService._mark_failed(item, error)
+        db.session.flush()
+        return sent
+
+    @staticmethod
+    def _mark_sent(email_item: EmailQueue):
+        email_item.status = 'sent'
+        email_item.sent_at = now_local()
+        email_item.error_message = None
+
+    @staticmethod
+    def _mark_failed(email_item: EmailQueue, error: str):
+        email_item.attempts += 1
+        email_item.error_message = error
+
+        if email_item.attempts >= email_item.max_attempts:
+            email_item.status = 'failed'
+        else:
+            # Reintentar en 5 minutos
+            email_item.next_retry_at = now_local() + timedelta(minutes=5)
     
     @staticmethod
     def process_queue(limit: int = 50) -> dict:
         """
-        Procesa la cola de correos pendientes.
+        Procesa la cola de correos pendientes en lotes de BATCH_LIMIT
+        (un POST a /$batch y un commit por lote).
         Retorna estadísticas del procesamiento.
         """
         if not is_connected():
@@ -129,20 +278,14 @@ class EmailService:
         ).limit(limit).all()
         
         sent_count = 0
-        failed_count = 0
-        
-        for email_item in pending:
-            if EmailService._try_send_email(email_item):
-                sent_count += 1
-            else:
-                failed_count += 1
-        
-        db.session.commit()
+        for start in range(0, len(pending), BATCH_LIMIT):
+            sent_count += EmailService._send_batch(pending[start:start + BATCH_LIMIT])
+            db.session.commit()
         
         return {
             'processed': len(pending),
             'sent': sent_count,
-            'failed': failed_count
+            'failed': len(pending) - sent_count
         }
     
     @staticmethod
@@ -162,11 +305,9 @@ class EmailService:
         ).limit(limit).all()
         
         sent_count = 0
-        for email_item in failed:
-            if EmailService._try_send_email(email_item):
-                sent_count += 1
-        
-        db.session.commit()
+        for start in range(0, len(failed), BATCH_LIMIT):
+            sent_count += EmailService._send_batch(failed[start:start + BATCH_LIMIT])
+            db.session.commit()
         
         return {
             'processed': len(failed),
@@ -1,11 +1,24 @@
 """
 EventReminderService — despacha recordatorios automáticos de eventos
 (24h y 2h antes del inicio). Idempotente vía EventReminderLog.
+
+Por ventana:
+  1. Una consulta obtiene los destinatarios de TODOS los eventos que inician
+     en la ventana (registrados + invitados aceptados de eventos multiple /
+     unlimited y citas 1:1 agendadas), con un LEFT JOIN contra
+     EventReminderLog (índice ix_event_reminder_lookup) que marca a quienes
+     ya recibieron este recordatorio.
+  2. Por evento: INSERT multi-fila de logs con ON CONFLICT DO NOTHING
+     (RETURNING da los que realmente se insertaron), notificaciones con
+     NotificationService.notify_event_reminders_bulk y un commit.
 """
 
+from collections import defaultdict
 from datetime import timedelta
 import logging
 
+from sqlalchemy import and_, insert, literal, null, select, union
+
 from app import db
 from app.utils.datetime_utils import now_local
 from app.models.event import Event, EventAttendance, EventInvitation, EventReminderLog
@@ -28,7 +41,7 @@ class EventReminderService:
     def dispatch_due_reminders(window_type: str) -> dict:
         """
         Busca eventos cuyo inicio cae en la ventana indicada y envía recordatorios.
-        Idempotencia garantizada por EventReminderLog (query antes de crear).
+        Idempotencia garantizada por EventReminderLog (anti-join + ON CONFLICT).
 
         Returns: {'sent': N, 'skipped': M, 'failed': K}
         """
@@ -36,126 +49,158 @@ class EventReminderService:
             raise ValueError(f"window_type debe ser uno de {list(WINDOWS.keys())}")
 
         lower, upper = WINDOWS[window_type]
-        ref_start = now_local() + lower
-        ref_end = now_local() + upper
+        now = now_local()
+        ref_start = now + lower
+        ref_end = now + upper
 
         stats = {'sent': 0, 'skipped': 0, 'failed': 0}
 
-        # --- Eventos multiple/unlimited (usar event_date) ---
-        multi_events = Event.query.filter(
+        # (event_id, starts_at) → [(user_id, appointment_id)]
+        groups = defaultdict(list)
+        for event_id, user_id, appointment_id, starts_at, reminded in db.session.execute(
+            EventReminderService._recipients_query(window_type, ref_start, ref_end)
+        ):
+            if reminded:
+                stats['skipped'] += 1
+            else:
+                groups[(event_id, starts_at)].append((user_id, appointment_id))
+
+        if not groups:
+            return stats
+
+        events = {
+            ev.id: ev for ev in
+            Event.query.filter(Event.id.in_({event_id for event_id, _ in groups})).all()
+        }
+        for (event_id, starts_at), recipients in groups.items():
+            EventReminderService._dispatch_group(
+                events[event_id], starts_at, recipients, window_type, stats
+            )
+
+        return stats
+
+    @staticmethod
+    def _recipients_query(window_type: str, ref_start, ref_end):
+        """
+        Destinatarios de todos los eventos de la ventana, sin duplicados, con
+        una columna `reminded` (ya existe log para ese recordatorio).
+        """
+        multi_filter = and_(
             Event.status == 'published',
             Event.reminders_enabled == True,
             Event.capacity_type != 'single',
             Event.event_date.isnot(None),
             Event.event_date >= ref_start,
-            Event.event_date <= ref_end
-        ).all()
+            Event.event_date <= ref_end,
+        )
 
-        for ev in multi_events:
-            EventReminderService._send_for_multi_event(ev, window_type, stats)
+        # --- Eventos multiple/unlimited (usar event_date) ---
+        registered = select(
+            Event.id.label('event_id'),
+            EventAttendance.user_id.label('user_id'),
+            null().label('appointment_id'),
+            Event.event_date.label('starts_at'),
+        ).join(EventAttendance, EventAttendance.event_id == Event.id).where(
+            multi_filter, EventAttendance.status == 'registered'
+        )
+        invited = select(
+            Event.id, EventInvitation.user_id, null(), Event.event_date,
+        ).join(EventInvitation, EventInvitation.event_id == Event.id).where(
+            multi_filter, EventInvitation.status == 'accepted'
+        )
 
         # --- Eventos single (1:1) — usar slots con Appointments activos ---
-        single_appts = db.session.query(Appointment, EventSlot, Event).join(
+        appointments = select(
+            Event.id, Appointment.applicant_id, Appointment.id, EventSlot.starts_at,
+        ).select_from(Appointment).join(
             EventSlot, Appointment.slot_id == EventSlot.id
         ).join(
             EventWindow, EventSlot.event_window_id == EventWindow.id
         ).join(
             Event, EventWindow.event_id == Event.id
-        ).filter(
+        ).where(
             Appointment.status == 'scheduled',
             Event.status == 'published',
             Event.reminders_enabled == True,
             Event.capacity_type == 'single',
             EventSlot.starts_at >= ref_start,
-            EventSlot.starts_at <= ref_end
-        ).all()
-
-        for appt, slot, ev in single_appts:
-            EventReminderService._send_for_single_appointment(
-                ev, appt, slot, window_type, stats
-            )
-
-        return stats
-
-    @staticmethod
-    def _send_for_multi_event(event: Event, window_type: str, stats: dict):
-        """Envía recordatorios a registered + invitados accepted de un evento multiple."""
-        user_ids = set()
-
-        for att in EventAttendance.query.filter_by(
-            event_id=event.id, status='registered'
-        ).all():
-            user_ids.add(att.user_id)
-
-        for inv in EventInvitation.query.filter_by(
-            event_id=event.id, status='accepted'
-        ).all():
-            user_ids.add(inv.user_id)
-
-        slot_datetime = event.event_date.strftime('%d/%m/%Y %H:%M') if event.event_date else 'Por definir'
-
-        for user_id in user_ids:
-            EventReminderService._dispatch_one(
-                event=event,
-                user_id=user_id,
-                window_type=window_type,
-                appointment_id=None,
-                slot_datetime=slot_datetime,
-                stats=stats
-            )
-
-    @staticmethod
-    def _send_for_single_appointment(event: Event, appointment: Appointment, slot: EventSlot, window_type: str, stats: dict):
-        """Envía recordatorio al applicant de una cita 1:1."""
-        slot_datetime = slot.starts_at.strftime('%d/%m/%Y %H:%M')
-        EventReminderService._dispatch_one(
-            event=event,
-            user_id=appointment.applicant_id,
-            window_type=window_type,
-            appointment_id=appointment.id,
-            slot_datetime=slot_datetime,
-            stats=stats
+            EventSlot.starts_at <= ref_end,
         )
 
+        # UNION elimina a quien está registrado e invitado a la vez
+        recipients = union(registered, invited, appointments).subquery()
+        log = EventReminderLog
+        return select(
+            recipients.c.event_id,
+            recipients.c.user_id,
+            recipients.c.appointment_id,
+            recipients.c.starts_at,
+            log.id.isnot(None).label('reminded'),
+        ).outerjoin(log, and_(
+            log.event_id == recipients.c.event_id,
+            log.user_id == recipients.c.user_id,
+            log.reminder_type == literal(window_type),
+            log.appointment_id.is_not_distinct_from(recipients.c.appointment_id),
+        )).order_by(recipients.c.event_id, recipients.c.starts_at)
+
     @staticmethod
-    def _dispatch_one(event: Event, user_id: int, window_type: str,
-                      appointment_id: int | None, slot_datetime: str, stats: dict):
+    def _dispatch_group(event: Event, starts_at, recipients: list, window_type: str, stats: dict):
         """
-        Crea log + notificación + email. Idempotente: salta si ya existe log.
+        Logs + notificaciones + emails de los destinatarios de un evento (o de
+        un horario de cita) en una sola transacción.
         """
         from app.services.notification_service import NotificationService
 
-        existing = EventReminderLog.query.filter_by(
-            event_id=event.id,
-            user_id=user_id,
-            reminder_type=window_type,
-            appointment_id=appointment_id
-        ).first()
-        if existing:
-            stats['skipped'] += 1
-            return
-
+        slot_datetime = starts_at.strftime('%d/%m/%Y %H:%M') if starts_at else 'Por definir'
         try:
-            log = EventReminderLog(
-                event_id=event.id,
-                user_id=user_id,
-                reminder_type=window_type,
-                appointment_id=appointment_id
-            )
-            db.session.add(log)
-            db.session.flush()
-
-            NotificationService.notify_event_reminder(
-                user_id=user_id,
-                event=event,
-                reminder_type=window_type,
-                slot_datetime=slot_datetime
-            )
+            inserted = EventReminderService._insert_logs(event.id, recipients, window_type)
+            stats['skipped'] += len(recipients) - len(inserted)
+            if inserted:
+                NotificationService.notify_event_reminders_bulk(
+                    user_ids=inserted,
+                    event=event,
+                    reminder_type=window_type,
+                    slot_datetime=slot_datetime,
+                )
             db.session.commit()
-            stats['sent'] += 1
+            stats['sent'] += len(inserted)
         except Exception as e:
             db.session.rollback()
             logger.exception(
-                f"[event_reminder] fallo user_id={user_id} event_id={event.id} type={window_type}: {e}"
+                f"[event_reminder] fallo event_id={event.id} type={window_type} "
+                f"destinatarios={len(recipients)}: {e}"
             )
-            stats['failed'] += 1
+            stats['failed'] += len(recipients)
+
+    @staticmethod
+    def _insert_logs(event_id: int, recipients: list, window_type: str) -> list:
+        """
+        INSERT multi-fila de EventReminderLog que ignora los que ya existen
+        (otro dispatcher concurrente). Devuelve los user_id insertados.
+        """
+        now = now_local()
+        rows = [
+            {
+                'event_id': event_id,
+                'user_id': user_id,
+                'appointment_id': appointment_id,
+                'reminder_type': window_type,
+                'sent_at': now,
+            }
+            for user_id, appointment_id in recipients
+        ]
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            dialect_insert = None
+
+        if dialect_insert is None:
+            stmt = insert(EventReminderLog).values(rows)
+        else:
+            stmt = dialect_insert(EventReminderLog).values(rows).on_conflict_do_nothing()
+        return [user_id for (user_id,) in db.session.execute(
+            stmt.returning(EventReminderLog.user_id)
+        )]
@@ -1,4 +1,5 @@
 from datetime import datetime, date, time, timedelta
+from typing import Optional
 from app import db
 from app.models.event import Event, EventWindow, EventSlot,EventAttendance
 from app.models.academic_period import AcademicPeriod
@@ -6,6 +7,7 @@ from sqlalchemy import and_, or_, func
 func_coalesce = func.coalesce
 from datetime import timezone
 from app.utils.datetime_utils import now_local
+from app.utils import user_counters
 
 class EventsService:
 
@@ -61,16 +63,19 @@ class EventsService:
             status=status
         )
         db.session.add(ev)
-        db.session.commit()
-
-        # Fase 6.2: broadcast a usuarios potencialmente interesados cuando el evento
-        # se publica directamente como público y de capacidad múltiple/ilimitada.
-        if (
+        broadcast = (
             status == 'published'
             and visible_to_students
             and capacity_type != 'single'
             and visibility == 'public'
-        ):
+        )
+        if status == 'published' and not broadcast:
+            user_counters.queue_invalidate(user_counters.NEW_EVENTS)
+        db.session.commit()
+
+        # Fase 6.2: broadcast a usuarios potencialmente interesados cuando el evento
+        # se publica directamente como público y de capacidad múltiple/ilimitada.
+        if broadcast:
             try:
                 from app.services.notification_service import NotificationService
                 from app.models.user_program import UserProgram
@@ -101,13 +106,20 @@ class EventsService:
                 # Excluir creador
                 target_user_ids = [uid for uid in target_user_ids if uid != created_by]
 
+                # Contador de eventos nuevos: +1 a la audiencia; el resto
+                # (admins, creador) se recalcula en su siguiente lectura.
+                user_counters.queue_delta(user_counters.NEW_EVENTS, target_user_ids, 1)
+                user_counters.queue_invalidate(
+                    user_counters.NEW_EVENTS, exclude=target_user_ids,
+                )
+
                 if target_user_ids:
                     NotificationService.notify_event_published(
                         user_ids=target_user_ids,
                         event_title=ev.title,
                         event_id=ev.id
                     )
-                    db.session.commit()
+                db.session.commit()
             except Exception as e:
                 from flask import current_app
                 current_app.logger.exception(f"[create_event] Broadcast fallo event_id={ev.id}: {e}")
@@ -143,6 +155,8 @@ class EventsService:
                 )
             event.capacity_type = data['capacity_type']
 
+        # Estado/visibilidad pueden cambiar quién ve el evento
+        user_counters.queue_invalidate(user_counters.NEW_EVENTS)
         db.session.commit()
         return event
 
@@ -426,72 +440,254 @@ class EventsService:
         db.session.commit()
         return win
 
+    @staticmethod
+    def _plan_window_slots(win: EventWindow, existing: dict, overwrite_free: bool):
+        """
+        Calcula en memoria los cambios de slots de una ventana.
+
+        Args:
+            win: Ventana
+            existing: {starts_at: EventSlot} con los slots ya creados de la ventana
+            overwrite_free: Si True, ajusta ends_at de los slots libres existentes
+
+        Returns:
+            (filas nuevas, actualizaciones {'id', 'ends_at'}, omitidos)
+        """
+        starts = datetime.combine(win.date, win.start_time)
+        ends = datetime.combine(win.date, win.end_time)
+        step = timedelta(minutes=win.slot_minutes)
+
+        new_rows, updates, skipped = [], [], 0
+        cursor = starts
+        while cursor + step <= ends:
+            slot_end = cursor + step
+            slot = existing.get(cursor)
+            if slot is None:
+                new_rows.append({
+                    'event_window_id': win.id,
+                    'starts_at': cursor,
+                    'ends_at': slot_end,
+                    'status': 'free',
+                })
+            else:
+                # Si existe y está libre, se ajusta su fin; ocupado se respeta
+                if overwrite_free and slot.status == 'free' and slot.ends_at != slot_end:
+                    updates.append({'id': slot.id, 'ends_at': slot_end})
+                skipped += 1
+            cursor = slot_end
+        return new_rows, updates, skipped
+
+    @staticmethod
+    def _write_slot_plan(new_rows: list, updates: list) -> None:
+        """Aplica el plan con un INSERT y un UPDATE masivos (sin commit)."""
+        from sqlalchemy import insert, update
+        if new_rows:
+            db.session.execute(insert(EventSlot), new_rows)
+        if updates:
+            db.session.execute(update(EventSlot), updates)
+
+    @staticmethod
+    def _existing_slots_by_window(window_ids: list) -> dict:
+        """{window_id: {starts_at: EventSlot}} en una sola consulta."""
+        grouped = {wid: {} for wid in window_ids}
+        if window_ids:
+            for slot in EventSlot.query.filter(EventSlot.event_window_id.in_(window_ids)):
+                grouped[slot.event_window_id][slot.starts_at] = slot
+        return grouped
+
     @staticmethod
     def generate_slots(window_id: int, overwrite_free: bool = True) -> dict:
         """
         Genera slots para una ventana.
+
+        Carga los slots existentes de la ventana una sola vez, calcula la
+        diferencia en memoria y escribe con un insert/update masivo.
         
         Args:
             window_id: ID de la ventana
             overwrite_free: Si True, regenera slots libres. Si False, solo crea los faltantes.
         
         Returns:
-            dict con 'created', 'skipped', 'total'
+            dict con 'created', 'updated', 'skipped', 'total'
         """
         win = db.session.get(EventWindow, window_id)
         if not win:
             raise ValueError("EventWindow no encontrado")
 
-        # Construir timestamps
-        starts = datetime.combine(win.date, win.start_time)
-        ends = datetime.combine(win.date, win.end_time)
+        existing = EventsService._existing_slots_by_window([win.id])[win.id]
+        new_rows, updates, skipped = EventsService._plan_window_slots(win, existing, overwrite_free)
+        EventsService._write_slot_plan(new_rows, updates)
 
-        created = 0
-        skipped = 0
-        cursor = starts
+        # Marcar ventana como generada
+        win.slots_generated = True
+        db.session.commit()
         
-        while cursor < ends:
-            slot_end = cursor + timedelta(minutes=win.slot_minutes)
-            if slot_end > ends:
-                break
+        return {
+            'created': len(new_rows),
+            'updated': len(updates),
+            'skipped': skipped,
+            'total': len(new_rows) + skipped
+        }
 
-            # Verificar si ya existe un slot en este horario
-            existing = EventSlot.query.filter(
-                and_(
-                    EventSlot.event_window_id == win.id,
-                    EventSlot.starts_at == cursor
-                )
-            ).first()
+    @staticmethod
+    def _find_overlaps(intervals: list) -> list:
+        """
+        Pares de intervalos que se solapan el mismo día (barrido por inicio).
 
-            if existing:
-                # Si existe y está libre, actualizar
-                if overwrite_free and existing.status == 'free':
-                    existing.ends_at = slot_end
-                    skipped += 1
-                else:
-                    # Slot ocupado o no se permite sobrescribir
-                    skipped += 1
-            else:
-                # Crear nuevo slot
-                slot = EventSlot(
-                    event_window_id=win.id,
-                    starts_at=cursor,
-                    ends_at=slot_end,
-                    status='free'
-                )
-                db.session.add(slot)
-                created += 1
+        Args:
+            intervals: lista de (date, start_time, end_time, key)
 
-            cursor = slot_end
+        Returns:
+            Lista de (key_a, key_b) con key_a empezando antes o a la vez que key_b
+        """
+        pairs = []
+        active = []
+        for day, start, end, key in sorted(intervals, key=lambda i: (i[0], i[1], i[2])):
+            active = [a for a in active if a[0] == day and a[2] > start]
+            pairs.extend((a[3], key) for a in active)
+            active.append((day, start, end, key))
+        return pairs
 
-        # Marcar ventana como generada
-        win.slots_generated = True
+    @staticmethod
+    def find_window_conflicts(event_id: int, windows: Optional[list] = None) -> list:
+        """
+        Detecta en una sola pasada los solapes de las ventanas de un evento:
+          - 'window_overlap': dos ventanas del mismo evento se cruzan.
+          - 'host_overlap': una ventana se cruza con otra de un evento distinto
+            (no cancelado) que comparte ponente / entrevistador (EventHost.user_id).
+
+        Returns:
+            Lista de dicts con 'type', 'window_id', 'other_window_id', 'date'
+            y, para host_overlap, 'other_event_id' y 'user_ids'.
+        """
+        from app.models.event import EventHost
+
+        if windows is None:
+            windows = EventWindow.query.filter_by(event_id=event_id).all()
+        if not windows:
+            return []
+
+        own_ids = {w.id for w in windows}
+        intervals = [(w.date, w.start_time, w.end_time, w.id) for w in windows]
+
+        # Ventanas de otros eventos con alguno de los mismos anfitriones
+        host_ids = [
+            uid for (uid,) in db.session.query(EventHost.user_id).filter(
+                EventHost.event_id == event_id,
+                EventHost.user_id.isnot(None)
+            )
+        ]
+        foreign = {}  # window_id -> (event_id, {user_id})
+        if host_ids:
+            rows = db.session.query(
+                EventWindow.id, EventWindow.event_id, EventWindow.date,
+                EventWindow.start_time, EventWindow.end_time, EventHost.user_id
+            ).join(
+                EventHost, EventHost.event_id == EventWindow.event_id
+            ).join(
+                Event, Event.id == EventWindow.event_id
+            ).filter(
+                EventHost.user_id.in_(host_ids),
+                EventWindow.event_id != event_id,
+                EventWindow.date.in_({w.date for w in windows}),
+                Event.status != 'cancelled'
+            ).all()
+            for wid, ev_id, day, start, end, uid in rows:
+                if wid not in foreign:
+                    foreign[wid] = (ev_id, set())
+                    intervals.append((day, start, end, wid))
+                foreign[wid][1].add(uid)
+
+        dates = {w.id: w.date for w in windows}
+        conflicts = []
+        for a, b in EventsService._find_overlaps(intervals):
+            a_own, b_own = a in own_ids, b in own_ids
+            if a_own and b_own:
+                conflicts.append({
+                    'type': 'window_overlap',
+                    'window_id': a,
+                    'other_window_id': b,
+                    'date': dates[a].isoformat(),
+                })
+            elif a_own or b_own:
+                own, other = (a, b) if a_own else (b, a)
+                other_event_id, user_ids = foreign[other]
+                conflicts.append({
+                    'type': 'host_overlap',
+                    'window_id': own,
+                    'other_window_id': other,
+                    'other_event_id': other_event_id,
+                    'user_ids': sorted(user_ids),
+                    'date': dates[own].isoformat(),
+                })
+        return conflicts
+
+    @staticmethod
+    def generate_slots_bulk(
+        event_id: int,
+        overwrite_free: bool = True,
+        skip_conflicts: bool = True
+    ) -> dict:
+        """
+        Genera los slots de todas las ventanas de un evento en una sola
+        transacción: una consulta de ventanas, una de slots existentes, un
+        INSERT y un UPDATE masivos.
+
+        Args:
+            event_id: ID del evento
+            overwrite_free: Igual que en generate_slots
+            skip_conflicts: Si True, no genera slots en ventanas con solapes
+                (ver find_window_conflicts); los conflictos se reportan igual.
+
+        Returns:
+            dict con 'created', 'updated', 'skipped', 'total', 'windows'
+            ({window_id: resumen}), 'conflicts' y 'skipped_windows'
+        """
+        if not db.session.get(Event, event_id):
+            raise ValueError("Evento no encontrado")
+
+        windows = EventWindow.query.filter_by(event_id=event_id).order_by(
+            EventWindow.date, EventWindow.start_time
+        ).all()
+        conflicts = EventsService.find_window_conflicts(event_id, windows)
+
+        blocked = set()
+        if skip_conflicts:
+            for c in conflicts:
+                blocked.add(c['window_id'])
+                if c['type'] == 'window_overlap':
+                    blocked.add(c['other_window_id'])
+
+        targets = [w for w in windows if w.id not in blocked]
+        existing = EventsService._existing_slots_by_window([w.id for w in targets])
+
+        all_new, all_updates, per_window = [], [], {}
+        for win in targets:
+            new_rows, updates, skipped = EventsService._plan_window_slots(
+                win, existing[win.id], overwrite_free
+            )
+            all_new.extend(new_rows)
+            all_updates.extend(updates)
+            per_window[win.id] = {
+                'created': len(new_rows),
+                'updated': len(updates),
+                'skipped': skipped,
+                'total': len(new_rows) + skipped
+            }
+            win.slots_generated = True
+
+        EventsService._write_slot_plan(all_new, all_updates)
         db.session.commit()
-        
+
+        skipped_total = sum(w['skipped'] for w in per_window.values())
         return {
-            'created': created,
-            'skipped': skipped,
-            'total': created + skipped
+            'created': len(all_new),
+            'updated': len(all_updates),
+            'skipped': skipped_total,
+            'total': len(all_new) + skipped_total,
+            'windows': per_window,
+            'conflicts': conflicts,
+            'skipped_windows': sorted(blocked)
         }
 
     @staticmethod
@@ -816,6 +1012,8 @@ class EventsService:
             db.session.add(invitation)
             results['invited'].append(user_id)
         
+        # Una invitación hace visible el evento privado al invitado
+        user_counters.queue_invalidate(user_counters.NEW_EVENTS, results['invited'])
         db.session.commit()
 
         # Post-commit: notificaciones + historial + email_queue — aislar fallos por usuario
@@ -1115,7 +1313,17 @@ class EventsService:
         Cuenta eventos públicos creados desde la última vez que el usuario abrió
         la lista de eventos (User.last_events_seen_at). Si nunca ha visto la lista,
         cuenta los publicados en los últimos 7 días.
+
+        Se sirve desde el contador materializado (app.utils.user_counters);
+        list_public_events solo corre cuando no hay valor en caché.
         """
+        return user_counters.get_count(
+            user_counters.NEW_EVENTS, user_id,
+            lambda: EventsService._count_new_events_db(user_id),
+        )
+
+    @staticmethod
+    def _count_new_events_db(user_id: int) -> int:
         from app.models.user import User
 
         user = db.session.get(User, user_id)
@@ -1144,6 +1352,7 @@ class EventsService:
         if not user:
             return
         user.last_events_seen_at = now_local()
+        user_counters.queue_reset(user_counters.NEW_EVENTS, user_id, 0)
         db.session.commit()
 
     @staticmethod
@@ -1257,6 +1466,7 @@ class EventsService:
 
         event_title = event.title
         event.status = 'completed'
+        user_counters.queue_invalidate(user_counters.NEW_EVENTS)
         db.session.commit()
 
         EventsService._cancel_pending_invitations(event_id, event_title)
@@ -1288,6 +1498,7 @@ class EventsService:
 
         event_title = event.title
         event.status = 'archived'
+        user_counters.queue_invalidate(user_counters.NEW_EVENTS)
         db.session.commit()
 
         EventsService._cancel_pending_invitations(event_id, event_title)
@@ -1319,6 +1530,7 @@ class EventsService:
             raise ValueError("new_status debe ser 'draft' o 'published'")
 
         event.status = new_status
+        user_counters.queue_invalidate(user_counters.NEW_EVENTS)
         db.session.commit()
 
         UserHistoryService.log_action(
@@ -1429,10 +1641,10 @@ class EventsService:
                     try:
                         photo_url = url_for(
                             'api_files.event_image',
-                            event_id=event_id, kind='hosts', filename=filename
+                            event_id=event_id, kind='hosts', filename=filename, w=320
                         )
                     except Exception:
-                        photo_url = f"/files/event/{event_id}/hosts/{filename}"
+                        photo_url = f"/files/event/{event_id}/hosts/{filename}?w=320"
                 else:
                     photo_url = None
 
@@ -1465,7 +1677,7 @@ class EventsService:
         Guarda cover. Reemplaza el cover anterior (unicidad is_cover=True por evento).
         """
         from app.models.event import EventImage
-        from app.utils.files import save_event_image, delete_event_image_file
+        from app.utils.files import delete_event_image_file, record_file_inventory, save_event_image
 
         event = db.session.get(Event, event_id)
         if not event:
@@ -1486,18 +1698,21 @@ class EventsService:
                 is_cover=True,
                 display_order=0
             )
+            record_file_inventory(image, path)
             db.session.add(image)
             db.session.commit()
-            return image
         except Exception:
             db.session.rollback()
             raise
 
+        EventsService.enqueue_image_variants(path, image.id)
+        return image
+
     @staticmethod
     def upload_event_gallery_image(event_id: int, file_storage, caption: str = None) -> 'EventImage':
         """Agrega imagen a la galería (no cover)."""
         from app.models.event import EventImage
-        from app.utils.files import save_event_image
+        from app.utils.files import record_file_inventory, save_event_image
 
         event = db.session.get(Event, event_id)
         if not event:
@@ -1516,13 +1731,63 @@ class EventsService:
                 is_cover=False,
                 display_order=last_order + 1
             )
+            record_file_inventory(image, path)
             db.session.add(image)
             db.session.commit()
-            return image
         except Exception:
             db.session.rollback()
             raise
 
+        EventsService.enqueue_image_variants(path, image.id)
+        return image
+
+    @staticmethod
+    def enqueue_image_variants(rel_path: str, image_id: int | None = None) -> None:
+        """
+        Encola la generación de derivadas (WebP/JPEG por ancho + placeholder).
+        `image_id` None para fotos de hosts externos, que no tienen EventImage.
+        """
+        try:
+            from app.tasks.events import generate_event_image_variants
+            # countdown=1: la tarea lee la fila recién confirmada
+            generate_event_image_variants.apply_async(
+                kwargs={'rel_path': rel_path, 'image_id': image_id}, countdown=1
+            )
+        except Exception as e:
+            from flask import current_app
+            current_app.logger.warning(f"[enqueue_image_variants] No se pudo encolar {rel_path}: {e}")
+
+    @staticmethod
+    def build_image_variants(rel_path: str, image_id: int | None = None) -> dict | None:
+        """
+        Genera las derivadas de una imagen de evento y, si es cover/galería,
+        las registra en su EventImage. Retorna el resultado de
+        build_image_variants o None si el original ya no existe.
+        """
+        from flask import current_app
+        from app.models.event import EventImage
+        from app.utils.files import delete_event_image_variants
+        from app.utils.image_processing import build_image_variants
+
+        base = current_app.config['EVENTS_FOLDER']
+        if not (base / rel_path).is_file():
+            return None
+
+        result = build_image_variants(base, rel_path)
+
+        if image_id is not None:
+            image = db.session.get(EventImage, image_id)
+            if image is None or image.path != rel_path:
+                # Se borró o reemplazó mientras la tarea esperaba en cola
+                delete_event_image_variants(rel_path)
+                return None
+            image.width = result['width']
+            image.height = result['height']
+            image.variants = result['variants']
+            image.placeholder = result['placeholder']
+            db.session.commit()
+        return result
+
     @staticmethod
     def delete_event_image(image_id: int) -> bool:
         """Borra imagen (DB + disco). Si era cover, el evento queda sin cover (fallback a icono)."""
@@ -0,0 +1,349 @@
+# app/services/file_inventory_service.py
+"""
+Inventario de archivos subidos (Submission, AcceptanceDocument, EventImage).
+
+Cada fila guarda size_bytes / sha256 / mime desde la subida
+(app/utils/files.py: save_user_doc, save_event_image). Con eso las vistas
+de purga y los reportes de almacenamiento salen de la BD con una consulta
+agregada, sin stat() por archivo.
+
+  - reconcile(): recorre las filas por bloques y las compara con el disco
+    (faltantes, reaparecidos, cambiados, sin inventario) y cuenta archivos
+    huérfanos. Lo ejecuta la tarea reconcile_file_inventory.
+  - file_totals_by_user_program() / file_totals_by_user(): conteo y bytes
+    para la vista previa de purga.
+  - submission_totals_by_program() / submission_totals_by_archive(): las
+    mismas cuentas como subconsultas agrupadas, para unirlas a consultas de
+    candidatos (cleanup_candidate_service).
+  - storage_report(): archivos y bytes por programa y tipo.
+  - pending_inventory_count(): filas con archivo aún sin inventario (las
+    anteriores a las columnas). El despliegue corre la reconciliación
+    mientras haya alguna (flask reconcile-file-inventory --if-pending en
+    docker/entrypoint.sh) para que las vistas previas no las cuenten como
+    presentes con 0 bytes.
+"""
+
+import logging
+from pathlib import Path
+
+from flask import current_app
+from sqlalchemy import and_, bindparam, func, literal, union_all
+
+from app import db
+from app.models.acceptance_document import AcceptanceDocument
+from app.models.event import Event, EventHost, EventImage
+from app.models.program import Program
+from app.models.program_step import ProgramStep
+from app.models.submission import Submission
+from app.models.user_program import UserProgram
+from app.utils.files import file_inventory
+from app.utils.image_processing import VARIANTS_DIR
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_CHUNK_SIZE = 500
+IN_CHUNK_SIZE = 1000
+DRIFT_SAMPLE = 20
+
+# (nombre, modelo, atributo con la ruta, clave de config de la carpeta base)
+# Las rutas de documentos son relativas a USER_DOCS_FOLDER, igual que las
+# sirve files_api.user_doc.
+SOURCES = (
+    ('submission', Submission, 'file_path', 'USER_DOCS_FOLDER'),
+    ('acceptance_document', AcceptanceDocument, 'file_path', 'USER_DOCS_FOLDER'),
+    ('event_image', EventImage, 'path', 'EVENTS_FOLDER'),
+)
+
+
+def _chunks(seq, size=IN_CHUNK_SIZE):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+def _has_file(model, path_col):
+    return and_(path_col.isnot(None), path_col != '', model.file_missing.is_(False))
+
+
+# ---------------------------------------------------------------------------
+# Reconciliación
+# ---------------------------------------------------------------------------
+
+def _reconcile_source(name, model, path_attr, root: Path, chunk_size: int,
+                      verify_hashes: bool) -> tuple[dict, set]:
+    """Reconcilia una tabla. Devuelve (stats, rutas referenciadas)."""
+    path_col = getattr(model, path_attr)
+    # updated_at se reescribe con su propio valor: el reconciliador no es
+    # una modificación del documento y no debe mover onupdate
+    has_updated_at = 'updated_at' in model.__table__.c
+    columns = [model.id, path_col, model.size_bytes, model.sha256, model.mime, model.file_missing]
+    if has_updated_at:
+        columns.append(model.updated_at)
+
+    table = model.__table__
+    values = {
+        'size_bytes': bindparam('b_size'),
+        'sha256': bindparam('b_sha'),
+        'mime': bindparam('b_mime'),
+        'file_missing': bindparam('b_missing'),
+    }
+    if has_updated_at:
+        values['updated_at'] = bindparam('b_updated_at')
+    stmt = table.update().where(table.c.id == bindparam('b_id')).values(**values)
+
+    stats = {'checked': 0, 'missing': 0, 'restored': 0, 'changed': 0, 'backfilled': 0}
+    samples = []
+    referenced = set()
+    last_id = 0
+    while True:
+        rows = (
+            db.session.query(*columns)
+            .filter(path_col.isnot(None), path_col != '', model.id > last_id)
+            .order_by(model.id)
+            .limit(chunk_size)
+            .all()
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        params = []
+        for row in rows:
+            row_id, rel, size, sha, mime, missing = row[:6]
+            stats['checked'] += 1
+            referenced.add(rel)
+            new = {'size': size, 'sha': sha, 'mime': mime, 'missing': False}
+            try:
+                st = (root / rel).stat()
+            except OSError:
+                if missing:
+                    continue
+                stats['missing'] += 1
+                samples.append(('missing', rel))
+                new['missing'] = True
+            else:
+                if missing:
+                    stats['restored'] += 1
+                if size is None or sha is None:
+                    stats['backfilled'] += 1
+                    new['size'], new['sha'], new['mime'] = file_inventory(root / rel)
+                elif st.st_size != size or verify_hashes:
+                    new['size'], new['sha'], new['mime'] = file_inventory(root / rel)
+                    if (new['size'], new['sha']) != (size, sha):
+                        stats['changed'] += 1
+                        samples.append(('changed', rel))
+                if (new['size'], new['sha'], new['mime'], missing) == (size, sha, mime, False):
+                    continue
+            param = {'b_id': row_id, 'b_size': new['size'], 'b_sha': new['sha'],
+                     'b_mime': new['mime'], 'b_missing': new['missing']}
+            if has_updated_at:
+                param['b_updated_at'] = row[6]
+            params.append(param)
+
+        if params:
+            db.session.execute(stmt, params)
+        db.session.commit()
+
+    for kind, rel in samples[:DRIFT_SAMPLE]:
+        logger.warning(f"[file_inventory] {name}: {kind} {rel}")
+    return stats, referenced
+
+
+def _orphans(root: Path, referenced: set) -> list:
+    """Archivos bajo `root` que ninguna fila referencia (sin derivadas `_v/`)."""
+    if not root.is_dir():
+        return []
+    out = []
+    for path in root.rglob('*'):
+        if not path.is_file() or path.name.startswith('.'):
+            continue
+        rel = path.relative_to(root)
+        if VARIANTS_DIR in rel.parts[:-1]:
+            continue
+        if rel.as_posix() not in referenced:
+            out.append(rel.as_posix())
+    return out
+
+
+def reconcile(chunk_size: int = RECONCILE_CHUNK_SIZE, verify_hashes: bool = False) -> dict:
+    """
+    Compara el inventario con el disco y corrige la BD:
+      - missing:    el archivo ya no está → file_missing=True
+      - restored:   estaba marcado como faltante y volvió
+      - changed:    el tamaño (o el hash, con verify_hashes) no coincide
+      - backfilled: fila sin inventario (anterior a las columnas)
+    Los huérfanos (en disco sin fila) sólo se cuentan, no se borran.
+    """
+    result = {}
+    referenced_by_root = {}
+    for name, model, path_attr, root_key in SOURCES:
+        root = Path(current_app.config[root_key])
+        stats, referenced = _reconcile_source(
+            name, model, path_attr, root, chunk_size, verify_hashes
+        )
+        result[name] = stats
+        referenced_by_root.setdefault(root_key, set()).update(referenced)
+
+    # Fotos de ponentes externos: viven en EVENTS_FOLDER sin EventImage
+    referenced_by_root.setdefault('EVENTS_FOLDER', set()).update(
+        path for (path,) in db.session.query(EventHost.external_photo_path)
+        .filter(EventHost.external_photo_path.isnot(None))
+    )
+
+    orphans = {}
+    for root_key, referenced in referenced_by_root.items():
+        found = _orphans(Path(current_app.config[root_key]), referenced)
+        orphans[root_key] = len(found)
+        for rel in found[:DRIFT_SAMPLE]:
+            logger.warning(f"[file_inventory] huérfano en {root_key}: {rel}")
+    result['orphans'] = orphans
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Agregados
+# ---------------------------------------------------------------------------
+
+def pending_inventory_count() -> int:
+    """Filas con ruta pero sin size_bytes (sin inventario), en todas las fuentes."""
+    total = 0
+    for _name, model, path_attr, _root_key in SOURCES:
+        path_col = getattr(model, path_attr)
+        total += (
+            db.session.query(func.count(model.id))
+            .filter(_has_file(model, path_col), model.size_bytes.is_(None))
+            .scalar()
+        )
+    return total
+
+
+def file_totals_by_user_program(user_program_ids) -> dict:
+    """
+    {user_program_id: (archivos, bytes)} de las submissions del programa de
+    cada UserProgram con archivo presente. Una consulta agregada por bloque
+    de IDs; los UserProgram sin archivos no aparecen.
+    """
+    ids = sorted(set(user_program_ids))
+    totals = {}
+    for chunk in _chunks(ids):
+        rows = (
+            db.session.query(
+                UserProgram.id,
+                func.count(Submission.id),
+                func.coalesce(func.sum(Submission.size_bytes), 0),
+            )
+            .join(ProgramStep, ProgramStep.program_id == UserProgram.program_id)
+            .join(Submission, and_(
+                Submission.program_step_id == ProgramStep.id,
+                Submission.user_id == UserProgram.user_id,
+            ))
+            .filter(UserProgram.id.in_(chunk), _has_file(Submission, Submission.file_path))
+            .group_by(UserProgram.id)
+            .all()
+        )
+        totals.update({up_id: (count, int(size)) for up_id, count, size in rows})
+    return totals
+
+
+def file_totals_by_user(user_ids, archive_id: int) -> dict:
+    """{user_id: (archivos, bytes)} de submissions de un archive con archivo presente."""
+    ids = sorted(set(user_ids))
+    totals = {}
+    for chunk in _chunks(ids):
+        rows = (
+            db.session.query(
+                Submission.user_id,
+                func.count(Submission.id),
+                func.coalesce(func.sum(Submission.size_bytes), 0),
+            )
+            .filter(
+                Submission.user_id.in_(chunk),
+                Submission.archive_id == archive_id,
+                _has_file(Submission, Submission.file_path),
+            )
+            .group_by(Submission.user_id)
+            .all()
+        )
+        totals.update({user_id: (count, int(size)) for user_id, count, size in rows})
+    return totals
+
+
+def submission_totals_by_program():
+    """
+    Subconsulta (user_id, program_id, files, bytes) de submissions con
+    archivo presente. Se une a UserProgram por usuario y programa.
+    """
+    return (
+        db.session.query(
+            Submission.user_id.label('user_id'),
+            ProgramStep.program_id.label('program_id'),
+            func.count(Submission.id).label('files'),
+            func.coalesce(func.sum(Submission.size_bytes), 0).label('bytes'),
+        )
+        .join(ProgramStep, Submission.program_step_id == ProgramStep.id)
+        .filter(_has_file(Submission, Submission.file_path))
+        .group_by(Submission.user_id, ProgramStep.program_id)
+        .subquery()
+    )
+
+
+def submission_totals_by_archive():
+    """Subconsulta (user_id, archive_id, files, bytes) de submissions con archivo presente."""
+    return (
+        db.session.query(
+            Submission.user_id.label('user_id'),
+            Submission.archive_id.label('archive_id'),
+            func.count(Submission.id).label('files'),
+            func.coalesce(func.sum(Submission.size_bytes), 0).label('bytes'),
+        )
+        .filter(_has_file(Submission, Submission.file_path))
+        .group_by(Submission.user_id, Submission.archive_id)
+        .subquery()
+    )
+
+
+def storage_report() -> list:
+    """
+    Archivos y bytes por programa y tipo (submission / acceptance_document /
+    event_image) en una sola consulta. `pending` cuenta filas aún sin
+    inventario (bytes desconocidos hasta que corra el reconciliador).
+    Los eventos sin programa salen con program_id None.
+    """
+    def _branch(kind, model, path_col, program_col, *joins):
+        q = db.session.query(
+            program_col.label('program_id'),
+            literal(kind).label('kind'),
+            func.count(model.id).label('files'),
+            func.coalesce(func.sum(model.size_bytes), 0).label('bytes'),
+            func.count(model.id).filter(model.size_bytes.is_(None)).label('pending'),
+        ).select_from(model)
+        for target, onclause in joins:
+            q = q.join(target, onclause)
+        return q.filter(_has_file(model, path_col)).group_by(program_col)
+
+    report = union_all(
+        _branch('submission', Submission, Submission.file_path, ProgramStep.program_id,
+                (ProgramStep, Submission.program_step_id == ProgramStep.id)).statement,
+        _branch('acceptance_document', AcceptanceDocument, AcceptanceDocument.file_path,
+                UserProgram.program_id,
+                (UserProgram, AcceptanceDocument.user_program_id == UserProgram.id)).statement,
+        _branch('event_image', EventImage, EventImage.path, Event.program_id,
+                (Event, EventImage.event_id == Event.id)).statement,
+    ).subquery()
+
+    rows = (
+        db.session.query(report, Program.name)
+        .outerjoin(Program, Program.id == report.c.program_id)
+        .order_by(Program.name, report.c.kind)
+        .all()
+    )
+    return [
+        {
+            'program_id': row.program_id,
+            'program_name': row.name,
+            'kind': row.kind,
+            'files': row.files,
+            'bytes': int(row.bytes),
+            'pending': row.pending,
+        }
+        for row in rows
+    ]
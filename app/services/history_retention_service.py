@@ -2,17 +2,45 @@
 """
 Servicio para la limpieza automática del historial de usuarios
 basado en políticas de retención configurables.
+
+Todo se resuelve por conjuntos, sin cargar filas de user_history como
+objetos ORM:
+  - la categoría de cada usuario es una subconsulta agregada
+  - la vista previa son COUNT agrupados por categoría
+  - el borrado avanza por bloques de IDs (keyset) con
+    DELETE ... WHERE id IN (SELECT ...) y commit por bloque, de modo que se
+    puede reanudar desde el último ID confirmado (after_id)
+  - opcionalmente cada bloque se respalda antes en un JSONL comprimido
+    en instance/backups/history/
+
+La ejecución desde el panel va por la tarea Celery
+app.tasks.maintenance.cleanup_user_history.
 """
 
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional
-from sqlalchemy import and_, or_
+import gzip
+import json
+from pathlib import Path
+from datetime import timedelta
+from typing import Callable, Dict, Optional
+from sqlalchemy import and_, case, delete, func, or_, select
+from sqlalchemy.orm import aliased
 from app import db
+from app.config import Config
 from app.models.user_history import UserHistory
 from app.models.user import User
 from app.models.user_program import UserProgram
 from app.utils.datetime_utils import now_local
 
+_ARCHIVE_DIR = Config.INSTANCE_DIR / 'backups' / 'history'
+
+DELETE_CHUNK_SIZE = 5000
+
+# Columnas que se respaldan en el JSONL
+_ARCHIVE_COLUMNS = (
+    'id', 'user_id', 'admin_id', 'action', 'details', 'details_json',
+    'subject_user_id', 'timestamp',
+)
+
 
 class HistoryRetentionService:
     """
@@ -38,142 +66,262 @@ class HistoryRetentionService:
         'critical_actions': -1  # Acciones críticas: permanente (-1)
     }
 
+    # Categorías de usuario en el orden en que se reportan
+    CATEGORIES = ('active', 'graduated', 'inactive')
+
     @staticmethod
-    def cleanup_old_history(dry_run: bool = True, retention_config: Optional[Dict] = None) -> Dict:
+    def cleanup_old_history(
+        dry_run: bool = True,
+        retention_config: Optional[Dict] = None,
+        chunk_size: int = DELETE_CHUNK_SIZE,
+        archive: bool = False,
+        archive_name: Optional[str] = None,
+        after_id: int = 0,
+        progress_callback: Optional[Callable[[int, int, int], None]] = None,
+    ) -> Dict:
         """
         Limpia el historial antiguo basado en las políticas de retención.
         
         Args:
             dry_run: Si es True, solo simula la limpieza sin eliminar
             retention_config: Configuración personalizada de retención (opcional)
+            chunk_size: Registros por bloque de borrado (un commit por bloque)
+            archive: Respaldar cada bloque en JSONL comprimido antes de borrarlo
+            archive_name: Nombre del respaldo; al reanudar se agrega al mismo archivo
+            after_id: Reanudar a partir de este ID (último bloque confirmado)
+            progress_callback: fn(eliminados, total, último_id) tras cada bloque
             
         Returns:
             Estadísticas de la limpieza realizada
         """
         config = retention_config or HistoryRetentionService.DEFAULT_RETENTION
-        now = now_local()
+        cutoffs = HistoryRetentionService._cutoffs(config, now_local())
+
+        stats = HistoryRetentionService._preview(config, cutoffs, after_id)
+        stats['dry_run'] = dry_run
+        if dry_run or not stats['entries_to_delete']:
+            return stats
+
+        archive_path = None
+        if archive:
+            archive_name = archive_name or now_local().strftime('%Y%m%d_%H%M%S')
+            archive_path = HistoryRetentionService._archive_path(archive_name)
+
+        deleted, last_id = HistoryRetentionService._delete_in_chunks(
+            cutoffs, max(1, chunk_size), after_id, stats['entries_to_delete'],
+            archive_path, progress_callback,
+        )
+        stats['entries_deleted'] = deleted
+        stats['last_id'] = last_id
+        stats['archive_path'] = str(archive_path) if archive_path else None
+        stats.update(HistoryRetentionService._kept_summary())
+        return stats
+
+    # ------------------------------------------------------------------
+    # Consultas por conjuntos
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _classification():
+        """
+        Subconsulta (user_id, category) con la categoría de cada usuario:
+        inactivo si is_active es falso o no tiene programas; activo en otro
+        caso. UserProgram no registra fecha de egreso, así que la categoría
+        'graduated' no se asigna hasta que exista ese dato.
+        """
+        category = case(
+            (and_(User.is_active.is_(True), func.count(UserProgram.id) > 0), 'active'),
+            else_='inactive',
+        )
+        return (
+            db.session.query(User.id.label('user_id'), category.label('category'))
+            .outerjoin(UserProgram, User.id == UserProgram.user_id)
+            .group_by(User.id, User.is_active)
+            .subquery()
+        )
+
+    @staticmethod
+    def _cutoffs(config: Dict, now) -> Dict:
+        """{categoría: (años, fecha de corte)}; fecha None si es permanente."""
+        cutoffs = {}
+        for category in HistoryRetentionService.CATEGORIES:
+            years = config.get(f"{category}_users", config['active_users'])
+            cutoffs[category] = (years, None if years == -1 else now - timedelta(days=years * 365))
+        return cutoffs
+
+    @staticmethod
+    def _deletable(history, classes, cutoffs):
+        """Condición de borrado sobre `history` unido a la clasificación."""
+        by_category = [
+            and_(classes.c.category == category, history.timestamp < cutoff)
+            for category, (_, cutoff) in cutoffs.items()
+            if cutoff is not None
+        ]
+        if not by_category:
+            return None
+        return and_(
+            or_(*by_category),
+            ~history.action.in_(HistoryRetentionService.CRITICAL_ACTIONS),
+        )
+
+    @staticmethod
+    def _deletable_ids(cutoffs):
+        """SELECT de IDs borrables (None si todas las categorías son permanentes)."""
+        history = aliased(UserHistory)
+        classes = HistoryRetentionService._classification()
+        condition = HistoryRetentionService._deletable(history, classes, cutoffs)
+        if condition is None:
+            return None, history
+        stmt = (
+            select(history.id)
+            .join(classes, classes.c.user_id == history.user_id)
+            .where(condition)
+        )
+        return stmt, history
+
+    @staticmethod
+    def _preview(config: Dict, cutoffs: Dict, after_id: int = 0) -> Dict:
+        """Estadísticas de la limpieza con tres consultas agregadas."""
+        classes = HistoryRetentionService._classification()
+        users_by_category = dict(
+            db.session.query(classes.c.category, func.count())
+            .group_by(classes.c.category)
+            .all()
+        )
+
+        to_delete = {}
+        condition = HistoryRetentionService._deletable(UserHistory, classes, cutoffs)
+        if condition is not None:
+            rows = (
+                db.session.query(
+                    classes.c.category,
+                    func.count(UserHistory.id),
+                    func.count(func.distinct(UserHistory.user_id)),
+                )
+                .select_from(UserHistory)
+                .join(classes, classes.c.user_id == UserHistory.user_id)
+                .filter(condition, UserHistory.id > after_id)
+                .group_by(classes.c.category)
+                .all()
+            )
+            to_delete = {category: (entries, users) for category, entries, users in rows}
+
         stats = {
             'total_entries_analyzed': 0,
             'entries_to_delete': 0,
             'entries_preserved_critical': 0,
             'entries_deleted': 0,
-            'users_affected': set(),
+            'users_affected': 0,
             'oldest_entry_kept': None,
-            'dry_run': dry_run,
-            'breakdown_by_category': {}
+            'breakdown_by_category': {},
         }
-
-        # 1. Obtener todos los usuarios y clasificarlos
-        users_status = HistoryRetentionService._classify_users()
-
-        # 2. Para cada categoría de usuario, aplicar políticas
-        for user_status, user_ids in users_status.items():
-            if not user_ids:
+        for category, (years, cutoff) in cutoffs.items():
+            users = users_by_category.get(category, 0)
+            if not users:
                 continue
-
-            retention_years = config.get(f"{user_status}_users", config['active_users'])
-            if retention_years == -1:  # Permanente
-                stats['breakdown_by_category'][user_status] = {
-                    'users': len(user_ids),
+            if cutoff is None:
+                stats['breakdown_by_category'][category] = {
+                    'users': users,
                     'retention_years': 'permanente',
                     'entries_to_delete': 0,
                 }
                 continue
+            entries, affected = to_delete.get(category, (0, 0))
+            stats['breakdown_by_category'][category] = {
+                'users': users,
+                'retention_years': years,
+                'cutoff_date': cutoff.isoformat(),
+                'entries_to_delete': entries,
+                'users_affected': affected,
+            }
+            stats['entries_to_delete'] += entries
+            # Cada usuario pertenece a una sola categoría
+            stats['users_affected'] += affected
 
-            cutoff_date = now - timedelta(days=retention_years * 365)
-
-            # 3. Encontrar entradas a eliminar (excluyendo acciones críticas)
-            entries_to_delete = db.session.query(UserHistory).filter(
-                and_(
-                    UserHistory.user_id.in_(user_ids),
-                    UserHistory.timestamp < cutoff_date,
-                    ~UserHistory.action.in_(HistoryRetentionService.CRITICAL_ACTIONS)
-                )
-            ).all()
+        stats['total_entries_analyzed'] = stats['entries_to_delete']
+        stats.update(HistoryRetentionService._kept_summary())
+        return stats
 
-            affected_in_category = {e.user_id for e in entries_to_delete}
+    @staticmethod
+    def _kept_summary() -> Dict:
+        """Acciones críticas conservadas y entrada más antigua, en una consulta."""
+        critical, oldest = db.session.query(
+            func.count(UserHistory.id).filter(
+                UserHistory.action.in_(HistoryRetentionService.CRITICAL_ACTIONS)
+            ),
+            func.min(UserHistory.timestamp),
+        ).one()
+        return {
+            'entries_preserved_critical': critical,
+            'oldest_entry_kept': oldest.isoformat() if oldest else None,
+        }
 
-            stats['breakdown_by_category'][user_status] = {
-                'users': len(user_ids),
-                'retention_years': retention_years,
-                'cutoff_date': cutoff_date.isoformat(),
-                'entries_to_delete': len(entries_to_delete),
-                'users_affected': len(affected_in_category),
-            }
+    # ------------------------------------------------------------------
+    # Borrado por bloques
+    # ------------------------------------------------------------------
 
-            stats['total_entries_analyzed'] += len(entries_to_delete)
-            stats['entries_to_delete'] += len(entries_to_delete)
-            stats['users_affected'].update(affected_in_category)
+    @staticmethod
+    def _archive_path(name: str) -> Path:
+        _ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+        return _ARCHIVE_DIR / f'{name}.jsonl.gz'
 
-            # 4. Eliminar o simular eliminación
-            if not dry_run and entries_to_delete:
-                for entry in entries_to_delete:
-                    db.session.delete(entry)
-                stats['entries_deleted'] += len(entries_to_delete)
-        
-        # 5. Contar acciones críticas preservadas
-        critical_count = db.session.query(UserHistory).filter(
-            UserHistory.action.in_(HistoryRetentionService.CRITICAL_ACTIONS)
-        ).count()
-        stats['entries_preserved_critical'] = critical_count
-        
-        # 6. Obtener fecha de la entrada más antigua conservada
-        oldest_entry = db.session.query(UserHistory).order_by(UserHistory.timestamp.asc()).first()
-        if oldest_entry:
-            stats['oldest_entry_kept'] = oldest_entry.timestamp.isoformat()
-        
-        # 7. Commit si no es dry run
-        if not dry_run:
-            db.session.commit()
-        
-        stats['users_affected'] = len(stats['users_affected'])
-        return stats
+    @staticmethod
+    def _archive_chunk(path: Path, ids_stmt):
+        """Agrega las filas del bloque al JSONL comprimido (un miembro gzip por bloque)."""
+        columns = [getattr(UserHistory, name) for name in _ARCHIVE_COLUMNS]
+        rows = db.session.execute(
+            select(*columns)
+            .where(UserHistory.id.in_(ids_stmt))
+            .order_by(UserHistory.id)
+            .execution_options(yield_per=1000)
+        )
+        with gzip.open(path, 'at', encoding='utf-8') as fh:
+            for row in rows:
+                record = dict(zip(_ARCHIVE_COLUMNS, row))
+                record['timestamp'] = record['timestamp'].isoformat()
+                fh.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+            fh.flush()
 
     @staticmethod
-    def _classify_users() -> Dict[str, List[int]]:
+    def _delete_in_chunks(cutoffs, chunk_size, after_id, total, archive_path, progress_callback):
         """
-        Clasifica usuarios según su estado actual.
-        
-        Returns:
-            Diccionario con listas de user_ids por categoría
+        Borra por bloques de hasta `chunk_size` IDs en orden ascendente.
+        Cada bloque: fija el ID frontera, respalda (opcional), borra y hace
+        commit. Devuelve (eliminados, último ID procesado).
         """
-        from sqlalchemy import select, case, func
-        
-        # Query compleja para clasificar usuarios
-        subquery = db.session.query(
-            User.id,
-            User.is_active,
-            func.max(UserProgram.graduation_date).label('graduation_date'),
-            func.count(UserProgram.id).label('program_count')
-        ).outerjoin(UserProgram, User.id == UserProgram.user_id).group_by(User.id, User.is_active).subquery()
-        
-        results = db.session.query(subquery).all()
-        
-        classification = {
-            'active': [],
-            'graduated': [],
-            'inactive': []
-        }
-        
-        now = now_local()
-        
-        for user_data in results:
-            user_id = user_data.id
-            is_active = user_data.is_active
-            graduation_date = user_data.graduation_date
-            program_count = user_data.program_count or 0
-            
-            # Lógica de clasificación
-            if not is_active:
-                classification['inactive'].append(user_id)
-            elif graduation_date and graduation_date <= now:
-                classification['graduated'].append(user_id)
-            elif program_count > 0:
-                classification['active'].append(user_id)
-            else:
-                classification['inactive'].append(user_id)
-        
-        return classification
+        ids_stmt, history = HistoryRetentionService._deletable_ids(cutoffs)
+        deleted = 0
+        last_id = after_id
+        if ids_stmt is None:
+            return deleted, last_id
+
+        while True:
+            window = (
+                ids_stmt.where(history.id > last_id)
+                .order_by(history.id)
+                .limit(chunk_size)
+                .subquery()
+            )
+            boundary = db.session.execute(select(func.max(window.c.id))).scalar()
+            if boundary is None:
+                break
+
+            chunk_ids = ids_stmt.where(history.id > last_id, history.id <= boundary)
+            if archive_path is not None:
+                HistoryRetentionService._archive_chunk(archive_path, chunk_ids)
+            result = db.session.execute(
+                delete(UserHistory)
+                .where(UserHistory.id.in_(chunk_ids))
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+
+            deleted += result.rowcount
+            last_id = boundary
+            if progress_callback:
+                progress_callback(deleted, total, last_id)
+
+        return deleted, last_id
 
     @staticmethod
     def get_retention_statistics() -> Dict:
@@ -225,11 +373,16 @@ class HistoryRetentionService:
         return stats
 
     @staticmethod
-    def schedule_cleanup_job():
+    def schedule_cleanup_job(retention_config: Optional[Dict] = None, archive: bool = True,
+                             chunk_size: int = DELETE_CHUNK_SIZE):
         """
-        Configura un trabajo programado para la limpieza automática.
-        Esto requeriría un sistema de colas como Celery.
+        Encola la limpieza en Celery (app.tasks.maintenance.cleanup_user_history).
+        Devuelve el AsyncResult para consultar el progreso.
         """
-        # Esta función sería implementada con Celery o similar
-        # Para ejecutar la limpieza automáticamente
-        pass
\ No newline at end of file
+        from app.tasks.maintenance import cleanup_user_history
+
+        return cleanup_user_history.apply_async(kwargs={
+            'retention_config': retention_config,
+            'archive': archive,
+            'chunk_size': chunk_size,
+        })
\ No newline at end of file
@@ -2,9 +2,14 @@ from app import db
 from app.models.notification import Notification
 from app.models.user import User
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterable
+from sqlalchemy import insert
 from app.utils.datetime_utils import now_local
+from app.utils import user_counters
 from flask import url_for
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class NotificationService:
@@ -43,6 +48,9 @@ class NotificationService:
         'deferral_request_received',
         'extension_request_submitted',
     }
+
+    # Filas por INSERT multi-fila / emisión agrupada en los envíos masivos
+    BULK_CHUNK_SIZE = 500
     
     @staticmethod
     def create_notification(
@@ -85,6 +93,7 @@ class NotificationService:
         
         db.session.add(notification)
         db.session.flush()
+        user_counters.queue_delta(user_counters.UNREAD, [user_id], 1)
 
         # Emitir evento WebSocket al usuario en tiempo real
         try:
@@ -99,6 +108,104 @@ class NotificationService:
 
         return notification
 
+    @staticmethod
+    def create_bulk_notifications(
+        user_ids: Iterable[int],
+        notification_type: str,
+        title: str,
+        message: str,
+        priority: str = 'medium',
+        data: Optional[Dict[str, Any]] = None,
+        action_url: Optional[str] = None,
+        expires_at: Optional[datetime] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Dict[int, int]:
+        """
+        Crea la MISMA notificación para muchos usuarios.
+
+        A diferencia de llamar create_notification en un loop (add + flush
+        por usuario), inserta por bloques con un INSERT multi-fila; los ids
+        del RETURNING se usan para emitir a cada sala user:{id} su
+        'notification:new' con el id real. No hace commit: el llamador
+        controla la transacción.
+
+        Returns:
+            dict user_id → notification_id de las notificaciones creadas.
+        """
+        chunk_size = chunk_size or NotificationService.BULK_CHUNK_SIZE
+        unique_ids = list(dict.fromkeys(uid for uid in user_ids if uid))
+        if not unique_ids:
+            return {}
+
+        now = now_local()
+        base = {
+            'type': notification_type,
+            'title': title,
+            'message': message,
+            'priority': priority,
+            'data': data or {},
+            'action_url': action_url,
+            'expires_at': expires_at,
+            'is_actionable': notification_type in NotificationService.ACTIONABLE_TYPES,
+            'is_read': False,
+            'is_deleted': False,
+            'created_at': now,
+        }
+        stmt = insert(Notification).returning(Notification.id, Notification.user_id)
+
+        created = {}
+        for start in range(0, len(unique_ids), chunk_size):
+            chunk = unique_ids[start:start + chunk_size]
+            # Descartar ids inexistentes para que un id inválido no tumbe el bloque
+            existing = {uid for (uid,) in db.session.query(User.id).filter(User.id.in_(chunk))}
+            chunk = [uid for uid in chunk if uid in existing]
+            if not chunk:
+                continue
+            rows = db.session.execute(stmt, [{**base, 'user_id': uid} for uid in chunk]).all()
+            chunk_created = {user_id: notif_id for notif_id, user_id in rows}
+            created.update(chunk_created)
+            NotificationService._emit_bulk(chunk_created, base)
+            user_counters.queue_delta(
+                user_counters.UNREAD, chunk_created.keys(), 1, emit=False,
+            )
+
+        return created
+
+    @staticmethod
+    def _emit_bulk(created: Dict[int, int], base: Dict[str, Any]) -> None:
+        """
+        Emite 'notification:new' a la sala user:{id} de cada usuario del
+        bloque con su notificación (id real del RETURNING); el resto del
+        payload se arma una sola vez.
+        """
+        if not created:
+            return
+        common = {
+            'type': base['type'],
+            'title': base['title'],
+            'message': base['message'],
+            'priority': base['priority'],
+            'data': base['data'],
+            'is_read': False,
+            'is_deleted': False,
+            'is_actionable': base['is_actionable'],
+            'action_url': base['action_url'],
+            'related_invitation_id': None,
+            'created_at': base['created_at'].isoformat(),
+            'read_at': None,
+            'expires_at': base['expires_at'].isoformat() if base['expires_at'] else None,
+        }
+        try:
+            from app.extensions import socketio
+            for user_id, notification_id in created.items():
+                socketio.emit(
+                    'notification:new',
+                    {'notification': {**common, 'id': notification_id, 'user_id': user_id}},
+                    room=f'user:{user_id}',
+                )
+        except Exception:
+            pass  # Si Redis/socket falla, las notificaciones ya están en BD
+
     # ==================== DOCUMENTOS ====================
     
     @staticmethod
@@ -562,6 +669,75 @@ class NotificationService:
 
         return notification
 
+    @staticmethod
+    def notify_event_reminders_bulk(user_ids, event, reminder_type: str, slot_datetime: str) -> Dict[int, int]:
+        """
+        Versión masiva de notify_event_reminder para todos los destinatarios
+        de un evento: un INSERT multi-fila de notificaciones, una consulta de
+        usuarios y un INSERT de correos personalizados. No hace commit.
+
+        Returns:
+            dict user_id → notification_id.
+        """
+        label_map = {
+            '24h': ('Recordatorio: evento mañana', 'mañana'),
+            '2h':  ('Recordatorio: evento en 2 horas', 'en unas horas'),
+        }
+        title, when = label_map.get(reminder_type, ('Recordatorio de evento', 'pronto'))
+
+        created = NotificationService.create_bulk_notifications(
+            user_ids=user_ids,
+            notification_type=f'event_reminder_{reminder_type}',
+            title=title,
+            message=f'Tu evento "{event.title}" comienza {when} ({slot_datetime}).',
+            priority='high',
+            action_url=f'/events/{event.id}',
+            data={
+                'event_id': event.id,
+                'event_title': event.title,
+                'reminder_type': reminder_type,
+                'slot_datetime': slot_datetime,
+            }
+        )
+        if not created:
+            return created
+
+        try:
+            from app.services.email_service import EmailService
+            from app.services.email_templates import EmailTemplates
+
+            try:
+                event_url = url_for('pages_events_public.view_event', event_id=event.id, _external=True)
+            except RuntimeError:
+                event_url = f"/events/{event.id}"
+
+            recipients = (
+                db.session.query(User.id, User.first_name, User.last_name, User.email)
+                .filter(User.id.in_(list(created)), User.email.isnot(None), User.email != '')
+                .all()
+            )
+            messages = []
+            for uid, first_name, last_name, email in recipients:
+                subject, html = EmailTemplates.event_reminder(
+                    user_name=f"{first_name} {last_name}",
+                    event_title=event.title,
+                    slot_datetime=slot_datetime,
+                    reminder_type=reminder_type,
+                    location=event.location or 'Por definir',
+                    event_url=event_url
+                )
+                messages.append({
+                    'user_id': uid, 'notification_id': created[uid], 'recipient_email': email,
+                    'subject': subject, 'html_content': html,
+                })
+            with db.session.begin_nested():
+                email_ids = EmailService.insert_messages_bulk(messages)
+            EmailService.dispatch_batch(email_ids)
+        except Exception as e:
+            logging.exception(f"Error queueing emails for event_reminder: {e}")
+
+        return created
+
     @staticmethod
     def notify_event_archived(user_id: int, event_title: str, event_id: int) -> Notification:
         """Notifica a registrados que el evento fue archivado/retirado."""
@@ -872,6 +1048,8 @@ class NotificationService:
             notification.is_read = True
             notification.read_at = now_local()
             db.session.flush()
+            if not notification.is_deleted:
+                user_counters.queue_delta(user_counters.UNREAD, [user_id], -1)
         
         return notification
     
@@ -887,6 +1065,7 @@ class NotificationService:
             'read_at': now_local()
         })
         db.session.flush()
+        user_counters.queue_reset(user_counters.UNREAD, user_id, 0)
         return count
     
     @staticmethod
@@ -898,6 +1077,8 @@ class NotificationService:
         ).first()
         
         if notification:
+            if not notification.is_deleted and not notification.is_read:
+                user_counters.queue_delta(user_counters.UNREAD, [user_id], -1)
             notification.is_deleted = True
             db.session.flush()
         
@@ -929,7 +1110,18 @@ class NotificationService:
     
     @staticmethod
     def get_unread_count(user_id: int) -> int:
-        """Obtiene el contador de notificaciones no leídas"""
+        """
+        Obtiene el contador de notificaciones no leídas.
+        Se sirve desde el contador materializado (app.utils.user_counters);
+        el COUNT(*) solo corre cuando no hay valor en caché.
+        """
+        return user_counters.get_count(
+            user_counters.UNREAD, user_id,
+            lambda: NotificationService._count_unread_db(user_id),
+        )
+
+    @staticmethod
+    def _count_unread_db(user_id: int) -> int:
         return Notification.query.filter_by(
             user_id=user_id,
             is_read=False,
@@ -972,23 +1164,20 @@ class NotificationService:
         Returns:
             Cantidad de notificaciones creadas exitosamente.
         """
-        created = 0
-        for uid in user_ids:
-            try:
-                NotificationService.create_notification(
-                    user_id=uid,
-                    notification_type='event_published',
-                    title='Nuevo evento disponible',
-                    message=f'Se publicó "{event_title}". Revísalo en la sección de eventos.',
-                    priority='normal',
-                    action_url=f'/events/{event_id}',
-                    data={'event_id': event_id, 'event_title': event_title}
-                )
-                created += 1
-            except Exception as e:
-                import logging
-                logging.exception(f"notify_event_published fallo user_id={uid}: {e}")
-        return created
+        try:
+            created = NotificationService.create_bulk_notifications(
+                user_ids=user_ids,
+                notification_type='event_published',
+                title='Nuevo evento disponible',
+                message=f'Se publicó "{event_title}". Revísalo en la sección de eventos.',
+                priority='normal',
+                action_url=f'/events/{event_id}',
+                data={'event_id': event_id, 'event_title': event_title}
+            )
+        except Exception as e:
+            logger.exception(f"notify_event_published fallo event_id={event_id}: {e}")
+            return 0
+        return len(created)
 
     # ==================== NOTIFICACIONES MASIVAS (VÍA CELERY) ====================
 
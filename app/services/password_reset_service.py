@@ -13,6 +13,7 @@ import secrets
 from datetime import timedelta
 
 from werkzeug.security import generate_password_hash
+from app.utils.offload import offload_cpu
 
 from app import db
 from app.models.password_reset_token import PasswordResetToken
@@ -108,7 +109,7 @@ def consume_token(token: str, new_password: str) -> User:
     if not user:
         raise TokenNotFound("Usuario asociado al token no existe.")
 
-    user.password = generate_password_hash(new_password)
+    user.password = offload_cpu(generate_password_hash, new_password, label='password_hash')
     user.must_change_password = False
     prt.used_at = now_local()
 
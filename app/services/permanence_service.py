@@ -1019,7 +1019,7 @@ def submit_permanence_document(
     from app.models.document_deadline import DocumentDeadline
     from app.models.submission import Submission
     from app.models.program_step import ProgramStep
-    from app.utils.files import save_user_doc
+    from app.utils.files import record_file_inventory, save_user_doc
 
     up = UserProgram.query.get(user_program_id)
     if not up or up.user_id != student_id:
@@ -1068,6 +1068,7 @@ def submit_permanence_document(
         uploaded_by_role='student',
         deadline_at=dl.closes_at,
     )
+    record_file_inventory(sub, file_path)
     sub.document_deadline_id = dl.id
     sub.academic_period_id = dl.academic_period_id
     db.session.add(sub)
@@ -1316,7 +1317,7 @@ def submit_leave_request(
     """
     from app.models.submission import Submission
     from app.models.program_step import ProgramStep
-    from app.utils.files import save_user_doc
+    from app.utils.files import record_file_inventory, save_user_doc
 
     up = UserProgram.query.get(user_program_id)
     if not up or up.user_id != student_id:
@@ -1368,6 +1369,7 @@ def submit_leave_request(
         uploaded_by=student_id,
         uploaded_by_role='student',
     )
+    record_file_inventory(sub, file_path)
     sub.academic_period_id = active_period.id
     db.session.add(sub)
 
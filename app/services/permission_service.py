@@ -14,6 +14,7 @@ from app.models.role_permission_audit import RolePermissionAudit
 from app.models.user_permission import UserPermission
 from app.models.user import User
 from app.models.role import Role
+from app.utils.permission_cache import bump_permission_version
 
 
 class PermissionError(Exception):
@@ -162,6 +163,7 @@ def delegate_permission(granter_id, grantee_id, codename, program_id=None, note=
     )
     db.session.add(up)
     db.session.commit()
+    bump_permission_version()
     return up
 
 
@@ -186,6 +188,7 @@ def revoke_delegation(revoker_id, user_permission_id):
 
     up.revoke()
     db.session.commit()
+    bump_permission_version()
     return up
 
 
@@ -298,6 +301,7 @@ def create_social_service_user(creator_id, user_data, permissions_to_delegate,
             created_delegations.append(up)
 
     db.session.commit()
+    bump_permission_version()
 
     # Notificar a admins en tiempo real
     try:
@@ -415,6 +419,7 @@ def add_role_override(role_id, codename, performed_by, reason=None):
     )
     db.session.add(audit)
     db.session.commit()
+    bump_permission_version()
 
     # Notificar a admins en tiempo real
     try:
@@ -466,6 +471,7 @@ def revert_role_override(role_id, codename, performed_by):
     )
     db.session.add(audit)
     db.session.commit()
+    bump_permission_version()
 
     # Notificar a admins en tiempo real
     try:
@@ -11,7 +11,9 @@ Workflow:
 All photos are compressed to 512px JPEG q=85 by `image_processing.compress_profile_photo`.
 """
 
+import uuid
 from pathlib import Path
+
 from flask import current_app
 
 from app import db
@@ -22,9 +24,10 @@ from app.services.notification_service import NotificationService
 from app.services.user_history_service import UserHistoryService
 from app.utils.datetime_utils import now_local
 from app.utils.image_processing import compress_profile_photo, ImageProcessingError
+from app.utils.offload import offload_cpu
 
 
-AVATAR_FILENAME = 'avatar.jpg'
+AVATAR_PREFIX = 'avatar_'
 
 
 class ProfilePhotoError(Exception):
@@ -62,6 +65,12 @@ def _delete_previous_avatars(user_id: int) -> None:
                 pass
 
 
+def _avatar_filename() -> str:
+    # New name on every upload: /files/avatar/... is served as immutable,
+    # so the URL has to change whenever the content does.
+    return f"{AVATAR_PREFIX}{uuid.uuid4().hex}.jpg"
+
+
 def _coordinator_ids_for_user(user: User) -> list[int]:
     """Returns coordinator_ids of all programs the user is enrolled in."""
     coord_ids = set()
@@ -91,17 +100,18 @@ def upload_photo(user_id: int, file_storage, requester_id: int = None,
         )
 
     try:
-        compressed_bytes = compress_profile_photo(file_storage)
+        compressed_bytes = offload_cpu(compress_profile_photo, file_storage, label='profile_photo')
     except ImageProcessingError as exc:
         raise ProfilePhotoError(str(exc)) from exc
 
     _delete_previous_avatars(user_id)
     folder = _avatar_dir(user_id)
-    target = folder / AVATAR_FILENAME
+    filename = _avatar_filename()
+    target = folder / filename
     with open(target, 'wb') as fh:
         fh.write(compressed_bytes)
 
-    user.avatar = AVATAR_FILENAME
+    user.avatar = filename
     user.photo_change_allowed = False
     user.photo_change_requested_at = None
 
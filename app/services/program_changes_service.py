@@ -107,6 +107,9 @@ class ProgramChangesService:
                     reviewer_id=src.reviewer_id,
                     reviewer_comment=src.reviewer_comment
                 )
+                # Mismo archivo físico: mismo inventario
+                copy.size_bytes, copy.sha256, copy.mime = src.size_bytes, src.sha256, src.mime
+                copy.file_missing = src.file_missing
                 db.session.add(copy)
             elif m.mapping_rule == 'needs_update':
                 # no copiamos archivo; el checklist mostrará el pendiente del archive destino
@@ -5,7 +5,8 @@ Servicio para el cierre de periodo y avance masivo de semestre (Tarea "Pasar Sem
 Flujo:
 1. postgraduate_admin llama a preview_program() para obtener un resumen de qué ocurrirá.
 2. Confirma y llama a execute_program_transition() (o execute_global_transition() para todos
-   los programas) — toda la operación ocurre en una única transacción SQL.
+   los programas) — la operación de cada programa ocurre en una única transacción SQL.
+   Para todos los programas conviene encolar app.tasks.transition (reporta avance).
 3. Por cada estudiante elegible se cierra su SemesterEnrollment activo y se crea uno nuevo
    en el periodo destino (pending, sin confirmar).
 4. Los aspirantes se migran o expiran según cuántos periodos llevan de antigüedad.
@@ -14,6 +15,12 @@ Flujo:
 Idempotencia:
 - Si ya existe un SE para el periodo destino de un UserProgram, se omite silently.
 - Los aspirantes ya expirados no se tocan.
+
+Rendimiento:
+- _TransitionData carga inscripciones, ventanas de entrega, submissions aprobadas
+  y diferimientos de uno o todos los programas con un número fijo de consultas;
+  las reglas de evaluate_student() se evalúan en memoria.
+- Historial y notificaciones se escriben con INSERT multi-fila.
 """
 
 import logging
@@ -27,9 +34,13 @@ from app.services.notification_service import NotificationService
 from app.services.user_history_service import UserHistoryService
 from app.services.payment_reference_service import PaymentReferenceService
 from app.utils.datetime_utils import now_local
+from app.utils.period_calendar import get_period_calendar
 
 logger = logging.getLogger(__name__)
 
+# Cada cuántos estudiantes se reporta avance en execute_program_transition
+PROGRESS_EVERY = 50
+
 
 # ---------------------------------------------------------------------------
 # Domain exceptions
@@ -76,31 +87,20 @@ def _ordered_period_ids() -> list:
     crearse en cualquier orden (ej: migración que rellena periodos
     históricos faltantes después de que ya existían los recientes).
     """
-    rows = (
-        db.session.query(AcademicPeriod.id)
-        .order_by(AcademicPeriod.start_date)
-        .all()
-    )
-    return [r[0] for r in rows]
+    return get_period_calendar().ordered_ids
 
 
 def _delta_periods(admission_period_id: Optional[int], target_period_id: int) -> Optional[int]:
     """
     Calcula cuántos periodos de diferencia hay entre admission_period_id
-    y target_period_id en la lista ordenada.
+    y target_period_id en el orden cronológico.
 
-    Retorna None si admission_period_id es None o no existe en la lista.
+    Retorna None si admission_period_id es None o no existe en el calendario.
     Retorna el número de posiciones de distancia (≥ 0).
     """
     if admission_period_id is None:
         return None
-    period_ids = _ordered_period_ids()
-    try:
-        idx_target = period_ids.index(target_period_id)
-        idx_admission = period_ids.index(admission_period_id)
-    except ValueError:
-        return None
-    return idx_target - idx_admission
+    return get_period_calendar().delta(admission_period_id, target_period_id)
 
 
 def _get_conacyt_archive_step_id() -> Optional[int]:
@@ -117,6 +117,269 @@ def _is_conacyt_deadline(deadline) -> bool:
     return deadline.archive and deadline.archive.step_id == 12
 
 
+# ---------------------------------------------------------------------------
+# Carga masiva
+# ---------------------------------------------------------------------------
+
+class _TransitionData:
+    """
+    Todo lo necesario para evaluar la transición de uno o varios programas,
+    cargado con un número fijo de consultas (independiente del número de
+    estudiantes). La evaluación y la clasificación se hacen en memoria.
+
+    Atributos:
+        programs           {program_id: Program}
+        calendar           PeriodCalendar (orden cronológico y deltas en memoria)
+        user_programs      UserProgram no expirados (con user precargado)
+        source_se          {user_program_id: SemesterEnrollment del periodo origen}
+        target_se_ids      user_program_ids que ya tienen SE en el periodo destino
+        max_semester       {user_program_id: max(semester_number)}
+        deadlines          {program_id: [DocumentDeadline del periodo origen, archive activo]}
+        approved           {(user_id, deadline_id)} con submission aprobada
+        deferrals          {user_program_id: EnrollmentDeferral activo hacia el destino}
+    """
+
+    def __init__(self, source_period_id: int, target_period_id: int):
+        self.source_period_id = source_period_id
+        self.target_period_id = target_period_id
+        self.now = now_local().replace(tzinfo=None)
+        self.programs = {}
+        self.calendar = None
+        self.user_programs = []
+        self.source_se = {}
+        self.target_se_ids = set()
+        self.max_semester = {}
+        self.deadlines = {}
+        self.approved = set()
+        self.deferrals = {}
+
+    @classmethod
+    def load(
+        cls,
+        program_ids: list,
+        source_period_id: int,
+        target_period_id: int,
+        user_program_ids: Optional[list] = None,
+    ) -> '_TransitionData':
+        """
+        Carga los datos de los programas dados. Con ``user_program_ids`` se
+        limita a esos UserProgram (evaluación individual).
+        """
+        from sqlalchemy.orm import contains_eager, selectinload
+        from app.models.archive import Archive
+        from app.models.document_deadline import DocumentDeadline
+        from app.models.submission import Submission
+
+        data = cls(source_period_id, target_period_id)
+        data.calendar = get_period_calendar()
+        if not program_ids:
+            return data
+
+        def scope(query):
+            if user_program_ids is not None:
+                return query.filter(UserProgram.id.in_(user_program_ids))
+            return query.filter(UserProgram.program_id.in_(program_ids))
+
+        data.programs = {
+            p.id: p for p in Program.query.filter(Program.id.in_(program_ids)).all()
+        }
+
+        up_query = UserProgram.query.options(selectinload(UserProgram.user))
+        if user_program_ids is None:
+            up_query = up_query.filter(UserProgram.admission_status != 'expired')
+        data.user_programs = scope(up_query).order_by(UserProgram.id).all()
+
+        enrollments = scope(
+            SemesterEnrollment.query.join(
+                UserProgram, SemesterEnrollment.user_program_id == UserProgram.id
+            ).filter(
+                SemesterEnrollment.academic_period_id.in_([source_period_id, target_period_id])
+            )
+        ).order_by(SemesterEnrollment.id).all()
+        for se in enrollments:
+            if se.academic_period_id == source_period_id:
+                data.source_se.setdefault(se.user_program_id, se)
+            if se.academic_period_id == target_period_id:
+                data.target_se_ids.add(se.user_program_id)
+
+        data.max_semester = dict(scope(
+            db.session.query(
+                SemesterEnrollment.user_program_id,
+                db.func.max(SemesterEnrollment.semester_number),
+            ).join(
+                UserProgram, SemesterEnrollment.user_program_id == UserProgram.id
+            )
+        ).group_by(SemesterEnrollment.user_program_id).all())
+
+        deadlines = (
+            DocumentDeadline.query
+            .join(Archive, DocumentDeadline.archive_id == Archive.id)
+            .options(contains_eager(DocumentDeadline.archive))
+            .filter(
+                DocumentDeadline.program_id.in_(program_ids),
+                DocumentDeadline.academic_period_id == source_period_id,
+                Archive.is_active == True,  # noqa: E712
+            )
+            .order_by(DocumentDeadline.id)
+            .all()
+        )
+        for dl in deadlines:
+            data.deadlines.setdefault(dl.program_id, []).append(dl)
+
+        # Sólo ventanas ya cerradas bloquean: solo esas necesitan submissions
+        closed_ids = [
+            dl.id for dl in deadlines
+            if dl.closes_at is not None and dl.closes_at <= data.now
+        ]
+        if closed_ids:
+            data.approved = set(
+                db.session.query(Submission.user_id, Submission.document_deadline_id)
+                .filter(
+                    Submission.document_deadline_id.in_(closed_ids),
+                    Submission.status == 'approved',
+                )
+                .distinct()
+                .all()
+            )
+
+        data.deferrals = {
+            d.user_program_id: d
+            for d in scope(
+                EnrollmentDeferral.query.join(
+                    UserProgram, EnrollmentDeferral.user_program_id == UserProgram.id
+                ).filter(
+                    EnrollmentDeferral.deferred_to_period_id == target_period_id,
+                    EnrollmentDeferral.status == 'active',
+                )
+            ).all()
+        }
+        return data
+
+    def enrolled(self, program_id: int) -> list:
+        return [
+            up for up in self.user_programs
+            if up.program_id == program_id and up.admission_status == 'enrolled'
+        ]
+
+    def applicants(self, program_id: int) -> list:
+        return [
+            up for up in self.user_programs
+            if up.program_id == program_id
+            and up.admission_status not in ('enrolled', 'expired')
+        ]
+
+    def admission_delta(self, up: UserProgram) -> Optional[int]:
+        """Periodos entre la admisión del aspirante y el destino (None si no aplica)."""
+        if up.admission_period_id is None:
+            return None
+        return self.calendar.delta(up.admission_period_id, self.target_period_id)
+
+    def next_semester_number(self, up: UserProgram) -> int:
+        return (self.max_semester.get(up.id) or 0) + 1
+
+    def evaluate(self, up: UserProgram) -> dict:
+        """Aplica las reglas de evaluate_student() sobre los datos precargados."""
+        blockers = []
+
+        # ── Regla 1: Debe existir SE en periodo origen con enrollment_confirmed=True ──
+        source_se = self.source_se.get(up.id)
+        if not source_se:
+            blockers.append({
+                'code': 'not_enrolled',
+                'message': 'No tiene inscripción semestral en el periodo origen',
+            })
+            return {'can_advance': False, 'blockers': blockers}
+
+        # ── Regla nueva: Límite máximo de semestres (duration_semesters + 4) ──
+        # Maestrías: 4 normal → 8 máx. Doctorado: 6 normal → 10 máx.
+        # Bajas temporales NO descuentan: el contador sigue creciendo.
+        program = self.programs.get(up.program_id)
+        if program and program.duration_semesters:
+            max_allowed = program.duration_semesters + 4
+            next_sem = (source_se.semester_number or 0) + 1
+            if next_sem > max_allowed:
+                blockers.append({
+                    'code': 'semester_limit_exceeded',
+                    'message': (
+                        f'Excede el límite de semestres del programa '
+                        f'(máx {max_allowed}: duración {program.duration_semesters} + 4). '
+                        f'Avanzaría al semestre {next_sem}.'
+                    ),
+                })
+
+        if not source_se.enrollment_confirmed:
+            blockers.append({
+                'code': 'enrollment_not_confirmed',
+                'message': 'La inscripción semestral no fue confirmada por el coordinador',
+            })
+
+        # ── Regla 2: SE en periodo origen debe estar en status='active' ──
+        if source_se.status == 'on_leave':
+            blockers.append({
+                'code': 'on_leave',
+                'message': 'El estudiante está en baja temporal',
+            })
+        elif source_se.status == 'dropped':
+            blockers.append({
+                'code': 'dropped',
+                'message': 'El estudiante tiene baja definitiva registrada',
+            })
+        elif source_se.status == 'pending':
+            blockers.append({
+                'code': 'enrollment_not_confirmed',
+                'message': 'La inscripción semestral está en estado pendiente (no activa)',
+            })
+
+        # ── Regla 3: Documentos de permanencia cerrados sin submission aprobada ──
+        missing_docs = []
+        missing_conacyt = []
+
+        for dl in self.deadlines.get(up.program_id, ()):
+            # Sólo ventanas ya cerradas bloquean
+            if dl.closes_at is None or dl.closes_at > self.now:
+                continue
+            if (up.user_id, dl.id) in self.approved:
+                continue
+
+            if _is_conacyt_deadline(dl):
+                # Las ventanas SECIHTI mensual se acumulan por separado
+                missing_conacyt.append({
+                    'id': dl.id,
+                    'label': dl.label,
+                    'sequence': dl.sequence,
+                })
+            else:
+                missing_docs.append({
+                    'id': dl.id,
+                    'label': dl.label,
+                })
+
+        if missing_docs:
+            blockers.append({
+                'code': 'missing_documents',
+                'message': (
+                    f'{len(missing_docs)} ventana(s) de entrega cerrada(s) sin documento aprobado'
+                ),
+                'deadlines': missing_docs,
+            })
+
+        # ── Regla 4: SECIHTI mensual (sólo becarios) ──
+        if up.has_conacyt_scholarship and missing_conacyt:
+            blockers.append({
+                'code': 'missing_conacyt_months',
+                'message': (
+                    f'{len(missing_conacyt)} entrega(s) mensual(es) SECIHTI cerrada(s) sin aprobación'
+                ),
+                'months': missing_conacyt,
+            })
+        # Si no es becario, ignorar ventanas SECIHTI (ya se omitieron de missing_docs)
+
+        return {
+            'can_advance': len(blockers) == 0,
+            'blockers': blockers,
+        }
+
+
 # ---------------------------------------------------------------------------
 # Core evaluation
 # ---------------------------------------------------------------------------
@@ -151,9 +414,6 @@ def evaluate_student(
             ]
         }
     """
-    from app.models.document_deadline import DocumentDeadline
-    from app.models.submission import Submission
-
     up = UserProgram.query.get(user_program_id)
     if not up:
         return {
@@ -161,160 +421,23 @@ def evaluate_student(
             'blockers': [{'code': 'not_enrolled', 'message': 'UserProgram no encontrado'}],
         }
 
-    blockers = []
-
-    # ── Regla 1: Debe existir SE en periodo origen con enrollment_confirmed=True ──
-    source_se = SemesterEnrollment.query.filter_by(
-        user_program_id=user_program_id,
-        academic_period_id=source_period_id,
-    ).first()
-
-    if not source_se:
-        blockers.append({
-            'code': 'not_enrolled',
-            'message': 'No tiene inscripción semestral en el periodo origen',
-        })
-        return {'can_advance': False, 'blockers': blockers}
-
-    # ── Regla nueva: Límite máximo de semestres (duration_semesters + 4) ──
-    # Maestrías: 4 normal → 8 máx. Doctorado: 6 normal → 10 máx.
-    # Bajas temporales NO descuentan: el contador sigue creciendo.
-    program = up.program
-    if program and program.duration_semesters:
-        max_allowed = program.duration_semesters + 4
-        next_sem = (source_se.semester_number or 0) + 1
-        if next_sem > max_allowed:
-            blockers.append({
-                'code': 'semester_limit_exceeded',
-                'message': (
-                    f'Excede el límite de semestres del programa '
-                    f'(máx {max_allowed}: duración {program.duration_semesters} + 4). '
-                    f'Avanzaría al semestre {next_sem}.'
-                ),
-            })
-
-    if not source_se.enrollment_confirmed:
-        blockers.append({
-            'code': 'enrollment_not_confirmed',
-            'message': 'La inscripción semestral no fue confirmada por el coordinador',
-        })
-
-    # ── Regla 2: SE en periodo origen debe estar en status='active' ──
-    if source_se.status == 'on_leave':
-        blockers.append({
-            'code': 'on_leave',
-            'message': 'El estudiante está en baja temporal',
-        })
-    elif source_se.status == 'dropped':
-        blockers.append({
-            'code': 'dropped',
-            'message': 'El estudiante tiene baja definitiva registrada',
-        })
-    elif source_se.status == 'pending':
-        blockers.append({
-            'code': 'enrollment_not_confirmed',
-            'message': 'La inscripción semestral está en estado pendiente (no activa)',
-        })
-
-    # ── Regla 3: Documentos de permanencia cerrados sin submission aprobada ──
-    now = now_local().replace(tzinfo=None)
-
-    from app.models.archive import Archive
-
-    deadlines = (
-        DocumentDeadline.query
-        .filter_by(
-            program_id=up.program_id,
-            academic_period_id=source_period_id,
-        )
-        .join(Archive, DocumentDeadline.archive_id == Archive.id)
-        .filter(Archive.is_active == True)
-        .all()
+    data = _TransitionData.load(
+        [up.program_id], source_period_id, target_period_id,
+        user_program_ids=[up.id],
     )
-
-    missing_docs = []
-    missing_conacyt = []
-
-    for dl in deadlines:
-        # Sólo ventanas ya cerradas bloquean
-        if dl.closes_at is None:
-            continue
-        if dl.closes_at > now:
-            continue
-
-        has_approved = Submission.query.filter_by(
-            user_id=up.user_id,
-            document_deadline_id=dl.id,
-            status='approved',
-        ).first() is not None
-
-        if has_approved:
-            continue
-
-        if _is_conacyt_deadline(dl):
-            # Las ventanas SECIHTI mensual se acumulan por separado
-            missing_conacyt.append({
-                'id': dl.id,
-                'label': dl.label,
-                'sequence': dl.sequence,
-            })
-        else:
-            missing_docs.append({
-                'id': dl.id,
-                'label': dl.label,
-            })
-
-    if missing_docs:
-        blockers.append({
-            'code': 'missing_documents',
-            'message': (
-                f'{len(missing_docs)} ventana(s) de entrega cerrada(s) sin documento aprobado'
-            ),
-            'deadlines': missing_docs,
-        })
-
-    # ── Regla 4: SECIHTI mensual (sólo becarios) ──
-    if up.has_conacyt_scholarship and missing_conacyt:
-        blockers.append({
-            'code': 'missing_conacyt_months',
-            'message': (
-                f'{len(missing_conacyt)} entrega(s) mensual(es) SECIHTI cerrada(s) sin aprobación'
-            ),
-            'months': missing_conacyt,
-        })
-    # Si no es becario, ignorar ventanas SECIHTI (ya se omitieron de missing_docs)
-
-    return {
-        'can_advance': len(blockers) == 0,
-        'blockers': blockers,
-    }
+    return data.evaluate(up)
 
 
 # ---------------------------------------------------------------------------
 # Preview
 # ---------------------------------------------------------------------------
 
-def _build_student_row(up: UserProgram, source_period_id: int, target_period_id: int) -> dict:
-    """Construye un dict de fila para la respuesta del preview."""
+def _base_row(up: UserProgram, data: _TransitionData) -> dict:
+    """Datos comunes de una fila del preview (sin consultas adicionales)."""
     user = up.user
-    evaluation = evaluate_student(up.id, source_period_id, target_period_id)
-
-    source_se = SemesterEnrollment.query.filter_by(
-        user_program_id=up.id,
-        academic_period_id=source_period_id,
-    ).first()
-
-    # Calcular el siguiente número de semestre
-    max_sem = (
-        db.session.query(db.func.max(SemesterEnrollment.semester_number))
-        .filter_by(user_program_id=up.id)
-        .scalar()
-    ) or 0
-    next_semester_number = max_sem + 1
-
-    program = up.program
+    program = data.programs.get(up.program_id)
     return {
-        'user_program': up.to_dict(),
+        'user_program': up.to_dict(last_semester_number=data.max_semester.get(up.id)),
         'user': {
             'id': user.id,
             'full_name': f"{user.first_name} {user.last_name} {user.mother_last_name or ''}".strip(),
@@ -326,17 +449,23 @@ def _build_student_row(up: UserProgram, source_period_id: int, target_period_id:
             'name': program.name if program else None,
             'slug': program.slug if program else None,
         },
+    }
+
+
+def _build_student_row(up: UserProgram, data: _TransitionData) -> dict:
+    """Construye un dict de fila para la respuesta del preview."""
+    evaluation = data.evaluate(up)
+    source_se = data.source_se.get(up.id)
+    return {
+        **_base_row(up, data),
         'current_se': source_se.to_dict() if source_se else None,
-        'next_semester_number': next_semester_number,
+        'next_semester_number': data.next_semester_number(up),
         'can_advance': evaluation['can_advance'],
         'blockers': evaluation['blockers'],
     }
 
 
-def _build_admission_rows(
-    program_id: int,
-    target_period_id: int,
-) -> tuple:
+def _build_admission_rows(program_id: int, data: _TransitionData) -> tuple:
     """
     Clasifica los aspirantes del programa según antigüedad de admisión.
 
@@ -349,171 +478,61 @@ def _build_admission_rows(
     periodo activo, no requieren acción. Antes se omitían silenciosamente y
     parecían "en limbo" en la UI.
     """
-    period_ids = _ordered_period_ids()
-
-    try:
-        idx_target = period_ids.index(target_period_id)
-    except ValueError:
+    if data.target_period_id not in data.calendar:
         return [], [], [], [], []
 
-    # Todos los UserProgram del programa que NO son estudiantes enrolled
-    applicants = (
-        UserProgram.query
-        .filter(
-            UserProgram.program_id == program_id,
-            UserProgram.admission_status.notin_(['enrolled', 'expired']),
-        )
-        .all()
-    )
-
-    # Diferidos cuyo target coincide con el nuevo periodo
-    deferred_reactivate = []
-
-    # Pre-cargar diferidos activos en el periodo destino para este programa
-    active_deferrals = {
-        d.user_program_id: d
-        for d in EnrollmentDeferral.query.filter(
-            EnrollmentDeferral.deferred_to_period_id == target_period_id,
-            EnrollmentDeferral.status == 'active',
-        ).all()
-    }
-
     migrate = []
     expire = []
     cleanup = []
+    deferred_reactivate = []
     already_aligned = []
 
-    for up in applicants:
-        user = up.user
-        program = up.program
-        base_row = {
-            'user_program': up.to_dict(),
-            'user': {
-                'id': user.id,
-                'full_name': f"{user.first_name} {user.last_name} {user.mother_last_name or ''}".strip(),
-                'email': user.email,
-                'control_number': getattr(user, 'control_number', None),
-            },
-            'program': {
-                'id': program.id if program else None,
-                'name': program.name if program else None,
-                'slug': program.slug if program else None,
-            },
-            'admission_period_id': up.admission_period_id,
-        }
-
+    for up in data.applicants(program_id):
         # Excepción diferidos: si tienen deferral activo que apunta al target_period
-        if up.id in active_deferrals:
-            deferred_reactivate.append(base_row)
-            continue
-
-        if up.admission_period_id is None:
-            # Sin periodo de admisión registrado: ignorar
+        if up.id in data.deferrals:
+            deferred_reactivate.append({
+                **_base_row(up, data), 'admission_period_id': up.admission_period_id,
+            })
             continue
 
-        try:
-            idx_admission = period_ids.index(up.admission_period_id)
-        except ValueError:
+        delta = data.admission_delta(up)
+        if delta is None or delta < 0:
+            # Sin periodo de admisión registrado o FUTURO al destino: ignorar
             continue
 
-        delta = idx_target - idx_admission
-
-        if delta < 0:
-            # Periodo de admisión es FUTURO al destino: ignorar (no aplica)
-            continue
-        elif delta == 0:
+        row = {**_base_row(up, data), 'admission_period_id': up.admission_period_id}
+        if delta == 0:
             # Ya pertenece al periodo destino: su admisión sigue allí
-            already_aligned.append(base_row)
+            already_aligned.append(row)
         elif delta == 1:
-            migrate.append(base_row)
+            migrate.append(row)
         elif delta == 2:
-            expire.append(base_row)
+            expire.append(row)
         else:  # delta >= 3
-            cleanup.append(base_row)
+            cleanup.append(row)
 
     return migrate, expire, cleanup, deferred_reactivate, already_aligned
 
 
-def preview_program(
-    program_id: int,
-    source_period_id: int,
-    target_period_id: int,
-) -> dict:
-    """
-    Genera un resumen de lo que ocurrirá al ejecutar la transición para un programa.
-    No muta ningún dato.
-
-    Returns:
-        {
-            'will_advance': [{user_program_dict, user_dict, current_se_dict, next_semester_number}],
-            'will_block': [{user_program_dict, user_dict, blockers}],
-            'on_leave': [{user_program_dict, user_dict, current_se_dict}],
-            'admission_migrate': [{user_program_dict, user_dict, admission_period_id}],
-            'admission_expire': [...],
-            'admission_to_cleanup': [...],
-            'deferred_reactivate': [...],
-            'stats': {
-                'will_advance': int,
-                'will_block': int,
-                'on_leave': int,
-                'admission_migrate': int,
-                'admission_expire': int,
-                'admission_to_cleanup': int,
-                'deferred_reactivate': int,
-            }
-        }
-    """
-    _get_period(source_period_id)
-    _get_period(target_period_id)
-    _get_program(program_id)
-
-    # ── Estudiantes enrolled ──
-    enrolled_ups = (
-        UserProgram.query
-        .filter_by(program_id=program_id, admission_status='enrolled')
-        .all()
-    )
-
+def _classify_program(program_id: int, data: _TransitionData) -> dict:
+    """Preview de un programa a partir de los datos precargados."""
     will_advance = []
     will_block = []
     on_leave = []
 
-    for up in enrolled_ups:
-        source_se = SemesterEnrollment.query.filter_by(
-            user_program_id=up.id,
-            academic_period_id=source_period_id,
-        ).first()
-
+    for up in data.enrolled(program_id):
+        source_se = data.source_se.get(up.id)
         if source_se and source_se.status == 'on_leave':
-            user = up.user
-            program = up.program
-            on_leave.append({
-                'user_program': up.to_dict(),
-                'user': {
-                    'id': user.id,
-                    'full_name': f"{user.first_name} {user.last_name} {user.mother_last_name or ''}".strip(),
-                    'email': user.email,
-                    'control_number': getattr(user, 'control_number', None),
-                },
-                'program': {
-                    'id': program.id if program else None,
-                    'name': program.name if program else None,
-                    'slug': program.slug if program else None,
-                },
-                'current_se': source_se.to_dict() if source_se else None,
-            })
+            on_leave.append({**_base_row(up, data), 'current_se': source_se.to_dict()})
             continue
 
-        row = _build_student_row(up, source_period_id, target_period_id)
+        row = _build_student_row(up, data)
         if row['can_advance']:
             will_advance.append(row)
         else:
             will_block.append(row)
 
-    # ── Aspirantes ──
-    migrate, expire, cleanup, deferred, already_aligned = _build_admission_rows(
-        program_id, target_period_id
-    )
+    migrate, expire, cleanup, deferred, already_aligned = _build_admission_rows(program_id, data)
 
     stats = {
         'will_advance': len(will_advance),
@@ -539,10 +558,62 @@ def preview_program(
     }
 
 
-def preview_global(source_period_id: int, target_period_id: int) -> dict:
+def preview_program(
+    program_id: int,
+    source_period_id: int,
+    target_period_id: int,
+) -> dict:
+    """
+    Genera un resumen de lo que ocurrirá al ejecutar la transición para un programa.
+    No muta ningún dato.
+
+    Returns:
+        {
+            'will_advance': [{user_program_dict, user_dict, current_se_dict, next_semester_number}],
+            'will_block': [{user_program_dict, user_dict, blockers}],
+            'on_leave': [{user_program_dict, user_dict, current_se_dict}],
+            'admission_migrate': [{user_program_dict, user_dict, admission_period_id}],
+            'admission_expire': [...],
+            'admission_to_cleanup': [...],
+            'deferred_reactivate': [...],
+            'stats': {
+                'will_advance': int,
+                'will_block': int,
+                'on_leave': int,
+                'admission_migrate': int,
+                'admission_expire': int,
+                'admission_to_cleanup': int,
+                'deferred_reactivate': int,
+            }
+        }
+    """
+    _get_period(source_period_id)
+    _get_period(target_period_id)
+    _get_program(program_id)
+
+    data = _TransitionData.load([program_id], source_period_id, target_period_id)
+    return _classify_program(program_id, data)
+
+
+_PREVIEW_KEYS = (
+    'will_advance', 'will_block', 'on_leave', 'admission_migrate',
+    'admission_expire', 'admission_to_cleanup', 'deferred_reactivate',
+    'admission_already_aligned',
+)
+
+
+def preview_global(
+    source_period_id: int,
+    target_period_id: int,
+    progress_callback=None,
+) -> dict:
     """
     Genera un preview global para todos los programas.
 
+    Los datos de todos los programas se cargan de una vez (_TransitionData)
+    y se clasifican en memoria. ``progress_callback(done, total)`` se llama
+    tras cada programa.
+
     Returns dict con las mismas claves que preview_program pero acumuladas,
     más 'programs' (lista de program_id → stats individuales).
     """
@@ -550,41 +621,22 @@ def preview_global(source_period_id: int, target_period_id: int) -> dict:
     _get_period(target_period_id)
 
     programs = Program.query.filter_by(is_active=True).all()
+    data = _TransitionData.load([p.id for p in programs], source_period_id, target_period_id)
 
-    global_result = {
-        'will_advance': [],
-        'will_block': [],
-        'on_leave': [],
-        'admission_migrate': [],
-        'admission_expire': [],
-        'admission_to_cleanup': [],
-        'deferred_reactivate': [],
-        'admission_already_aligned': [],
-        'programs': [],
-        'stats': {
-            'will_advance': 0,
-            'will_block': 0,
-            'on_leave': 0,
-            'admission_migrate': 0,
-            'admission_expire': 0,
-            'admission_to_cleanup': 0,
-            'deferred_reactivate': 0,
-            'admission_already_aligned': 0,
-        },
-    }
+    global_result = {key: [] for key in _PREVIEW_KEYS}
+    global_result['programs'] = []
+    global_result['stats'] = dict.fromkeys(_PREVIEW_KEYS, 0)
 
-    for program in programs:
+    for done, program in enumerate(programs, start=1):
         try:
-            p_result = preview_program(program.id, source_period_id, target_period_id)
+            p_result = _classify_program(program.id, data)
         except Exception as e:
             logger.error(
                 f"Error en preview_program(program_id={program.id}): {e}"
             )
             continue
 
-        for key in ('will_advance', 'will_block', 'on_leave', 'admission_migrate',
-                    'admission_expire', 'admission_to_cleanup', 'deferred_reactivate',
-                    'admission_already_aligned'):
+        for key in _PREVIEW_KEYS:
             global_result[key].extend(p_result[key])
             global_result['stats'][key] += p_result['stats'][key]
 
@@ -593,6 +645,8 @@ def preview_global(source_period_id: int, target_period_id: int) -> dict:
             'program_name': program.name,
             'stats': p_result['stats'],
         })
+        if progress_callback:
+            progress_callback(done, len(programs))
 
     return global_result
 
@@ -606,6 +660,7 @@ def execute_program_transition(
     source_period_id: int,
     target_period_id: int,
     coordinator_id: int,
+    progress_callback=None,
 ) -> dict:
     """
     Aplica la transición semestral completa para un programa en una sola transacción.
@@ -616,6 +671,10 @@ def execute_program_transition(
     - Diferidos con deferred_to_period_id == target_period_id: reactiva (in_progress).
     - Idempotente: si ya existe SE para target_period, se omite.
 
+    Los datos se cargan de una vez (_TransitionData); historial y
+    notificaciones se escriben con INSERT multi-fila al final.
+    ``progress_callback(done, total)`` se llama cada PROGRESS_EVERY estudiantes.
+
     Returns:
         {
             'advanced': int,
@@ -627,7 +686,7 @@ def execute_program_transition(
             'errors': [str],
         }
     """
-    source_period = _get_period(source_period_id)
+    _get_period(source_period_id)
     target_period = _get_period(target_period_id)
     program = _get_program(program_id)
 
@@ -642,120 +701,79 @@ def execute_program_transition(
         'expired_user_program_ids': [],
     }
 
+    history = []
+    # (tipo, título, mensaje, prioridad) → [user_id]
+    notifications = {}
+
+    def notify(user_id, notification_type, title, message, priority):
+        notifications.setdefault((notification_type, title, message, priority), []).append(user_id)
+
     try:
         now = now_local()
-
-        # ── Diferidos que se reactivan ──────────────────────────────────────
-        active_deferrals = {
-            d.user_program_id: d
-            for d in EnrollmentDeferral.query.filter(
-                EnrollmentDeferral.deferred_to_period_id == target_period_id,
-                EnrollmentDeferral.status == 'active',
-            ).join(
-                UserProgram,
-                EnrollmentDeferral.user_program_id == UserProgram.id,
-            ).filter(
-                UserProgram.program_id == program_id,
-            ).all()
-        }
+        data = _TransitionData.load([program_id], source_period_id, target_period_id)
 
         # ── Aspirantes ──────────────────────────────────────────────────────
-        period_ids = _ordered_period_ids()
-        try:
-            idx_target = period_ids.index(target_period_id)
-        except ValueError:
-            idx_target = None
-
-        if idx_target is not None:
-            applicants = (
-                UserProgram.query
-                .filter(
-                    UserProgram.program_id == program_id,
-                    UserProgram.admission_status.notin_(['enrolled', 'expired']),
-                )
-                .all()
-            )
-
-            for up in applicants:
+        if target_period_id in data.calendar:
+            for up in data.applicants(program_id):
                 try:
                     # Diferidos con deferred_to_period_id == target → reactivar
-                    if up.id in active_deferrals:
-                        deferral = active_deferrals[up.id]
+                    deferral = data.deferrals.get(up.id)
+                    if deferral is not None:
                         up.admission_period_id = target_period_id
                         up.admission_status = 'in_progress'
                         deferral.status = 'used'
-                        UserHistoryService.log_action(
-                            user_id=up.user_id,
-                            admin_id=coordinator_id,
-                            action='deferral_reactivated_by_transition',
-                            details=(
+                        history.append({
+                            'user_id': up.user_id,
+                            'action': 'deferral_reactivated_by_transition',
+                            'details': (
                                 f'Diferido reactivado al periodo {target_period.name} '
                                 f'durante transición semestral del programa {program.name}'
                             ),
-                        )
-                        NotificationService.create_notification(
-                            user_id=up.user_id,
-                            notification_type='deferral_reactivated',
-                            title='Tu diferimiento ha sido activado',
-                            message=(
-                                f'Tu solicitud de admisión ha sido reactivada para el periodo '
-                                f'{target_period.name} en {program.name}. '
-                                f'Revisa tu portal para continuar el proceso.'
-                            ),
-                            priority='high',
-                            action_url='/user/dashboard',
+                        })
+                        notify(
+                            up.user_id, 'deferral_reactivated',
+                            'Tu diferimiento ha sido activado',
+                            f'Tu solicitud de admisión ha sido reactivada para el periodo '
+                            f'{target_period.name} en {program.name}. '
+                            f'Revisa tu portal para continuar el proceso.',
+                            'high',
                         )
                         stats['deferred_reactivated'] += 1
                         continue
 
-                    if up.admission_period_id is None:
-                        continue
-
-                    try:
-                        idx_admission = period_ids.index(up.admission_period_id)
-                    except ValueError:
-                        continue
-
-                    delta = idx_target - idx_admission
-
-                    if delta <= 0:
+                    delta = data.admission_delta(up)
+                    if delta is None or delta <= 0:
                         continue
                     elif delta == 1:
                         up.admission_period_id = target_period_id
                         up.updated_at = now
-                        UserHistoryService.log_action(
-                            user_id=up.user_id,
-                            admin_id=coordinator_id,
-                            action='admission_period_migrated',
-                            details=(
+                        history.append({
+                            'user_id': up.user_id,
+                            'action': 'admission_period_migrated',
+                            'details': (
                                 f'Periodo de admisión migrado a {target_period.name} '
                                 f'durante transición del programa {program.name}'
                             ),
-                        )
+                        })
                         stats['admission_migrated'] += 1
                     elif delta == 2:
                         up.admission_status = 'expired'
                         up.updated_at = now
-                        UserHistoryService.log_action(
-                            user_id=up.user_id,
-                            admin_id=coordinator_id,
-                            action='admission_expired',
-                            details=(
+                        history.append({
+                            'user_id': up.user_id,
+                            'action': 'admission_expired',
+                            'details': (
                                 f'Admisión expirada durante transición semestral '
                                 f'del programa {program.name} (Δ=2 periodos)'
                             ),
-                        )
-                        NotificationService.create_notification(
-                            user_id=up.user_id,
-                            notification_type='admission_expired',
-                            title='Tu proceso de admisión ha expirado',
-                            message=(
-                                f'Tu proceso de admisión al programa {program.name} ha expirado '
-                                f'porque ha transcurrido más de un periodo sin completarse. '
-                                f'Contacta al coordinador si tienes dudas.'
-                            ),
-                            priority='high',
-                            action_url='/user/dashboard',
+                        })
+                        notify(
+                            up.user_id, 'admission_expired',
+                            'Tu proceso de admisión ha expirado',
+                            f'Tu proceso de admisión al programa {program.name} ha expirado '
+                            f'porque ha transcurrido más de un periodo sin completarse. '
+                            f'Contacta al coordinador si tienes dudas.',
+                            'high',
                         )
                         stats['admission_expired'] += 1
                         stats['expired_user_program_ids'].append(up.id)
@@ -767,24 +785,20 @@ def execute_program_transition(
                     stats['errors'].append(err_msg)
 
         # ── Estudiantes enrolled ────────────────────────────────────────────
-        enrolled_ups = (
-            UserProgram.query
-            .filter_by(program_id=program_id, admission_status='enrolled')
-            .all()
-        )
+        enrolled_ups = data.enrolled(program_id)
+        new_enrollments = []
 
-        for up in enrolled_ups:
+        for done, up in enumerate(enrolled_ups, start=1):
+            if progress_callback and done % PROGRESS_EVERY == 0:
+                progress_callback(done, len(enrolled_ups))
             try:
-                source_se = SemesterEnrollment.query.filter_by(
-                    user_program_id=up.id,
-                    academic_period_id=source_period_id,
-                ).first()
+                source_se = data.source_se.get(up.id)
 
                 if source_se and source_se.status == 'on_leave':
                     stats['on_leave'] += 1
                     continue
 
-                evaluation = evaluate_student(up.id, source_period_id, target_period_id)
+                evaluation = data.evaluate(up)
 
                 if not evaluation['can_advance']:
                     stats['blocked'] += 1
@@ -794,13 +808,8 @@ def execute_program_transition(
                     )
                     continue
 
-                # ── Idempotencia: verificar si ya existe SE para target_period ──
-                existing_target_se = SemesterEnrollment.query.filter_by(
-                    user_program_id=up.id,
-                    academic_period_id=target_period_id,
-                ).first()
-
-                if existing_target_se:
+                # ── Idempotencia: ya existe SE para target_period ──
+                if up.id in data.target_se_ids:
                     logger.info(
                         f"SE ya existe para up_id={up.id} en period_id={target_period_id} — omitido"
                     )
@@ -812,23 +821,15 @@ def execute_program_transition(
                     source_se.status = 'completed'
                     source_se.updated_at = now
 
-                # ── Calcular nuevo número de semestre ──
-                max_sem = (
-                    db.session.query(db.func.max(SemesterEnrollment.semester_number))
-                    .filter_by(user_program_id=up.id)
-                    .scalar()
-                ) or 0
-                new_semester_number = max_sem + 1
-
                 # ── Crear nuevo SE en target_period ──
-                new_se = SemesterEnrollment(
+                new_semester_number = data.next_semester_number(up)
+                new_enrollments.append(SemesterEnrollment(
                     user_program_id=up.id,
                     academic_period_id=target_period_id,
                     semester_number=new_semester_number,
                     status='pending',
                     enrollment_confirmed=False,
-                )
-                db.session.add(new_se)
+                ))
 
                 # ── Actualizar current_semester en UserProgram ──
                 up.current_semester = new_semester_number
@@ -846,29 +847,21 @@ def execute_program_transition(
                         f"PaymentReferenceService.generate(up_id={up.id}): stub retornó None"
                     )
 
-                # ── Historial ──
-                UserHistoryService.log_action(
-                    user_id=up.user_id,
-                    admin_id=coordinator_id,
-                    action='semester_advanced',
-                    details=(
+                history.append({
+                    'user_id': up.user_id,
+                    'action': 'semester_advanced',
+                    'details': (
                         f'Avanzó al semestre {new_semester_number} en {program.name} '
                         f'(periodo {target_period.name})'
                     ),
-                )
-
-                # ── Notificación al estudiante ──
-                NotificationService.create_notification(
-                    user_id=up.user_id,
-                    notification_type='semester_advanced',
-                    title=f'Avanzaste al semestre {new_semester_number}',
-                    message=(
-                        f'Tu avance al semestre {new_semester_number} en {program.name} '
-                        f'({target_period.name}) ha sido registrado. '
-                        f'Sube tu comprobante de pago para confirmar tu inscripción.'
-                    ),
-                    priority='normal',
-                    action_url='/user/dashboard',
+                })
+                notify(
+                    up.user_id, 'semester_advanced',
+                    f'Avanzaste al semestre {new_semester_number}',
+                    f'Tu avance al semestre {new_semester_number} en {program.name} '
+                    f'({target_period.name}) ha sido registrado. '
+                    f'Sube tu comprobante de pago para confirmar tu inscripción.',
+                    'normal',
                 )
 
                 stats['advanced'] += 1
@@ -878,6 +871,20 @@ def execute_program_transition(
                 logger.error(err_msg)
                 stats['errors'].append(err_msg)
 
+        db.session.add_all(new_enrollments)
+
+        # ── Historial y notificaciones en bloque ─────────────────────────────
+        UserHistoryService.log_actions_bulk(history, admin_id=coordinator_id)
+        for (notification_type, title, message, priority), user_ids in notifications.items():
+            NotificationService.create_bulk_notifications(
+                user_ids,
+                notification_type=notification_type,
+                title=title,
+                message=message,
+                priority=priority,
+                action_url='/user/dashboard',
+            )
+
         # ── Notificar coordinador si hay bloqueados ──────────────────────────
         if stats['blocked'] > 0:
             try:
@@ -903,6 +910,9 @@ def execute_program_transition(
         db.session.rollback()
         raise
 
+    if progress_callback:
+        progress_callback(len(enrolled_ups), len(enrolled_ups))
+
     # Activar destino + cerrar origen tras transición exitosa.
     # Si esto falla, el avance ya está commiteado — sólo se loggea.
     try:
@@ -945,11 +955,13 @@ def execute_global_transition(
     source_period_id: int,
     target_period_id: int,
     coordinator_id: int,
+    progress_callback=None,
 ) -> dict:
     """
     Ejecuta la transición semestral para todos los programas activos.
     Acumula estadísticas de cada programa. Al finalizar, activa el periodo
-    destino y cierra el origen.
+    destino y cierra el origen. ``progress_callback(done, total)`` recibe
+    el número de programas terminados.
 
     Returns:
         {
@@ -975,7 +987,9 @@ def execute_global_transition(
     }
     per_program = []
 
-    for program in programs:
+    for done, program in enumerate(programs, start=1):
+        if progress_callback:
+            progress_callback(done - 1, len(programs))
         try:
             p_stats = execute_program_transition(
                 program_id=program.id,
@@ -1009,6 +1023,9 @@ def execute_global_transition(
             'stats': p_stats,
         })
 
+    if progress_callback:
+        progress_callback(len(programs), len(programs))
+
     # Activar el periodo destino + cerrar origen al final
     try:
         _activate_target_period(source_period_id, target_period_id)
@@ -1020,3 +1037,51 @@ def execute_global_transition(
         'total': total_stats,
         'programs': per_program,
     }
+
+
+def snapshot_expired_applicants(
+    result: dict,
+    program_id: Optional[int],
+    source_period_id: int,
+    target_period_id: int,
+    initiated_by_id: int,
+) -> Optional[dict]:
+    """
+    Respaldo preventivo (PurgeRun 'transition_snapshot') de los aspirantes
+    Δ=2 que expiró la transición. ``result`` es la salida de
+    execute_program_transition (program_id) o execute_global_transition.
+
+    Returns:
+        dict para la respuesta ('archive') o None si no hubo expirados.
+        Un fallo no se propaga: la transición ya está commiteada.
+    """
+    if program_id:
+        expired_ids = result.get('expired_user_program_ids') or []
+    else:
+        expired_ids = (result.get('total') or {}).get('expired_user_program_ids') or []
+    if not expired_ids:
+        return None
+
+    try:
+        import app.services.applicant_archive_service as archive_svc
+        run = archive_svc.create_purge_run(
+            user_program_ids=expired_ids,
+            purge_type='transition_snapshot',
+            initiated_by_id=initiated_by_id,
+            program_id=program_id or None,
+            source_period_id=source_period_id,
+            target_period_id=target_period_id,
+            notes=(
+                f'Snapshot preventivo de transición '
+                f'{source_period_id}→{target_period_id}'
+            ),
+        )
+        return {
+            'run_id': run.run_id,
+            'archive_url': f'/api/v1/admin/purge/{run.run_id}/archive.zip',
+            'expires_at': run.expires_at.isoformat() if run.expires_at else None,
+            'item_count': len(expired_ids),
+            'size_bytes': run.archive_size_bytes,
+        }
+    except Exception as e:
+        return {'error': f'No se pudo generar snapshot: {e}'}
@@ -14,24 +14,40 @@ Flujo principal:
   5. Enviar email de bienvenida con link de set-password.
   6. Registrar en historial.
 
-Para CSV: validar cada fila individualmente + detectar duplicados intra-CSV,
-luego ejecutar filas válidas atómicamente por fila (errores aislados).
+Para CSV: validar el archivo completo contra BD con una consulta por
+conjunto (emails, números de control, programas, periodos) + detectar
+duplicados intra-CSV. La ejecución escribe por bloques con INSERT multi-fila
+(usuarios, programas, semestres, tokens, correos, historial); si un bloque
+falla se reintenta fila por fila, cada una en su SAVEPOINT (errores aislados).
+Los hashes de contraseña se calculan en un pool de hilos. Para archivos
+grandes la ejecución corre en Celery (app.tasks.students) con avance.
 """
 
 import csv
 import io
+import os
 import secrets
 import string
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from types import SimpleNamespace
+
+from flask import current_app, has_app_context
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
 
 from app import db
 from app.models import (
     User, UserProgram, Program, AcademicPeriod, Role
 )
 from app.models.semester_enrollment import SemesterEnrollment
+from app.services.email_service import EmailService
 from app.services.notification_service import NotificationService
 from app.services.user_history_service import UserHistoryService
+from app.utils import dashboard_cache
 from app.utils.datetime_utils import now_local
+from app.utils.offload import is_green, offload_cpu
 
 logger = logging.getLogger(__name__)
 
@@ -80,6 +96,25 @@ CSV_EXAMPLE_ROW = [
     '20221', 'no',
 ]
 
+PROFILE_FIELDS = (
+    'phone', 'mobile_phone', 'address', 'curp', 'rfc', 'nss',
+    'cedula_profesional', 'birth_date', 'birth_place',
+    'emergency_contact_name', 'emergency_contact_phone',
+    'emergency_contact_relationship',
+)
+
+# Estudiantes por bloque de INSERT/commit en execute_csv
+IMPORT_CHUNK_SIZE = 200
+
+# Valores por consulta IN (...) al precargar emails / números de control
+LOOKUP_CHUNK_SIZE = 1000
+
+# Por debajo de este número de contraseñas no vale la pena arrancar el pool
+HASH_POOL_MIN = 32
+
+# Vigencia del token de set-password enviado en el correo de bienvenida
+SET_PASSWORD_TTL_DAYS = 7
+
 
 # ---------------------------------------------------------------------------
 # Helpers internos
@@ -96,11 +131,6 @@ def _get_all_periods_ordered() -> list:
     return AcademicPeriod.query.order_by(AcademicPeriod.id.asc()).all()
 
 
-def _get_active_period() -> AcademicPeriod | None:
-    """Devuelve el periodo activo, o None si no existe."""
-    return AcademicPeriod.query.filter_by(is_active=True).first()
-
-
 def _build_login_url() -> str:
     """
     Construye la URL absoluta de la página de login.
@@ -132,6 +162,93 @@ def _build_reset_password_url(token: str) -> str:
             return f'/reset-password/{token}'
 
 
+def _hash_workers() -> int:
+    if has_app_context():
+        return int(current_app.config.get('STUDENT_IMPORT_HASH_WORKERS', os.cpu_count() or 1))
+    return os.cpu_count() or 1
+
+
+def _hash_inline(passwords: list) -> list:
+    return [generate_password_hash(pw) for pw in passwords]
+
+
+class _PasswordHasher:
+    """
+    Calcula hashes de contraseña en un pool de hilos reutilizado entre
+    bloques. scrypt/pbkdf2 de hashlib liberan el GIL, así que los hilos hashean en
+    paralelo, y a diferencia de un pool de procesos funcionan dentro de los
+    workers daemon de Celery (prefork). Bajo eventlet (hilos verdes) se
+    calcula en línea vía offload_cpu.
+    """
+
+    def __init__(self, total: int):
+        self._pool = None
+        self._workers = _hash_workers()
+        if self._workers > 1 and total >= HASH_POOL_MIN and not is_green():
+            try:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self._workers, thread_name_prefix='password-hash',
+                )
+            except (OSError, ValueError) as exc:
+                logger.warning(f'[student_bulk] Pool de hashing no disponible: {exc}')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._pool is not None:
+            self._pool.shutdown()
+
+    def hash_many(self, passwords: list) -> list:
+        if self._pool is not None:
+            try:
+                return list(self._pool.map(generate_password_hash, passwords))
+            except Exception as exc:
+                logger.warning(f'[student_bulk] Pool de hashing falló, se continúa en línea: {exc}')
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+        return offload_cpu(_hash_inline, passwords, label='password_hash')
+
+
+def _existing_values(column, values) -> set:
+    """Subconjunto de `values` que ya existe en `column` (IN por bloques)."""
+    values = list(values)
+    found = set()
+    for start in range(0, len(values), LOOKUP_CHUNK_SIZE):
+        chunk = values[start:start + LOOKUP_CHUNK_SIZE]
+        found.update(v for (v,) in db.session.query(column).filter(column.in_(chunk)))
+    return found
+
+
+class _ValidationLookup:
+    """
+    Datos de BD que necesita la validación, cargados una sola vez para todas
+    las filas: emails y números de control ya registrados, programas por slug
+    y periodos académicos (orden cronológico, por código y el activo).
+    """
+
+    def __init__(self, payloads: list):
+        emails, controls, slugs = set(), set(), set()
+        for payload in payloads:
+            emails.add((payload.get('email') or '').strip().lower())
+            controls.add((payload.get('control_number') or '').strip())
+            slugs.add((payload.get('program_slug') or '').strip())
+        emails.discard('')
+        controls.discard('')
+        slugs.discard('')
+
+        self.taken_emails = _existing_values(User.email, emails)
+        self.taken_controls = _existing_values(User.control_number, controls)
+        self.programs = (
+            {p.slug: p for p in Program.query.filter(Program.slug.in_(slugs))}
+            if slugs else {}
+        )
+        self.periods = _get_all_periods_ordered()
+        self.period_by_code = {p.code: p for p in self.periods}
+        self.period_index = {p.id: i for i, p in enumerate(self.periods)}
+        self.active_period = next((p for p in self.periods if p.is_active), None)
+
+
 # ---------------------------------------------------------------------------
 # Validación individual
 # ---------------------------------------------------------------------------
@@ -146,6 +263,11 @@ def validate_individual(payload: dict) -> dict:
     Returns:
         {'valid': bool, 'errors': list[str], 'normalized': dict}
     """
+    return _validate_payload(payload, _ValidationLookup([payload]))
+
+
+def _validate_payload(payload: dict, lookup: _ValidationLookup) -> dict:
+    """Reglas de validate_individual contra datos precargados (sin queries)."""
     errors = []
     normalized = {}
 
@@ -169,7 +291,7 @@ def validate_individual(payload: dict) -> dict:
     email = (payload.get('email') or '').strip().lower()
     if not email:
         errors.append('El correo electrónico es requerido.')
-    elif User.query.filter_by(email=email).first():
+    elif email in lookup.taken_emails:
         errors.append(f'El correo {email!r} ya está registrado en el sistema.')
     normalized['email'] = email
 
@@ -177,7 +299,7 @@ def validate_individual(payload: dict) -> dict:
     control_number = (payload.get('control_number') or '').strip()
     if not control_number:
         errors.append('El número de control es requerido.')
-    elif User.query.filter_by(control_number=control_number).first():
+    elif control_number in lookup.taken_controls:
         errors.append(f'El número de control {control_number!r} ya está registrado.')
     normalized['control_number'] = control_number
 
@@ -187,7 +309,7 @@ def validate_individual(payload: dict) -> dict:
     if not program_slug:
         errors.append('El slug del programa es requerido.')
     else:
-        program = Program.query.filter_by(slug=program_slug).first()
+        program = lookup.programs.get(program_slug)
         if not program:
             errors.append(f'No existe un programa con slug {program_slug!r}.')
         elif not program.is_active:
@@ -219,7 +341,7 @@ def validate_individual(payload: dict) -> dict:
     if not admission_period_code:
         errors.append('El código de periodo de admisión es requerido.')
     else:
-        admission_period = AcademicPeriod.query.filter_by(code=admission_period_code).first()
+        admission_period = lookup.period_by_code.get(admission_period_code)
         if not admission_period:
             errors.append(f'No existe un periodo académico con código {admission_period_code!r}.')
     normalized['admission_period_code'] = admission_period_code
@@ -269,18 +391,17 @@ def validate_individual(payload: dict) -> dict:
 
     # --- Validaciones cronológicas (solo si no hubo errores previos críticos) ---
     if admission_period and current_semester and current_semester >= 1:
-        all_periods = _get_all_periods_ordered()
-        period_ids = [p.id for p in all_periods]
+        all_periods = lookup.periods
 
-        if admission_period.id not in period_ids:
+        if admission_period.id not in lookup.period_index:
             errors.append('El periodo de admisión no se encontró en la lista cronológica de periodos.')
         else:
-            admission_idx = period_ids.index(admission_period.id)
-            active_period = _get_active_period()
+            admission_idx = lookup.period_index[admission_period.id]
+            active_period = lookup.active_period
 
             # El periodo de admisión debe ser <= el periodo activo cronológicamente
             if active_period:
-                active_idx = period_ids.index(active_period.id) if active_period.id in period_ids else -1
+                active_idx = lookup.period_index.get(active_period.id, -1)
                 if admission_idx > active_idx:
                     errors.append(
                         f'El periodo de admisión ({admission_period_code}) es posterior al '
@@ -335,34 +456,41 @@ def _backfill_history(
     Returns:
         Número de SemesterEnrollment creados.
     """
-    all_periods = _get_all_periods_ordered()
-    period_ids = [p.id for p in all_periods]
-    admission_idx = period_ids.index(admission_period_id)
-
-    now = now_local()
-    created_count = 0
-
-    for sem_num in range(1, current_semester + 1):
-        period_idx = admission_idx + sem_num - 1
-        period = all_periods[period_idx]
-        is_last = (sem_num == current_semester)
-
-        se = SemesterEnrollment(
-            user_program_id=up.id,
-            academic_period_id=period.id,
-            semester_number=sem_num,
-            status='active' if is_last else 'completed',
-            enrollment_confirmed=True,
-            confirmed_by=created_by_id,
-            confirmed_at=now,
-        )
-        db.session.add(se)
-        created_count += 1
+    rows = _backfill_rows(
+        up.id, admission_period_id, current_semester, created_by_id,
+        _get_all_periods_ordered(), now_local(),
+    )
+    for row in rows:
+        db.session.add(SemesterEnrollment(**row))
 
     # Sincronizar current_semester en UserProgram
     up.current_semester = current_semester
 
-    return created_count
+    return len(rows)
+
+
+def _backfill_rows(
+    user_program_id: int,
+    admission_period_id: int,
+    current_semester: int,
+    created_by_id: int,
+    periods: list,
+    now,
+) -> list:
+    """Columnas de los SemesterEnrollment de _backfill_history (sin tocar la sesión)."""
+    admission_idx = [p.id for p in periods].index(admission_period_id)
+    return [
+        {
+            'user_program_id': user_program_id,
+            'academic_period_id': periods[admission_idx + sem_num - 1].id,
+            'semester_number': sem_num,
+            'status': 'active' if sem_num == current_semester else 'completed',
+            'enrollment_confirmed': True,
+            'confirmed_by': created_by_id,
+            'confirmed_at': now,
+        }
+        for sem_num in range(1, current_semester + 1)
+    ]
 
 
 # ---------------------------------------------------------------------------
@@ -551,8 +679,10 @@ def validate_csv(csv_text: str) -> dict:
         first_name, last_name, mother_last_name, email, control_number,
         program_slug, current_semester, admission_period_code, has_conacyt
 
-    Valida cada fila con validate_individual y además detecta duplicados
-    intra-CSV (emails y control_numbers repetidos dentro del propio archivo).
+    Valida cada fila con las reglas de validate_individual contra datos
+    precargados una sola vez para todo el archivo (_ValidationLookup) y además
+    detecta duplicados intra-CSV (emails y control_numbers repetidos dentro
+    del propio archivo).
 
     Args:
         csv_text: Contenido del archivo CSV como string UTF-8.
@@ -601,11 +731,16 @@ def validate_csv(csv_text: str) -> dict:
 
     # Validar cada fila — pasar también campos opcionales si están en el CSV
     available_optional = [h for h in CSV_OPTIONAL_HEADERS if h in (reader.fieldnames or [])]
-    for i, row in enumerate(raw_rows, start=1):
+    payloads = []
+    for row in raw_rows:
         payload = {k: (row.get(k) or '').strip() for k in CSV_HEADERS}
         for k in available_optional:
             payload[k] = (row.get(k) or '').strip()
-        result = validate_individual(payload)
+        payloads.append(payload)
+
+    lookup = _ValidationLookup(payloads)
+    for i, payload in enumerate(payloads, start=1):
+        result = _validate_payload(payload, lookup)
 
         extra_errors = []
         email = payload.get('email', '').lower()
@@ -647,17 +782,20 @@ def validate_csv(csv_text: str) -> dict:
 # Ejecución CSV
 # ---------------------------------------------------------------------------
 
-def execute_csv(rows: list, created_by_id: int) -> dict:
+def execute_csv(rows: list, created_by_id: int, progress_callback=None) -> dict:
     """
     Aplica las filas válidas de un preview CSV.
 
-    Cada estudiante se crea en su propia transacción atómica. Si una fila
-    falla, las demás continúan procesándose (fallas aisladas).
+    Las filas se revalidan juntas (el preview pudo quedar desfasado) y se
+    escriben por bloques de IMPORT_CHUNK_SIZE con INSERT multi-fila y un
+    commit por bloque. Si un bloque falla se reintenta fila por fila, cada
+    una en su SAVEPOINT: una fila con error no impide crear las demás.
 
     Args:
         rows: Lista de dicts con estructura {index, data, valid, errors}.
               Solo se procesan las filas con valid=True.
         created_by_id: ID del usuario que ejecuta la operación.
+        progress_callback: callable(done, total) opcional, tras cada bloque.
 
     Returns:
         {
@@ -666,45 +804,241 @@ def execute_csv(rows: list, created_by_id: int) -> dict:
           'created_users': [{'user_id': int, 'email': str, 'control_number': str}]
         }
     """
-    created = 0
     failed = []
     created_users = []
 
     valid_rows = [r for r in rows if r.get('valid')]
+    total = len(valid_rows)
 
-    for row in valid_rows:
-        index = row.get('index', '?')
-        data = row.get('data', {})
-        email = data.get('email', '')
+    student_role = Role.query.filter_by(name='student').first() if valid_rows else None
+    if valid_rows and not student_role:
+        error = 'No se encontró el rol "student" en el sistema.'
+        return {
+            'created': 0,
+            'failed': [
+                {'index': r.get('index', '?'), 'email': (r.get('data') or {}).get('email', ''),
+                 'error': error}
+                for r in valid_rows
+            ],
+            'created_users': [],
+        }
 
-        try:
-            result = create_student_individual(data, created_by_id)
-            created += 1
-            created_users.append({
-                'user_id': result['user_id'],
-                'email': result['email'],
-                'control_number': data.get('control_number', ''),
-            })
-        except (ValidationError, StudentCreationError) as exc:
-            failed.append({
-                'index': index,
-                'email': email,
-                'error': str(exc),
-            })
-        except Exception as exc:
+    lookup = _ValidationLookup([r.get('data') or {} for r in valid_rows])
+    pending = []
+    for row in valid_rows:
+        data = row.get('data') or {}
+        result = _validate_payload(data, lookup)
+        if result['valid']:
+            pending.append((row.get('index', '?'), result['normalized']))
+        else:
             failed.append({
-                'index': index,
-                'email': email,
-                'error': f'Error inesperado: {exc}',
+                'index': row.get('index', '?'),
+                'email': data.get('email', ''),
+                'error': '; '.join(result['errors']),
             })
 
+    done = total - len(pending)
+    with _PasswordHasher(len(pending)) as hasher:
+        for start in range(0, len(pending), IMPORT_CHUNK_SIZE):
+            chunk = pending[start:start + IMPORT_CHUNK_SIZE]
+            hashes = hasher.hash_many([_random_password() for _ in chunk])
+            entries = [
+                {'index': index, 'data': data, 'password': pw_hash}
+                for (index, data), pw_hash in zip(chunk, hashes)
+            ]
+
+            chunk_created, chunk_failed, email_ids = _import_chunk(
+                entries, lookup, student_role.id, created_by_id,
+            )
+            db.session.commit()
+            EmailService.dispatch_batch(email_ids)
+            if chunk_created:
+                dashboard_cache.invalidate({lookup.programs[e['data']['program_slug']].id
+                                            for e in entries})
+
+            created_users.extend(chunk_created)
+            failed.extend(chunk_failed)
+            done += len(chunk)
+            if progress_callback:
+                progress_callback(done, total)
+
+    failed.sort(key=lambda f: (not isinstance(f['index'], int), f['index']))
     return {
-        'created': created,
+        'created': len(created_users),
         'failed': failed,
         'created_users': created_users,
     }
 
 
+def _import_chunk(entries: list, lookup: _ValidationLookup, role_id: int, created_by_id: int):
+    """
+    Escribe un bloque completo en un SAVEPOINT; si falla, fila por fila.
+
+    Returns:
+        (created_users, failed, email_queue_ids)
+    """
+    try:
+        with db.session.begin_nested():
+            created, email_ids = _insert_students(entries, lookup, role_id, created_by_id)
+        return created, [], email_ids
+    except Exception as exc:
+        logger.info(f'[student_bulk] Bloque de {len(entries)} filas falló, reintento por fila: {exc}')
+
+    created, failed, email_ids = [], [], []
+    for entry in entries:
+        try:
+            with db.session.begin_nested():
+                row_created, row_emails = _insert_students([entry], lookup, role_id, created_by_id)
+            created.extend(row_created)
+            email_ids.extend(row_emails)
+        except Exception as exc:
+            failed.append({
+                'index': entry['index'],
+                'email': entry['data']['email'],
+                'error': f'Error al crear el estudiante: {exc}',
+            })
+    return created, failed, email_ids
+
+
+def _insert_students(entries: list, lookup: _ValidationLookup, role_id: int, created_by_id: int):
+    """
+    INSERT multi-fila de User, UserProgram, SemesterEnrollment, tokens de
+    set-password, correos de bienvenida e historial para `entries`. Mismo
+    resultado que create_student_individual, sin commit.
+
+    Returns:
+        (created_users, email_queue_ids)
+    """
+    from app.models.password_reset_token import PasswordResetToken
+    from app.services.email_templates import EmailTemplates
+
+    now = now_local()
+
+    user_rows = []
+    for entry in entries:
+        data = entry['data']
+        profile = {field: data.get(field) for field in PROFILE_FIELDS}
+        user_rows.append({
+            'first_name': data['first_name'],
+            'last_name': data['last_name'],
+            'mother_last_name': data['mother_last_name'],
+            'username': data['control_number'],   # username = control_number
+            'password': entry['password'],
+            'email': data['email'],
+            'is_internal': False,
+            'role_id': role_id,
+            'must_change_password': True,
+            'control_number': data['control_number'],
+            'control_number_assigned_at': now,
+            'is_active': True,
+            'registration_date': now,
+            'last_login': now,
+            # is_profile_complete solo lee atributos del perfil
+            'profile_completed': User.is_profile_complete(SimpleNamespace(**profile)),
+            **profile,
+        })
+    user_ids = [
+        row[0] for row in db.session.execute(
+            insert(User).returning(User.id, sort_by_parameter_order=True), user_rows,
+        )
+    ]
+
+    up_ids = [
+        row[0] for row in db.session.execute(
+            insert(UserProgram).returning(UserProgram.id, sort_by_parameter_order=True),
+            [
+                {
+                    'user_id': user_id,
+                    'program_id': lookup.programs[entry['data']['program_slug']].id,
+                    'admission_status': 'enrolled',
+                    'admission_period_id': lookup.period_by_code[entry['data']['admission_period_code']].id,
+                    'current_semester': entry['data']['current_semester'],
+                    'has_conacyt_scholarship': entry['data']['has_conacyt'],
+                    'enrollment_date': now,
+                }
+                for entry, user_id in zip(entries, user_ids)
+            ],
+        )
+    ]
+
+    se_rows = []
+    for entry, up_id in zip(entries, up_ids):
+        data = entry['data']
+        se_rows.extend(_backfill_rows(
+            up_id, lookup.period_by_code[data['admission_period_code']].id,
+            data['current_semester'], created_by_id, lookup.periods, now,
+        ))
+    db.session.execute(insert(SemesterEnrollment), se_rows)
+
+    expires_at = now + timedelta(days=SET_PASSWORD_TTL_DAYS)
+    tokens = [secrets.token_urlsafe(48) for _ in entries]
+    db.session.execute(insert(PasswordResetToken), [
+        {
+            'token': token,
+            'user_id': user_id,
+            'purpose': 'set_password',
+            'expires_at': expires_at,
+            'created_by': created_by_id,
+            'created_at': now,
+        }
+        for token, user_id in zip(tokens, user_ids)
+    ])
+
+    # Correos de bienvenida: si fallan no se pierde el alta (igual que en
+    # create_student_individual); el token sigue vigente.
+    email_ids = []
+    try:
+        messages = []
+        for entry, user_id, token in zip(entries, user_ids, tokens):
+            data = entry['data']
+            subject, html = EmailTemplates.student_welcome_set_password(
+                user_name=f"{data['first_name']} {data['last_name']}".strip(),
+                control_number=data['control_number'],
+                program_name=lookup.programs[data['program_slug']].name,
+                token_link=_build_reset_password_url(token),
+                expires_at=expires_at,
+            )
+            messages.append({
+                'user_id': user_id, 'recipient_email': data['email'],
+                'subject': subject, 'html_content': html,
+            })
+        with db.session.begin_nested():
+            email_ids = EmailService.insert_messages_bulk(messages)
+    except Exception as email_exc:
+        logger.warning(f'[student_bulk] No se pudieron encolar los correos de bienvenida: {email_exc}')
+    email_sent = bool(email_ids)
+
+    history = []
+    for entry, user_id, up_id in zip(entries, user_ids, up_ids):
+        data = entry['data']
+        program = lookup.programs[data['program_slug']]
+        history.append({
+            'user_id': user_id,
+            'action': 'enrolled_via_bulk_import',
+            'details': {
+                'program': program.name,
+                'program_slug': program.slug,
+                'control_number': data['control_number'],
+                'admission_period_code': data['admission_period_code'],
+                'current_semester': data['current_semester'],
+                'sems_created': data['current_semester'],
+                'has_conacyt': data['has_conacyt'],
+                'set_password_token_sent': email_sent,
+            },
+        })
+    UserHistoryService.log_actions_bulk(history, admin_id=created_by_id)
+
+    created = [
+        {
+            'user_id': user_id,
+            'email': entry['data']['email'],
+            'control_number': entry['data']['control_number'],
+        }
+        for entry, user_id in zip(entries, user_ids)
+    ]
+    return created, email_ids
+
+
 # ---------------------------------------------------------------------------
 # Plantilla CSV
 # ---------------------------------------------------------------------------
@@ -4,7 +4,10 @@ from app import db
 from app.models.user_history import UserHistory
 from app.models.user import User
 from flask_login import current_user
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
+from datetime import datetime
+from sqlalchemy import and_, or_, insert
+from app.utils.datetime_utils import now_local
 from app.services.notification_service import NotificationService
 import json
 
@@ -31,14 +34,38 @@ class UserHistoryService:
        - get_user_history(user_id) → acciones que HIZO el usuario
        - get_actions_on_user(user_id) → acciones que se HICIERON SOBRE el usuario
        - get_admin_activity(admin_id) → acciones que HIZO el administrador
+
+    4. PAGINACIÓN:
+       Las consultas de auditoría ordenan por (timestamp, id) descendente y
+       aceptan `before` = cursor de la última entrada de la página anterior
+       (ver encode_cursor), para no usar OFFSET sobre historiales largos.
     """
 
+    # Claves de `details` que identifican al usuario sobre el que se actuó
+    SUBJECT_KEYS = ('student_id', 'affected_user_id', 'deleted_user_id')
+
+    @staticmethod
+    def _extract_subject(details: Optional[Dict[str, Any]]) -> Optional[int]:
+        """Obtiene el subject_user_id a partir de las claves conocidas de details."""
+        if not isinstance(details, dict):
+            return None
+        for key in UserHistoryService.SUBJECT_KEYS:
+            value = details.get(key)
+            if value is None or isinstance(value, bool):
+                continue
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                continue
+        return None
+
     @staticmethod
     def log_action(
         user_id: int, 
         action: str, 
         details: Optional[str | Dict[str, Any]] = None, 
-        admin_id: Optional[int] = None
+        admin_id: Optional[int] = None,
+        subject_user_id: Optional[int] = None
     ) -> UserHistory:
         """
         Registra una acción en el historial del usuario.
@@ -48,6 +75,7 @@ class UserHistoryService:
             action: Tipo de acción realizada (ver ACTIONS para valores válidos)
             details: Detalles adicionales de la acción (string o dict)
             admin_id: ID del administrador que realizó la acción (opcional, usa current_user si no se especifica)
+            subject_user_id: Usuario sobre el que se actuó (opcional, se deduce de details)
             
         Returns:
             UserHistory: La entrada de historial creada
@@ -64,9 +92,19 @@ class UserHistoryService:
         if action not in UserHistoryService.ACTIONS:
             raise ValueError(f"Acción '{action}' no es válida. Acciones permitidas: {list(UserHistoryService.ACTIONS.keys())}")
         
-        # Convertir details a JSON si es un diccionario
+        # Convertir details a JSON si es un diccionario (se guarda también estructurado)
+        details_json = None
         if isinstance(details, dict):
+            details_json = details
             details = json.dumps(details, ensure_ascii=False)
+        elif isinstance(details, str) and details.lstrip().startswith('{'):
+            try:
+                details_json = json.loads(details)
+            except ValueError:
+                details_json = None
+
+        if subject_user_id is None:
+            subject_user_id = UserHistoryService._extract_subject(details_json)
         
         # Usar current_user si no se especifica admin_id
         if admin_id is None and current_user.is_authenticated:
@@ -77,12 +115,63 @@ class UserHistoryService:
             user_id=user_id,
             admin_id=admin_id,
             action=action,
-            details=details
+            details=details,
+            details_json=details_json,
+            subject_user_id=subject_user_id
         )
         
         db.session.add(history_entry)
         return history_entry
 
+    @staticmethod
+    def log_actions_bulk(entries: List[Dict[str, Any]], admin_id: Optional[int] = None) -> int:
+        """
+        Registra muchas acciones con un INSERT multi-fila.
+
+        Pensado para procesos masivos (p.ej. la transición semestral) donde
+        los usuarios ya se cargaron: a diferencia de log_action no valida que
+        cada user_id exista. No hace commit.
+
+        Args:
+            entries: dicts con user_id, action y details (string o dict);
+                     subject_user_id opcional
+            admin_id: Administrador que realizó las acciones
+
+        Returns:
+            int: Número de entradas insertadas
+
+        Raises:
+            ValueError: Si alguna acción no es válida
+        """
+        if not entries:
+            return 0
+
+        now = now_local()
+        rows = []
+        for entry in entries:
+            action = entry['action']
+            if action not in UserHistoryService.ACTIONS:
+                raise ValueError(f"Acción '{action}' no es válida")
+            details = entry.get('details')
+            details_json = details if isinstance(details, dict) else None
+            if details_json is not None:
+                details = json.dumps(details, ensure_ascii=False)
+            rows.append({
+                'user_id': entry['user_id'],
+                'admin_id': admin_id,
+                'action': action,
+                'details': details,
+                'details_json': details_json,
+                'subject_user_id': (
+                    entry.get('subject_user_id')
+                    or UserHistoryService._extract_subject(details_json)
+                ),
+                'timestamp': now,
+            })
+
+        db.session.execute(insert(UserHistory), rows)
+        return len(rows)
+
     @staticmethod
     def log_password_reset(user_id: int, admin_id: Optional[int] = None) -> UserHistory:
         """Registra un reset de contraseña - SE GUARDA EN EL HISTORIAL DEL ADMINISTRADOR"""
@@ -357,27 +446,66 @@ class UserHistoryService:
         """
         return UserHistory.query.order_by(UserHistory.timestamp.desc()).limit(limit).all()
 
+    # ==================== PAGINACIÓN POR CURSOR ====================
     @staticmethod
-    def get_admin_activity(admin_id: int, limit: Optional[int] = None) -> List[UserHistory]:
+    def encode_cursor(entry: UserHistory) -> str:
+        """Cursor de una entrada: '<timestamp iso>|<id>'."""
+        return f"{entry.timestamp.isoformat()}|{entry.id}"
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        """
+        Decodifica un cursor generado por encode_cursor.
+
+        Raises:
+            ValueError: Si el cursor no tiene el formato esperado
+        """
+        try:
+            ts, entry_id = cursor.rsplit('|', 1)
+            return datetime.fromisoformat(ts), int(entry_id)
+        except (AttributeError, ValueError):
+            raise ValueError(f"Cursor de historial inválido: {cursor!r}")
+
+    @staticmethod
+    def _paginate(query, limit: Optional[int], before: Optional[str]) -> List[UserHistory]:
+        """Ordena por (timestamp, id) descendente y aplica el cursor `before`."""
+        if before:
+            ts, entry_id = UserHistoryService.decode_cursor(before)
+            query = query.filter(or_(
+                UserHistory.timestamp < ts,
+                and_(UserHistory.timestamp == ts, UserHistory.id < entry_id)
+            ))
+        query = query.order_by(UserHistory.timestamp.desc(), UserHistory.id.desc())
+        if limit:
+            query = query.limit(limit)
+        return query.all()
+
+    @staticmethod
+    def get_admin_activity(
+        admin_id: int,
+        limit: Optional[int] = None,
+        before: Optional[str] = None
+    ) -> List[UserHistory]:
         """
         Obtiene todas las acciones realizadas por un administrador específico.
         
         Args:
             admin_id: ID del administrador
             limit: Número máximo de entradas a retornar
+            before: Cursor de la última entrada de la página anterior
             
         Returns:
             Lista de entradas del historial ordenadas por fecha (más reciente primero)
         """
-        query = UserHistory.query.filter_by(user_id=admin_id).order_by(UserHistory.timestamp.desc())
-        
-        if limit:
-            query = query.limit(limit)
-        
-        return query.all()
+        query = UserHistory.query.filter(UserHistory.user_id == admin_id)
+        return UserHistoryService._paginate(query, limit, before)
 
     @staticmethod
-    def get_actions_on_user(target_user_id: int, limit: Optional[int] = None) -> List[UserHistory]:
+    def get_actions_on_user(
+        target_user_id: int,
+        limit: Optional[int] = None,
+        before: Optional[str] = None
+    ) -> List[UserHistory]:
         """
         Obtiene todas las acciones administrativas realizadas SOBRE un usuario específico.
         Útil para que los administradores vean qué acciones se han realizado sobre un estudiante.
@@ -385,27 +513,21 @@ class UserHistoryService:
         Args:
             target_user_id: ID del usuario sobre el cual se realizaron acciones
             limit: Número máximo de entradas a retornar
+            before: Cursor de la última entrada de la página anterior
             
         Returns:
-            Lista de entradas del historial donde se menciona al usuario en los details
+            Lista de entradas del historial sobre el usuario (subject_user_id)
+            más sus propias acciones, de la más reciente a la más antigua
         """
-        from sqlalchemy import or_, and_
-        
-        # Buscar en los detalles JSON donde se mencione al usuario
+        # Ambas columnas están indexadas junto con timestamp
         query = UserHistory.query.filter(
             or_(
-                UserHistory.details.like(f'%"student_id": {target_user_id}%'),
-                UserHistory.details.like(f'%"affected_user_id": {target_user_id}%'),
-                UserHistory.details.like(f'%"deleted_user_id": {target_user_id}%'),
+                UserHistory.subject_user_id == target_user_id,
                 # También incluir acciones directas del usuario (para contexto completo)
                 UserHistory.user_id == target_user_id
             )
-        ).order_by(UserHistory.timestamp.desc())
-        
-        if limit:
-            query = query.limit(limit)
-        
-        return query.all()
+        )
+        return UserHistoryService._paginate(query, limit, before)
 
     # ==================== POSTULACIONES Y PROGRAMAS ====================
     @staticmethod
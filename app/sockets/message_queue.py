@@ -0,0 +1,131 @@
+"""
+Message queue (Redis) de Socket.IO según el rol del proceso web.
+
+Roles (WEB_ROLE):
+    all       Un solo proceso eventlet atiende HTTP y Socket.IO (despliegue
+              clásico, `--workers 1`). Redis es opcional: si no responde
+              tras los reintentos se usa message_queue=None y solo funciona
+              con un worker.
+    http      Workers HTTP (gthread) escalables al número de núcleos. No
+              atienden conexiones Socket.IO; emiten a través de Redis en
+              modo write-only. Redis es obligatorio.
+    socketio  Proceso(s) eventlet dedicados a /socket.io/ detrás de nginx
+              con sesiones pegajosas (docker/nginx.scale.conf). Redis es
+              obligatorio.
+
+Con SOCKETIO_REQUIRE_MQ (por defecto: cualquier rol distinto de 'all') el
+arranque falla si Redis no responde tras SOCKETIO_MQ_RETRIES intentos, en
+lugar de degradarse en silencio a un modo que pierde eventos entre procesos.
+"""
+
+import logging
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+ROLE_ALL = 'all'
+ROLE_HTTP = 'http'
+ROLE_SOCKETIO = 'socketio'
+WEB_ROLES = (ROLE_ALL, ROLE_HTTP, ROLE_SOCKETIO)
+
+_MAX_RETRY_DELAY = 10.0
+_OPTIONAL_RETRIES = 3
+
+
+def web_role(app) -> str:
+    role = (app.config.get('WEB_ROLE') or ROLE_ALL).lower()
+    if role not in WEB_ROLES:
+        raise RuntimeError(f"WEB_ROLE inválido: {role!r}. Valores: {', '.join(WEB_ROLES)}")
+    return role
+
+
+def queue_required(app) -> bool:
+    required = app.config.get('SOCKETIO_REQUIRE_MQ')
+    if required is None:
+        return web_role(app) != ROLE_ALL
+    return bool(required)
+
+
+def _ping(url: str) -> None:
+    import redis as redis_lib
+    client = redis_lib.from_url(url, socket_connect_timeout=2, socket_timeout=2)
+    try:
+        client.ping()
+    finally:
+        client.close()
+
+
+def resolve_message_queue(app) -> Optional[str]:
+    """
+    Devuelve la URL de Redis para Socket.IO, reintentando con backoff.
+
+    Raises:
+        RuntimeError: Si el message queue es obligatorio y Redis no responde
+    """
+    url = app.config.get('SOCKETIO_MESSAGE_QUEUE') or app.config.get('REDIS_URL')
+    required = queue_required(app)
+    if not url:
+        if required:
+            raise RuntimeError('[SocketIO] Se requiere REDIS_URL para el message queue')
+        return None
+
+    retries = max(1, int(app.config.get('SOCKETIO_MQ_RETRIES', 5)))
+    if not required:
+        # Modo de un solo proceso: no retrasar el arranque más de unos segundos
+        retries = min(retries, _OPTIONAL_RETRIES)
+    delay = float(app.config.get('SOCKETIO_MQ_RETRY_DELAY', 0.5))
+    last_error = None
+    for attempt in range(1, retries + 1):
+        try:
+            _ping(url)
+            if attempt > 1:
+                logger.info(f'[SocketIO] Redis disponible tras {attempt} intentos')
+            return url
+        except Exception as e:
+            last_error = e
+            if attempt < retries:
+                logger.warning(f'[SocketIO] Redis no responde (intento {attempt}/{retries}): {e}')
+                time.sleep(min(delay * 2 ** (attempt - 1), _MAX_RETRY_DELAY))
+
+    if required:
+        raise RuntimeError(
+            f'[SocketIO] Redis no disponible tras {retries} intentos y el message '
+            f'queue es obligatorio (WEB_ROLE={web_role(app)}): {last_error}'
+        )
+    app.logger.warning('[SocketIO] Redis no disponible — message_queue=None (single-worker mode)')
+    return None
+
+
+def socketio_options(app) -> dict:
+    """
+    Argumentos para socketio.init_app() según el rol del proceso.
+    """
+    role = web_role(app)
+
+    if app.config.get('TESTING'):
+        return {'async_mode': 'threading', 'message_queue': None}
+
+    url = resolve_message_queue(app)
+
+    if role == ROLE_HTTP:
+        # Solo publica en Redis; no se suscribe ni atiende clientes
+        import socketio as socketio_lib
+        return {
+            'async_mode': 'threading',
+            'client_manager': socketio_lib.RedisManager(
+                url, channel=app.config.get('SOCKETIO_CHANNEL', 'flask-socketio'),
+                write_only=True,
+            ),
+        }
+
+    try:
+        import eventlet  # noqa: F401
+        async_mode = 'eventlet'
+    except ImportError:
+        async_mode = 'threading'
+    return {
+        'async_mode': async_mode,
+        'message_queue': url,
+        'channel': app.config.get('SOCKETIO_CHANNEL', 'flask-socketio'),
+    }
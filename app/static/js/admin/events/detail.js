@@ -329,14 +329,16 @@
             return;
         }
         let totalCreated = 0;
-        for (const w of currentWindows) {
-            try {
-                const { data } = await C.apiRequest(
-                    `${C.API}/events/windows/${w.id}/generate-slots`, { method: 'POST' });
-                totalCreated += data.created || 0;
-            } catch (err) {
-                console.error(`Error generando slots ventana ${w.id}:`, err);
+        try {
+            const { data } = await C.apiRequest(
+                `${C.API}/events/${currentEvent.id}/generate-slots`, { method: 'POST' });
+            totalCreated = data.created || 0;
+            if (data.conflicts && data.conflicts.length) {
+                C.flash(`${data.conflicts.length} plazo(s) se solapan con otros horarios; no se generaron sus slots`, 'warning');
             }
+        } catch (err) {
+            C.flash(`Error generando slots: ${err.message}`, 'danger');
+            return;
         }
         C.flash(totalCreated > 0
             ? `Se generaron ${totalCreated} nuevos horarios`
@@ -1311,7 +1313,7 @@
     function buildEventImageUrl(imgEventId, image, kind) {
         if (!image || !image.path) return '';
         const filename = image.path.split('/').pop();
-        return `/files/event/${imgEventId}/${kind}/${filename}`;
+        return `/files/event/${imgEventId}/${kind}/${filename}?w=640`;
     }
 
     async function loadEventMedia() {
@@ -5,6 +5,7 @@
 // Flujo por categoría:
 //   1. listCandidates(category) → tabla con checkboxes
 //   2. start(purge_type, ids)   → POST /start → run_id + archive_url
+//      (lotes grandes: 202 + task_id → polling de /tasks/<id> hasta SUCCESS)
 //   3. download(archive_url)    → cliente baja ZIP, backend marca downloaded
 //   4. confirmPurge(run_id)     → POST /confirm → borrado físico
 //
@@ -60,13 +61,13 @@
   }
 
   // ── Render tabla candidatos ────────────────────────────────────────────
-  function renderTable(category, items) {
+  function renderTable(category, items, total) {
     const container = document.querySelector(
       `[data-table-container="${category}"]`
     );
     if (!container) return;
 
-    document.getElementById(`badge-${badgeKey(category)}`).textContent = items.length;
+    document.getElementById(`badge-${badgeKey(category)}`).textContent = total ?? items.length;
 
     if (!items.length) {
       container.innerHTML = `
@@ -169,7 +170,7 @@
         flash('danger', json?.error?.message || 'Error al cargar candidatos');
         return;
       }
-      renderTable(category, json.data || []);
+      renderTable(category, json.data || [], json.meta?.total);
     } catch (e) {
       flash('danger', `Error de red: ${e.message}`);
     }
@@ -211,10 +212,16 @@
 
       (json.flash || []).forEach(f => flash(f.level, f.message));
 
-      const run = json.data?.run;
+      let data = json.data;
+      if (res.status === 202 && data?.status_url) {
+        data = await waitForTask(data.status_url, btn);
+        if (!data) return;
+      }
+
+      const run = data?.run;
       if (run) {
         currentRunId = run.run_id;
-        triggerDownload(json.data.archive_url, `purge_${run.run_id}.zip`);
+        triggerDownload(data.archive_url, `purge_${run.run_id}.zip`);
         // Mostrar modal de confirmación tras pequeño delay para asegurar que descarga inició
         setTimeout(() => openConfirmModal(run.run_id), 800);
         await loadCandidates(category);
@@ -227,6 +234,32 @@
     }
   }
 
+  // Consulta el estado de build_purge_run hasta que termine o se agote el
+  // tiempo. Devuelve `data` (con run + archive_url) o null si falló.
+  const TASK_POLL_INTERVAL_MS = 1500;
+  const TASK_POLL_MAX_ATTEMPTS = 1200;  // ~30 min
+
+  async function waitForTask(statusUrl, btn) {
+    for (let attempt = 0; attempt < TASK_POLL_MAX_ATTEMPTS; attempt++) {
+      await new Promise(r => setTimeout(r, TASK_POLL_INTERVAL_MS));
+      const res = await fetch(statusUrl);
+      const json = await res.json();
+      if (!res.ok || json.error) {
+        flash('danger', json?.error?.message || 'Error al generar respaldo');
+        return null;
+      }
+      const data = json.data || {};
+      if (data.state === 'SUCCESS') return data;
+      const p = data.progress;
+      if (btn && p && p.total) {
+        btn.innerHTML = `<span class="spinner-border spinner-border-sm me-1"></span>Generando ZIP... ${p.done}/${p.total}`;
+      }
+    }
+
+    flash('danger', 'El respaldo no terminó a tiempo. Revisa el historial de ejecuciones más tarde.');
+    return null;
+  }
+
   function triggerDownload(url, filename) {
     const a = document.createElement('a');
     a.href = url;
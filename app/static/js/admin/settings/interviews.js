@@ -402,16 +402,15 @@
         return;
       }
       
-      let totalCreated = 0;
-      
-      for (const window of event.windows) {
-        const { data: slotsData } = await apiRequest(
-          `${API}/events/windows/${window.id}/generate-slots`, 
-          { method: 'POST' }
-        );
-        totalCreated += slotsData.created || 0;
+      const { data: slotsData } = await apiRequest(
+        `${API}/events/${selectedEventId}/generate-slots`,
+        { method: 'POST' }
+      );
+      const totalCreated = slotsData.created || 0;
+
+      if (slotsData.conflicts && slotsData.conflicts.length) {
+        flash(`${slotsData.conflicts.length} ventana(s) se solapan con otros horarios; no se generaron sus slots`, 'warning');
       }
-      
       flash(`Se generaron ${totalCreated} nuevos horarios`, 'success');
       await loadSlots(selectedEventId);
       
@@ -327,7 +327,12 @@
     btn.disabled = true;
     btn.innerHTML = '<span class="spinner-border spinner-border-sm me-1"></span>Aplicando...';
 
-    const data = await postJson(`${API_BASE}/csv/execute`, { rows: validRows });
+    let data = await postJson(`${API_BASE}/csv/execute`, { rows: validRows });
+
+    // Lotes grandes: el servidor encola en Celery (202) y responde status_url
+    if (data && data.status_url) {
+      data = await waitForImportTask(data.status_url, btn);
+    }
 
     btn.disabled = false;
     btn.innerHTML = '<i class="bi bi-cloud-upload me-1"></i>Aplicar válidas';
@@ -337,6 +342,48 @@
     renderCsvResult(data);
   }
 
+  // Consulta el estado de la tarea hasta SUCCESS/FAILURE o hasta agotar el
+  // tiempo; devuelve el resultado de execute_csv o null.
+  const TASK_POLL_INTERVAL_MS = 2000;
+  const TASK_POLL_MAX_ATTEMPTS = 900;  // ~30 min
+
+  async function waitForImportTask(statusUrl, btn) {
+    for (let attempt = 0; attempt < TASK_POLL_MAX_ATTEMPTS; attempt++) {
+      await new Promise(resolve => setTimeout(resolve, TASK_POLL_INTERVAL_MS));
+
+      let body;
+      try {
+        const res = await fetch(statusUrl, { headers: { 'Accept': 'application/json' } });
+        body = await res.json();
+        if (!res.ok) {
+          showFlash('danger', (body.error && body.error.message) || 'Error al consultar el alta masiva.');
+          return null;
+        }
+      } catch {
+        continue;  // error de red transitorio: se reintenta
+      }
+
+      const task = body.data || {};
+      if (task.state === 'SUCCESS') {
+        return task.result;
+      }
+      if (task.state === 'FAILURE') {
+        (body.flash || []).forEach(f => showFlash(f.level, f.message));
+        if (!body.flash) {
+          showFlash('danger', (body.error && body.error.message) || 'Error al ejecutar el CSV.');
+        }
+        return null;
+      }
+      if (task.state === 'PROGRESS' && task.progress && task.progress.total) {
+        btn.innerHTML = '<span class="spinner-border spinner-border-sm me-1"></span>' +
+          `Aplicando... ${task.progress.done}/${task.progress.total}`;
+      }
+    }
+
+    showFlash('warning', 'El alta masiva sigue en proceso. Revisa la lista de estudiantes más tarde.');
+    return null;
+  }
+
   // ---------------------------------------------------------------------------
   // CSV: render result modal
   // ---------------------------------------------------------------------------
@@ -176,7 +176,8 @@ class AcceptanceManager {
 
     async loadTab(tabName) {
         try {
-            const results = await this._fanFetch(pid => `/api/v1/acceptance/program/${pid}/applicants`);
+            // El servidor filtra por pestaña; la clasificación en cliente se conserva
+            const results = await this._fanFetch(pid => `/api/v1/acceptance/program/${pid}/applicants?tab=${encodeURIComponent(tabName)}`);
             const allApplicants = [];
             results.forEach(r => {
                 if (!r.data) return;
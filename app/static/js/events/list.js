@@ -513,7 +513,7 @@
     function buildCoverUrl(eventId, coverPath) {
         if (!coverPath) return '';
         const filename = coverPath.split('/').pop();
-        return `/files/event/${eventId}/cover/${filename}`;
+        return `/files/event/${eventId}/cover/${filename}?w=640`;
     }
 
     /**
@@ -236,7 +236,8 @@
             const cover = data.cover || data.data?.cover;
             if (cover?.path) {
                 const filename = cover.path.split('/').pop();
-                const url = `/files/event/${ev.id}/cover/${filename}`;
+                // ?w= → derivada responsiva (WebP/JPEG) en vez del original
+                const url = `/files/event/${ev.id}/cover/${filename}?w=1280`;
                 heroEl.style.background = `url('${url}') center/cover no-repeat`;
             }
         } catch {
@@ -387,9 +388,15 @@
             grid.innerHTML = gallery.map(img => {
                 const filename = (img.path || '').split('/').pop();
                 const url = `/files/event/${evId}/gallery/${filename}`;
+                // Miniatura de 320/640 px; el lightbox pide la de 1280.
+                // El placeholder (data URI ~24 px) se ve mientras carga.
+                const placeholder = img.placeholder
+                    ? ` style="background:url('${img.placeholder}') center/cover no-repeat"` : '';
                 return `
-                <div class="event-public-gallery-item" data-img-url="${escapeHtml(url)}">
-                    <img src="${escapeHtml(url)}" alt="${escapeHtml(img.caption || 'Imagen del evento')}" loading="lazy">
+                <div class="event-public-gallery-item" data-img-url="${escapeHtml(url)}?w=1280"${placeholder}>
+                    <img src="${escapeHtml(url)}?w=320" srcset="${escapeHtml(url)}?w=320 1x, ${escapeHtml(url)}?w=640 2x"
+                         alt="${escapeHtml(img.caption || 'Imagen del evento')}" loading="lazy"
+                         ${img.width && img.height ? `width="${img.width}" height="${img.height}"` : ''}>
                 </div>`;
             }).join('');
 
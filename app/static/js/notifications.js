@@ -41,6 +41,12 @@ class NotificationManager {
                 detail: notification
             }));
         });
+
+        // Contador autoritativo empujado por el servidor (user_counters)
+        window.addEventListener('siiap:notifications:unread_count', (e) => {
+            const count = Number(e.detail?.count);
+            if (Number.isFinite(count)) this.setBadgeCount(count);
+        });
     }
 
     // ── Badge ─────────────────────────────────────────────────────────────────
@@ -194,4 +194,25 @@
         window.dispatchEvent(new CustomEvent('siiap:invitations:count_changed', { detail: data }));
     });
 
+    /**
+     * notifications:unread_count
+     * Emitido al usuario cuando cambia su contador de notificaciones no leídas
+     * (nueva notificación, marcar como leída, eliminar). Evita consultar
+     * /api/v1/notifications/unread-count.
+     * Payload: { count: number }
+     */
+    socket.on('notifications:unread_count', (data) => {
+        window.dispatchEvent(new CustomEvent('siiap:notifications:unread_count', { detail: data }));
+    });
+
+    /**
+     * events:new_count
+     * Emitido al usuario cuando cambia su contador de eventos nuevos
+     * (publicación de un evento para su audiencia, marcar como vistos).
+     * Payload: { count: number }
+     */
+    socket.on('events:new_count', (data) => {
+        window.dispatchEvent(new CustomEvent('siiap:events:new_count', { detail: data }));
+    });
+
 })();
@@ -3,3 +3,8 @@
 # Módulos disponibles:
 #   maintenance   — limpieza de archivos expirados, retención y notificaciones antiguas
 #   notifications — envío masivo de notificaciones/correos a grupos de usuarios
+#   events        — recordatorios de eventos y derivadas de imágenes de eventos
+#   purge         — construcción asíncrona de respaldos ZIP previos a la purga
+#   documents     — generación de documentos por lote (cartas de aceptación, etc.)
+#   transition    — preview y ejecución de la transición semestral con avance
+#   students      — alta masiva de estudiantes por CSV con avance por bloque
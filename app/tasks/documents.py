@@ -0,0 +1,62 @@
+"""
+Tareas Celery para generación de documentos desde plantillas.
+
+generate_documents_batch emite el mismo documento (p.ej. cartas de
+aceptación) para una cohorte completa en un solo trabajo; se puede lanzar
+desde el panel de tareas (/admin/celery → Ejecutar) con sus kwargs.
+
+Se enruta a la cola 'documents' (task_routes en app/celery_app.py). Ese
+worker debe arrancar con un pool que permita procesos hijos, p.ej.:
+
+    celery -A app.celery_worker.celery worker -Q documents -P solo
+
+En el pool prefork por defecto el proceso de la tarea es daemon, el
+ProcessPoolExecutor de generate_batch no puede arrancar y el lote se
+renderiza en serie. Los procesos de render del lote los fija
+DOCUMENT_BATCH_WORKERS.
+"""
+
+import logging
+
+from app.extensions import celery
+
+logger = logging.getLogger(__name__)
+
+
+@celery.task(
+    name='app.tasks.documents.generate_documents_batch',
+    bind=True,
+    time_limit=1800,
+    soft_time_limit=1740,
+)
+def generate_documents_batch(
+    self,
+    user_ids,
+    program_id,
+    document_type='acceptance_letter',
+    period_id=None,
+):
+    """
+    Genera documentos para user_ids y los empaqueta en un ZIP.
+
+    Returns:
+        {'generated': int, 'errors': {user_id: msg}, 'zip_path': str | None}
+    """
+    from app.services.document_generation_service import DocumentGenerationService
+
+    result = DocumentGenerationService.generate_batch(
+        user_ids=user_ids,
+        program_id=program_id,
+        document_type=document_type,
+        period_id=period_id,
+        as_zip=True,
+    )
+    logger.info(
+        f"[generate_documents_batch] programa={program_id} tipo={document_type} "
+        f"generados={len(result['files'])} errores={len(result['errors'])}"
+    )
+    return {
+        'generated': len(result['files']),
+        'errors': {str(uid): msg for uid, msg in result['errors'].items()},
+        'zip_path': result['zip_path'],
+    }
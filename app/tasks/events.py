@@ -1,5 +1,6 @@
 """
-Tareas Celery para eventos — dispatcher de recordatorios automáticos.
+Tareas Celery para eventos — dispatcher de recordatorios automáticos y
+derivadas responsivas de las imágenes subidas.
 
 Las entradas de beat_schedule viven en app/celery_app.py:
 - event-reminders-24h: diario 09:00 AM
@@ -46,3 +47,25 @@ def dispatch_reminders_2h(self):
     except Exception as exc:
         logger.exception(f"[dispatch_reminders_2h] error: {exc}")
         raise self.retry(exc=exc)
+
+
+@celery.task(
+    name='app.tasks.events.generate_event_image_variants',
+    bind=True,
+    max_retries=2,
+    default_retry_delay=30,
+)
+def generate_event_image_variants(self, rel_path, image_id=None):
+    """Genera WebP/JPEG por ancho + placeholder de una imagen de evento (cover, galería u host)."""
+    from app.services.events_service import EventsService
+    from app.utils.image_processing import ImageProcessingError
+    try:
+        result = EventsService.build_image_variants(rel_path, image_id)
+    except ImageProcessingError as exc:
+        # Archivo ilegible: reintentar no sirve, se sigue sirviendo el original
+        logger.warning(f"[generate_event_image_variants] {rel_path}: {exc}")
+        return {'path': rel_path, 'variants': 0, 'error': str(exc)}
+    except Exception as exc:
+        logger.exception(f"[generate_event_image_variants] error: {exc}")
+        raise self.retry(exc=exc)
+    return {'path': rel_path, 'variants': len(result['variants']) if result else 0}
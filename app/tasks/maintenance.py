@@ -5,6 +5,10 @@ Programadas automáticamente a través de Celery Beat (ver app/celery_app.py):
   - cleanup_old_notifications          → diario a las 04:00
   - check_deferral_expirations         → diario a las 08:00
   - notify_pending_permanence_docs     → lunes a las 09:00
+  - reconcile_file_inventory           → domingos a las 03:00
+
+Bajo demanda (panel de historial):
+  - cleanup_user_history
 
 Tasks DEPRECATED (no corren en cron desde 2026-04-30, flujo manual con ZIP):
   - cleanup_expired_admission_files
@@ -28,17 +32,11 @@ def _periods_elapsed_since(enrollment_period_code: str) -> int:
     """
     Cuenta cuántos periodos han cerrado su proceso de admisión después del periodo
     de inscripción (código YYYYN comparado lexicográficamente, lo que equivale a
-    orden cronológico por el formato fijo de 5 caracteres).
+    orden cronológico por el formato fijo de 5 caracteres). Se resuelve en memoria
+    con el calendario de periodos.
     """
-    from app.models.academic_period import AcademicPeriod
-    return (
-        AcademicPeriod.query
-        .filter(
-            AcademicPeriod.code > enrollment_period_code,
-            AcademicPeriod.admission_end_date < datetime.utcnow(),
-        )
-        .count()
-    )
+    from app.utils.period_calendar import get_period_calendar
+    return get_period_calendar().closed_since(enrollment_period_code)
 
 
 @celery.task(
@@ -67,7 +65,8 @@ def cleanup_expired_admission_files(self):
     from app.models.program_step import ProgramStep
     from app.models.user_program import UserProgram
     from app.models.academic_period import AcademicPeriod
-    from app.config import Config
+    from app.utils.files import user_doc_path
+    from app.utils.period_calendar import get_period_calendar
 
     logger.info("[cleanup_expired_admission_files] Iniciando limpieza de archivos expirados...")
 
@@ -88,12 +87,13 @@ def cleanup_expired_admission_files(self):
         deleted_files = 0
         marked_expired = 0
 
+        calendar = get_period_calendar()
         for up in candidates:
-            enrollment_period = AcademicPeriod.query.get(up.admission_period_id)
+            enrollment_period = calendar.get(up.admission_period_id)
             if not enrollment_period:
                 continue
 
-            elapsed = _periods_elapsed_since(enrollment_period.code)
+            elapsed = calendar.closed_since(enrollment_period.code)
             if elapsed < 2:
                 continue  # todavía dentro del plazo permitido
 
@@ -114,7 +114,7 @@ def cleanup_expired_admission_files(self):
             files_deleted_this_user = 0
             for sub in submissions:
                 if sub.file_path:
-                    full_path = os.path.join(str(Config.UPLOAD_FOLDER), sub.file_path)
+                    full_path = str(user_doc_path(sub.file_path))
                     if os.path.exists(full_path):
                         try:
                             os.remove(full_path)
@@ -178,7 +178,7 @@ def apply_retention_policies(self):
     from app.models.retention_policy import RetentionPolicy
     from app.models.submission import Submission
     from app.models.user_program import UserProgram
-    from app.config import Config
+    from app.utils.files import user_doc_path
 
     logger.info("[apply_retention_policies] Iniciando aplicación de políticas de retención...")
 
@@ -209,7 +209,7 @@ def apply_retention_policies(self):
 
                 for sub in subs:
                     if sub.file_path:
-                        full_path = os.path.join(str(Config.UPLOAD_FOLDER), sub.file_path)
+                        full_path = str(user_doc_path(sub.file_path))
                         if os.path.exists(full_path):
                             try:
                                 os.remove(full_path)
@@ -316,15 +316,26 @@ def notify_pending_permanence_docs(self):
     confirmada por el coordinador para el período académico activo.
 
     Sólo notifica si existe un período activo. No re-notifica a estudiantes
-    que ya tienen su inscripción confirmada (enrollment_confirmed=True).
+    que ya tienen su inscripción confirmada (enrollment_confirmed=True) ni a
+    quienes ya recibieron este aviso en la semana en curso (desde el lunes
+    00:00), así un reintento tras un fallo parcial no duplica avisos.
+
+    Los destinatarios salen de una sola consulta (LEFT JOIN contra la
+    inscripción del período activo); las notificaciones se insertan por
+    bloques con create_bulk_notifications (INSERT multi-fila) y se hace
+    commit por bloque.
 
     Programada semanalmente los lunes a las 09:00.
     """
+    from sqlalchemy import and_, exists, or_
+
     from app import db
     from app.models.user_program import UserProgram
     from app.models.semester_enrollment import SemesterEnrollment
     from app.models.academic_period import AcademicPeriod
+    from app.models.notification import Notification
     from app.services.notification_service import NotificationService
+    from app.utils.datetime_utils import now_local
 
     logger.info("[notify_pending_permanence_docs] Iniciando notificaciones de permanencia pendiente...")
 
@@ -334,20 +345,41 @@ def notify_pending_permanence_docs(self):
             logger.info("[notify_pending_permanence_docs] Sin período activo. No se envían notificaciones.")
             return {'notified': 0, 'reason': 'no_active_period'}
 
-        enrolled_ups = UserProgram.query.filter_by(admission_status='enrolled').all()
-
-        notified = 0
-        for up in enrolled_ups:
-            enrollment = SemesterEnrollment.query.filter_by(
-                user_program_id=up.id,
-                academic_period_id=active_period.id,
-            ).first()
+        now = now_local()
+        week_start = (now - timedelta(days=now.weekday())).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        already_notified = exists().where(
+            Notification.user_id == UserProgram.user_id,
+            Notification.type == 'permanence_pending',
+            Notification.created_at >= week_start,
+        )
 
-            if enrollment and enrollment.enrollment_confirmed:
-                continue  # ya confirmado, no notificar
+        user_ids = [
+            uid for (uid,) in (
+                db.session.query(UserProgram.user_id)
+                .outerjoin(SemesterEnrollment, and_(
+                    SemesterEnrollment.user_program_id == UserProgram.id,
+                    SemesterEnrollment.academic_period_id == active_period.id,
+                ))
+                .filter(
+                    UserProgram.admission_status == 'enrolled',
+                    or_(
+                        SemesterEnrollment.id.is_(None),
+                        SemesterEnrollment.enrollment_confirmed.is_(False),
+                    ),
+                    ~already_notified,
+                )
+                .distinct()
+                .order_by(UserProgram.user_id)
+            )
+        ]
 
-            NotificationService.create_notification(
-                user_id=up.user_id,
+        notified = 0
+        chunk_size = NotificationService.BULK_CHUNK_SIZE
+        for start in range(0, len(user_ids), chunk_size):
+            created = NotificationService.create_bulk_notifications(
+                user_ids=user_ids[start:start + chunk_size],
                 notification_type='permanence_pending',
                 title='Inscripción semestral pendiente de confirmación',
                 message=(
@@ -357,10 +389,11 @@ def notify_pending_permanence_docs(self):
                 ),
                 priority='medium',
                 action_url='/dashboard',
+                data={'academic_period_id': active_period.id},
             )
-            notified += 1
+            db.session.commit()
+            notified += len(created)
 
-        db.session.commit()
         logger.info(f"[notify_pending_permanence_docs] Notificaciones enviadas: {notified}")
         return {'notified': notified, 'period': active_period.name}
 
@@ -368,3 +401,103 @@ def notify_pending_permanence_docs(self):
         db.session.rollback()
         logger.error(f"[notify_pending_permanence_docs] Error: {exc}", exc_info=True)
         raise self.retry(exc=exc)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 6. RECONCILIAR EL INVENTARIO DE ARCHIVOS CON EL DISCO
+# ─────────────────────────────────────────────────────────────────────────────
+
+@celery.task(
+    name='app.tasks.maintenance.reconcile_file_inventory',
+    bind=True,
+    max_retries=3,
+    default_retry_delay=60,
+)
+def reconcile_file_inventory(self, verify_hashes: bool = False):
+    """
+    Compara size_bytes/sha256/file_missing de Submission, AcceptanceDocument
+    y EventImage con lo que hay en disco (ver file_inventory_service.reconcile).
+    Marca faltantes, rellena filas sin inventario y cuenta huérfanos; no
+    borra archivos.
+
+    Programada semanalmente los domingos a las 03:00.
+    """
+    from app import db
+    from app.services import file_inventory_service
+
+    logger.info("[reconcile_file_inventory] Reconciliando inventario de archivos...")
+
+    try:
+        stats = file_inventory_service.reconcile(verify_hashes=verify_hashes)
+        logger.info(f"[reconcile_file_inventory] Resultado: {stats}")
+        return stats
+
+    except Exception as exc:
+        db.session.rollback()
+        logger.error(f"[reconcile_file_inventory] Error: {exc}", exc_info=True)
+        raise self.retry(exc=exc)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 7. LIMPIEZA DEL HISTORIAL DE USUARIOS POR POLÍTICA DE RETENCIÓN
+# ─────────────────────────────────────────────────────────────────────────────
+
+@celery.task(
+    name='app.tasks.maintenance.cleanup_user_history',
+    bind=True,
+    max_retries=3,
+    default_retry_delay=60,
+    time_limit=3600,
+    soft_time_limit=3540,
+)
+def cleanup_user_history(self, retention_config=None, archive: bool = False,
+                         chunk_size: int = None, after_id: int = 0):
+    """
+    Borra el historial vencido por bloques (ver
+    HistoryRetentionService.cleanup_old_history). Cada bloque hace commit,
+    así que un reintento continúa desde el último ID confirmado y agrega al
+    mismo respaldo JSONL (nombrado con el id de la tarea).
+
+    Progreso: state=PROGRESS, meta={'done', 'total', 'last_id'}.
+    """
+    from app import db
+    from app.services.history_retention_service import (
+        DELETE_CHUNK_SIZE, HistoryRetentionService,
+    )
+
+    progress = {'last_id': after_id}
+
+    def _progress(done, total, last_id):
+        progress['last_id'] = last_id
+        self.update_state(
+            state='PROGRESS',
+            meta={'done': done, 'total': total, 'last_id': last_id},
+        )
+
+    logger.info(f"[cleanup_user_history] Iniciando limpieza (after_id={after_id})...")
+
+    try:
+        stats = HistoryRetentionService.cleanup_old_history(
+            dry_run=False,
+            retention_config=retention_config,
+            chunk_size=chunk_size or DELETE_CHUNK_SIZE,
+            archive=archive,
+            archive_name=f'user_history_{self.request.id}' if self.request.id else None,
+            after_id=after_id,
+            progress_callback=_progress,
+        )
+        logger.info(
+            f"[cleanup_user_history] {stats['entries_deleted']} registros eliminados "
+            f"(último id {stats.get('last_id', after_id)})"
+        )
+        return stats
+
+    except Exception as exc:
+        db.session.rollback()
+        logger.error(f"[cleanup_user_history] Error: {exc}", exc_info=True)
+        raise self.retry(exc=exc, kwargs={
+            'retention_config': retention_config,
+            'archive': archive,
+            'chunk_size': chunk_size,
+            'after_id': progress['last_id'],
+        })
@@ -32,6 +32,10 @@ from app.celery_app import celery
 
 logger = logging.getLogger(__name__)
 
+# Tamaño máximo de destinatarios por tarea; listas mayores se reparten
+# en sub-tareas send_bulk_notification que corren en paralelo.
+FANOUT_SLICE_SIZE = 2000
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # 1. ENVÍO MASIVO POR LISTA DE USER IDs
@@ -73,46 +77,68 @@ def send_bulk_notification(
     """
     from app import db
     from app.services.notification_service import NotificationService
-    from app.models.user import User
+
+    user_ids = list(dict.fromkeys(user_ids or []))
+
+    # Listas muy grandes se reparten en sub-tareas paralelas; cada una hace
+    # su propio INSERT por bloques en una transacción corta.
+    if len(user_ids) > FANOUT_SLICE_SIZE:
+        slices = [
+            user_ids[i:i + FANOUT_SLICE_SIZE]
+            for i in range(0, len(user_ids), FANOUT_SLICE_SIZE)
+        ]
+        for part in slices:
+            send_bulk_notification.delay(
+                user_ids=part,
+                notification_type=notification_type,
+                title=title,
+                message=message,
+                priority=priority,
+                action_url=action_url,
+                data=data,
+                send_email=send_email,
+                email_subject=email_subject,
+                email_html=email_html,
+            )
+        logger.info(
+            f"[send_bulk_notification] '{title}' repartido en {len(slices)} sub-tareas "
+            f"({len(user_ids)} usuarios)"
+        )
+        return {'dispatched': len(slices), 'users': len(user_ids)}
 
     logger.info(
         f"[send_bulk_notification] Enviando '{title}' a {len(user_ids)} usuarios..."
     )
 
-    created = 0
-    errors = 0
-
     try:
-        for uid in user_ids:
+        created = NotificationService.create_bulk_notifications(
+            user_ids=user_ids,
+            notification_type=notification_type,
+            title=title,
+            message=message,
+            priority=priority,
+            action_url=action_url,
+            data=data or {},
+        )
+
+        queued = []
+        if send_email and email_subject and email_html:
             try:
-                NotificationService.create_notification(
-                    user_id=uid,
-                    notification_type=notification_type,
-                    title=title,
-                    message=message,
-                    priority=priority,
-                    action_url=action_url,
-                    data=data or {},
+                from app.services.email_service import EmailService
+                queued = EmailService.queue_emails_bulk(
+                    created.keys(), email_subject, email_html, notification_ids=created,
                 )
-                created += 1
-
-                if send_email and email_subject and email_html:
-                    try:
-                        from app.services.email_service import EmailService
-                        EmailService.queue_email(uid, email_subject, email_html)
-                    except Exception as e:
-                        logger.warning(f"Error al encolar correo para user {uid}: {e}")
-
             except Exception as e:
-                errors += 1
-                logger.warning(f"Error creando notificación para user {uid}: {e}")
+                logger.warning(f"Error al encolar correos masivos: {e}")
 
         db.session.commit()
 
+        errors = len(user_ids) - len(created)
         logger.info(
-            f"[send_bulk_notification] Completado. Creadas: {created}, errores: {errors}"
+            f"[send_bulk_notification] Completado. Creadas: {len(created)}, "
+            f"correos: {len(queued)}, errores: {errors}"
         )
-        return {'created': created, 'errors': errors}
+        return {'created': len(created), 'emails': len(queued), 'errors': errors}
 
     except Exception as exc:
         db.session.rollback()
@@ -173,28 +199,38 @@ def send_bulk_notification_by_filter(
     )
 
     try:
+        from app import db
+
         user_ids = []
 
         if filter_type == 'role':
             role = Role.query.filter_by(name=filter_value).first()
             if role:
-                users = User.query.filter(
-                    User.roles.any(id=role.id),
-                    User.is_active == True,
-                ).all()
-                user_ids = [u.id for u in users]
+                user_ids = [
+                    uid for (uid,) in db.session.query(User.id).filter(
+                        User.role_id == role.id,
+                        User.is_active == True,
+                    )
+                ]
 
         elif filter_type == 'program':
-            ups = UserProgram.query.filter_by(program_id=filter_value).all()
-            user_ids = list({up.user_id for up in ups})
+            user_ids = [
+                uid for (uid,) in db.session.query(UserProgram.user_id)
+                .filter(UserProgram.program_id == filter_value)
+                .distinct()
+            ]
 
         elif filter_type == 'process':
-            ups = UserProgram.query.filter_by(status=filter_value).all()
-            user_ids = list({up.user_id for up in ups})
+            user_ids = [
+                uid for (uid,) in db.session.query(UserProgram.user_id)
+                .filter(UserProgram.admission_status == filter_value)
+                .distinct()
+            ]
 
         elif filter_type == 'all':
-            users = User.query.filter_by(is_active=True).all()
-            user_ids = [u.id for u in users]
+            user_ids = [
+                uid for (uid,) in db.session.query(User.id).filter(User.is_active == True)
+            ]
 
         else:
             logger.warning(f"filter_type desconocido: {filter_type}")
@@ -272,3 +308,42 @@ def send_email_async(self, email_queue_id: int):
         logger.error(f"[send_email_async] Error enviando email {email_queue_id}: {exc}")
         # Reintentar con backoff exponencial
         raise self.retry(exc=exc, countdown=60 * (2 ** self.request.retries))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 4. ENVÍO DE CORREOS EN LOTE (desde EmailService.queue_emails_bulk)
+# ─────────────────────────────────────────────────────────────────────────────
+
+@celery.task(
+    name='app.tasks.notifications.send_emails_batch_async',
+    bind=True,
+)
+def send_emails_batch_async(self, email_queue_ids: List[int]):
+    """
+    Intenta enviar un bloque de correos de la cola en una sola tarea, vía
+    /$batch de Graph (BATCH_LIMIT correos por petición).
+
+    Los que fallen quedan en EmailQueue con su next_retry_at (lo gestiona
+    _try_send_email) y se reintentan con process_queue / retry_failed,
+    en lugar de encadenar un reintento Celery por correo.
+    """
+    from app import db
+    from app.models.email_queue import EmailQueue
+    from app.services.email_service import EmailService
+    from app.utils.ms_graph import BATCH_LIMIT
+
+    items = (
+        EmailQueue.query
+        .filter(EmailQueue.id.in_(email_queue_ids), EmailQueue.status == 'pending')
+        .order_by(EmailQueue.id)
+        .all()
+    )
+    sent = 0
+    for start in range(0, len(items), BATCH_LIMIT):
+        sent += EmailService._send_batch(items[start:start + BATCH_LIMIT])
+        db.session.commit()
+
+    if items:
+        EmailService._emit_queue_update()
+    logger.info(f"[send_emails_batch_async] {sent}/{len(items)} correos enviados")
+    return {'processed': len(items), 'sent': sent}
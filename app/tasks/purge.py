@@ -0,0 +1,64 @@
+"""
+Tareas Celery para respaldos ZIP previos a la purga física.
+
+Generar el ZIP de una cohorte completa puede tardar minutos; desde
+POST /api/v1/admin/purge/start se encola aquí para no bloquear un worker
+HTTP. El avance se publica con `update_state(state='PROGRESS')` y se
+consulta en GET /api/v1/admin/purge/tasks/<task_id>.
+"""
+
+import logging
+
+from app.extensions import celery
+
+logger = logging.getLogger(__name__)
+
+
+@celery.task(
+    name='app.tasks.purge.build_purge_run',
+    bind=True,
+    time_limit=1800,
+    soft_time_limit=1740,
+)
+def build_purge_run(
+    self,
+    user_program_ids,
+    purge_type,
+    initiated_by_id,
+    program_id=None,
+    source_period_id=None,
+    target_period_id=None,
+    notes=None,
+):
+    """
+    Construye el PurgeRun y su ZIP. Sin reintentos: un fallo deja el run sin
+    crear (el .zip.tmp se borra) y el admin puede volver a intentarlo.
+    """
+    import app.services.applicant_archive_service as svc
+
+    def _progress(done, total):
+        self.update_state(
+            state='PROGRESS',
+            meta={'done': done, 'total': total},
+        )
+
+    run = svc.create_purge_run(
+        user_program_ids=user_program_ids,
+        purge_type=purge_type,
+        initiated_by_id=initiated_by_id,
+        program_id=program_id,
+        source_period_id=source_period_id,
+        target_period_id=target_period_id,
+        notes=notes,
+        progress_callback=_progress,
+    )
+    logger.info(
+        f"[build_purge_run] run_id={run.run_id} "
+        f"items={len(run.target_user_program_ids or [])} "
+        f"size={run.archive_size_bytes}"
+    )
+    return {
+        'run_id': run.run_id,
+        'archive_size_bytes': run.archive_size_bytes,
+        'item_count': len(run.target_user_program_ids or []),
+    }
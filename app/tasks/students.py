@@ -0,0 +1,42 @@
+"""
+Tareas Celery para el alta masiva de estudiantes por CSV.
+
+Un padrón histórico completo (miles de filas) tarda más que el timeout de un
+worker HTTP aun con escritura por bloques. Desde
+/api/v1/student-bulk/csv/execute con `async` (o por encima de
+ASYNC_THRESHOLD filas) se encola aquí. El avance se publica por bloque con
+`update_state(state='PROGRESS')` y se consulta en
+GET /api/v1/student-bulk/csv/tasks/<task_id>.
+"""
+
+import logging
+
+from app.extensions import celery
+
+logger = logging.getLogger(__name__)
+
+
+@celery.task(
+    name='app.tasks.students.import_students_csv',
+    bind=True,
+    time_limit=1800,
+    soft_time_limit=1740,
+)
+def import_students_csv(self, rows, created_by_id):
+    """
+    Ejecuta las filas válidas de un preview CSV. Sin reintentos: cada bloque
+    hace commit y las filas ya creadas fallarían por duplicado al relanzar.
+    """
+    import app.services.student_bulk_service as svc
+
+    def _progress(done, total):
+        self.update_state(
+            state='PROGRESS',
+            meta={'stage': 'students', 'done': done, 'total': total},
+        )
+
+    result = svc.execute_csv(rows, created_by_id=created_by_id, progress_callback=_progress)
+    logger.info(
+        f"[import_students_csv] creados={result['created']} fallidos={len(result['failed'])}"
+    )
+    return result
@@ -0,0 +1,89 @@
+"""
+Tareas Celery para la transición semestral ("Pasar Semestre").
+
+El preview y la ejecución global recorren todos los programas activos; al
+final de semestre pueden tardar más que el timeout de un worker HTTP. Desde
+/api/v1/permanence/transition/{preview,execute} con `async` se encolan aquí.
+El avance se publica con `update_state(state='PROGRESS')` y se consulta en
+GET /api/v1/permanence/transition/tasks/<task_id>.
+"""
+
+import logging
+
+from app.extensions import celery
+
+logger = logging.getLogger(__name__)
+
+
+def _progress_reporter(task, stage):
+    def _progress(done, total):
+        task.update_state(
+            state='PROGRESS',
+            meta={'stage': stage, 'done': done, 'total': total},
+        )
+    return _progress
+
+
+@celery.task(
+    name='app.tasks.transition.build_transition_preview',
+    bind=True,
+    time_limit=900,
+    soft_time_limit=870,
+)
+def build_transition_preview(self, source_period_id, target_period_id, program_id=None):
+    """Preview de un programa (program_id) o de todos. No muta datos."""
+    import app.services.semester_transition_service as tsvc
+
+    if program_id:
+        return tsvc.preview_program(program_id, source_period_id, target_period_id)
+    return tsvc.preview_global(
+        source_period_id, target_period_id,
+        progress_callback=_progress_reporter(self, 'programs'),
+    )
+
+
+@celery.task(
+    name='app.tasks.transition.run_semester_transition',
+    bind=True,
+    time_limit=1800,
+    soft_time_limit=1740,
+)
+def run_semester_transition(
+    self,
+    source_period_id,
+    target_period_id,
+    coordinator_id,
+    program_id=None,
+):
+    """
+    Ejecuta la transición de un programa (program_id) o de todos y genera el
+    snapshot de aspirantes expirados. Sin reintentos: cada programa es
+    atómico e idempotente, el admin puede relanzarla.
+    """
+    import app.services.semester_transition_service as tsvc
+
+    if program_id:
+        result = tsvc.execute_program_transition(
+            program_id=program_id,
+            source_period_id=source_period_id,
+            target_period_id=target_period_id,
+            coordinator_id=coordinator_id,
+            progress_callback=_progress_reporter(self, 'students'),
+        )
+    else:
+        result = tsvc.execute_global_transition(
+            source_period_id=source_period_id,
+            target_period_id=target_period_id,
+            coordinator_id=coordinator_id,
+            progress_callback=_progress_reporter(self, 'programs'),
+        )
+
+    archive = tsvc.snapshot_expired_applicants(
+        result, program_id, source_period_id, target_period_id,
+        initiated_by_id=coordinator_id,
+    )
+    logger.info(
+        f"[run_semester_transition] {source_period_id}→{target_period_id} "
+        f"program_id={program_id or 'all'}"
+    )
+    return {**result, 'archive': archive}
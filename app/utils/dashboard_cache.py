@@ -0,0 +1,181 @@
+"""
+Caché de corta duración para las métricas de los dashboards administrativos.
+
+Las métricas por programa (DashboardService._compute_program_metrics) se
+guardan en Redis como JSON con un TTL de pocos segundos, de modo que varios
+coordinadores recargando el dashboard a la vez comparten un único cálculo.
+
+Claves:
+    siiap:dash:program:<program_id>   → métricas del programa (JSON, TTL)
+    siiap:dash:global                 → métricas del admin de posgrado (JSON, TTL)
+
+Invalidación:
+    Un listener de sesión marca en `before_flush` los programas afectados por
+    cambios en Submission (alta, baja o cambio de status, p.ej. una revisión)
+    y en UserProgram (alta, baja o cambio de admission_status). Las claves se
+    borran en `after_commit`; un rollback descarta las marcas. El TTL
+    (DASHBOARD_CACHE_TTL) cubre el resto (citas agendadas, cuentas
+    desactivadas).
+
+Si Redis no está disponible se calcula siempre desde BD.
+"""
+
+import json
+import logging
+from typing import Callable, Dict, Iterable, Optional
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.utils.redis_pool import get_redis, report_redis_failure
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 10
+
+_GLOBAL_KEY = 'siiap:dash:global'
+_DIRTY_KEY = '_dashboard_dirty_programs'
+
+
+def _program_key(program_id: int) -> str:
+    return f'siiap:dash:program:{program_id}'
+
+
+def _ttl() -> int:
+    if has_app_context():
+        return int(current_app.config.get('DASHBOARD_CACHE_TTL', DEFAULT_TTL))
+    return DEFAULT_TTL
+
+
+# ---------------------------------------------------------------------------
+# Lectura
+# ---------------------------------------------------------------------------
+
+def get_program_metrics(
+    program_ids: Iterable[int],
+    loader: Callable[[list], Dict[int, dict]],
+) -> Dict[int, dict]:
+    """
+    Métricas por programa. Los programas que no están en caché se calculan
+    juntos con una sola llamada a `loader(missing_ids)` y se guardan.
+    """
+    program_ids = list(dict.fromkeys(program_ids))
+    if not program_ids:
+        return {}
+
+    client = get_redis()
+    if client is None or _ttl() <= 0:
+        return loader(program_ids)
+
+    result = {}
+    try:
+        cached = client.mget([_program_key(pid) for pid in program_ids])
+        for pid, raw in zip(program_ids, cached):
+            if raw is not None:
+                result[pid] = json.loads(raw)
+    except Exception as e:
+        report_redis_failure(e, 'Error al leer métricas del dashboard')
+        return loader(program_ids)
+
+    missing = [pid for pid in program_ids if pid not in result]
+    if missing:
+        computed = loader(missing)
+        result.update(computed)
+        try:
+            ttl = _ttl()
+            pipe = client.pipeline(transaction=False)
+            for pid, metrics in computed.items():
+                pipe.set(_program_key(pid), json.dumps(metrics), ex=ttl)
+            pipe.execute()
+        except Exception as e:
+            report_redis_failure(e, 'Error al guardar métricas del dashboard')
+    return result
+
+
+def get_global_metrics(loader: Callable[[], dict]) -> dict:
+    """Métricas globales del admin de posgrado (misma política de TTL)."""
+    client = get_redis()
+    if client is None or _ttl() <= 0:
+        return loader()
+    try:
+        raw = client.get(_GLOBAL_KEY)
+        if raw is not None:
+            return json.loads(raw)
+    except Exception as e:
+        report_redis_failure(e, 'Error al leer métricas globales')
+        return loader()
+
+    metrics = loader()
+    try:
+        client.set(_GLOBAL_KEY, json.dumps(metrics), ex=_ttl())
+    except Exception as e:
+        report_redis_failure(e, 'Error al guardar métricas globales')
+    return metrics
+
+
+def invalidate(program_ids: Optional[Iterable[int]] = None) -> None:
+    """Borra de inmediato las métricas de los programas dados y las globales."""
+    client = get_redis()
+    if client is None:
+        return
+    keys = [_GLOBAL_KEY] + [_program_key(pid) for pid in (program_ids or ()) if pid]
+    try:
+        client.delete(*keys)
+    except Exception as e:
+        report_redis_failure(e, 'Error al invalidar métricas del dashboard')
+
+
+# ---------------------------------------------------------------------------
+# Invalidación automática al hacer commit
+# ---------------------------------------------------------------------------
+
+def _affected_program_ids(session, obj):
+    from app.models.program_step import ProgramStep
+    from app.models.submission import Submission
+    from app.models.user_program import UserProgram
+
+    if isinstance(obj, UserProgram):
+        state = inspect(obj)
+        moved = state.attrs.program_id.history
+        if state.pending or obj in session.deleted or moved.has_changes() \
+                or state.attrs.admission_status.history.has_changes():
+            # Si cambió de programa, también se invalida el anterior
+            return [obj.program_id, *moved.deleted]
+        return ()
+
+    if isinstance(obj, Submission):
+        state = inspect(obj)
+        if not (state.pending or obj in session.deleted
+                or state.attrs.status.history.has_changes()):
+            return ()
+        if obj.program_step_id is None:
+            return ()
+        with session.no_autoflush:
+            step = session.get(ProgramStep, obj.program_step_id)
+        return (step.program_id,) if step else ()
+
+    return ()
+
+
+@event.listens_for(Session, 'before_flush')
+def _mark_dashboard_changes(session, flush_context, instances):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        program_ids = [pid for pid in _affected_program_ids(session, obj) if pid is not None]
+        if program_ids:
+            session.info.setdefault(_DIRTY_KEY, set()).update(program_ids)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    program_ids = session.info.pop(_DIRTY_KEY, None)
+    if program_ids:
+        try:
+            invalidate(program_ids)
+        except Exception as e:
+            logger.warning(f'[dashboard_cache] No se pudo invalidar la caché: {e}')
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop(_DIRTY_KEY, None)
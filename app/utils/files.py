@@ -1,13 +1,83 @@
 from pathlib import Path
+import hashlib
+import mimetypes
 import shutil
 import uuid
+from urllib.parse import quote
 from werkzeug.utils import secure_filename, safe_join
-from flask import current_app, abort
+from flask import current_app, abort, send_file
 from typing import Literal
 
 def _uuid_name(ext: str) -> str:
     return f"{uuid.uuid4().hex}.{ext.lower()}"
 
+# ---------- inventario ------------------------------------------------------
+_HASH_CHUNK = 1024 * 1024
+
+
+class StoredPath(str):
+    """
+    Ruta relativa devuelta por save_user_doc / save_event_image. Sigue siendo
+    un str (se guarda tal cual en file_path/path) y además trae el inventario
+    del archivo escrito: size_bytes, sha256 y mime.
+    """
+    size_bytes: int | None = None
+    sha256: str | None = None
+    mime: str | None = None
+
+    @classmethod
+    def of(cls, rel_path: str, size_bytes: int, sha256: str, mime: str | None) -> 'StoredPath':
+        stored = cls(rel_path)
+        stored.size_bytes, stored.sha256, stored.mime = size_bytes, sha256, mime
+        return stored
+
+
+def _guess_mime(name: str) -> str | None:
+    return mimetypes.guess_type(name)[0]
+
+
+def _write_upload(file_storage, dest: Path) -> tuple[int, str]:
+    """Copia el upload a `dest` calculando tamaño y sha256 en la misma pasada."""
+    stream = file_storage.stream
+    stream.seek(0)
+    digest = hashlib.sha256()
+    size = 0
+    with open(dest, 'wb') as out:
+        while True:
+            chunk = stream.read(_HASH_CHUNK)
+            if not chunk:
+                break
+            digest.update(chunk)
+            out.write(chunk)
+            size += len(chunk)
+    return size, digest.hexdigest()
+
+
+def file_inventory(path: Path) -> tuple[int, str, str | None]:
+    """(size_bytes, sha256, mime) de un archivo ya en disco (reconciliador)."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as fh:
+        while True:
+            chunk = fh.read(_HASH_CHUNK)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+    return size, digest.hexdigest(), _guess_mime(path.name)
+
+
+def record_file_inventory(obj, stored: str) -> None:
+    """
+    Copia el inventario de `stored` (StoredPath) a una fila con columnas
+    size_bytes/sha256/mime/file_missing (Submission, AcceptanceDocument,
+    EventImage). Con un str simple deja NULL y el reconciliador lo completa.
+    """
+    obj.size_bytes = getattr(stored, 'size_bytes', None)
+    obj.sha256 = getattr(stored, 'sha256', None)
+    obj.mime = getattr(stored, 'mime', None)
+    obj.file_missing = False
+
 # ---------- rutas absolutas -------------------------------------------------
 def avatar_dir(user_id: int) -> Path:
     if current_app.config['AVATAR_FOLDER'] / str(user_id) is None:
@@ -15,6 +85,21 @@ def avatar_dir(user_id: int) -> Path:
        current_app.config['AVATAR_FOLDER'] / str(user_id).mkdir(parents=True, exist_ok=True)
     return current_app.config['AVATAR_FOLDER'] / str(user_id)
 
+def user_docs_root() -> Path:
+    """
+    Raíz de los documentos de usuario. Submission.file_path y
+    AcceptanceDocument.file_path son relativas a esta carpeta (así las
+    guarda save_user_doc y las sirve files_api.user_doc); el inventario,
+    el ZIP de purga y el borrado físico deben resolverlas aquí.
+    """
+    return Path(current_app.config['USER_DOCS_FOLDER'])
+
+
+def user_doc_path(rel_path: str) -> Path:
+    """Ruta absoluta de un documento a partir de su file_path relativo."""
+    return user_docs_root() / rel_path
+
+
 def docs_dir(user_id: int, phase: Literal['admission', 'permanence', 'conclusion']) -> Path:
     return (current_app.config['USER_DOCS_FOLDER']
             / str(user_id) / phase)
@@ -29,15 +114,15 @@ def save_avatar(file_storage, user_id: int) -> str:
     file_storage.save(folder / filename)
     return f"{user_id}/{filename}"          
 
-def save_user_doc(file_storage, user_id: int, phase: str, name: str) -> str:
+def save_user_doc(file_storage, user_id: int, phase: str, name: str) -> StoredPath:
     ext = _validate_ext(file_storage.filename, current_app.config['ALLOWED_DOC_EXT'])
     folder = docs_dir(user_id, phase)
     folder.mkdir(parents=True, exist_ok=True)
 
     safe = secure_filename(name.rsplit('.', 1)[0])
     filename = f"{safe}.{ext}"
-    file_storage.save(folder / filename)
-    return f"{user_id}/{phase}/{filename}"
+    size, sha = _write_upload(file_storage, folder / filename)
+    return StoredPath.of(f"{user_id}/{phase}/{filename}", size, sha, _guess_mime(filename))
 
 def save_system_template(file_storage, name: str) -> str:
     ext = _validate_ext(file_storage.filename, current_app.config['ALLOWED_DOC_EXT'])
@@ -62,6 +147,68 @@ def abs_path_from_db(relative_path: str, base_folder: Path) -> Path:
     return safe_join(base_folder, relative_path)  # evita ../ traversal
 
 
+# ---------- descargas -------------------------------------------------------
+# Raíces que nginx expone como `internal` bajo X_ACCEL_PREFIX/<nombre>/
+# (ver docker/nginx.prod.conf). Lo que quede fuera se sirve con send_file.
+_ACCEL_ROOTS = (('uploads', 'UPLOAD_FOLDER'), ('instance', 'INSTANCE_DIR'))
+
+
+def _accel_location(path: Path) -> str | None:
+    """URI interna de nginx para `path`, o None si no aplica X-Accel-Redirect."""
+    if not current_app.config.get('X_ACCEL_REDIRECT'):
+        return None
+    prefix = current_app.config.get('X_ACCEL_PREFIX', '/_protected').rstrip('/')
+    resolved = path.resolve()
+    for name, key in _ACCEL_ROOTS:
+        root = current_app.config.get(key)
+        if not root:
+            continue
+        try:
+            rel = resolved.relative_to(Path(root).resolve())
+        except ValueError:
+            continue
+        return f"{prefix}/{name}/{quote(rel.as_posix())}"
+    return None
+
+
+def send_stored_file(path: Path, *, as_attachment: bool = False,
+                     download_name: str | None = None, mimetype: str | None = None,
+                     max_age: int | None = None, immutable: bool = False):
+    """
+    Respuesta de descarga para un archivo ya autorizado por la ruta.
+
+    Detrás de nginx (X_ACCEL_REDIRECT) sólo se devuelven cabeceras y un
+    X-Accel-Redirect: nginx transmite el archivo con Range y ETag propios y
+    el worker queda libre. Sin nginx se usa send_file(conditional=True).
+    `max_age` + `immutable` sirven para archivos cuyo nombre cambia con el
+    contenido (avatares con nombre uuid).
+    """
+    path = Path(path)
+    name = download_name or path.name
+    location = _accel_location(path)
+
+    if location is None:
+        rv = send_file(str(path), mimetype=mimetype, as_attachment=as_attachment,
+                       download_name=name, max_age=max_age, conditional=True)
+    else:
+        rv = current_app.response_class(status=200)
+        rv.headers['X-Accel-Redirect'] = location
+        rv.content_type = mimetype or mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        rv.headers.set('Content-Disposition',
+                       'attachment' if as_attachment else 'inline', filename=name)
+        if max_age is not None:
+            rv.cache_control.max_age = max_age
+        else:
+            rv.cache_control.no_cache = True
+
+    # Requieren sesión: sólo caché del navegador, nunca compartida
+    rv.cache_control.public = False
+    rv.cache_control.private = True
+    if immutable and max_age:
+        rv.cache_control.immutable = True
+    return rv
+
+
 # ---------- eventos ---------------------------------------------------------
 EventImageKind = Literal['cover', 'gallery', 'host']
 
@@ -76,7 +223,7 @@ def events_dir(event_id: int, kind: EventImageKind | None = None) -> Path:
     return base  # cover vive directamente en el base
 
 
-def save_event_image(file_storage, event_id: int, kind: EventImageKind) -> str:
+def save_event_image(file_storage, event_id: int, kind: EventImageKind) -> StoredPath:
     """
     Guarda una imagen de evento y retorna la ruta relativa a EVENTS_FOLDER.
     - cover: `<event_id>/cover.<ext>` (sobrescribe el previo si existe)
@@ -104,6 +251,8 @@ def save_event_image(file_storage, event_id: int, kind: EventImageKind) -> str:
             previous = folder / f"cover.{existing_ext}"
             if previous.exists():
                 previous.unlink()
+        # Las derivadas dependen sólo del nombre base ("cover"): fuera las viejas
+        delete_event_image_variants(f"{event_id}/cover.{ext}")
         filename = f"cover.{ext}"
         relative = f"{event_id}/{filename}"
     else:
@@ -111,8 +260,8 @@ def save_event_image(file_storage, event_id: int, kind: EventImageKind) -> str:
         subfolder = 'gallery' if kind == 'gallery' else 'hosts'
         relative = f"{event_id}/{subfolder}/{filename}"
 
-    file_storage.save(folder / filename)
-    return relative
+    size, sha = _write_upload(file_storage, folder / filename)
+    return StoredPath.of(relative, size, sha, _guess_mime(filename))
 
 
 def delete_event_image_file(relative_path: str) -> bool:
@@ -124,12 +273,51 @@ def delete_event_image_file(relative_path: str) -> bool:
         abs_path = Path(safe_join(str(base), relative_path))
     except Exception:
         return False
+    delete_event_image_variants(relative_path)
     if abs_path.exists() and abs_path.is_file():
         abs_path.unlink()
         return True
     return False
 
 
+def delete_event_image_variants(relative_path: str) -> int:
+    """Borra las derivadas (`_v/`) de una imagen de evento. Retorna cuántas existían."""
+    from app.utils.image_processing import VARIANT_FORMATS, VARIANT_WIDTHS, variant_relpath
+
+    base = Path(current_app.config['EVENTS_FOLDER'])
+    count = 0
+    for width in VARIANT_WIDTHS:
+        for fmt in VARIANT_FORMATS:
+            path = base / variant_relpath(relative_path, width, fmt)
+            if path.is_file():
+                path.unlink()
+                count += 1
+    return count
+
+
+def event_image_variant(relative_path: str, width: int | None, accept_webp: bool) -> str:
+    """
+    Ruta (relativa a EVENTS_FOLDER) que conviene servir para `relative_path`:
+    la derivada más chica con ancho >= `width` (sin `width`, la más grande),
+    en WebP si el cliente lo acepta. Si las derivadas aún no existen (la tarea
+    sigue en cola o falló) se devuelve el original.
+    """
+    from app.utils.image_processing import VARIANT_WIDTHS, variant_relpath
+
+    slots = sorted(VARIANT_WIDTHS)
+    if width:
+        slot = next((w for w in slots if w >= width), slots[-1])
+    else:
+        slot = slots[-1]
+
+    base = Path(current_app.config['EVENTS_FOLDER'])
+    for fmt in (('webp', 'jpeg') if accept_webp else ('jpeg',)):
+        candidate = variant_relpath(relative_path, slot, fmt)
+        if (base / candidate).is_file():
+            return candidate
+    return relative_path
+
+
 def delete_all_event_files(event_id: int) -> int:
     """
     Borra todas las imágenes de un evento (carpeta completa).
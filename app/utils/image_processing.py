@@ -1,27 +1,58 @@
 """
-Image processing utilities. Currently used to compress profile photos.
+Image processing utilities: profile photo compression and responsive
+derivatives for event images.
 
-Pillow-based pipeline:
+Profile photo pipeline (Pillow):
   - Open uploaded image (jpg/png/webp).
   - Auto-orient via EXIF.
   - Convert to RGB (drops alpha; flatten on white background if needed).
   - Resize so the longer side equals target_size (preserve aspect ratio).
   - Save as JPEG with optimize=True and the requested quality.
+
+Event image derivatives (build_image_variants):
+  - One WebP and one JPEG per width in VARIANT_WIDTHS, stored next to the
+    original under `_v/<stem>-<width>.<ext>` (never upscaled).
+  - A tiny blurred WebP placeholder returned as a data URI.
 """
 
+import base64
+import os
 from io import BytesIO
+from pathlib import Path
 
 DEFAULT_TARGET_SIZE = 512
 DEFAULT_QUALITY = 85
 ALLOWED_INPUT_EXT = {'jpg', 'jpeg', 'png', 'webp'}
 MAX_INPUT_BYTES = 5 * 1024 * 1024  # 5 MB
 
+# Event image derivatives
+VARIANT_WIDTHS = (320, 640, 1280)
+VARIANT_FORMATS = ('webp', 'jpeg')
+VARIANT_QUALITY = {'webp': 78, 'jpeg': 80}
+VARIANT_EXT = {'webp': 'webp', 'jpeg': 'jpg'}
+VARIANTS_DIR = '_v'
+PLACEHOLDER_WIDTH = 24
+
 
 class ImageProcessingError(Exception):
     """Raised when an image cannot be processed."""
     pass
 
 
+def _flatten_rgb(img):
+    """Convert to RGB, flattening transparency on a white background."""
+    from PIL import Image
+
+    if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        mask = img.convert('RGBA').split()[-1]
+        background.paste(img.convert('RGB'), mask=mask)
+        return background
+    if img.mode != 'RGB':
+        return img.convert('RGB')
+    return img
+
+
 def compress_profile_photo(file_storage,
                             target_size: int = DEFAULT_TARGET_SIZE,
                             quality: int = DEFAULT_QUALITY) -> bytes:
@@ -71,13 +102,7 @@ def compress_profile_photo(file_storage,
         img = Image.open(stream)
         img = ImageOps.exif_transpose(img)
 
-        if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            mask = img.convert('RGBA').split()[-1]
-            background.paste(img.convert('RGB'), mask=mask)
-            img = background
-        elif img.mode != 'RGB':
-            img = img.convert('RGB')
+        img = _flatten_rgb(img)
 
         img.thumbnail((target_size, target_size), Image.LANCZOS)
 
@@ -88,3 +113,82 @@ def compress_profile_photo(file_storage,
         raise
     except Exception as exc:
         raise ImageProcessingError(f"No se pudo procesar la imagen: {exc}") from exc
+
+
+def variant_relpath(rel_path: str, width: int, fmt: str) -> str:
+    """
+    Relative path of a derivative, next to its original.
+
+    '12/gallery/ab12.png', 640, 'webp' -> '12/gallery/_v/ab12-640.webp'
+    """
+    parent, _, name = rel_path.rpartition('/')
+    stem = name.rsplit('.', 1)[0]
+    derived = f"{VARIANTS_DIR}/{stem}-{width}.{VARIANT_EXT[fmt]}"
+    return f"{parent}/{derived}" if parent else derived
+
+
+def _save_atomic(img, dest: Path, fmt: str) -> int:
+    """Write `img` to `dest` through a temp file so readers never see a partial file."""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f".{dest.name}.tmp")
+    options = {'quality': VARIANT_QUALITY[fmt]}
+    if fmt == 'jpeg':
+        options.update(optimize=True, progressive=True)
+    else:
+        options.update(method=4)
+    img.save(tmp, format=fmt.upper(), **options)
+    os.replace(tmp, dest)
+    return dest.stat().st_size
+
+
+def build_image_variants(base_folder: Path, rel_path: str,
+                         widths=VARIANT_WIDTHS, formats=VARIANT_FORMATS) -> dict:
+    """
+    Generate the responsive derivatives of an event image.
+
+    Args:
+        base_folder: folder the relative path is resolved against (EVENTS_FOLDER).
+        rel_path: original image path relative to base_folder.
+        widths: target widths; slots wider than the original keep its width.
+        formats: subset of VARIANT_FORMATS.
+
+    Returns:
+        {'width', 'height', 'placeholder', 'variants': [{'w', 'h', 'format', 'path', 'bytes'}]}
+        with one entry per (width slot, format), paths relative to base_folder.
+
+    Raises:
+        ImageProcessingError if the original cannot be read.
+    """
+    try:
+        from PIL import Image, ImageFilter, ImageOps
+    except ImportError as exc:
+        raise ImageProcessingError(
+            "Pillow no está instalado. Reconstruye el contenedor con `docker compose build web`."
+        ) from exc
+
+    base_folder = Path(base_folder)
+    try:
+        with Image.open(base_folder / rel_path) as src:
+            img = _flatten_rgb(ImageOps.exif_transpose(src))
+            img.load()
+    except Exception as exc:
+        raise ImageProcessingError(f"No se pudo procesar la imagen: {exc}") from exc
+
+    orig_w, orig_h = img.size
+    variants = []
+    for slot in sorted(widths):
+        w = min(slot, orig_w)
+        h = max(1, round(orig_h * w / orig_w))
+        resized = img if w == orig_w else img.resize((w, h), Image.LANCZOS)
+        for fmt in formats:
+            rel = variant_relpath(rel_path, slot, fmt)
+            size = _save_atomic(resized, base_folder / rel, fmt)
+            variants.append({'w': w, 'h': h, 'format': fmt, 'path': rel, 'bytes': size})
+
+    ph_h = max(1, round(orig_h * PLACEHOLDER_WIDTH / orig_w))
+    tiny = img.resize((PLACEHOLDER_WIDTH, ph_h), Image.BILINEAR).filter(ImageFilter.GaussianBlur(1))
+    out = BytesIO()
+    tiny.save(out, format='WEBP', quality=40)
+    placeholder = 'data:image/webp;base64,' + base64.b64encode(out.getvalue()).decode('ascii')
+
+    return {'width': orig_w, 'height': orig_h, 'placeholder': placeholder, 'variants': variants}
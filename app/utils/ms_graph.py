@@ -1,8 +1,14 @@
-import os, json, threading
+import os, json, threading, time, logging
 from pathlib import Path
 import msal, requests
+from requests.adapters import HTTPAdapter
 from flask import current_app
 
+logger = logging.getLogger(__name__)
+
+GRAPH_BASE_URL = "https://graph.microsoft.com/v1.0"
+
+
 def get_config():
     """Obtiene configuración desde Flask config"""
     try:
@@ -13,7 +19,8 @@ def get_config():
             'CLIENT_SECRET': current_app.config.get('MS_CLIENT_SECRET', ''),
             'REDIRECT_URI': current_app.config.get('MS_REDIRECT_URI', 'http://localhost/admin/emails/callback'),
             'CACHE_PATH': current_app.config.get('MAIL_CACHE_PATH', 'instance/mail/msal_cache.json'),
-            'ACCT_PATH': current_app.config.get('MAIL_ACCOUNT_PATH', 'instance/mail/msal_account.json')
+            'ACCT_PATH': current_app.config.get('MAIL_ACCOUNT_PATH', 'instance/mail/msal_account.json'),
+            'GRAPH_URL': current_app.config.get('MS_GRAPH_BASE_URL', GRAPH_BASE_URL),
         }
     except RuntimeError:
         # Fuera del contexto de app, usar variables de entorno
@@ -23,7 +30,8 @@ def get_config():
             'CLIENT_SECRET': os.getenv('MS_CLIENT_SECRET', ''),
             'REDIRECT_URI': os.getenv('MS_REDIRECT_URI', 'http://localhost/admin/emails/callback'),
             'CACHE_PATH': os.getenv('MAIL_CACHE_PATH', 'instance/mail/msal_cache.json'),
-            'ACCT_PATH': os.getenv('MAIL_ACCOUNT_PATH', 'instance/mail/msal_account.json')
+            'ACCT_PATH': os.getenv('MAIL_ACCOUNT_PATH', 'instance/mail/msal_account.json'),
+            'GRAPH_URL': os.getenv('MS_GRAPH_BASE_URL', GRAPH_BASE_URL),
         }
 
 # Scopes necesarios para enviar correos (formato completo de Microsoft Graph)
@@ -86,6 +94,7 @@ def read_account_info() -> dict | None:
 
 def clear_account_and_cache():
     cfg = get_config()
+    reset_token()
     with LOCK:
         if os.path.exists(cfg['CACHE_PATH']): 
             os.remove(cfg['CACHE_PATH'])
@@ -132,6 +141,7 @@ def process_auth_code(code: str) -> dict:
             "name": result.get("id_token_claims", {}).get("name")
         })
     save_cache(cache)
+    reset_token()
 
     idc = result.get("id_token_claims", {})
     return {
@@ -144,6 +154,11 @@ def acquire_token_silent() -> str | None:
     Intenta renovar un access token usando el refresh token del cache.
     Retorna el token o None si no hay sesión activa o sin credenciales.
     """
+    result = _acquire_token_result()
+    return result["access_token"] if result else None
+
+def _acquire_token_result() -> dict | None:
+    """Resultado de MSAL (access_token, expires_in) leyendo el cache en disco."""
     if not is_configured():
         return None
     cache = load_cache()
@@ -166,15 +181,27 @@ def acquire_token_silent() -> str | None:
     
     if not result or "access_token" not in result:
         return None
-    return result["access_token"]
+    return result
 
 def graph_send_mail(access_token: str, subject: str, content_html: str, 
                    to_list: list[str], save_to_sent=True):
     """
     Envío delegado: usa /me/sendMail (envía como el usuario que inició sesión).
     """
-    endpoint = "https://graph.microsoft.com/v1.0/me/sendMail"
-    payload = {
+    endpoint = f"{get_config()['GRAPH_URL']}/me/sendMail"
+    payload = _mail_payload(subject, content_html, to_list, save_to_sent)
+    headers = { 
+        "Authorization": f"Bearer {access_token}", 
+        "Content-Type": "application/json" 
+    }
+    _wait_throttle()
+    resp = get_session().post(endpoint, headers=headers, json=payload, timeout=30)
+    if resp.status_code == 429:
+        _throttle(resp.headers.get("Retry-After"))
+    return resp
+
+def _mail_payload(subject: str, content_html: str, to_list: list[str], save_to_sent=True) -> dict:
+    return {
         "message": {
             "subject": subject,
             "body": { "contentType": "HTML", "content": content_html },
@@ -182,12 +209,6 @@ def graph_send_mail(access_token: str, subject: str, content_html: str,
         },
         "saveToSentItems": bool(save_to_sent)
     }
-    headers = { 
-        "Authorization": f"Bearer {access_token}", 
-        "Content-Type": "application/json" 
-    }
-    resp = requests.post(endpoint, headers=headers, json=payload, timeout=30)
-    return resp
 
 def is_connected() -> bool:
     """
@@ -201,7 +222,174 @@ def is_connected() -> bool:
     if not os.path.exists(cfg['ACCT_PATH']):
         return False
     try:
-        token = acquire_token_silent()
-        return token is not None
+        return get_access_token() is not None
     except Exception:
-        return False
\ No newline at end of file
+        return False
+
+
+# ---------------------------------------------------------------------------
+# Transporte: token en memoria, sesión HTTP keep-alive y JSON batching
+# ---------------------------------------------------------------------------
+#
+# Un proceso (worker Celery o web) reutiliza el mismo access token hasta
+# TOKEN_REFRESH_MARGIN segundos antes de que expire; solo entonces vuelve a
+# leer el cache de MSAL en disco. Las peticiones salen por una única
+# requests.Session (conexiones TLS reutilizadas). send_mail_batch agrupa
+# hasta BATCH_LIMIT correos por POST a /$batch y respeta el Retry-After de
+# Graph (429/503), tanto del lote completo como de cada petición interna.
+
+BATCH_LIMIT = 20                 # máximo de Graph por /$batch
+TOKEN_REFRESH_MARGIN = 300       # segundos antes de expirar para renovar
+MAX_THROTTLE_RETRIES = 3
+MAX_RETRY_AFTER = 60             # tope (s) a la espera pedida por Graph
+DEFAULT_RETRY_AFTER = 5
+
+_token = {"access_token": None, "expires_at": 0.0}
+_token_lock = threading.Lock()
+_session = None
+_session_lock = threading.Lock()
+_throttle_until = 0.0
+
+def get_access_token(force_refresh: bool = False) -> str | None:
+    """Access token en memoria; se renueva solo cerca de su expiración."""
+    with _token_lock:
+        if not force_refresh and _token["access_token"] \
+                and time.time() < _token["expires_at"] - TOKEN_REFRESH_MARGIN:
+            return _token["access_token"]
+        result = _acquire_token_result()
+        if not result:
+            _token.update(access_token=None, expires_at=0.0)
+            return None
+        _token.update(
+            access_token=result["access_token"],
+            expires_at=time.time() + int(result.get("expires_in") or 0),
+        )
+        return _token["access_token"]
+
+def reset_token():
+    """Olvida el token en memoria (logout, nueva cuenta o 401)."""
+    with _token_lock:
+        _token.update(access_token=None, expires_at=0.0)
+
+def get_session() -> requests.Session:
+    """requests.Session compartida por el proceso (keep-alive)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=10))
+                session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=10))
+                _session = session
+    return _session
+
+def _retry_after_seconds(value) -> float:
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        seconds = DEFAULT_RETRY_AFTER
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+def _throttle(retry_after):
+    """Pausa los envíos de este proceso lo que pida Graph."""
+    global _throttle_until
+    _throttle_until = max(_throttle_until, time.monotonic() + _retry_after_seconds(retry_after))
+
+def _wait_throttle():
+    delay = _throttle_until - time.monotonic()
+    if delay > 0:
+        logger.info(f"[ms_graph] Throttling de Graph: esperando {delay:.1f}s")
+        time.sleep(delay)
+
+def _header(headers: dict | None, name: str):
+    for key, value in (headers or {}).items():
+        if key.lower() == name.lower():
+            return value
+    return None
+
+def _post_batch(requests_: list[dict]) -> dict:
+    """
+    Un POST a /$batch. Reintenta el lote completo ante 429/503 y renueva el
+    token una vez ante 401. Devuelve {id: respuesta interna}.
+    """
+    refreshed = False
+    for attempt in range(MAX_THROTTLE_RETRIES + 1):
+        token = get_access_token()
+        if not token:
+            raise RuntimeError("No hay sesión activa de Microsoft")
+        _wait_throttle()
+        resp = get_session().post(
+            f"{get_config()['GRAPH_URL']}/$batch",
+            headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
+            json={"requests": requests_},
+            timeout=60,
+        )
+        if resp.status_code == 401 and not refreshed:
+            refreshed = True
+            reset_token()
+            continue
+        if resp.status_code in (429, 503) and attempt < MAX_THROTTLE_RETRIES:
+            _throttle(resp.headers.get("Retry-After"))
+            continue
+        if resp.status_code != 200:
+            raise RuntimeError(f"HTTP {resp.status_code}: {resp.text}")
+        return {str(r.get("id")): r for r in resp.json().get("responses", [])}
+    raise RuntimeError("Graph sigue limitando las peticiones (429)")
+
+def _error_text(response: dict) -> str:
+    body = response.get("body") or {}
+    error = body.get("error") if isinstance(body, dict) else None
+    if isinstance(error, dict):
+        return f"HTTP {response.get('status')}: {error.get('code')} {error.get('message')}".strip()
+    return f"HTTP {response.get('status')}: {body}"
+
+def send_mail_batch(messages: list[dict], save_to_sent=True) -> dict:
+    """
+    Envía muchos correos vía /$batch (BATCH_LIMIT por POST).
+
+    Args:
+        messages: dicts con id, subject, content_html y to_list.
+
+    Returns:
+        {id: None si se envió, o el texto del error}. Un error del lote
+        completo (sin sesión, red, 5xx) se asigna a todos sus mensajes.
+    """
+    results = {}
+    for start in range(0, len(messages), BATCH_LIMIT):
+        chunk = messages[start:start + BATCH_LIMIT]
+        pending = {
+            str(msg["id"]): {
+                "id": str(msg["id"]),
+                "method": "POST",
+                "url": "/me/sendMail",
+                "headers": {"Content-Type": "application/json"},
+                "body": _mail_payload(msg["subject"], msg["content_html"], msg["to_list"], save_to_sent),
+            }
+            for msg in chunk
+        }
+        by_key = {str(msg["id"]): msg["id"] for msg in chunk}
+
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            try:
+                responses = _post_batch(list(pending.values()))
+            except Exception as exc:
+                for key in pending:
+                    results[by_key[key]] = str(exc)
+                break
+
+            throttled = {}
+            for key in list(pending):
+                response = responses.get(key)
+                status = (response or {}).get("status")
+                if status in (200, 202):
+                    results[by_key[key]] = None
+                    del pending[key]
+                elif status in (429, 503) and attempt < MAX_THROTTLE_RETRIES:
+                    throttled[key] = _header(response.get("headers"), "Retry-After")
+                else:
+                    results[by_key[key]] = _error_text(response) if response else "Sin respuesta en el lote"
+                    del pending[key]
+            if not pending:
+                break
+            _throttle(max(throttled.values(), key=_retry_after_seconds))
+    return results
\ No newline at end of file
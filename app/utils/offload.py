@@ -0,0 +1,159 @@
+"""
+Capa de ejecución segura para el worker eventlet de gunicorn.
+
+En producción la web corre con `--worker-class eventlet --workers 1`: todo
+el sitio (HTTP y Socket.IO) comparte un único hilo de SO, así que cualquier
+llamada que bloquee sin ceder al hub congela a todos los usuarios. Aquí se
+agrupan las dos piezas que lo evitan:
+
+  - `make_db_driver_green()`: instala el wait callback de eventlet en
+    psycopg2, para que las queries cedan el control mientras esperan a
+    PostgreSQL (psycopg2 es una extensión C y monkey_patch no lo alcanza).
+    Se llama desde app.py justo después de eventlet.monkey_patch().
+
+  - `offload_cpu(fn, *args, **kwargs)`: ejecuta trabajo intensivo de CPU
+    (WeasyPrint, zipfile, Pillow, hashing de contraseñas) en el threadpool
+    nativo de eventlet (`eventlet.tpool`), de modo que el hub sigue
+    atendiendo requests mientras tanto. Fuera de eventlet (tests, Celery,
+    `flask run`) la función se ejecuta en línea.
+
+Concurrencia acotada:
+    Un semáforo (OFFLOAD_MAX_CONCURRENCY, por defecto nº de CPUs) limita
+    cuántas tareas corren a la vez; el resto espera cediendo al hub.
+
+Métricas:
+    Por `label` se acumulan llamadas, errores, tiempo total/máximo de
+    ejecución y tiempo de espera en el semáforo (`get_offload_stats`). Las
+    ejecuciones que superan OFFLOAD_SLOW_SECONDS se registran en el log.
+
+Importante: `fn` corre en otro hilo del SO sin contexto de Flask ni sesión
+de SQLAlchemy; solo debe recibir datos ya cargados (rutas, bytes, dicts).
+
+Uso:
+    from app.utils.offload import offload_cpu
+
+    pdf_path = offload_cpu(_render_html_file, template, variables, out, label='pdf_render')
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from flask import current_app, has_app_context
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = os.cpu_count() or 2
+DEFAULT_SLOW_SECONDS = 5.0
+
+_semaphore = None
+_semaphore_size = 0
+_init_lock = threading.Lock()
+
+_stats: Dict[str, dict] = {}
+_stats_lock = threading.Lock()
+
+
+def is_green() -> bool:
+    """True si el proceso corre con eventlet.monkey_patch() aplicado."""
+    try:
+        from eventlet import patcher
+    except ImportError:
+        return False
+    return patcher.is_monkey_patched('thread')
+
+
+def make_db_driver_green() -> bool:
+    """
+    Hace cooperativo a psycopg2 bajo eventlet. Devuelve True si se aplicó.
+    """
+    if not is_green():
+        return False
+    try:
+        from eventlet.support.psycopg2_patcher import make_psycopg_green
+        make_psycopg_green()
+    except ImportError:
+        logger.warning('[offload] psycopg2 no disponible; las queries seguirán bloqueando el hub')
+        return False
+    return True
+
+
+def _config(key: str, default):
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+def _get_semaphore():
+    """
+    Semáforo creado en el primer uso (después de monkey_patch, así que bajo
+    eventlet es un semáforo verde que cede al hub mientras espera).
+    """
+    global _semaphore, _semaphore_size
+    if _semaphore is None:
+        with _init_lock:
+            if _semaphore is None:
+                _semaphore_size = max(1, int(_config('OFFLOAD_MAX_CONCURRENCY', DEFAULT_MAX_CONCURRENCY)))
+                _semaphore = threading.BoundedSemaphore(_semaphore_size)
+    return _semaphore
+
+
+def _record(label: str, waited: float, elapsed: float, failed: bool) -> None:
+    with _stats_lock:
+        entry = _stats.setdefault(label, {
+            'calls': 0, 'errors': 0, 'total_s': 0.0, 'max_s': 0.0, 'wait_s': 0.0,
+        })
+        entry['calls'] += 1
+        entry['errors'] += int(failed)
+        entry['total_s'] += elapsed
+        entry['max_s'] = max(entry['max_s'], elapsed)
+        entry['wait_s'] += waited
+
+
+def offload_cpu(fn: Callable, *args, label: Optional[str] = None, **kwargs):
+    """
+    Ejecuta `fn(*args, **kwargs)` fuera del hub de eventlet y devuelve su
+    resultado (las excepciones se propagan tal cual).
+    """
+    label = label or getattr(fn, '__name__', 'anonymous')
+    semaphore = _get_semaphore()
+
+    queued = time.monotonic()
+    semaphore.acquire()
+    started = time.monotonic()
+    failed = False
+    try:
+        if is_green():
+            from eventlet import tpool
+            return tpool.execute(fn, *args, **kwargs)
+        return fn(*args, **kwargs)
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        semaphore.release()
+        elapsed = time.monotonic() - started
+        _record(label, started - queued, elapsed, failed)
+        if elapsed >= _config('OFFLOAD_SLOW_SECONDS', DEFAULT_SLOW_SECONDS):
+            logger.warning(f'[offload] {label} tardó {elapsed:.2f}s')
+
+
+def get_offload_stats() -> Dict[str, dict]:
+    """Copia de las métricas acumuladas por label en este proceso."""
+    with _stats_lock:
+        stats = {label: dict(entry) for label, entry in _stats.items()}
+    for entry in stats.values():
+        entry['avg_s'] = entry['total_s'] / entry['calls'] if entry['calls'] else 0.0
+    return stats
+
+
+def reset_offload_stats() -> None:
+    """Reinicia métricas y semáforo (tests / cambio de configuración)."""
+    global _semaphore, _semaphore_size
+    with _stats_lock:
+        _stats.clear()
+    with _init_lock:
+        _semaphore = None
+        _semaphore_size = 0
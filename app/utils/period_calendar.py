@@ -0,0 +1,248 @@
+"""
+Calendario de periodos académicos en memoria, compartido entre requests.
+
+Las preguntas "¿cuál es el periodo activo?", "¿cuál sigue?" o "¿cuántos
+periodos han cerrado desde X?" se resolvían con una query (COUNT, ORDER BY
+start_date, filter_by(is_active)) cada vez, a menudo dentro de un loop por
+UserProgram. Los periodos cambian pocas veces al año, así que aquí se cargan
+una sola vez por proceso (una query) y se responde en memoria:
+
+  - ordinal(period_id): posición cronológica por start_date
+  - delta(from_id, to_id): periodos de distancia entre dos periodos
+  - next(period_id) / previous(period_id)
+  - closed_since(code): periodos con código posterior cuya admisión ya cerró
+  - active: periodo con is_active
+
+Los periodos se guardan como PeriodInfo (valores planos, sin sesión). Quien
+necesite la instancia ORM la obtiene con db.session.get(AcademicPeriod, id),
+que usa el identity map de la sesión.
+
+Invalidación por versión (mismo esquema que permission_cache):
+  - Versión local (por proceso): se incrementa al hacer flush, commit o
+    rollback de cualquier cambio en AcademicPeriod (listener de sesión), de
+    modo que la propia sesión ve sus cambios antes del commit, y
+    explícitamente desde academic_period_service al crear / actualizar /
+    activar / desactivar / eliminar.
+  - Versión global en Redis (`siiap:period:version`): se incrementa junto con
+    la local para que los demás workers / procesos Celery recarguen. Se lee
+    como máximo una vez por request (flask.g).
+
+Si Redis no está disponible solo se usa la versión local.
+"""
+
+import bisect
+import logging
+import threading
+from datetime import date, datetime
+
+from flask import current_app, g, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.utils.redis_pool import get_redis, report_redis_failure
+
+logger = logging.getLogger(__name__)
+
+_VERSION_KEY = 'siiap:period:version'
+_EXT_KEY = 'siiap_period_calendar'
+
+
+class PeriodInfo:
+    """Copia de solo lectura de una fila de AcademicPeriod."""
+
+    __slots__ = (
+        'id', 'code', 'name', 'start_date', 'end_date',
+        'admission_start_date', 'admission_end_date', 'is_active', 'status',
+        'ordinal',
+    )
+
+    def __init__(self, row, ordinal: int):
+        for attr in self.__slots__[:-1]:
+            setattr(self, attr, getattr(row, attr))
+        self.ordinal = ordinal
+
+    def __repr__(self):
+        return f'<PeriodInfo {self.code} #{self.ordinal}>'
+
+
+class PeriodCalendar:
+    """Periodos ordenados por (start_date, id) con búsquedas O(1)."""
+
+    def __init__(self, rows):
+        ordered = sorted(rows, key=lambda r: (r.start_date, r.id))
+        self.periods = tuple(PeriodInfo(row, i) for i, row in enumerate(ordered))
+        self._by_id = {p.id: p for p in self.periods}
+        self._by_code = {p.code: p for p in self.periods}
+        self.active = next((p for p in self.periods if p.is_active), None)
+        # Códigos ordenados de periodos con admisión cerrada, por fecha de corte
+        self._closed_codes = {}
+
+    @property
+    def ordered_ids(self) -> list:
+        return [p.id for p in self.periods]
+
+    def get(self, period_id):
+        return self._by_id.get(period_id)
+
+    def by_code(self, code):
+        return self._by_code.get(code)
+
+    def __contains__(self, period_id):
+        return period_id in self._by_id
+
+    def ordinal(self, period_id):
+        period = self._by_id.get(period_id)
+        return period.ordinal if period else None
+
+    def delta(self, from_id, to_id):
+        """Posiciones entre from_id y to_id (negativo si to_id es anterior)."""
+        start, end = self._by_id.get(from_id), self._by_id.get(to_id)
+        if start is None or end is None:
+            return None
+        return end.ordinal - start.ordinal
+
+    def next(self, period_id):
+        """Primer periodo con start_date posterior al de period_id."""
+        current = self._by_id.get(period_id)
+        if current is None:
+            return None
+        for period in self.periods[current.ordinal + 1:]:
+            if period.start_date > current.start_date:
+                return period
+        return None
+
+    def previous(self, period_id):
+        """Último periodo con start_date anterior al de period_id."""
+        current = self._by_id.get(period_id)
+        if current is None:
+            return None
+        for period in reversed(self.periods[:current.ordinal]):
+            if period.start_date < current.start_date:
+                return period
+        return None
+
+    def closed_since(self, code: str, today: date | None = None) -> int:
+        """
+        Cuántos periodos con código posterior a `code` ya cerraron su
+        admisión (admission_end_date <= today). El código YYYYN se compara
+        lexicográficamente, lo que equivale a orden cronológico.
+        """
+        if today is None:
+            today = datetime.utcnow().date()
+        closed = self._closed_codes.get(today)
+        if closed is None:
+            closed = sorted(p.code for p in self.periods if p.admission_end_date <= today)
+            self._closed_codes = {today: closed}
+        return len(closed) - bisect.bisect_right(closed, code)
+
+
+class _CalendarCache:
+    """Estado por app. Se guarda en app.extensions."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local_version = 0
+        self.entry = None  # (version, PeriodCalendar)
+
+    def clear(self):
+        with self.lock:
+            self.local_version += 1
+            self.entry = None
+
+
+def _get_cache():
+    app = current_app._get_current_object()
+    cache = app.extensions.get(_EXT_KEY)
+    if cache is None:
+        cache = app.extensions.setdefault(_EXT_KEY, _CalendarCache())
+    return cache
+
+
+def _remote_version():
+    """Lee la versión global desde Redis (una vez por request)."""
+    cached = g.get('_period_remote_version')
+    if cached is not None:
+        return cached
+    version = 0
+    client = get_redis()
+    if client is not None:
+        try:
+            version = int(client.get(_VERSION_KEY) or 0)
+        except Exception as e:
+            report_redis_failure(e, 'Error al leer versión del calendario de periodos')
+    g._period_remote_version = version
+    return version
+
+
+def _load():
+    from app import db
+    from app.models.academic_period import AcademicPeriod
+
+    cols = [getattr(AcademicPeriod, attr) for attr in PeriodInfo.__slots__[:-1]]
+    return PeriodCalendar(db.session.query(*cols).all())
+
+
+def get_period_calendar() -> PeriodCalendar:
+    """Calendario vigente; se recarga si cambió la versión local o global."""
+    cache = _get_cache()
+    version = (cache.local_version, _remote_version())
+    entry = cache.entry
+    if entry is None or entry[0] != version:
+        entry = (version, _load())
+        cache.entry = entry
+    return entry[1]
+
+
+def bump_period_version():
+    """
+    Invalida el calendario en este proceso y en los demás.
+    Llamar después de hacer commit de un cambio en AcademicPeriod.
+    """
+    if not has_app_context():
+        return
+    _get_cache().clear()
+    g.pop('_period_remote_version', None)
+
+    client = get_redis()
+    if client is not None:
+        try:
+            client.incr(_VERSION_KEY)
+        except Exception as e:
+            report_redis_failure(e, 'Error al incrementar versión del calendario de periodos')
+
+
+# ---------------------------------------------------------------------------
+# Invalidación automática al hacer commit
+# ---------------------------------------------------------------------------
+
+_DIRTY_FLAG = '_period_calendar_dirty'
+
+
+@event.listens_for(Session, 'before_flush')
+def _mark_period_changes(session, flush_context, instances):
+    from app.models.academic_period import AcademicPeriod
+
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, AcademicPeriod):
+            session.info[_DIRTY_FLAG] = True
+            # Lo que se lea antes del commit en esta misma sesión debe ver
+            # el cambio (autoflush), como lo veía la query directa
+            if has_app_context():
+                _get_cache().clear()
+            return
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_on_commit(session):
+    if session.info.pop(_DIRTY_FLAG, False):
+        try:
+            bump_period_version()
+        except Exception as e:
+            logger.warning(f'[period_calendar] No se pudo invalidar el calendario: {e}')
+
+
+@event.listens_for(Session, 'after_rollback')
+def _clear_on_rollback(session):
+    # Se descarta un calendario que pudo cargarse con cambios no confirmados
+    if session.info.pop(_DIRTY_FLAG, False) and has_app_context():
+        _get_cache().clear()
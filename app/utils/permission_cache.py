@@ -0,0 +1,292 @@
+"""
+Caché compilada de permisos, compartida entre requests.
+
+`User.has_permission` necesitaba tres queries (RolePermission,
+RolePermissionOverride, UserPermission) por cada par (user_id, program_id)
+en cada request. Como los permisos cambian muy rara vez, aquí se compilan
+una sola vez por proceso:
+
+  - Por rol: frozenset de codenames (seed + overrides activos).
+  - Por usuario: tupla de delegaciones activas (codename, program_id, expires_at)
+    más los programas que coordina.
+
+El vencimiento (`expires_at`) se evalúa en memoria en cada chequeo, así que
+una delegación que vence no requiere invalidar la caché.
+
+Invalidación por versión:
+  - Versión local (por proceso): se incrementa al hacer commit de cualquier
+    cambio en RolePermission, RolePermissionOverride, UserPermission o en
+    Program.coordinator_id (listener de sesión), y explícitamente desde
+    permission_service al delegar / revocar / modificar overrides.
+  - Versión global en Redis (`siiap:perm:version`): se incrementa junto con
+    la local para que los demás workers / procesos Celery descarten sus
+    compilaciones. Se lee como máximo una vez por request (flask.g).
+
+Si Redis no está configurado solo se usa la versión local. Si está
+configurado pero no se puede leer (caído o circuit breaker abierto), no hay
+forma de saber si otro proceso invalidó la caché: las compilaciones hechas
+en ese estado valen como máximo PERMISSION_CACHE_UNVERIFIED_MAX_AGE segundos
+y después se recargan de la BD.
+"""
+
+import logging
+import threading
+import time
+
+from flask import current_app, g, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.utils.redis_pool import get_redis, report_redis_failure
+
+logger = logging.getLogger(__name__)
+
+_VERSION_KEY = 'siiap:perm:version'
+_EXT_KEY = 'siiap_permission_cache'
+_DEFAULT_UNVERIFIED_MAX_AGE = 30
+
+
+class _PermissionCache:
+    """Estado compilado por app. Se guarda en app.extensions."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local_version = 0
+        self.roles = {}   # role_id -> (version, compiled_at, frozenset[codename])
+        self.users = {}   # user_id -> (version, compiled_at, grants, coordinated_pids)
+
+    def clear(self):
+        with self.lock:
+            self.local_version += 1
+            self.roles.clear()
+            self.users.clear()
+
+
+def _get_cache():
+    app = current_app._get_current_object()
+    cache = app.extensions.get(_EXT_KEY)
+    if cache is None:
+        cache = app.extensions.setdefault(_EXT_KEY, _PermissionCache())
+    return cache
+
+
+def _remote_version():
+    """
+    Lee la versión global desde Redis (una vez por request).
+    0 si Redis no está configurado; None si está configurado pero no se pudo
+    leer (caído o circuit breaker abierto).
+    """
+    if '_perm_remote_version' in g:
+        return g._perm_remote_version
+    version = 0
+    if current_app.config.get('REDIS_URL'):
+        version = None
+        client = get_redis()
+        if client is not None:
+            try:
+                version = int(client.get(_VERSION_KEY) or 0)
+            except Exception as e:
+                report_redis_failure(e, 'Error al leer versión de permisos')
+    g._perm_remote_version = version
+    return version
+
+
+def current_version():
+    """Versión efectiva de la caché: (local, global); global None = sin verificar."""
+    return (_get_cache().local_version, _remote_version())
+
+
+def _is_valid(entry, version):
+    """
+    La compilación vale si se hizo con la misma versión. Sin versión global
+    verificable, además debe ser reciente.
+    """
+    if entry is None or entry[0] != version:
+        return False
+    if version[1] is not None:
+        return True
+    max_age = current_app.config.get(
+        'PERMISSION_CACHE_UNVERIFIED_MAX_AGE', _DEFAULT_UNVERIFIED_MAX_AGE,
+    )
+    return time.monotonic() - entry[1] < max_age
+
+
+def bump_permission_version():
+    """
+    Invalida las compilaciones de permisos en este proceso y en los demás.
+    Llamar después de hacer commit de un cambio de permisos.
+    """
+    if not has_app_context():
+        return
+    _get_cache().clear()
+    g.pop('_perm_remote_version', None)
+    # El caché por request (flask.g) también queda obsoleto
+    for key in [k for k in vars(g) if k.startswith('_perm_cache_')]:
+        g.pop(key, None)
+
+    client = get_redis()
+    if client is not None:
+        try:
+            client.incr(_VERSION_KEY)
+        except Exception as e:
+            report_redis_failure(e, 'Error al incrementar versión de permisos')
+
+
+# ---------------------------------------------------------------------------
+# Compilación
+# ---------------------------------------------------------------------------
+
+def _compile_role(role_id):
+    from app import db
+    from app.models.permission import Permission
+    from app.models.role_permission import RolePermission, RolePermissionOverride
+
+    base = (
+        db.session.query(Permission.codename)
+        .join(RolePermission, RolePermission.permission_id == Permission.id)
+        .filter(RolePermission.role_id == role_id)
+    )
+    overrides = (
+        db.session.query(Permission.codename)
+        .join(RolePermissionOverride, RolePermissionOverride.permission_id == Permission.id)
+        .filter(
+            RolePermissionOverride.role_id == role_id,
+            RolePermissionOverride.is_active == True
+        )
+    )
+    return frozenset(row[0] for row in base.union(overrides).all())
+
+
+def _compile_user(user_id):
+    from app import db
+    from app.models.permission import Permission
+    from app.models.program import Program
+    from app.models.user_permission import UserPermission
+
+    grants = tuple(
+        (codename, program_id, expires_at)
+        for codename, program_id, expires_at in (
+            db.session.query(
+                Permission.codename,
+                UserPermission.program_id,
+                UserPermission.expires_at,
+            )
+            .join(UserPermission, UserPermission.permission_id == Permission.id)
+            .filter(
+                UserPermission.user_id == user_id,
+                UserPermission.is_active == True
+            )
+            .all()
+        )
+    )
+    coordinated = frozenset(
+        pid for (pid,) in
+        db.session.query(Program.id).filter(Program.coordinator_id == user_id).all()
+    )
+    return grants, coordinated
+
+
+def role_codenames(role_id):
+    """Codenames del rol (seed + overrides activos), compilados por versión."""
+    if not role_id:
+        return frozenset()
+    cache = _get_cache()
+    version = current_version()
+    entry = cache.roles.get(role_id)
+    if not _is_valid(entry, version):
+        entry = (version, time.monotonic(), _compile_role(role_id))
+        cache.roles[role_id] = entry
+    return entry[2]
+
+
+def _user_entry(user_id):
+    cache = _get_cache()
+    version = current_version()
+    entry = cache.users.get(user_id)
+    if not _is_valid(entry, version):
+        grants, coordinated = _compile_user(user_id)
+        entry = (version, time.monotonic(), grants, coordinated)
+        cache.users[user_id] = entry
+    return entry
+
+
+def _is_current(expires_at, now):
+    if expires_at is None:
+        return True
+    if expires_at.tzinfo is None:
+        now = now.replace(tzinfo=None)
+    return expires_at > now
+
+
+def user_grants(user_id):
+    """Delegaciones activas y NO vencidas: lista de (codename, program_id)."""
+    from app.utils.datetime_utils import now_local
+
+    now = now_local()
+    return [
+        (codename, program_id)
+        for codename, program_id, expires_at in _user_entry(user_id)[2]
+        if _is_current(expires_at, now)
+    ]
+
+
+def coordinated_program_ids(user_id):
+    """Programas donde el usuario es coordinador (Program.coordinator_id)."""
+    return _user_entry(user_id)[3]
+
+
+def effective_codenames(user, program_id=None):
+    """
+    Conjunto de codenames efectivos del usuario.
+    Si program_id se especifica, solo cuentan las delegaciones globales
+    (program_id NULL) o las de ese programa.
+    """
+    codenames = set(role_codenames(user.role_id))
+    for codename, grant_pid in user_grants(user.id):
+        if program_id is None or grant_pid is None or grant_pid == program_id:
+            codenames.add(codename)
+    return codenames
+
+
+# ---------------------------------------------------------------------------
+# Invalidación automática al hacer commit
+# ---------------------------------------------------------------------------
+
+_DIRTY_FLAG = '_perm_cache_dirty'
+
+
+def _touches_permissions(obj):
+    from sqlalchemy import inspect
+    from app.models.program import Program
+    from app.models.role_permission import RolePermission, RolePermissionOverride
+    from app.models.user_permission import UserPermission
+
+    if isinstance(obj, (RolePermission, RolePermissionOverride, UserPermission)):
+        return True
+    if isinstance(obj, Program):
+        return inspect(obj).attrs.coordinator_id.history.has_changes()
+    return False
+
+
+@event.listens_for(Session, 'before_flush')
+def _mark_permission_changes(session, flush_context, instances):
+    if session.info.get(_DIRTY_FLAG):
+        return
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if _touches_permissions(obj):
+            session.info[_DIRTY_FLAG] = True
+            return
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_on_commit(session):
+    if session.info.pop(_DIRTY_FLAG, False):
+        try:
+            bump_permission_version()
+        except Exception as e:
+            logger.warning(f'[permission_cache] No se pudo invalidar la caché: {e}')
+
+
+@event.listens_for(Session, 'after_rollback')
+def _clear_on_rollback(session):
+    session.info.pop(_DIRTY_FLAG, None)
@@ -0,0 +1,95 @@
+"""
+Cliente Redis compartido con pool de conexiones y circuit breaker.
+
+Antes cada módulo que usaba Redis (session_tracker, etc.) construía un
+cliente nuevo con `redis.from_url(...)` en cada llamada, lo que abre un
+socket TCP por request. Aquí mantenemos UN ConnectionPool por URL a nivel
+de proceso y devolvemos clientes ligeros que lo reutilizan.
+
+Uso:
+    from app.utils.redis_pool import get_redis, report_redis_failure
+
+    client = get_redis()
+    if client is not None:
+        try:
+            client.incr('siiap:algo')
+        except Exception as e:
+            report_redis_failure(e, 'incr algo')
+
+`get_redis()` devuelve None si:
+  - la app no tiene REDIS_URL configurada (p.ej. tests con SQLite), o
+  - el circuit breaker está abierto tras un fallo reciente.
+Los llamadores deben tener SIEMPRE un fallback (BD o valor por defecto).
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+import redis as redis_lib
+from flask import current_app, has_app_context
+
+logger = logging.getLogger(__name__)
+
+# Un pool por URL (normalmente solo hay una)
+_pools: Dict[str, redis_lib.ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+# ── Circuit breaker ───────────────────────────────────────────────────────────
+# Después de un fallo, se salta Redis durante _CIRCUIT_RESET segundos para no
+# bloquear cada request esperando el timeout de conexión.
+_circuit_open_until: float = 0.0
+_CIRCUIT_RESET = 300  # segundos (5 min)
+
+_SOCKET_TIMEOUT = 2
+
+
+def _get_pool(url: str) -> redis_lib.ConnectionPool:
+    pool = _pools.get(url)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(url)
+            if pool is None:
+                pool = redis_lib.ConnectionPool.from_url(
+                    url,
+                    decode_responses=True,
+                    socket_connect_timeout=_SOCKET_TIMEOUT,
+                    socket_timeout=_SOCKET_TIMEOUT,
+                    health_check_interval=30,
+                )
+                _pools[url] = pool
+    return pool
+
+
+def is_circuit_open() -> bool:
+    return time.monotonic() < _circuit_open_until
+
+
+def get_redis(url: Optional[str] = None) -> Optional[redis_lib.Redis]:
+    """
+    Devuelve un cliente Redis respaldado por el pool del proceso, o None si
+    Redis no está configurado o el circuit breaker está abierto.
+    """
+    if is_circuit_open():
+        return None
+    if url is None:
+        if not has_app_context():
+            return None
+        url = current_app.config.get('REDIS_URL')
+    if not url:
+        return None
+    return redis_lib.Redis(connection_pool=_get_pool(url))
+
+
+def report_redis_failure(e: Exception, context: str) -> None:
+    """Abre el circuit breaker tras un error de Redis."""
+    global _circuit_open_until
+    _circuit_open_until = time.monotonic() + _CIRCUIT_RESET
+    logger.warning(f'[redis] {context}: {e} — Redis desactivado por {_CIRCUIT_RESET}s')
+
+
+def reset_redis_circuit() -> None:
+    """Cierra el circuit breaker (tras una operación exitosa)."""
+    global _circuit_open_until
+    _circuit_open_until = 0.0
@@ -15,83 +15,115 @@ Uso:
 
     count = get_online_users_count()
     users = get_online_users()  # lista de user_ids
+
+Índice de presencia:
+    Un único ZSET (`siiap:online`) con member=user_id y score=timestamp del
+    último request visto. El conteo y la lista salen de ZCOUNT /
+    ZRANGEBYSCORE sobre la ventana [ahora - SESSION_TTL, +inf], ambos
+    O(log n) — antes se usaba `KEYS siiap:online:*`, que recorre todo el
+    keyspace y bloquea Redis.
+
+    Las escrituras se limitan a una por usuario cada TRACK_INTERVAL segundos
+    por proceso, y las entradas vencidas se purgan con ZREMRANGEBYSCORE como
+    máximo cada TRIM_INTERVAL segundos. El cliente sale del pool compartido
+    de app.utils.redis_pool (sin abrir una conexión nueva por request).
 """
 
 import logging
+import threading
 import time
-from typing import List
+from typing import Dict, List
 
-import redis as redis_lib
-from flask import current_app
+from app.utils.redis_pool import get_redis, report_redis_failure, reset_redis_circuit
 
 logger = logging.getLogger(__name__)
 
 # Tiempo en segundos que un usuario se considera "activo" (15 minutos = sesión Flask)
 SESSION_TTL = 15 * 60
 
-# Prefijo de clave en Redis
-_KEY_PREFIX = 'siiap:online:'
+# Frecuencia máxima de escritura por usuario (por proceso)
+TRACK_INTERVAL = 60
+
+# Cada cuánto se purgan del ZSET los usuarios fuera de la ventana
+TRIM_INTERVAL = 60
 
-# ── Circuit breaker ───────────────────────────────────────────────────────────
-# Evita bloquear cada request cuando Redis no está disponible.
-# Después de un fallo, salta todos los intentos durante _CIRCUIT_RESET segundos.
-_circuit_open_until: float = 0.0
-_CIRCUIT_RESET = 300  # segundos antes de reintentar (5 min)
+# Clave del índice de presencia en Redis
+_ZSET_KEY = 'siiap:online'
 
+# user_id → time.monotonic() de la última escritura en Redis
+_last_tracked: Dict[int, float] = {}
+_last_trim: float = 0.0
+_lock = threading.Lock()
 
-def _get_client() -> redis_lib.Redis:
-    """Devuelve un cliente Redis. Lanza excepción si el circuit breaker está abierto."""
-    if time.monotonic() < _circuit_open_until:
-        raise redis_lib.ConnectionError('Redis circuit breaker open')
-    url = current_app.config.get('REDIS_URL', 'redis://redis:6379/0')
-    return redis_lib.from_url(url, decode_responses=True, socket_connect_timeout=2, socket_timeout=2)
 
+def _should_write(user_id: int, now_mono: float) -> bool:
+    last = _last_tracked.get(user_id)
+    if last is not None and now_mono - last < TRACK_INTERVAL:
+        return False
+    with _lock:
+        # Evita que el dict crezca sin límite en procesos de larga vida
+        if len(_last_tracked) > 50_000:
+            cutoff = now_mono - SESSION_TTL
+            for uid in [u for u, ts in _last_tracked.items() if ts < cutoff]:
+                _last_tracked.pop(uid, None)
+        _last_tracked[user_id] = now_mono
+    return True
 
-def _open_circuit(e: Exception, context: str) -> None:
-    global _circuit_open_until
-    _circuit_open_until = time.monotonic() + _CIRCUIT_RESET
-    logger.warning(f'[session_tracker] {context}: {e} — Redis desactivado por {_CIRCUIT_RESET}s')
+
+def _trim_if_due(client, now: float) -> None:
+    global _last_trim
+    if now - _last_trim < TRIM_INTERVAL:
+        return
+    _last_trim = now
+    client.zremrangebyscore(_ZSET_KEY, '-inf', now - SESSION_TTL)
 
 
 def track_user_session(user_id: int) -> None:
     """
     Registra o renueva la presencia activa del usuario en Redis.
-    Llama a esta función en cada request autenticado.
+    Llama a esta función en cada request autenticado; solo escribe en Redis
+    si pasaron TRACK_INTERVAL segundos desde la última vez.
     """
-    global _circuit_open_until
+    if not _should_write(user_id, time.monotonic()):
+        return
+    client = get_redis()
+    if client is None:
+        return
     try:
-        client = _get_client()
-        key = f'{_KEY_PREFIX}{user_id}'
-        # SETEX crea la clave con TTL; si ya existe, la renueva
-        client.setex(key, SESSION_TTL, '1')
-        _circuit_open_until = 0.0  # éxito → resetear circuit breaker
-    except redis_lib.ConnectionError as e:
-        if 'circuit breaker' not in str(e):
-            _open_circuit(e, f'Error al rastrear user {user_id}')
+        now = time.time()
+        client.zadd(_ZSET_KEY, {str(user_id): now})
+        _trim_if_due(client, now)
+        reset_redis_circuit()
     except Exception as e:
-        _open_circuit(e, f'Error al rastrear user {user_id}')
+        _last_tracked.pop(user_id, None)
+        report_redis_failure(e, f'Error al rastrear user {user_id}')
 
 
 def get_online_users_count() -> int:
     """Retorna el número de usuarios con sesión activa en este momento."""
+    client = get_redis()
+    if client is None:
+        return 0
     try:
-        client = _get_client()
-        keys = client.keys(f'{_KEY_PREFIX}*')
-        return len(keys)
+        return int(client.zcount(_ZSET_KEY, time.time() - SESSION_TTL, '+inf'))
     except Exception as e:
-        if 'circuit breaker' not in str(e):
-            _open_circuit(e, 'Error al obtener conteo')
+        report_redis_failure(e, 'Error al obtener conteo')
         return 0
 
 
-def get_online_users() -> List[int]:
-    """Retorna la lista de user_ids con sesión activa en este momento."""
+def get_online_users(limit: int = 500) -> List[int]:
+    """
+    Retorna los user_ids con sesión activa, del más reciente al más antiguo
+    (máximo `limit`).
+    """
+    client = get_redis()
+    if client is None:
+        return []
     try:
-        client = _get_client()
-        keys = client.keys(f'{_KEY_PREFIX}*')
-        prefix_len = len(_KEY_PREFIX)
-        return [int(k[prefix_len:]) for k in keys if k[prefix_len:].isdigit()]
+        members = client.zrevrangebyscore(
+            _ZSET_KEY, '+inf', time.time() - SESSION_TTL, start=0, num=limit,
+        )
+        return [int(m) for m in members if str(m).isdigit()]
     except Exception as e:
-        if 'circuit breaker' not in str(e):
-            _open_circuit(e, 'Error al obtener lista de usuarios')
+        report_redis_failure(e, 'Error al obtener lista de usuarios')
         return []
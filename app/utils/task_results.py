@@ -0,0 +1,38 @@
+"""
+Lectura del resultado de una tarea Celery desde los endpoints de estado.
+
+Los endpoints GET .../tasks/<task_id> reciben el id del cliente; sin más
+control devolverían el resultado de CUALQUIER tarea (otra purga, un alta
+masiva con sus correos...). Con result_extended (app/celery_app.py) el
+backend guarda el nombre de la tarea junto a su estado, y aquí se exige que
+coincida con la tarea que atiende el endpoint.
+
+Uso:
+    result = get_task_result(task_id, build_purge_run)
+    if result is None:
+        return 404
+"""
+
+from typing import Optional
+
+from celery.result import AsyncResult
+from celery.states import PENDING
+
+
+def get_task_result(task_id: str, *tasks) -> Optional[AsyncResult]:
+    """
+    AsyncResult de `task_id` si pertenece a alguna de `tasks`; None si es de
+    otra tarea.
+
+    PENDING (aún en cola o id desconocido) no trae resultado ni nombre y se
+    devuelve tal cual. Un estado sin nombre (guardado antes de activar
+    result_extended) no se puede verificar y se trata como ajeno.
+    """
+    from app.extensions import celery
+
+    result = celery.AsyncResult(task_id)
+    if result.state == PENDING:
+        return result
+    if result.name not in {task.name for task in tasks}:
+        return None
+    return result
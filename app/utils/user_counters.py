@@ -0,0 +1,253 @@
+"""
+Contadores materializados por usuario para los badges del sidebar.
+
+Guarda en Redis, por usuario, el número de notificaciones no leídas y de
+eventos nuevos, para que leer un badge sea un GET en lugar de un COUNT(*)
+(o, en el caso de eventos, de la query completa de list_public_events).
+
+Claves:
+    siiap:cnt:<kind>:<user_id>   → entero, con TTL (COUNTERS[kind]['ttl'])
+    siiap:cnt:<kind>:users       → SET con los user_id que tienen valor en caché
+
+Lectura (`get_count`):
+    Si la clave existe se devuelve tal cual; si no (o Redis no está
+    disponible), se calcula con el `loader` de BD y se guarda.
+
+Escritura (`queue_delta`, `queue_reset`, `queue_invalidate`):
+    Los cambios se acumulan en `db.session.info` y se aplican en
+    `after_commit`, así un rollback nunca deja el contador adelantado.
+    Al aplicarlos se emite el nuevo valor a la sala `user:{id}`
+    (COUNTERS[kind]['event']) para que el cliente no tenga que consultar.
+
+    Los deltas solo se aplican sobre valores ya en caché: un INCRBY sobre una
+    clave inexistente se descarta (DEL) y el siguiente `get_count` recalcula
+    desde BD. El TTL acota cualquier deriva (p.ej. eventos que terminan).
+
+    Si la escritura falla (o el circuit breaker está abierto) los contadores
+    afectados se borran para que la siguiente lectura los recalcule. Si Redis
+    tampoco acepta el DEL, las claves quedan pendientes en el proceso y se
+    borran en cuanto vuelve a haber cliente, antes de leer o escribir.
+
+Uso:
+    from app.utils import user_counters
+
+    count = user_counters.get_count(user_counters.UNREAD, uid, loader)
+    user_counters.queue_delta(user_counters.UNREAD, [uid], +1)
+    db.session.commit()   # ← aquí se aplica y se emite
+"""
+
+import logging
+import threading
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.utils.redis_pool import get_redis, is_circuit_open, report_redis_failure
+
+logger = logging.getLogger(__name__)
+
+UNREAD = 'unread'
+NEW_EVENTS = 'new_events'
+
+COUNTERS = {
+    UNREAD:     {'ttl': 60 * 60, 'event': 'notifications:unread_count'},
+    NEW_EVENTS: {'ttl': 10 * 60, 'event': 'events:new_count'},
+}
+
+_OPS_KEY = '_user_counter_ops'
+
+# (kind, user_id) cuyo valor en Redis pudo quedar desactualizado por una
+# escritura fallida; user_id None = todos los del registro de ese kind
+_stale: set = set()
+_stale_lock = threading.Lock()
+
+
+def _key(kind: str, user_id: int) -> str:
+    return f'siiap:cnt:{kind}:{user_id}'
+
+
+def _registry_key(kind: str) -> str:
+    return f'siiap:cnt:{kind}:users'
+
+
+# ---------------------------------------------------------------------------
+# Lectura
+# ---------------------------------------------------------------------------
+
+def get_count(kind: str, user_id: int, loader: Callable[[], int]) -> int:
+    """Devuelve el contador en caché o lo calcula con `loader` y lo guarda."""
+    client = get_redis()
+    if client is None:
+        return loader()
+    try:
+        _drop_stale(client)
+        cached = client.get(_key(kind, user_id))
+        if cached is not None:
+            return max(int(cached), 0)
+    except Exception as e:
+        report_redis_failure(e, f'Error al leer contador {kind}')
+        return loader()
+
+    value = loader()
+    try:
+        _store(client, kind, {user_id: value})
+    except Exception as e:
+        report_redis_failure(e, f'Error al guardar contador {kind}')
+    return value
+
+
+def _store(client, kind: str, values: dict) -> None:
+    ttl = COUNTERS[kind]['ttl']
+    pipe = client.pipeline(transaction=False)
+    for uid, value in values.items():
+        pipe.set(_key(kind, uid), int(value), ex=ttl)
+    pipe.sadd(_registry_key(kind), *values.keys())
+    pipe.expire(_registry_key(kind), ttl)
+    pipe.execute()
+
+
+# ---------------------------------------------------------------------------
+# Escritura diferida hasta el commit
+# ---------------------------------------------------------------------------
+
+def _queue(op: tuple) -> None:
+    from app import db
+    db.session.info.setdefault(_OPS_KEY, []).append(op)
+
+
+def queue_delta(kind: str, user_ids: Iterable[int], delta: int, emit: bool = True) -> None:
+    """
+    Suma `delta` al contador de cada usuario tras el commit.
+    emit=False para envíos masivos (el cliente ya incrementa con el evento
+    'notification:new').
+    """
+    user_ids = list(user_ids)
+    if user_ids and delta:
+        _queue(('delta', kind, user_ids, delta, emit))
+
+
+def queue_reset(kind: str, user_id: int, value: int = 0) -> None:
+    """Fija el contador del usuario a un valor conocido tras el commit."""
+    _queue(('reset', kind, [user_id], value, True))
+
+
+def queue_invalidate(
+    kind: str,
+    user_ids: Optional[Iterable[int]] = None,
+    exclude: Optional[Iterable[int]] = None,
+) -> None:
+    """
+    Descarta el valor en caché (se recalcula en la siguiente lectura).
+    user_ids=None → todos los usuarios con valor en caché, salvo `exclude`.
+    """
+    _queue((
+        'invalidate', kind,
+        list(user_ids) if user_ids is not None else None,
+        set(exclude or ()), False,
+    ))
+
+
+def _mark_stale(ops: list) -> None:
+    with _stale_lock:
+        for _op, kind, user_ids, _arg, _emit in ops:
+            if user_ids is None:
+                _stale.add((kind, None))
+            else:
+                _stale.update((kind, uid) for uid in user_ids)
+
+
+def _drop_stale(client) -> None:
+    """Borra los contadores que quedaron pendientes tras un fallo de Redis."""
+    if not _stale:
+        return
+    with _stale_lock:
+        pending = set(_stale)
+        _stale.clear()
+    try:
+        keys = set()
+        for kind, uid in pending:
+            if uid is None:
+                keys.update(_key(kind, int(m)) for m in client.smembers(_registry_key(kind)))
+            else:
+                keys.add(_key(kind, uid))
+        if keys:
+            client.delete(*keys)
+    except Exception:
+        with _stale_lock:
+            _stale.update(pending)
+        raise
+
+
+def _apply(ops: list) -> None:
+    client = get_redis()
+    if client is None:
+        # Con Redis configurado pero el breaker abierto, el valor en caché
+        # dejaría de reflejar este commit
+        if is_circuit_open():
+            _mark_stale(ops)
+        return
+    try:
+        _drop_stale(client)
+        # Invalidaciones primero: un delta posterior sobre la misma clave
+        # simplemente se descarta.
+        for op, kind, user_ids, arg, _emit in ops:
+            if op != 'invalidate':
+                continue
+            if user_ids is None:
+                user_ids = [int(m) for m in client.smembers(_registry_key(kind))]
+                user_ids = [uid for uid in user_ids if uid not in arg]
+            if user_ids:
+                client.delete(*[_key(kind, uid) for uid in user_ids])
+
+        to_emit = {}
+        for op, kind, user_ids, arg, emit in ops:
+            if op == 'reset':
+                _store(client, kind, {uid: arg for uid in user_ids})
+                if emit:
+                    to_emit.update({(kind, uid): arg for uid in user_ids})
+            elif op == 'delta':
+                pipe = client.pipeline(transaction=False)
+                for uid in user_ids:
+                    pipe.incrby(_key(kind, uid), arg)
+                results = pipe.execute()
+                stale = []
+                for uid, value in zip(user_ids, results):
+                    # value == arg → la clave no existía (o valía 0); < 0 → deriva.
+                    # En ambos casos se descarta y se recalcula en la próxima lectura.
+                    if value == arg or value < 0:
+                        stale.append(_key(kind, uid))
+                    elif emit:
+                        to_emit[(kind, uid)] = value
+                if stale:
+                    client.delete(*stale)
+    except Exception as e:
+        # Lo aplicado a medias no es confiable: se borra (o queda pendiente)
+        # y la siguiente lectura recalcula desde BD
+        _mark_stale(ops)
+        try:
+            _drop_stale(client)
+        except Exception:
+            pass
+        report_redis_failure(e, 'Error al actualizar contadores')
+        return
+
+    if to_emit:
+        from app.sockets.emitters import emit_to_user
+        for (kind, uid), value in to_emit.items():
+            emit_to_user(COUNTERS[kind]['event'], {'count': int(value)}, uid)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_on_commit(session):
+    ops = session.info.pop(_OPS_KEY, None)
+    if ops:
+        try:
+            _apply(ops)
+        except Exception as e:
+            logger.warning(f'[user_counters] No se pudieron aplicar los contadores: {e}')
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop(_OPS_KEY, None)
@@ -48,6 +48,12 @@ if [ "${SKIP_MIGRATIONS:-false}" != "true" ]; then
   echo "Ejecutando migraciones..."
   flask db upgrade
   echo "Migraciones completadas."
+
+  # Filas subidas antes del inventario de archivos (size_bytes NULL): se
+  # reconcilian con el disco antes de servir, para que las vistas de purga
+  # no las cuenten como presentes con 0 bytes. Sin pendientes es un COUNT.
+  echo "Reconciliando inventario de archivos pendiente..."
+  flask reconcile-file-inventory --if-pending
 else
   echo "Migraciones omitidas (SKIP_MIGRATIONS=true)."
 fi
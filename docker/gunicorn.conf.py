@@ -0,0 +1,29 @@
+# docker/gunicorn.conf.py
+# Configuración de gunicorn según WEB_ROLE (ver app/sockets/message_queue.py).
+#
+#   all       → 1 worker eventlet (HTTP + Socket.IO en el mismo proceso)
+#   socketio  → 1 worker eventlet por contenedor; se escala con réplicas
+#               detrás de nginx (docker/nginx.scale.conf)
+#   http      → workers gthread = GUNICORN_WORKERS (por defecto nº de núcleos)
+import multiprocessing
+import os
+
+_role = os.environ.get('WEB_ROLE', 'all').lower()
+
+bind = '0.0.0.0:5000'
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+accesslog = '-'
+errorlog = '-'
+
+if _role == 'http':
+    worker_class = 'gthread'
+    workers = int(os.environ.get('GUNICORN_WORKERS') or multiprocessing.cpu_count())
+    threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+    # Reciclar workers para acotar fugas de memoria (WeasyPrint, Pillow)
+    max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '2000'))
+    max_requests_jitter = max_requests // 10
+else:
+    # eventlet requiere exactamente 1 worker por proceso
+    worker_class = 'eventlet'
+    workers = 1
+    worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', '1000'))
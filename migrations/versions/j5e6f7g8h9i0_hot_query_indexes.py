@@ -0,0 +1,56 @@
+"""hot query indexes
+
+Índices compuestos para los filtros más frecuentes (feed y badge de
+notificaciones, submissions por usuario/archive y por ventana, listados por
+programa, inscripciones semestrales, invitaciones/asistencias, historial,
+cola de correo y delegaciones de permisos).
+
+Revision ID: j5e6f7g8h9i0
+Revises: 0d517ddc1e45
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'j5e6f7g8h9i0'
+down_revision = '0d517ddc1e45'
+branch_labels = None
+depends_on = None
+
+
+# (nombre, tabla, columnas)
+_INDEXES = [
+    ('ix_notification_user_feed', 'notification', ['user_id', 'is_deleted', 'created_at']),
+    ('ix_submission_user_archive', 'submission', ['user_id', 'archive_id']),
+    ('ix_submission_deadline_status', 'submission', ['document_deadline_id', 'status']),
+    ('ix_user_program_program_status', 'user_program', ['program_id', 'admission_status']),
+    ('ix_semester_enrollment_up_period', 'semester_enrollment', ['user_program_id', 'academic_period_id']),
+    ('ix_event_invitation_user_event', 'event_invitation', ['user_id', 'event_id']),
+    ('ix_event_invitation_event_user', 'event_invitation', ['event_id', 'user_id']),
+    ('ix_event_attendance_event_user', 'event_attendance', ['event_id', 'user_id']),
+    ('ix_event_attendance_user_event', 'event_attendance', ['user_id', 'event_id']),
+    ('ix_user_history_user_timestamp', 'user_history', ['user_id', 'timestamp']),
+    ('ix_email_queue_status_retry', 'email_queue', ['status', 'next_retry_at']),
+    ('ix_user_permission_user_active', 'user_permission', ['user_id', 'is_active', 'program_id']),
+]
+
+
+def upgrade():
+    for name, table, columns in _INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+    # Parcial: solo las no leídas y no borradas (badge y filtro "no leídas")
+    op.create_index(
+        'ix_notification_user_unread', 'notification', ['user_id', 'created_at'],
+        unique=False,
+        postgresql_where=sa.text('is_read = false AND is_deleted = false'),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_notification_user_unread', table_name='notification')
+    for name, table, _columns in reversed(_INDEXES):
+        op.drop_index(name, table_name=table)
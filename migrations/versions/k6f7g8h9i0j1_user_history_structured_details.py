@@ -0,0 +1,111 @@
+"""user_history structured details
+
+Agrega `details_json` (JSONB) y `subject_user_id` (indexado) a user_history
+y los rellena por lotes a partir de la columna de texto `details`, para que
+get_actions_on_user deje de buscar con LIKE sobre toda la tabla.
+
+Revision ID: k6f7g8h9i0j1
+Revises: j5e6f7g8h9i0
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'k6f7g8h9i0j1'
+down_revision = 'j5e6f7g8h9i0'
+branch_labels = None
+depends_on = None
+
+
+BATCH_SIZE = 5000
+
+# Mismas claves que UserHistoryService.SUBJECT_KEYS
+SUBJECT_KEYS = ('student_id', 'affected_user_id', 'deleted_user_id')
+
+user_history = sa.table(
+    'user_history',
+    sa.column('id', sa.Integer),
+    sa.column('details', sa.Text),
+    sa.column('details_json', sa.JSON),
+    sa.column('subject_user_id', sa.Integer),
+)
+
+
+def _subject(details):
+    for key in SUBJECT_KEYS:
+        value = details.get(key)
+        if value is None or isinstance(value, bool):
+            continue
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def _backfill():
+    conn = op.get_bind()
+    update = (
+        user_history.update()
+        .where(user_history.c.id == sa.bindparam('b_id'))
+        .values(
+            details_json=sa.bindparam('b_json', type_=sa.JSON),
+            subject_user_id=sa.bindparam('b_subject'),
+        )
+    )
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(user_history.c.id, user_history.c.details)
+            .where(user_history.c.id > last_id, user_history.c.details.like('{%'))
+            .order_by(user_history.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        params = []
+        for row in rows:
+            try:
+                details = json.loads(row.details)
+            except ValueError:
+                continue
+            if isinstance(details, dict):
+                params.append({
+                    'b_id': row.id,
+                    'b_json': details,
+                    'b_subject': _subject(details),
+                })
+        if params:
+            conn.execute(update, params)
+
+
+def upgrade():
+    with op.batch_alter_table('user_history', schema=None) as batch_op:
+        batch_op.add_column(sa.Column(
+            'details_json',
+            sa.JSON().with_variant(postgresql.JSONB(astext_type=sa.Text()), 'postgresql'),
+            nullable=True,
+        ))
+        batch_op.add_column(sa.Column('subject_user_id', sa.Integer(), nullable=True))
+
+    _backfill()
+
+    op.create_index(
+        'ix_user_history_subject_timestamp', 'user_history',
+        ['subject_user_id', 'timestamp'], unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_user_history_subject_timestamp', table_name='user_history')
+    with op.batch_alter_table('user_history', schema=None) as batch_op:
+        batch_op.drop_column('subject_user_id')
+        batch_op.drop_column('details_json')
@@ -0,0 +1,37 @@
+"""event_image variants
+
+Agrega a event_image las dimensiones del original, la lista de derivadas
+WebP/JPEG generadas por generate_event_image_variants y el placeholder
+(data URI). Las imágenes existentes se procesan con
+`flask event-image-variants`.
+
+Revision ID: l7g8h9i0j1k2
+Revises: k6f7g8h9i0j1
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'l7g8h9i0j1k2'
+down_revision = 'k6f7g8h9i0j1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('event_image', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('width', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('height', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('variants', sa.JSON(), nullable=True))
+        batch_op.add_column(sa.Column('placeholder', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('event_image', schema=None) as batch_op:
+        batch_op.drop_column('placeholder')
+        batch_op.drop_column('variants')
+        batch_op.drop_column('height')
+        batch_op.drop_column('width')
@@ -0,0 +1,44 @@
+"""file inventory
+
+Agrega size_bytes, sha256, mime y file_missing a submission,
+acceptance_document y event_image. Se llenan al subir el archivo; las filas
+existentes quedan en NULL hasta que corre reconcile_file_inventory, que
+también marca file_missing cuando el archivo ya no está en disco.
+
+Revision ID: m8h9i0j1k2l3
+Revises: l7g8h9i0j1k2
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'm8h9i0j1k2l3'
+down_revision = 'l7g8h9i0j1k2'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ('submission', 'acceptance_document', 'event_image')
+
+
+def upgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('size_bytes', sa.BigInteger(), nullable=True))
+            batch_op.add_column(sa.Column('sha256', sa.String(length=64), nullable=True))
+            batch_op.add_column(sa.Column('mime', sa.String(length=100), nullable=True))
+            batch_op.add_column(sa.Column(
+                'file_missing', sa.Boolean(), nullable=False, server_default=sa.false(),
+            ))
+
+
+def downgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('file_missing')
+            batch_op.drop_column('mime')
+            batch_op.drop_column('sha256')
+            batch_op.drop_column('size_bytes')
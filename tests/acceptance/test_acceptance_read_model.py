@@ -0,0 +1,151 @@
+# tests/acceptance/test_acceptance_read_model.py
+"""
+Lectura en bloque de la vista de aceptación del coordinador:
+  - get_accepted_applicants hace un número fijo de consultas, filtra por
+    pestaña y pagina
+  - get_acceptance_stats sale de una sola consulta agregada con los mismos
+    conteos que la clasificación por aspirante
+"""
+
+import unittest
+
+from app import create_app, db
+from app.models.acceptance_document import AcceptanceDocument
+from app.models.semester_enrollment import SemesterEnrollment
+from app.services import acceptance_service as svc
+
+from tests.acceptance.conftest import (
+    make_test_config, make_role, make_user, make_program, make_period,
+    make_accepted_user_program,
+)
+from tests.events.conftest import grant_permission
+from tests.utils import count_queries
+
+
+class TestAcceptanceReadModel(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app(make_test_config())
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.role_app = make_role('applicant')
+        role_coord = make_role('program_admin')
+        grant_permission(role_coord, 'acceptance.api.list_applicants')
+        self.coord = make_user(role_coord, suffix='_coord')
+        self.period = make_period()
+        self.program = make_program(self.coord)
+        db.session.commit()
+        self.seq = 0
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _applicant(self, letter=None, schedule=None, receipt=None):
+        """Aspirante aceptado con los documentos en los estados dados."""
+        self.seq += 1
+        user = make_user(self.role_app, suffix=f'_{self.seq}')
+        up = make_accepted_user_program(user, self.program, self.period)
+        for doc_type, status in (('acceptance_letter', letter),
+                                 ('course_schedule', schedule),
+                                 ('enrollment_receipt', receipt)):
+            if status:
+                db.session.add(AcceptanceDocument(
+                    user_program_id=up.id, document_type=doc_type,
+                    status=status, file_path=f'{user.id}/admission/{doc_type}.pdf',
+                ))
+        db.session.flush()
+        return up
+
+    def _cohort(self, n):
+        ups = []
+        for i in range(n):
+            kind = i % 4
+            if kind == 0:
+                ups.append(self._applicant())
+            elif kind == 1:
+                ups.append(self._applicant('uploaded', 'uploaded', 'uploaded'))
+            elif kind == 2:
+                ups.append(self._applicant('approved', 'uploaded', 'approved'))
+            else:
+                ups.append(self._applicant('uploaded', None, 'approved'))
+        db.session.commit()
+        return ups
+
+    def test_applicants_pivot_documents(self):
+        up = self._applicant('uploaded', 'approved', 'uploaded')
+        db.session.add(SemesterEnrollment(
+            user_program_id=up.id, academic_period_id=self.period.id, semester_number=1,
+        ))
+        db.session.commit()
+
+        data, total = svc.get_accepted_applicants(self.program.id)
+
+        self.assertEqual(total, 1)
+        docs = data[0]['acceptance_docs']
+        self.assertEqual(set(docs), svc.VALID_DOC_TYPES)
+        self.assertEqual(docs['course_schedule']['status'], 'approved')
+        self.assertEqual(docs['enrollment_receipt']['status'], 'uploaded')
+        self.assertIsNone(docs['acceptance_opinion']['id'])
+        self.assertEqual(data[0]['user_program']['current_semester'], 1)
+        self.assertEqual(svc.get_acceptance_status(up.id), docs)
+
+    def test_query_count_does_not_grow_with_cohort(self):
+        self._cohort(4)
+        db.session.expire_all()
+        with count_queries() as few:
+            svc.get_accepted_applicants(self.program.id)
+            svc.get_acceptance_stats(self.program.id)
+
+        self._cohort(40)
+        db.session.expire_all()
+        with count_queries() as many:
+            data, _ = svc.get_accepted_applicants(self.program.id)
+            svc.get_acceptance_stats(self.program.id)
+
+        self.assertEqual(len(data), 44)
+        self.assertEqual(len(many), len(few))
+
+    def test_stats_match_per_applicant_classification(self):
+        self._cohort(12)
+        self._applicant('approved', 'approved')  # sin boleta → pendiente
+        db.session.commit()
+
+        stats = svc.get_acceptance_stats(self.program.id)
+
+        # 0: sin docs, 3: falta la tira → pendientes; 1: boleta enviada; 2: completo
+        self.assertEqual(stats, {
+            'total_accepted': 13, 'pending_docs': 7,
+            'receipt_submitted': 3, 'completed': 3,
+        })
+
+    def test_tab_filter_and_pagination_over_http(self):
+        self._cohort(12)
+        client = self.app.test_client()
+        client.post('/api/v1/auth/login',
+                    json={'username': self.coord.username, 'password': 'Test1234!'})
+        url = f'/api/v1/acceptance/program/{self.program.id}/applicants'
+
+        # La pestaña solo mira la boleta (como acceptance.js)
+        body = client.get(f'{url}?tab=pending_docs&page=1&per_page=2').get_json()
+        self.assertEqual(body['meta'], {
+            'count': 2, 'total': 3, 'page': 1, 'per_page': 2, 'pages': 2,
+        })
+        second = client.get(f'{url}?tab=pending_docs&page=2&per_page=2').get_json()
+        self.assertEqual(second['meta']['count'], 1)
+        ids = {a['user_program']['id'] for a in body['data'] + second['data']}
+        self.assertEqual(len(ids), 3)
+
+        completed = client.get(f'{url}?tab=completed').get_json()['data']
+        self.assertEqual(len(completed), 6)
+        self.assertTrue(all(a['acceptance_docs']['enrollment_receipt']['status'] == 'approved'
+                            for a in completed))
+
+        self.assertEqual(client.get(f'{url}?tab=otra').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+# tests/admission/conftest.py
+"""
+Fixtures para los tests del estado de admisión (individual y por lotes).
+
+Crea un programa con dos pasos de admisión (secuencia 1 y 2), un periodo
+activo, un coordinador con `coordinator.api.list_students` y una fábrica de
+aspirantes con submissions en distintos estados.
+"""
+
+from datetime import date, timedelta
+from pathlib import Path
+import tempfile
+
+import pytest
+
+from app import create_app, db
+from app.models.role import Role
+from app.models.user import User
+from app.models.program import Program
+from app.models.academic_period import AcademicPeriod
+from app.models.user_program import UserProgram
+from app.models.permission import Permission
+from app.models.role_permission import RolePermission
+from app.models.phase import Phase
+from app.models.step import Step
+from app.models.archive import Archive
+from app.models.program_step import ProgramStep
+from app.models.submission import Submission
+
+
+@pytest.fixture
+def app():
+    """Crea una app Flask con SQLite en memoria. Una nueva por test."""
+    upload_dir = Path(tempfile.mkdtemp(prefix='siiap_admission_test_'))
+    cfg = {
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SECRET_KEY': 'test-secret-key',
+        'WTF_CSRF_ENABLED': False,
+        'CELERY_BROKER_URL': 'memory://',
+        'CELERY_RESULT_BACKEND': 'cache+memory://',
+        'SERVER_NAME': 'localhost.test',
+        'PREFERRED_URL_SCHEME': 'http',
+        'UPLOAD_FOLDER': upload_dir,
+        'AVATAR_FOLDER': upload_dir / 'avatars',
+        'USER_DOCS_FOLDER': upload_dir / 'documents',
+        'EVENTS_FOLDER': upload_dir / 'events',
+        'TEMPLATE_STORE': upload_dir / 'templates_sys',
+    }
+    application = create_app(test_config=cfg)
+    with application.app_context():
+        db.create_all()
+        yield application
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def roles(app):
+    out = {}
+    for name in ('applicant', 'program_admin', 'postgraduate_admin',
+                 'social_service', 'student'):
+        r = Role(name=name, description=f'Test role: {name}')
+        db.session.add(r)
+        out[name] = r
+    db.session.flush()
+    return out
+
+
+@pytest.fixture
+def coordinator(app, roles):
+    perm = Permission(
+        codename='coordinator.api.list_students', display_name='list students',
+        resource='coordinator', perm_type='api', action='list_students',
+    )
+    db.session.add(perm)
+    db.session.flush()
+    db.session.add(RolePermission(role_id=roles['program_admin'].id, permission_id=perm.id))
+    u = User(
+        first_name='Coord', last_name='Test', mother_last_name='',
+        username='adm_coord', password='Test1234!',
+        email='adm_coord@test.local', is_internal=True,
+        role_id=roles['program_admin'].id, must_change_password=False,
+    )
+    db.session.add(u)
+    db.session.flush()
+    return u
+
+
+@pytest.fixture
+def period(app):
+    today = date.today()
+    ap = AcademicPeriod(
+        code='20263', name='Period 20263',
+        start_date=today - timedelta(days=30),
+        end_date=today + timedelta(days=120),
+        admission_start_date=today - timedelta(days=60),
+        admission_end_date=today + timedelta(days=15),
+        is_active=True, status='active',
+    )
+    db.session.add(ap)
+    db.session.flush()
+    return ap
+
+
+@pytest.fixture
+def program(app, coordinator):
+    p = Program(
+        name='Admission MII', description='Test', coordinator_id=coordinator.id,
+        slug='adm-mii', is_active=True, duration_semesters=4,
+    )
+    db.session.add(p)
+    db.session.flush()
+    return p
+
+
+@pytest.fixture
+def structure(app, program):
+    """Dos pasos de admisión con un archive subible cada uno."""
+    phase = Phase(name='admission', description='Admisión')
+    db.session.add(phase)
+    db.session.flush()
+    out = {'phase': phase, 'steps': [], 'archives': [], 'program_steps': []}
+    for seq in (1, 2):
+        step = Step(name=f'Paso {seq}', description='', phase_id=phase.id)
+        db.session.add(step)
+        db.session.flush()
+        archive = Archive(
+            name=f'Doc {seq}', description='', file_path='',
+            step_id=step.id, is_downloadable=False, is_uploadable=True,
+        )
+        db.session.add(archive)
+        ps = ProgramStep(program_id=program.id, step_id=step.id, sequence=seq)
+        db.session.add(ps)
+        db.session.flush()
+        out['steps'].append(step)
+        out['archives'].append(archive)
+        out['program_steps'].append(ps)
+    return out
+
+
+@pytest.fixture
+def make_applicant(app, roles, program, structure, period):
+    """
+    Factory: make_applicant(statuses=('approved', None), admission_status='in_progress')
+    `statuses[i]` es el estado de la submission del archive i (None = sin subir).
+    """
+    counter = [0]
+
+    def _make(statuses=(None, None), admission_status='in_progress', role='applicant'):
+        counter[0] += 1
+        n = counter[0]
+        u = User(
+            first_name='Aspirante', last_name=f'N{n:03d}', mother_last_name='',
+            username=f'adm_appl_{n}', password='Test1234!',
+            email=f'adm_appl_{n}@test.local', is_internal=False,
+            role_id=roles[role].id, must_change_password=False,
+        )
+        db.session.add(u)
+        db.session.flush()
+        up = UserProgram(
+            user_id=u.id, program_id=program.id,
+            admission_status=admission_status,
+            admission_period_id=period.id,
+        )
+        db.session.add(up)
+        for archive, ps, st in zip(structure['archives'], structure['program_steps'], statuses):
+            if st is None:
+                continue
+            db.session.add(Submission(
+                file_path=f'user_{u.id}/doc_{archive.id}.pdf', status=st,
+                user_id=u.id, archive_id=archive.id, program_step_id=ps.id, semester=1,
+            ))
+        db.session.flush()
+        return u, up
+
+    return _make
+
+
+def login(client, user, password='Test1234!'):
+    resp = client.post('/api/v1/auth/login',
+                       json={'username': user.username, 'password': password})
+    try:
+        from flask import g as _g
+        if hasattr(_g, '_login_user'):
+            del _g._login_user
+    except RuntimeError:
+        pass
+    return resp
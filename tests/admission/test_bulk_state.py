@@ -0,0 +1,153 @@
+# tests/admission/test_bulk_state.py
+"""
+get_admission_states_bulk debe devolver lo mismo que get_admission_state
+por alumno, con un número de queries que no crece con el número de alumnos.
+"""
+
+from datetime import timedelta
+
+from app import db
+from app.models import ExtensionRequest
+from app.services.admission_service import get_admission_state, get_admission_states_bulk
+from app.utils.datetime_utils import now_local
+
+from tests.admission.conftest import login
+from tests.utils import count_queries
+
+
+_COMPARED_KEYS = (
+    'status_count', 'progress_pct', 'step_states', 'lock_info', 'pending_items',
+    'total_docs', 'extended_docs', 'expired_archive_ids', 'acceptance_docs',
+)
+
+
+def _count_queries(fn):
+    with count_queries() as statements:
+        result = fn()
+    return result, len(statements)
+
+
+def _seed(make_applicant, n):
+    variants = [
+        ('approved', 'approved'),
+        ('approved', None),
+        ('rejected', 'review'),
+        (None, None),
+    ]
+    return [make_applicant(statuses=variants[i % len(variants)]) for i in range(n)]
+
+
+def test_bulk_matches_single(app, make_applicant, program):
+    rows = _seed(make_applicant, 8)
+    db.session.commit()
+
+    bulk = get_admission_states_bulk((u.id, program.id, up) for u, up in rows)
+
+    for u, up in rows:
+        single = get_admission_state(u.id, program.id, up)
+        for key in _COMPARED_KEYS:
+            assert bulk[(u.id, program.id)][key] == single[key], key
+        assert bulk[(u.id, program.id)]['subs'].keys() == single['subs'].keys()
+
+
+def test_bulk_accepted_includes_acceptance_docs(app, make_applicant, program):
+    u, up = make_applicant(statuses=('approved', 'approved'), admission_status='accepted')
+    db.session.commit()
+
+    state = get_admission_states_bulk([(u.id, program.id, up)])[(u.id, program.id)]
+    assert set(state['acceptance_docs']) == {
+        'acceptance_letter', 'course_schedule', 'enrollment_receipt', 'acceptance_opinion',
+    }
+    assert all(v is None for v in state['acceptance_docs'].values())
+
+
+def test_bulk_query_count_is_constant(app, make_applicant, program):
+    from app.models.user_program import UserProgram
+
+    def _entries():
+        db.session.expire_all()
+        return [(up.user_id, up.program_id, up) for up in UserProgram.query.all()]
+
+    _seed(make_applicant, 3)
+    db.session.commit()
+    entries = _entries()
+    _, q_few = _count_queries(lambda: get_admission_states_bulk(entries))
+
+    _seed(make_applicant, 20)
+    db.session.commit()
+    entries = _entries()
+    _, q_many = _count_queries(lambda: get_admission_states_bulk(entries))
+
+    assert q_many == q_few
+
+
+def test_bulk_empty_input(app):
+    assert get_admission_states_bulk([]) == {}
+
+
+def test_list_students_paginates(app, client, coordinator, make_applicant):
+    _seed(make_applicant, 5)
+    db.session.commit()
+    login(client, coordinator)
+
+    resp = client.get('/api/v1/coordinator/students?page=2&per_page=2')
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body['meta'] == {'total': 5, 'page': 2, 'per_page': 2, 'pages': 3}
+    assert len(body['students']) == 2
+
+
+def test_list_students_status_filter_with_pagination(app, client, coordinator, make_applicant):
+    _seed(make_applicant, 8)  # 2 rechazados (variante 3)
+    db.session.commit()
+    login(client, coordinator)
+
+    resp = client.get('/api/v1/coordinator/students?status=rejected&page=1&per_page=10')
+    body = resp.get_json()
+    assert body['meta']['total'] == 2
+    assert all(s['overall_status'] == 'rejected' for s in body['students'])
+
+
+def test_list_students_status_filter_matches_computed_status(
+    app, client, coordinator, make_applicant, structure
+):
+    _seed(make_applicant, 4)
+    make_applicant(statuses=('review', 'approved'))
+    # Prórroga vigente sobre el archive rechazado: cuenta como 'extended'
+    extended, _ = make_applicant(statuses=('rejected', 'approved'))
+    ext = ExtensionRequest(
+        user_id=extended.id, archive_id=structure['archives'][0].id,
+        program_step_id=structure['program_steps'][0].id, requested_by=extended.id,
+        reason='r', requested_until=now_local() + timedelta(days=5),
+    )
+    ext.status = 'granted'
+    ext.granted_until = (now_local() + timedelta(days=5)).replace(tzinfo=None)
+    db.session.add(ext)
+    db.session.commit()
+    login(client, coordinator)
+
+    everyone = client.get('/api/v1/coordinator/students').get_json()['students']
+    expected = {}
+    for s in everyone:
+        expected.setdefault(s['overall_status'], set()).add(s['id'])
+    assert set(expected) == {'approved', 'pending', 'rejected', 'review'}
+    assert extended.id in expected['approved']
+
+    for status in ('approved', 'pending', 'rejected', 'review', 'nope'):
+        body = client.get(
+            f'/api/v1/coordinator/students?status={status}&page=1&per_page=2'
+        ).get_json()
+        wanted = expected.get(status, set())
+        assert body['meta']['total'] == len(wanted), status
+        assert {s['id'] for s in body['students']} <= wanted
+        assert len(body['students']) == min(2, len(wanted))
+
+
+def test_list_students_without_page_returns_all(app, client, coordinator, make_applicant):
+    _seed(make_applicant, 3)
+    db.session.commit()
+    login(client, coordinator)
+
+    body = client.get('/api/v1/coordinator/students').get_json()
+    assert len(body['students']) == 3
+    assert body['meta'] == {'total': 3}
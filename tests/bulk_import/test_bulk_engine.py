@@ -0,0 +1,188 @@
+# tests/bulk_import/test_bulk_engine.py
+"""
+Tests del motor de alta masiva por CSV: validación por conjuntos, escritura
+por bloques con aislamiento por SAVEPOINT, hashing en pool de hilos,
+ejecución desde la tarea Celery y su endpoint de estado.
+"""
+
+import multiprocessing
+from unittest.mock import patch
+
+from werkzeug.security import check_password_hash
+
+from app import db
+from app.models.email_queue import EmailQueue
+from app.models.password_reset_token import PasswordResetToken
+from app.models.semester_enrollment import SemesterEnrollment
+from app.models.user import User
+from app.models.user_history import UserHistory
+from app.models.user_program import UserProgram
+from app.services import student_bulk_service as svc
+from tests.bulk_import.test_api import _csrf, _login
+from tests.utils import count_queries
+
+
+def _csv_text(program, count, prefix='s'):
+    lines = [','.join(svc.CSV_HEADERS)]
+    for i in range(count):
+        lines.append(
+            f'N{i},A{i},M,{prefix}{i}@test.local,M23{prefix}{i:04d},{program.slug},2,20223,no'
+        )
+    return '\n'.join(lines)
+
+
+def test_validate_csv_query_count_does_not_grow_with_rows(app, periods, program):
+    with count_queries() as small:
+        svc.validate_csv(_csv_text(program, 2))
+    with count_queries() as large:
+        result = svc.validate_csv(_csv_text(program, 40))
+
+    assert len(large) == len(small) <= 4
+    assert result['summary']['valid'] == 40
+
+
+def test_execute_csv_writes_every_table_in_bulk(app, periods, program, postgrad_admin,
+                                                monkeypatch):
+    monkeypatch.setattr(svc, 'IMPORT_CHUNK_SIZE', 2)
+    preview = svc.validate_csv(_csv_text(program, 5))
+    progress = []
+
+    out = svc.execute_csv(preview['rows'], created_by_id=postgrad_admin.id,
+                          progress_callback=lambda done, total: progress.append((done, total)))
+
+    assert out['created'] == 5
+    assert out['failed'] == []
+    assert progress == [(2, 5), (4, 5), (5, 5)]
+
+    user_ids = [u['user_id'] for u in out['created_users']]
+    users = User.query.filter(User.id.in_(user_ids)).all()
+    assert {u.username for u in users} == {u.control_number for u in users}
+    assert all(u.must_change_password and not u.profile_completed for u in users)
+    assert all(u.password.startswith(('scrypt:', 'pbkdf2:')) for u in users)
+
+    ups = UserProgram.query.filter(UserProgram.user_id.in_(user_ids)).all()
+    assert {up.admission_status for up in ups} == {'enrolled'}
+    ses = SemesterEnrollment.query.filter(
+        SemesterEnrollment.user_program_id.in_([up.id for up in ups])
+    ).all()
+    assert len(ses) == 10
+    assert sorted(se.status for se in ses).count('active') == 5
+
+    assert PasswordResetToken.query.filter(PasswordResetToken.user_id.in_(user_ids)).count() == 5
+    assert EmailQueue.query.filter(EmailQueue.user_id.in_(user_ids)).count() == 5
+    history = UserHistory.query.filter_by(action='enrolled_via_bulk_import').all()
+    assert {h.user_id for h in history} == set(user_ids)
+    assert all(h.admin_id == postgrad_admin.id for h in history)
+
+
+def test_execute_csv_isolates_row_failing_inside_a_chunk(app, periods, program, postgrad_admin,
+                                                         roles):
+    preview = svc.validate_csv(_csv_text(program, 3))
+    # El username no se valida en el preview: la fila choca hasta el INSERT
+    db.session.add(User(
+        first_name='X', last_name='Y', mother_last_name='', username='M23s0001',
+        password='pw', email='other@test.local', is_internal=False,
+        role_id=roles['student'].id, must_change_password=False,
+    ))
+    db.session.commit()
+
+    out = svc.execute_csv(preview['rows'], created_by_id=postgrad_admin.id)
+
+    assert out['created'] == 2
+    assert [f['email'] for f in out['failed']] == ['s1@test.local']
+    assert User.query.filter_by(email='s1@test.local').first() is None
+    assert UserProgram.query.filter_by(program_id=program.id).count() == 2
+    assert UserHistory.query.filter_by(action='enrolled_via_bulk_import').count() == 2
+
+
+def test_password_hasher_pool_produces_valid_hashes(app, monkeypatch):
+    monkeypatch.setattr(svc, 'HASH_POOL_MIN', 1)
+    app.config['STUDENT_IMPORT_HASH_WORKERS'] = 2
+    passwords = ['uno', 'dos', 'tres']
+
+    with svc._PasswordHasher(len(passwords)) as hasher:
+        assert hasher._pool is not None
+        hashes = hasher.hash_many(passwords)
+
+    assert all(check_password_hash(h, pw) for h, pw in zip(hashes, passwords))
+
+
+def test_password_hasher_pool_runs_inside_daemonic_process(app, monkeypatch):
+    # Los workers prefork de Celery son daemon y no pueden tener procesos hijos
+    monkeypatch.setattr(svc, 'HASH_POOL_MIN', 1)
+    app.config['STUDENT_IMPORT_HASH_WORKERS'] = 2
+    passwords = ['uno', 'dos', 'tres']
+    ctx = multiprocessing.get_context('fork')
+    queue = ctx.Queue()
+
+    def _work():
+        with app.app_context():
+            with svc._PasswordHasher(len(passwords)) as hasher:
+                hashes = hasher.hash_many(passwords)
+                # Si el pool falló, hash_many lo descarta y sigue en línea
+                queue.put((hasher._pool is not None, hashes))
+
+    proc = ctx.Process(target=_work, daemon=True)
+    proc.start()
+    pooled, hashes = queue.get(timeout=60)
+    proc.join(timeout=10)
+
+    assert pooled
+    assert all(check_password_hash(h, pw) for h, pw in zip(hashes, passwords))
+
+
+
+def test_csv_task_status_rejects_other_task_ids(app, client, permissions, postgrad_admin):
+    class _FakeAsyncResult:
+        state = 'SUCCESS'
+        name = 'app.tasks.purge.build_purge_run'
+        result = {'run_id': 'r-1'}
+
+    _login(client, postgrad_admin)
+    with patch('app.extensions.celery.AsyncResult', return_value=_FakeAsyncResult()):
+        resp = client.get('/api/v1/student-bulk/csv/tasks/task-999')
+
+    assert resp.status_code == 404
+    assert resp.get_json()['data'] is None
+
+def test_import_task_reports_progress(app, periods, program, postgrad_admin, monkeypatch):
+    from app.tasks import students as student_tasks
+
+    monkeypatch.setattr(svc, 'IMPORT_CHUNK_SIZE', 2)
+    states = []
+    monkeypatch.setattr(
+        student_tasks.import_students_csv, 'update_state',
+        lambda state=None, meta=None, **kw: states.append((state, meta)),
+    )
+    preview = svc.validate_csv(_csv_text(program, 3))
+
+    # .run() evita el ContextTask (ligado a la app con la que se inicializó Celery)
+    result = student_tasks.import_students_csv.run(preview['rows'], postgrad_admin.id)
+
+    assert result['created'] == 3
+    assert states[-1] == ('PROGRESS', {'stage': 'students', 'done': 3, 'total': 3})
+
+
+def test_csv_execute_endpoint_enqueues_large_imports(app, client, periods, program, permissions,
+                                                     postgrad_admin, monkeypatch):
+    from app.routes.api import student_bulk_api
+    from app.tasks import students as student_tasks
+
+    queued = []
+
+    class _Task:
+        id = 'task-123'
+
+    monkeypatch.setattr(student_bulk_api, 'ASYNC_THRESHOLD', 2)
+    monkeypatch.setattr(student_tasks.import_students_csv, 'apply_async',
+                        lambda kwargs=None, **kw: queued.append(kwargs) or _Task())
+    preview = svc.validate_csv(_csv_text(program, 2))
+
+    token = _login(client, postgrad_admin)
+    resp = client.post('/api/v1/student-bulk/csv/execute',
+                       json={'rows': preview['rows']}, headers=_csrf(token))
+
+    assert resp.status_code == 202
+    assert resp.get_json()['data']['status_url'].endswith('/csv/tasks/task-123')
+    assert queued[0]['created_by_id'] == postgrad_admin.id
+    assert User.query.filter_by(email='s0@test.local').first() is None
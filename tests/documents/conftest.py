@@ -0,0 +1,132 @@
+# tests/documents/conftest.py
+"""
+Fixtures para los tests de generación de documentos.
+
+Crea una app con SQLite en memoria cuyo instance_path y carpeta de
+plantillas viven en un directorio temporal, un programa con coordinador,
+una plantilla DOCX global de carta de aceptación y una fábrica de
+aspirantes aceptados.
+"""
+
+from pathlib import Path
+import tempfile
+
+import pytest
+
+from app import create_app, db
+from app.models.role import Role
+from app.models.user import User
+from app.models.program import Program
+from app.models.user_program import UserProgram
+from app.models.document_template import DocumentTemplate
+
+
+@pytest.fixture
+def app():
+    """Crea una app Flask con SQLite en memoria. Una nueva por test."""
+    tmp_root = Path(tempfile.mkdtemp(prefix='siiap_documents_test_'))
+    templates_dir = tmp_root / 'templates_sys'
+    templates_dir.mkdir()
+    cfg = {
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SECRET_KEY': 'test-secret-key',
+        'WTF_CSRF_ENABLED': False,
+        'CELERY_BROKER_URL': 'memory://',
+        'CELERY_RESULT_BACKEND': 'cache+memory://',
+        'SERVER_NAME': 'localhost.test',
+        'PREFERRED_URL_SCHEME': 'http',
+        'UPLOAD_FOLDER': tmp_root,
+        'AVATAR_FOLDER': tmp_root / 'avatars',
+        'USER_DOCS_FOLDER': tmp_root / 'documents',
+        'EVENTS_FOLDER': tmp_root / 'events',
+        'TEMPLATE_STORE': templates_dir,
+        'TEMPLATES_SYS_FOLDER': str(templates_dir),
+    }
+    application = create_app(test_config=cfg)
+    application.instance_path = str(tmp_root / 'instance')
+    with application.app_context():
+        db.create_all()
+        yield application
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def roles(app):
+    out = {}
+    for name in ('applicant', 'program_admin', 'postgraduate_admin'):
+        r = Role(name=name, description=f'Test role: {name}')
+        db.session.add(r)
+        out[name] = r
+    db.session.flush()
+    return out
+
+
+@pytest.fixture
+def program(app, roles):
+    coord = User(
+        first_name='Ana', last_name='Coordinadora', mother_last_name='',
+        username='doc_coord', password='Test1234!',
+        email='doc_coord@test.local', is_internal=True,
+        role_id=roles['program_admin'].id, must_change_password=False,
+    )
+    db.session.add(coord)
+    db.session.flush()
+    p = Program(
+        name='Maestría Docs', description='Test', coordinator_id=coord.id,
+        slug='maestria-docs', is_active=True, duration_semesters=4,
+    )
+    db.session.add(p)
+    db.session.flush()
+    return p
+
+
+def write_docx_template(path: Path, lines):
+    from docx import Document
+    doc = Document()
+    for line in lines:
+        doc.add_paragraph(line)
+    table = doc.add_table(rows=1, cols=1)
+    table.cell(0, 0).text = 'Programa: {{program_name}}'
+    doc.save(str(path))
+
+
+@pytest.fixture
+def docx_template(app, program):
+    """Plantilla DOCX global de carta de aceptación. Devuelve su ruta absoluta."""
+    path = Path(app.config['TEMPLATES_SYS_FOLDER']) / 'acceptance.docx'
+    write_docx_template(path, [
+        'Estimado(a) {{student_name}}:',
+        'Coordinación: {{coordinator_name}}. Marcador libre: {{no_existe}}',
+    ])
+    db.session.add(DocumentTemplate(
+        program_id=None, document_type='acceptance_letter',
+        name='Carta global', file_path='acceptance.docx', file_type='docx',
+    ))
+    db.session.flush()
+    return path
+
+
+@pytest.fixture
+def make_accepted(app, roles, program):
+    counter = [0]
+
+    def _make():
+        counter[0] += 1
+        n = counter[0]
+        u = User(
+            first_name=f'Aspirante{n}', last_name='Prueba', mother_last_name='',
+            username=f'doc_appl_{n}', password='Test1234!',
+            email=f'doc_appl_{n}@test.local', is_internal=False,
+            role_id=roles['applicant'].id, must_change_password=False,
+        )
+        db.session.add(u)
+        db.session.flush()
+        db.session.add(UserProgram(
+            user_id=u.id, program_id=program.id, admission_status='accepted',
+        ))
+        db.session.flush()
+        return u
+
+    return _make
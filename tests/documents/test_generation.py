@@ -0,0 +1,209 @@
+# tests/documents/test_generation.py
+"""
+Tests de DocumentGenerationService: caché de plantillas compiladas,
+sustitución en una pasada y generación por lotes (DOCX; weasyprint necesita
+librerías del sistema que no están en el entorno de pruebas).
+"""
+
+import os
+import sys
+import threading
+import types
+import zipfile
+from unittest.mock import patch
+
+import pytest
+from docx import Document
+
+from app import db
+import app.services.document_generation_service as dgs
+from app.services.document_generation_service import DocumentGenerationService
+
+from tests.documents.conftest import write_docx_template
+
+
+def _docx_text(path):
+    doc = Document(path)
+    parts = [p.text for p in doc.paragraphs]
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                parts.append(cell.text)
+    return '\n'.join(parts)
+
+
+class TestTemplateCompilation:
+
+    def test_segments_substitute_in_one_pass(self):
+        segments = tuple(dgs._PLACEHOLDER_RE.split('Hola {{a}}, {{b}} y {{zzz}}.'))
+        out = dgs._render_segments(segments, {'a': 'Ana', 'b': '{{a}}'})
+        # Un valor que contiene un marcador no se vuelve a sustituir
+        assert out == 'Hola Ana, {{a}} y {{zzz}}.'
+
+    def test_template_compiled_once_until_mtime_changes(self, app, tmp_path):
+        dgs._compiled_cache.clear()
+        tpl = tmp_path / 'tpl.docx'
+        write_docx_template(tpl, ['Hola {{student_name}}'])
+        out = tmp_path / 'out.docx'
+
+        with patch.object(dgs, '_compile_docx', wraps=dgs._compile_docx) as compile_spy:
+            dgs._render_docx_file(str(tpl), {'student_name': 'Ana'}, str(out))
+            dgs._render_docx_file(str(tpl), {'student_name': 'Beto'}, str(out))
+            assert compile_spy.call_count == 1
+            assert 'Hola Beto' in _docx_text(out)
+
+            write_docx_template(tpl, ['Adiós {{student_name}}'])
+            st = os.stat(tpl)
+            os.utime(tpl, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+            dgs._render_docx_file(str(tpl), {'student_name': 'Ana'}, str(out))
+            assert compile_spy.call_count == 2
+            assert 'Adiós Ana' in _docx_text(out)
+
+    def test_font_config_is_per_thread(self):
+        # weasyprint no carga sin pango: basta un módulo con FontConfiguration
+        fonts = types.ModuleType('weasyprint.text.fonts')
+        fonts.FontConfiguration = object
+        modules = {
+            'weasyprint': types.ModuleType('weasyprint'),
+            'weasyprint.text': types.ModuleType('weasyprint.text'),
+            'weasyprint.text.fonts': fonts,
+        }
+        with patch.dict(sys.modules, modules), \
+                patch.object(dgs, '_font_local', threading.local()):
+            main = dgs._get_font_config()
+            assert dgs._get_font_config() is main
+
+            other = []
+            worker = threading.Thread(target=lambda: other.append(dgs._get_font_config()))
+            worker.start()
+            worker.join()
+            assert other[0] is not main
+
+
+class TestGenerate:
+
+    def test_single_docx_generation(self, app, program, docx_template, make_accepted):
+        user = make_accepted()
+        db.session.commit()
+
+        result = DocumentGenerationService.generate(
+            user_id=user.id, program_id=program.id, document_type='acceptance_letter',
+        )
+
+        assert result['file_type'] == 'docx'
+        text = _docx_text(result['output_path'])
+        assert 'Estimado(a) Aspirante1 Prueba:' in text
+        assert 'Coordinación: Ana Coordinadora.' in text
+        assert '{{no_existe}}' in text
+        assert 'Programa: Maestría Docs' in text
+
+
+class TestGenerateBatch:
+
+    def test_batch_renders_each_user_and_zips(
+        self, app, program, docx_template, make_accepted
+    ):
+        users = [make_accepted() for _ in range(3)]
+        db.session.commit()
+
+        result = DocumentGenerationService.generate_batch(
+            user_ids=[u.id for u in users] + [999999],
+            program_id=program.id,
+            document_type='acceptance_letter',
+            max_workers=1,
+        )
+
+        assert result['file_type'] == 'docx'
+        assert [f['user_id'] for f in result['files']] == [u.id for u in users]
+        assert set(result['errors']) == {999999}
+        for item, user in zip(result['files'], users):
+            assert f'Estimado(a) {user.first_name} Prueba:' in _docx_text(item['output_path'])
+
+        with zipfile.ZipFile(result['zip_path']) as zf:
+            assert sorted(zf.namelist()) == sorted(
+                f"{f['user_id']}_{f['filename']}" for f in result['files']
+            )
+
+    def test_batch_in_process_pool(self, app, program, docx_template, make_accepted):
+        users = [make_accepted() for _ in range(4)]
+        db.session.commit()
+
+        result = DocumentGenerationService.generate_batch(
+            user_ids=[u.id for u in users],
+            program_id=program.id,
+            document_type='acceptance_letter',
+            as_zip=False,
+            max_workers=2,
+        )
+
+        assert result['errors'] == {}
+        assert result['zip_path'] is None
+        assert len(result['files']) == 4
+        for item, user in zip(result['files'], users):
+            assert f'Estimado(a) {user.first_name} Prueba:' in _docx_text(item['output_path'])
+
+    def test_batch_recovers_from_broken_pool(
+        self, app, program, docx_template, make_accepted, tmp_path
+    ):
+        users = [make_accepted() for _ in range(4)]
+        db.session.commit()
+        victim = f'{users[1].first_name} Prueba'
+        crashed_once = tmp_path / 'crashed'
+
+        def crash_once(template_abs, variables, output_path):
+            # El worker muere la primera vez; el pool nuevo sí lo genera
+            if variables['student_name'].startswith(victim) and not crashed_once.exists():
+                crashed_once.touch()
+                os._exit(1)
+            return dgs._render_docx_file(template_abs, variables, output_path)
+
+        with patch.dict(dgs._RENDERERS, {'docx': (crash_once, 'docx')}):
+            result = DocumentGenerationService.generate_batch(
+                user_ids=[u.id for u in users], program_id=program.id,
+                document_type='acceptance_letter', as_zip=False, max_workers=2,
+            )
+
+        assert crashed_once.exists()
+        assert result['errors'] == {}
+        assert [f['user_id'] for f in result['files']] == [u.id for u in users]
+
+    def test_batch_reports_documents_lost_with_the_pool(
+        self, app, program, docx_template, make_accepted
+    ):
+        users = [make_accepted() for _ in range(4)]
+        db.session.commit()
+        victim = f'{users[2].first_name} Prueba'
+
+        def always_crash(template_abs, variables, output_path):
+            if variables['student_name'].startswith(victim):
+                os._exit(1)
+            return dgs._render_docx_file(template_abs, variables, output_path)
+
+        with patch.dict(dgs._RENDERERS, {'docx': (always_crash, 'docx')}):
+            result = DocumentGenerationService.generate_batch(
+                user_ids=[u.id for u in users], program_id=program.id,
+                document_type='acceptance_letter', as_zip=False, max_workers=2,
+            )
+
+        # El reintento aislado solo pierde el documento que tira el proceso
+        assert result['errors'] == {users[2].id: dgs._POOL_CRASH_ERROR}
+        assert [f['user_id'] for f in result['files']] == [
+            users[0].id, users[1].id, users[3].id,
+        ]
+
+    def test_batch_task_routes_to_documents_queue(self, app):
+        # El worker prefork no puede crear el pool de render (procesos daemon)
+        from app.celery_app import DOCUMENTS_QUEUE
+        from app.extensions import celery
+
+        route = celery.amqp.router.route({}, 'app.tasks.documents.generate_documents_batch')
+        assert route['queue'].name == DOCUMENTS_QUEUE
+
+    def test_batch_without_template_raises(self, app, program, make_accepted):
+        user = make_accepted()
+        db.session.commit()
+        with pytest.raises(ValueError):
+            DocumentGenerationService.generate_batch(
+                user_ids=[user.id], program_id=program.id,
+                document_type='acceptance_letter',
+            )
@@ -0,0 +1,129 @@
+# tests/events/test_bulk_fanout.py
+"""
+Tests for the bulk notification fan-out path:
+
+  - create_bulk_notifications: one row per unique existing user, chunked,
+    one 'notification:new' emit per user room carrying the real ids
+  - EmailService.queue_emails_bulk: one EmailQueue row per user with email,
+    one Celery batch task per chunk
+  - send_bulk_notification task: bulk path + split into sub-tasks for
+    very large recipient lists
+"""
+
+import unittest
+from unittest.mock import patch
+
+from app import create_app, db
+from app.models.email_queue import EmailQueue
+from app.models.notification import Notification
+from app.services.email_service import EmailService
+from app.services.notification_service import NotificationService
+from tests.events.conftest import make_test_config, make_role, make_user
+
+
+class TestBulkFanout(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app(make_test_config())
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        role = make_role('student')
+        self.users = [make_user(role, suffix=f'_b{i}') for i in range(5)]
+        db.session.commit()
+        self.ids = [u.id for u in self.users]
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_creates_one_notification_per_unique_user(self):
+        created = NotificationService.create_bulk_notifications(
+            user_ids=self.ids + self.ids[:2],
+            notification_type='event_announcement',
+            title='Aviso',
+            message='Hola',
+        )
+        db.session.commit()
+        self.assertEqual(set(created), set(self.ids))
+        self.assertEqual(Notification.query.filter_by(type='event_announcement').count(), 5)
+        notif = db.session.get(Notification, created[self.ids[0]])
+        self.assertEqual(notif.user_id, self.ids[0])
+        self.assertEqual(notif.title, 'Aviso')
+
+    def test_unknown_user_ids_are_skipped(self):
+        created = NotificationService.create_bulk_notifications(
+            user_ids=[self.ids[0], 999999],
+            notification_type='event_announcement',
+            title='Aviso',
+            message='Hola',
+        )
+        db.session.commit()
+        self.assertEqual(list(created), [self.ids[0]])
+
+    @patch('app.extensions.socketio.emit')
+    def test_emits_real_ids_to_each_user_room(self, mock_emit):
+        created = NotificationService.create_bulk_notifications(
+            user_ids=self.ids,
+            notification_type='event_announcement',
+            title='Aviso',
+            message='Hola',
+            chunk_size=2,
+        )
+        self.assertEqual(mock_emit.call_count, 5)
+        rooms = {}
+        for call in mock_emit.call_args_list:
+            event, payload = call.args
+            self.assertEqual(event, 'notification:new')
+            rooms[call.kwargs['room']] = payload['notification']
+        self.assertEqual(set(rooms), {f'user:{uid}' for uid in self.ids})
+        for uid in self.ids:
+            notification = rooms[f'user:{uid}']
+            self.assertEqual(notification['user_id'], uid)
+            self.assertEqual(notification['id'], created[uid])
+            self.assertEqual(notification['title'], 'Aviso')
+
+    @patch('app.tasks.notifications.send_emails_batch_async.apply_async')
+    def test_queue_emails_bulk_one_task_per_chunk(self, mock_apply):
+        ids = EmailService.queue_emails_bulk(self.ids, 'Asunto', '<p>x</p>', chunk_size=3)
+        db.session.commit()
+        self.assertEqual(len(ids), 5)
+        self.assertEqual(EmailQueue.query.filter_by(status='pending').count(), 5)
+        self.assertEqual(mock_apply.call_count, 2)
+
+    @patch('app.tasks.notifications.send_emails_batch_async.apply_async')
+    def test_task_bulk_path_with_email(self, mock_apply):
+        from app.tasks.notifications import send_bulk_notification
+        result = send_bulk_notification.apply(kwargs=dict(
+            user_ids=self.ids,
+            notification_type='event_announcement',
+            title='Con correo',
+            message='Hola',
+            send_email=True,
+            email_subject='Asunto',
+            email_html='<p>x</p>',
+        )).get()
+        self.assertEqual(result['created'], 5)
+        self.assertEqual(result['emails'], 5)
+        items = EmailQueue.query.all()
+        self.assertTrue(all(i.notification_id for i in items))
+
+    @patch('app.tasks.notifications.send_bulk_notification.delay')
+    def test_task_splits_large_lists(self, mock_delay):
+        from app.tasks import notifications as tasks_mod
+        with patch.object(tasks_mod, 'FANOUT_SLICE_SIZE', 2):
+            result = tasks_mod.send_bulk_notification.apply(kwargs=dict(
+                user_ids=self.ids,
+                notification_type='event_announcement',
+                title='Grande',
+                message='Hola',
+            )).get()
+        self.assertEqual(result['dispatched'], 3)
+        self.assertEqual(mock_delay.call_count, 3)
+        self.assertEqual(Notification.query.filter_by(title='Grande').count(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
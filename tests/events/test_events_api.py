@@ -8,6 +8,7 @@ Integration tests for /api/v1/events (admin-facing endpoints):
   DELETE /api/v1/events/<id>
   POST   /api/v1/events/<id>/windows
   POST   /api/v1/events/windows/<wid>/generate-slots
+  POST   /api/v1/events/<id>/generate-slots
   GET    /api/v1/events/<id>/slots
   GET    /api/v1/events/<id>/windows-list
   DELETE /api/v1/events/windows/<wid>
@@ -237,6 +238,24 @@ class TestWindowsAndSlots(TestEventsApiBase):
         db.session.commit()
         resp = self._post(f'/api/v1/events/windows/{win.id}/generate-slots', {})
         self.assertEqual(resp.status_code, 201)
+        self.assertEqual(json.loads(resp.data)['created'], 2)
+
+    def test_generate_event_slots_bulk(self):
+        ev = self._make_event(capacity_type='single', max_capacity=None)
+        for start, end in ((9, 10), (11, 12)):
+            db.session.add(EventWindow(
+                event_id=ev.id,
+                date=__import__('datetime').date(2030, 6, 15),
+                start_time=__import__('datetime').time(start, 0),
+                end_time=__import__('datetime').time(end, 0),
+                slot_minutes=30,
+            ))
+        db.session.commit()
+        resp = self._post(f'/api/v1/events/{ev.id}/generate-slots', {})
+        self.assertEqual(resp.status_code, 201)
+        data = json.loads(resp.data)
+        self.assertEqual(data['created'], 4)
+        self.assertEqual(data['conflicts'], [])
 
     def test_list_slots_success(self):
         ev = self._make_event(capacity_type='single', max_capacity=None)
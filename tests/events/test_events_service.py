@@ -4,7 +4,7 @@ Unit tests for EventsService core methods:
   - create_event
   - update_event
   - list_admin_events
-  - add_window / generate_slots
+  - add_window / generate_slots / generate_slots_bulk
   - delete_slot / delete_window
   - register_to_event / unregister_from_event / mark_attendance
   - count_new_events / mark_events_seen
@@ -15,7 +15,7 @@ import unittest
 from datetime import date, time, datetime, timedelta
 
 from app import create_app, db
-from app.models.event import Event, EventWindow, EventSlot, EventAttendance
+from app.models.event import Event, EventWindow, EventSlot, EventAttendance, EventHost
 from app.services.events_service import EventsService
 from tests.events.conftest import (
     make_test_config, make_role, make_user, make_program, make_academic_period,
@@ -538,6 +538,122 @@ class TestWindowsAndSlots(unittest.TestCase):
         self.assertEqual(len(booked_slots), 0)
 
 
+class TestBulkSlotGeneration(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app(make_test_config())
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        role = make_role('program_admin')
+        self.admin = make_user(role)
+        self.interviewer = make_user(role, 'interviewer')
+        self.prog = make_program(self.admin)
+        self.ev = self._make_interview('Entrevistas A')
+        self.day = date.today() + timedelta(days=3)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _make_interview(self, title, host=None):
+        ev = Event(
+            program_id=self.prog.id, type='interview', title=title,
+            created_by=self.admin.id, capacity_type='single',
+            requires_registration=True, status='published', visibility='public',
+        )
+        db.session.add(ev)
+        db.session.flush()
+        if host:
+            db.session.add(EventHost(event_id=ev.id, user_id=host.id, role_label='Entrevistador'))
+        return ev
+
+    def _window(self, ev, start, end, minutes=15):
+        return EventsService.add_window(
+            event_id=ev.id, window_date=self.day,
+            start=start, end=end, slot_minutes=minutes,
+        )
+
+    def test_regenerating_a_window_is_idempotent(self):
+        win = self._window(self.ev, time(9, 0), time(10, 0))
+        first = EventsService.generate_slots(win.id)
+        second = EventsService.generate_slots(win.id)
+
+        self.assertEqual(first['created'], 4)
+        self.assertEqual(second['created'], 0)
+        self.assertEqual(second['skipped'], 4)
+        self.assertEqual(EventSlot.query.filter_by(event_window_id=win.id).count(), 4)
+
+    def test_free_slots_are_realigned_and_booked_kept(self):
+        win = self._window(self.ev, time(9, 0), time(10, 0))
+        EventsService.generate_slots(win.id)
+        slots = EventSlot.query.filter_by(event_window_id=win.id).order_by(EventSlot.starts_at).all()
+        slots[0].ends_at = slots[0].starts_at + timedelta(minutes=5)
+        slots[1].ends_at = slots[1].starts_at + timedelta(minutes=5)
+        slots[1].status = 'booked'
+        db.session.commit()
+
+        result = EventsService.generate_slots(win.id)
+        db.session.expire_all()
+
+        self.assertEqual(result['updated'], 1)
+        self.assertEqual(slots[0].ends_at - slots[0].starts_at, timedelta(minutes=15))
+        self.assertEqual(slots[1].ends_at - slots[1].starts_at, timedelta(minutes=5))
+
+    def test_bulk_generates_every_window(self):
+        self._window(self.ev, time(9, 0), time(10, 0))
+        self._window(self.ev, time(11, 0), time(12, 0), minutes=30)
+
+        result = EventsService.generate_slots_bulk(self.ev.id)
+
+        self.assertEqual(result['created'], 6)
+        self.assertEqual(result['conflicts'], [])
+        self.assertEqual(len(EventsService.list_slots(event_id=self.ev.id)), 6)
+        self.assertTrue(all(w.slots_generated for w in EventWindow.query.filter_by(event_id=self.ev.id)))
+
+    def test_bulk_skips_overlapping_windows_of_same_event(self):
+        a = self._window(self.ev, time(9, 0), time(10, 0))
+        b = self._window(self.ev, time(9, 30), time(10, 30))
+        c = self._window(self.ev, time(10, 30), time(11, 0))
+
+        result = EventsService.generate_slots_bulk(self.ev.id)
+
+        self.assertEqual(len(result['conflicts']), 1)
+        conflict = result['conflicts'][0]
+        self.assertEqual(conflict['type'], 'window_overlap')
+        self.assertEqual({conflict['window_id'], conflict['other_window_id']}, {a.id, b.id})
+        self.assertEqual(result['skipped_windows'], sorted([a.id, b.id]))
+        self.assertEqual(list(result['windows']), [c.id])
+        self.assertEqual(result['created'], 2)
+
+    def test_bulk_detects_shared_interviewer_across_events(self):
+        ev_a = self._make_interview('Entrevistas B', host=self.interviewer)
+        ev_b = self._make_interview('Entrevistas C', host=self.interviewer)
+        db.session.commit()
+        own = self._window(ev_a, time(9, 0), time(10, 0))
+        other = self._window(ev_b, time(9, 45), time(11, 0))
+        # Sin anfitrión compartido: no es conflicto
+        self._window(self.ev, time(9, 0), time(10, 0))
+
+        result = EventsService.generate_slots_bulk(ev_a.id)
+
+        self.assertEqual(len(result['conflicts']), 1)
+        conflict = result['conflicts'][0]
+        self.assertEqual(conflict['type'], 'host_overlap')
+        self.assertEqual(conflict['window_id'], own.id)
+        self.assertEqual(conflict['other_window_id'], other.id)
+        self.assertEqual(conflict['other_event_id'], ev_b.id)
+        self.assertEqual(conflict['user_ids'], [self.interviewer.id])
+        self.assertEqual(result['created'], 0)
+
+        forced = EventsService.generate_slots_bulk(ev_a.id, skip_conflicts=False)
+        self.assertEqual(forced['created'], 4)
+        self.assertEqual(len(forced['conflicts']), 1)
+
+
 class TestRegistration(unittest.TestCase):
 
     def setUp(self):
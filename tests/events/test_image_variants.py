@@ -0,0 +1,177 @@
+# tests/events/test_image_variants.py
+"""
+Derivadas responsivas de imágenes de eventos:
+
+  - build_image_variants: WebP/JPEG por ancho fijo, sin agrandar, placeholder
+  - la subida encola la tarea; la tarea las registra en EventImage
+  - event_image negocia ancho (?w=) y formato (Accept) con fallback al original
+  - borrar/reemplazar la imagen borra sus derivadas
+"""
+
+import io
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+
+from app import create_app, db
+from app.models.event import EventImage
+from app.services.events_service import EventsService
+from app.tasks.events import generate_event_image_variants
+from app.utils import image_processing as ip
+from tests.events.conftest import (
+    login, make_event, make_program, make_role, make_test_config, make_user,
+)
+
+
+def _png(width, height, color=(200, 30, 30)):
+    buf = io.BytesIO()
+    Image.new('RGB', (width, height), color).save(buf, format='PNG')
+    buf.seek(0)
+    return buf
+
+
+def _upload(width=2000, height=1000, name='foto.png'):
+    return FileStorage(stream=_png(width, height), filename=name, content_type='image/png')
+
+
+@patch('app.tasks.events.generate_event_image_variants.apply_async')
+class TestEventImageVariants(unittest.TestCase):
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp(prefix='siiap_variants_'))
+        self.app = create_app(make_test_config(str(self.root)))
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.coord = make_user(make_role('program_admin'), '_coord')
+        self.ev = make_event(self.coord.id, program_id=make_program(self.coord).id)
+        db.session.commit()
+        self.events_folder = self.root / 'events'
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _gallery_image(self, mock_apply, **kw):
+        image = EventsService.upload_event_gallery_image(self.ev.id, _upload(**kw))
+        generate_event_image_variants.run(**mock_apply.call_args.kwargs['kwargs'])
+        db.session.expire_all()
+        return db.session.get(EventImage, image.id)
+
+    # ── pipeline ─────────────────────────────────────────────────────────
+
+    def test_builds_each_width_and_format_without_upscaling(self, mock_apply):
+        rel = f'{self.ev.id}/gallery/big.png'
+        (self.events_folder / rel).parent.mkdir(parents=True)
+        (self.events_folder / rel).write_bytes(_png(2000, 1000).getvalue())
+
+        result = ip.build_image_variants(self.events_folder, rel)
+
+        self.assertEqual((result['width'], result['height']), (2000, 1000))
+        self.assertEqual(
+            {(v['w'], v['format']) for v in result['variants']},
+            {(w, f) for w in ip.VARIANT_WIDTHS for f in ip.VARIANT_FORMATS},
+        )
+        with Image.open(self.events_folder / f'{self.ev.id}/gallery/_v/big-640.webp') as img:
+            self.assertEqual((img.format, img.size), ('WEBP', (640, 320)))
+        self.assertTrue(result['placeholder'].startswith('data:image/webp;base64,'))
+        self.assertLess(len(result['placeholder']), 1024)
+
+        small = ip.build_image_variants(
+            self.events_folder, self._write_png(f'{self.ev.id}/gallery/small.png', 200, 100))
+        self.assertEqual({v['w'] for v in small['variants']}, {200})
+
+    def _write_png(self, rel, width, height):
+        path = self.events_folder / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(_png(width, height).getvalue())
+        return rel
+
+    def test_upload_enqueues_task_that_records_variants(self, mock_apply):
+        image = self._gallery_image(mock_apply)
+
+        mock_apply.assert_called_once()
+        self.assertEqual(mock_apply.call_args.kwargs['kwargs']['image_id'], image.id)
+        self.assertEqual((image.width, image.height), (2000, 1000))
+        self.assertEqual(len(image.variants), len(ip.VARIANT_WIDTHS) * len(ip.VARIANT_FORMATS))
+        self.assertTrue(all((self.events_folder / v['path']).is_file() for v in image.variants))
+        data = image.to_dict()
+        self.assertEqual(data['widths'], list(ip.VARIANT_WIDTHS))
+        self.assertEqual(data['placeholder'], image.placeholder)
+
+    def test_task_discards_variants_of_deleted_image(self, mock_apply):
+        image = EventsService.upload_event_gallery_image(self.ev.id, _upload())
+        kwargs = mock_apply.call_args.kwargs['kwargs']
+        # Se borra la fila pero el archivo sigue (p.ej. borrado concurrente a medias)
+        db.session.delete(image)
+        db.session.commit()
+
+        result = generate_event_image_variants.run(**kwargs)
+
+        self.assertEqual(result['variants'], 0)
+        self.assertFalse(any((self.events_folder / f'{self.ev.id}/gallery/_v').iterdir()))
+
+    def test_unreadable_image_is_not_retried(self, mock_apply):
+        rel = f'{self.ev.id}/hosts/roto.jpg'
+        (self.events_folder / rel).parent.mkdir(parents=True)
+        (self.events_folder / rel).write_bytes(b'no es una imagen')
+
+        result = generate_event_image_variants.run(rel_path=rel)
+
+        self.assertEqual(result['variants'], 0)
+        self.assertIn('error', result)
+
+    def test_delete_and_cover_replacement_remove_variants(self, mock_apply):
+        image = self._gallery_image(mock_apply)
+        variant = self.events_folder / image.variants[0]['path']
+        EventsService.delete_event_image(image.id)
+        self.assertFalse(variant.exists())
+
+        EventsService.upload_event_cover(self.ev.id, _upload(name='a.png'))
+        generate_event_image_variants.run(**mock_apply.call_args.kwargs['kwargs'])
+        stale = self.events_folder / f'{self.ev.id}/_v/cover-320.webp'
+        self.assertTrue(stale.exists())
+
+        EventsService.upload_event_cover(self.ev.id, _upload(name='b.jpg'))
+        self.assertFalse(stale.exists())
+
+    # ── negociación en /files/event ──────────────────────────────────────
+
+    def test_event_image_negotiates_width_and_format(self, mock_apply):
+        image = EventsService.upload_event_gallery_image(self.ev.id, _upload())
+        filename = image.path.rsplit('/', 1)[-1]
+        url = f'/files/event/{self.ev.id}/gallery/{filename}'
+        client = self.app.test_client()
+        login(client, self.coord)
+
+        # Aún sin derivadas: el original
+        resp = client.get(f'{url}?w=300', headers={'Accept': 'image/webp,*/*'})
+        self.assertEqual(resp.mimetype, 'image/png')
+        resp.close()
+
+        generate_event_image_variants.run(**mock_apply.call_args.kwargs['kwargs'])
+
+        resp = client.get(f'{url}?w=300', headers={'Accept': 'image/avif,image/webp,*/*'})
+        self.assertEqual(resp.mimetype, 'image/webp')
+        self.assertIn('Accept', resp.headers['Vary'])
+        with Image.open(io.BytesIO(resp.get_data())) as img:
+            self.assertEqual(img.width, 320)
+
+        resp = client.get(f'{url}?w=900', headers={'Accept': 'image/png,*/*'})
+        self.assertEqual(resp.mimetype, 'image/jpeg')
+        with Image.open(io.BytesIO(resp.get_data())) as img:
+            self.assertEqual(img.width, 1280)
+
+        # Sin ?w= la derivada más grande, nunca el original de 5 MB
+        resp = client.get(url, headers={'Accept': 'image/webp'})
+        self.assertLess(len(resp.get_data()), (self.events_folder / image.path).stat().st_size)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+# tests/events/test_reminders.py
+"""
+Tests for EventReminderService.dispatch_due_reminders:
+
+  - one recipients query for every due event (registered + accepted
+    invitations + 1:1 appointments), already-reminded users excluded
+  - logs inserted with ON CONFLICT DO NOTHING, one transaction per event
+  - bulk notifications + emails, constant query count per event
+"""
+
+import unittest
+from datetime import timedelta
+from unittest.mock import patch
+
+from app import create_app, db
+from app.models.appointment import Appointment
+from app.models.email_queue import EmailQueue
+from app.models.event import (
+    Event, EventAttendance, EventInvitation, EventReminderLog, EventSlot, EventWindow,
+)
+from app.models.notification import Notification
+from app.services.event_reminder_service import EventReminderService
+from app.utils.datetime_utils import now_local
+from tests.events.conftest import make_program, make_role, make_test_config, make_user
+from tests.utils import count_queries
+
+
+@patch('app.tasks.notifications.send_emails_batch_async.apply_async')
+class TestEventReminders(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app(make_test_config())
+        # Las plantillas de correo requieren contexto de request
+        self.ctx = self.app.test_request_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.role = make_role('student')
+        self.coordinator = make_user(make_role('program_admin'), '_coord')
+        self.program = make_program(self.coordinator)
+        self.starts = now_local().replace(microsecond=0) + timedelta(hours=24)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    # ── helpers ──────────────────────────────────────────────────────────
+
+    def _event(self, capacity_type='multiple', title='Seminario', reminders_enabled=True):
+        ev = Event(
+            program_id=self.program.id, title=title,
+            created_by=self.coordinator.id, capacity_type=capacity_type,
+            status='published', reminders_enabled=reminders_enabled,
+            event_date=self.starts if capacity_type != 'single' else None,
+        )
+        db.session.add(ev)
+        db.session.flush()
+        return ev
+
+    def _attendees(self, ev, count, prefix):
+        users = [make_user(self.role, f'_{prefix}{i}') for i in range(count)]
+        db.session.add_all([EventAttendance(event_id=ev.id, user_id=u.id) for u in users])
+        db.session.flush()
+        return users
+
+    def _appointment(self, ev, user, starts_at):
+        window = EventWindow(event_id=ev.id, date=starts_at.date(),
+                             start_time=starts_at.time(),
+                             end_time=(starts_at + timedelta(minutes=30)).time(),
+                             slot_minutes=30)
+        db.session.add(window)
+        db.session.flush()
+        slot = EventSlot(event_window_id=window.id, starts_at=starts_at,
+                         ends_at=starts_at + timedelta(minutes=30), status='booked')
+        db.session.add(slot)
+        db.session.flush()
+        appt = Appointment(event_id=ev.id, slot_id=slot.id, applicant_id=user.id)
+        db.session.add(appt)
+        db.session.flush()
+        return appt
+
+    # ── tests ────────────────────────────────────────────────────────────
+
+    def test_sends_to_registered_invited_and_appointments_once(self, mock_apply):
+        seminar = self._event()
+        attendees = self._attendees(seminar, 3, 'a')
+        guest = make_user(self.role, '_guest')
+        db.session.add_all([
+            EventInvitation(event_id=seminar.id, user_id=guest.id, status='accepted'),
+            # Registrado e invitado a la vez: un solo recordatorio
+            EventInvitation(event_id=seminar.id, user_id=attendees[0].id, status='accepted'),
+            EventInvitation(event_id=seminar.id, user_id=make_user(self.role, '_p').id,
+                            status='pending'),
+        ])
+        interview = self._event('single', title='Entrevista')
+        applicant = make_user(self.role, '_appl')
+        appt = self._appointment(interview, applicant, self.starts)
+        db.session.commit()
+
+        stats = EventReminderService.dispatch_due_reminders('24h')
+
+        self.assertEqual(stats, {'sent': 5, 'skipped': 0, 'failed': 0})
+        logs = EventReminderLog.query.all()
+        self.assertEqual(len(logs), 5)
+        self.assertEqual(
+            {log.appointment_id for log in logs if log.event_id == interview.id}, {appt.id}
+        )
+        notif = Notification.query.filter_by(user_id=guest.id).one()
+        self.assertEqual(notif.type, 'event_reminder_24h')
+        self.assertIn('Seminario', notif.message)
+        self.assertEqual(EmailQueue.query.count(), 5)
+        self.assertEqual(
+            EmailQueue.query.filter_by(user_id=guest.id).one().notification_id, notif.id
+        )
+
+        again = EventReminderService.dispatch_due_reminders('24h')
+        self.assertEqual(again, {'sent': 0, 'skipped': 5, 'failed': 0})
+        self.assertEqual(Notification.query.count(), 5)
+
+    def test_only_missing_recipients_get_reminded(self, mock_apply):
+        seminar = self._event()
+        users = self._attendees(seminar, 3, 'm')
+        db.session.add(EventReminderLog(event_id=seminar.id, user_id=users[0].id,
+                                        reminder_type='24h'))
+        db.session.commit()
+
+        stats = EventReminderService.dispatch_due_reminders('24h')
+
+        self.assertEqual(stats, {'sent': 2, 'skipped': 1, 'failed': 0})
+        self.assertEqual({n.user_id for n in Notification.query.all()},
+                         {users[1].id, users[2].id})
+
+    def test_concurrent_log_is_ignored_on_insert(self, mock_apply):
+        interview = self._event('single', title='Entrevista')
+        applicant = make_user(self.role, '_race')
+        appt = self._appointment(interview, applicant, self.starts)
+        db.session.commit()
+
+        # Otro dispatcher inserta el log entre la consulta y el INSERT
+        real = EventReminderService._insert_logs
+
+        def _racing(event_id, recipients, window_type):
+            db.session.add(EventReminderLog(event_id=event_id, user_id=applicant.id,
+                                            appointment_id=appt.id, reminder_type=window_type))
+            db.session.flush()
+            return real(event_id, recipients, window_type)
+
+        with patch.object(EventReminderService, '_insert_logs', side_effect=_racing):
+            stats = EventReminderService.dispatch_due_reminders('24h')
+
+        self.assertEqual(stats, {'sent': 0, 'skipped': 1, 'failed': 0})
+        self.assertEqual(Notification.query.count(), 0)
+
+    def test_query_count_does_not_grow_with_attendees(self, mock_apply):
+        small = self._event(title='Chico')
+        self._attendees(small, 2, 's')
+        db.session.commit()
+        with count_queries() as few:
+            EventReminderService.dispatch_due_reminders('24h')
+
+        large = self._event(title='Grande')
+        self._attendees(large, 60, 'l')
+        db.session.commit()
+        with count_queries() as many:
+            stats = EventReminderService.dispatch_due_reminders('24h')
+
+        self.assertEqual(stats['sent'], 60)
+        self.assertEqual(len(many), len(few))
+
+    def test_events_outside_window_or_disabled_are_ignored(self, mock_apply):
+        later = self._event(title='Luego')
+        later.event_date = self.starts + timedelta(days=3)
+        muted = self._event(title='Silenciado', reminders_enabled=False)
+        self._attendees(later, 1, 'x')
+        self._attendees(muted, 1, 'y')
+        db.session.commit()
+
+        stats = EventReminderService.dispatch_due_reminders('24h')
+
+        self.assertEqual(stats, {'sent': 0, 'skipped': 0, 'failed': 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,273 @@
+# tests/events/test_user_counters.py
+"""
+Tests for the materialized per-user badge counters (app.utils.user_counters):
+
+  - NotificationService.get_unread_count served from cache after first read
+  - create / mark_as_read / mark_all_as_read / delete update it after commit
+  - rollback discards queued deltas
+  - count_new_events cached, reset by mark_events_seen, +1 on public publish
+  - archive invalidates cached new-event counts
+  - without Redis every read falls back to the DB
+  - a failed Redis write drops the counter so the next read recomputes it
+"""
+
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models.event import Event
+from app.services.events_service import EventsService
+from app.services.notification_service import NotificationService
+from app.utils import user_counters
+from tests.events.conftest import (
+    make_test_config, make_role, make_user, make_academic_period,
+)
+
+
+class _FakeRedis:
+    """Subconjunto de comandos Redis usado por user_counters."""
+
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        value = self.store.get(key)
+        return None if value is None else str(value)
+
+    def set(self, key, value, ex=None):
+        self.store[key] = int(value)
+
+    def incrby(self, key, amount):
+        self.store[key] = int(self.store.get(key, 0)) + amount
+        return self.store[key]
+
+    def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+    def sadd(self, key, *members):
+        self.store.setdefault(key, set()).update(str(m) for m in members)
+
+    def smembers(self, key):
+        return set(self.store.get(key, set()))
+
+    def expire(self, key, ttl):
+        return True
+
+    def pipeline(self, transaction=False):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        def _queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return _queue
+
+    def execute(self):
+        out = [getattr(self.client, n)(*a, **k) for n, a, k in self.calls]
+        self.calls = []
+        return out
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+
+
+class TestUserCounters(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app(make_test_config(tempfile.mkdtemp(prefix='siiap_counters_')))
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.role_admin = make_role('program_admin')
+        self.admin = make_user(self.role_admin, suffix='_adm')
+        self.role_student = make_role('student')
+        self.student = make_user(self.role_student, suffix='_stu')
+        self.period = make_academic_period(is_active=True)
+        db.session.commit()
+
+        self.redis = _FakeRedis()
+        self.emitted = []
+        self.patches = [
+            patch.object(user_counters, 'get_redis', return_value=self.redis),
+            patch('app.sockets.emitters.emit_to_user',
+                  side_effect=lambda ev, payload, uid: self.emitted.append((ev, payload, uid))),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        user_counters._stale.clear()
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _notify(self, title='Hola'):
+        n = NotificationService.create_notification(
+            user_id=self.student.id, notification_type='system',
+            title=title, message='m',
+        )
+        db.session.commit()
+        return n
+
+    def _queries_during(self, fn):
+        counter = _QueryCounter()
+        event.listen(db.engine, 'before_cursor_execute', counter)
+        try:
+            result = fn()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', counter)
+        return result, counter.count
+
+    # ------------------------------------------------------------------
+    # Notificaciones no leídas
+    # ------------------------------------------------------------------
+
+    def test_unread_count_cached_after_first_read(self):
+        self._notify()
+        self.assertEqual(NotificationService.get_unread_count(self.student.id), 1)
+        count, queries = self._queries_during(
+            lambda: NotificationService.get_unread_count(self.student.id)
+        )
+        self.assertEqual(count, 1)
+        self.assertEqual(queries, 0)
+
+    def test_create_read_delete_update_counter_and_push(self):
+        n1 = self._notify('uno')
+        self.assertEqual(NotificationService.get_unread_count(self.student.id), 1)  # caché = 1
+
+        n2 = self._notify('dos')
+        self.assertEqual(self.emitted[-1], ('notifications:unread_count', {'count': 2}, self.student.id))
+
+        NotificationService.mark_as_read(n1.id, self.student.id)
+        db.session.commit()
+        self.assertEqual(self.emitted[-1][1], {'count': 1})
+
+        self._notify('tres')
+        NotificationService.delete_notification(n2.id, self.student.id)
+        db.session.commit()
+        self.assertEqual(self.emitted[-1][1], {'count': 1})
+        self.assertEqual(NotificationService.get_unread_count(self.student.id), 1)
+
+        NotificationService.mark_all_as_read(self.student.id)
+        db.session.commit()
+        self.assertEqual(self.emitted[-1][1], {'count': 0})
+        self.assertEqual(NotificationService.get_unread_count(self.student.id), 0)
+        self.assertEqual(NotificationService._count_unread_db(self.student.id), 0)
+
+    def test_rollback_discards_queued_delta(self):
+        self._notify()
+        self.assertEqual(NotificationService.get_unread_count(self.student.id), 1)
+        self._notify()
+        self.assertEqual(NotificationService.get_unread_count(self.student.id), 2)
+
+        NotificationService.create_notification(
+            user_id=self.student.id, notification_type='system', title='x', message='x',
+        )
+        db.session.rollback()
+        self.assertEqual(NotificationService.get_unread_count(self.student.id), 2)
+
+    def test_bulk_notifications_increment_without_per_user_push(self):
+        self._notify()
+        NotificationService.get_unread_count(self.student.id)
+        self._notify()
+        self.emitted.clear()
+        NotificationService.create_bulk_notifications(
+            [self.student.id], 'system', 't', 'm',
+        )
+        db.session.commit()
+        self.assertEqual(NotificationService.get_unread_count(self.student.id), 3)
+        self.assertEqual(self.emitted, [])
+
+    def test_without_redis_falls_back_to_db(self):
+        with patch.object(user_counters, 'get_redis', return_value=None):
+            self._notify()
+            self._notify()
+            self.assertEqual(NotificationService.get_unread_count(self.student.id), 2)
+        self.assertEqual(self.redis.store, {})
+
+    def test_failed_write_drops_counter(self):
+        self._notify()
+        self.assertEqual(NotificationService.get_unread_count(self.student.id), 1)
+
+        with patch.object(_FakePipeline, 'execute', side_effect=ConnectionError('caído')), \
+                patch.object(user_counters, 'report_redis_failure'):
+            self._notify()
+        self.assertNotIn(f'siiap:cnt:unread:{self.student.id}', self.redis.store)
+        self.assertEqual(NotificationService.get_unread_count(self.student.id), 2)
+
+    def test_counter_dropped_once_redis_is_back(self):
+        self._notify()
+        self.assertEqual(NotificationService.get_unread_count(self.student.id), 1)
+
+        # Ni el INCRBY ni el DEL llegan a Redis
+        with patch.object(_FakePipeline, 'execute', side_effect=ConnectionError('caído')), \
+                patch.object(_FakeRedis, 'delete', side_effect=ConnectionError('caído')), \
+                patch.object(user_counters, 'report_redis_failure'):
+            self._notify()
+        self.assertEqual(self.redis.store[f'siiap:cnt:unread:{self.student.id}'], 1)
+
+        # Con Redis de vuelta, la clave pendiente se borra antes de leerla
+        self.assertEqual(NotificationService.get_unread_count(self.student.id), 2)
+        self.assertEqual(user_counters._stale, set())
+
+    # ------------------------------------------------------------------
+    # Eventos nuevos
+    # ------------------------------------------------------------------
+
+    def _publish_public(self, title='Nuevo'):
+        return EventsService.create_event(
+            program_id=None, type_='conference', title=title,
+            description='', location='', created_by=self.admin.id,
+            capacity_type='multiple', max_capacity=50,
+            academic_period_id=self.period.id,
+        )
+
+    def test_new_events_cached_and_reset_by_mark_seen(self):
+        self._publish_public()
+        self.assertEqual(EventsService.count_new_events(self.student.id), 1)
+        _, queries = self._queries_during(
+            lambda: EventsService.count_new_events(self.student.id)
+        )
+        self.assertEqual(queries, 0)
+
+        EventsService.mark_events_seen(self.student.id)
+        self.assertEqual(self.emitted[-1], ('events:new_count', {'count': 0}, self.student.id))
+        self.assertEqual(EventsService.count_new_events(self.student.id), 0)
+
+    def test_publish_increments_audience_and_archive_invalidates(self):
+        first = self._publish_public('A')
+        EventsService.count_new_events(self.student.id)          # 1 en caché
+        EventsService.count_new_events(self.admin.id)            # admin también en caché
+
+        self._publish_public('B')
+        self.assertEqual(self.emitted[-1], ('events:new_count', {'count': 2}, self.student.id))
+        self.assertEqual(EventsService.count_new_events(self.student.id), 2)
+        # El creador no es audiencia: su valor se invalidó
+        self.assertNotIn(f'siiap:cnt:new_events:{self.admin.id}', self.redis.store)
+
+        with self.app.test_request_context():
+            EventsService.archive_event(first.id, self.admin.id)
+        self.assertNotIn(f'siiap:cnt:new_events:{self.student.id}', self.redis.store)
+        self.assertEqual(EventsService.count_new_events(self.student.id), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
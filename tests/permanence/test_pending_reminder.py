@@ -0,0 +1,115 @@
+# tests/permanence/test_pending_reminder.py
+"""
+Aviso semanal de inscripción pendiente (notify_pending_permanence_docs):
+destinatarios con una sola consulta, inserción masiva y sin repetir el
+aviso dentro de la misma semana.
+"""
+
+import unittest
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from app import create_app, db
+from app.models.notification import Notification
+from app.tasks.maintenance import notify_pending_permanence_docs
+from app.utils.datetime_utils import now_local
+from app.utils.period_calendar import get_period_calendar
+
+from tests.permanence.conftest import (
+    make_test_config, make_role, make_user, make_program, make_period,
+    make_user_program, make_enrollment,
+)
+from tests.utils import count_queries
+
+
+class TestPendingPermanenceReminder(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app(make_test_config())
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.role_student = make_role('student')
+        coord = make_user(make_role('program_admin'), suffix='_coord')
+        self.program = make_program(coord)
+        self.past = make_period('20251', date(2025, 1, 15))
+        self.active = make_period('20253', date(2025, 8, 1), is_active=True)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _student(self, suffix, confirmed=None):
+        """confirmed=None → sin inscripción en el período activo."""
+        user = make_user(self.role_student, suffix=suffix)
+        up = make_user_program(user, self.program, self.past, semester=2)
+        make_enrollment(up, self.past, 1, status='completed', confirmed=True)
+        if confirmed is not None:
+            make_enrollment(up, self.active, 2, confirmed=confirmed)
+        return user
+
+    def _run(self):
+        return notify_pending_permanence_docs.run()
+
+    def test_notifies_only_unconfirmed_students(self):
+        missing = self._student('_missing')
+        unconfirmed = self._student('_unconfirmed', confirmed=False)
+        self._student('_confirmed', confirmed=True)
+        db.session.commit()
+
+        result = self._run()
+
+        self.assertEqual(result['notified'], 2)
+        self.assertEqual(
+            {n.user_id for n in Notification.query.filter_by(type='permanence_pending')},
+            {missing.id, unconfirmed.id},
+        )
+
+    def test_does_not_repeat_within_the_same_week(self):
+        student = self._student('_weekly')
+        db.session.commit()
+
+        self.assertEqual(self._run()['notified'], 1)
+        self.assertEqual(self._run()['notified'], 0)
+
+        # El aviso de la semana pasada no cuenta
+        old = Notification.query.filter_by(user_id=student.id).one()
+        old.created_at = now_local() - timedelta(days=7)
+        db.session.commit()
+        self.assertEqual(self._run()['notified'], 1)
+
+    @patch('app.extensions.socketio.emit')
+    def test_query_count_does_not_grow_with_students(self, mock_emit):
+        for i in range(3):
+            self._student(f'_a{i}')
+        db.session.commit()
+        get_period_calendar()  # la carga única del calendario no cuenta
+        with count_queries() as few:
+            self._run()
+        few_other = self._other_emits(mock_emit)
+
+        Notification.query.delete()
+        for i in range(30):
+            self._student(f'_b{i}')
+        db.session.commit()
+        mock_emit.reset_mock()
+        with count_queries() as many:
+            result = self._run()
+
+        self.assertEqual(result['notified'], 33)
+        self.assertEqual(len(many), len(few))
+        # Un 'notification:new' por alumno (con su id real); nada más crece
+        new_calls = [c for c in mock_emit.call_args_list if c.args[0] == 'notification:new']
+        self.assertEqual(len(new_calls), 33)
+        self.assertEqual(self._other_emits(mock_emit), few_other)
+
+    @staticmethod
+    def _other_emits(mock_emit):
+        return sum(1 for c in mock_emit.call_args_list if c.args[0] != 'notification:new')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,7 @@ Tests for profile_photo_service:
   - First upload allowed regardless of photo_change_allowed
   - Subsequent upload blocked unless flag is set
   - upload_photo resets flag to False
+  - each upload gets a new file name (avatar URLs are cached as immutable)
   - request_photo_change sets timestamp + notifies coordinators
   - enable_photo_change(approve=True) sets flag, (False) clears request
   - list_pending_photo_requests returns only the coordinator's program students
@@ -62,7 +63,8 @@ class TestUploadPhoto(unittest.TestCase):
     def test_first_upload_allowed(self):
         fs = _make_jpeg_filestorage()
         user = svc.upload_photo(self.student.id, fs, requester_id=self.student.id, is_self=True)
-        self.assertEqual(user.avatar, 'avatar.jpg')
+        self.assertTrue(user.avatar.startswith(svc.AVATAR_PREFIX))
+        self.assertTrue(user.avatar.endswith('.jpg'))
 
     def test_second_upload_blocked_without_authorization(self):
         # First
@@ -71,12 +73,16 @@ class TestUploadPhoto(unittest.TestCase):
             svc.upload_photo(self.student.id, _make_jpeg_filestorage(), requester_id=self.student.id)
 
     def test_second_upload_allowed_after_authorization(self):
-        svc.upload_photo(self.student.id, _make_jpeg_filestorage(), requester_id=self.student.id)
+        first = svc.upload_photo(self.student.id, _make_jpeg_filestorage(),
+                                 requester_id=self.student.id).avatar
         # Coordinator authorizes
         svc.enable_photo_change(self.student.id, self.coord.id, approve=True)
         # Student uploads again
         user = svc.upload_photo(self.student.id, _make_jpeg_filestorage(), requester_id=self.student.id)
-        self.assertEqual(user.avatar, 'avatar.jpg')
+        # New name → new URL; the previous file is removed
+        self.assertNotEqual(user.avatar, first)
+        folder = self.app.config['AVATAR_FOLDER'] / str(self.student.id)
+        self.assertEqual([f.name for f in folder.iterdir()], [user.avatar])
         self.assertFalse(user.photo_change_allowed)
         self.assertIsNone(user.photo_change_requested_at)
 
@@ -87,7 +93,7 @@ class TestUploadPhoto(unittest.TestCase):
             self.student.id, _make_jpeg_filestorage(),
             requester_id=self.coord.id, is_self=False,
         )
-        self.assertEqual(user.avatar, 'avatar.jpg')
+        self.assertTrue(user.avatar.startswith(svc.AVATAR_PREFIX))
         # Notification to student must exist
         notifs = Notification.query.filter_by(
             user_id=self.student.id,
@@ -47,7 +47,8 @@ from app.models.retention_policy import RetentionPolicy
 def app(monkeypatch):
     """
     Flask app with SQLite in-memory DB plus a temp directory that serves both
-    as UPLOAD_FOLDER and as the base for the backup directory.
+    as UPLOAD_FOLDER (documents under <tmp>/documents) and as the base for
+    the backup directory.
 
     We monkeypatch app.services.applicant_archive_service._BACKUPS_DIR so the
     service writes ZIPs into the temp tree rather than instance/backups/purge.
@@ -92,12 +93,6 @@ def app(monkeypatch):
     monkeypatch.setattr(svc_mod, '_ensure_backups_dir', _patched_ensure)
     monkeypatch.setattr(svc_mod, '_archive_path_for', _patched_archive_path)
 
-    # Patch Config.UPLOAD_FOLDER used by the service for file resolution.
-    # The service reads Config.UPLOAD_FOLDER at call time (not import time) via
-    # Path(Config.UPLOAD_FOLDER), so patching the class attribute is enough.
-    import app.config as config_mod
-    monkeypatch.setattr(config_mod.Config, 'UPLOAD_FOLDER', tmp_root)
-
     with application.app_context():
         db.create_all()
         yield application
@@ -112,8 +107,11 @@ def client(app):
 
 @pytest.fixture
 def upload_root(app):
-    """Returns the Path used as UPLOAD_FOLDER (tmp root)."""
-    return Path(app.config['UPLOAD_FOLDER'])
+    """
+    Returns the Path documents are stored under (USER_DOCS_FOLDER), the
+    same root the inventory, the ZIP builder and the purge resolve against.
+    """
+    return Path(app.config['USER_DOCS_FOLDER'])
 
 
 @pytest.fixture
@@ -348,6 +346,8 @@ def make_applicant(app, program, program_structure, periods, upload_root):
                 program_step_id=program_structure['ps'].id,
                 semester=1,
             )
+            # Inventario como lo deja save_user_doc al subir
+            sub.size_bytes = (upload_root / rel_path).stat().st_size
             db.session.add(sub)
             db.session.flush()
 
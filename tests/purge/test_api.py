@@ -320,6 +320,39 @@ class TestDownloadArchive:
         assert resp.status_code == 200
         assert 'zip' in resp.content_type
 
+    def test_download_behind_nginx_uses_accel_redirect_and_marks_downloaded(
+        self, app, client, roles, permissions, postgrad_admin,
+        applicant_user_factory, make_applicant
+    ):
+        user = applicant_user_factory(suffix='dlaccel')
+        up, sub = make_applicant(user, status='expired', with_file=True)
+        db.session.commit()
+
+        run = svc.create_purge_run(
+            user_program_ids=[up.id],
+            purge_type='admission_expired_with_files',
+            initiated_by_id=postgrad_admin.id,
+        )
+        db.session.commit()
+
+        app.config['X_ACCEL_REDIRECT'] = True
+        _login_postgrad(client, postgrad_admin)
+        resp = client.get(f'{BASE}/{run.run_id}/archive.zip')
+        assert resp.status_code == 200
+        assert resp.data == b''
+        assert resp.headers['X-Accel-Redirect'] == (
+            f'/_protected/uploads/backups/purge/{run.run_id}.zip'
+        )
+        assert resp.headers['Content-Disposition'] == (
+            f'attachment; filename=purge_{run.run_id}.zip'
+        )
+        resp.close()
+
+        db.session.expire_all()
+        refreshed = PurgeRun.query.filter_by(run_id=run.run_id).one()
+        assert refreshed.status == 'downloaded'
+        assert refreshed.archive_downloaded_at is not None
+
     def test_download_purged_run_returns_409(
         self, client, roles, permissions, postgrad_admin,
         applicant_user_factory, make_applicant
@@ -0,0 +1,191 @@
+# tests/purge/test_archive_build.py
+"""
+Tests for the single-pass archive builder behind create_purge_run.
+
+Checks:
+  - Already-compressed formats are stored (ZIP_STORED), the rest deflated.
+  - Large file sets go through the read-ahead thread pool and stay intact.
+  - progress_callback reports (done, total) and ends at (total, total).
+  - Query count does not grow with the number of UserPrograms.
+  - POST /start with async=true enqueues build_purge_run and answers 202.
+  - GET /tasks/<task_id> only reports build_purge_run tasks.
+"""
+
+import zipfile
+from unittest.mock import patch
+
+from app import db
+from app.models.submission import Submission
+import app.services.applicant_archive_service as svc
+
+from tests.purge.conftest import _write_fake_file, csrf, login
+from tests.utils import count_queries
+
+
+BASE = '/api/v1/admin/purge'
+
+
+def _add_file(up, program_structure, upload_root, filename, content=None):
+    rel = _write_fake_file(upload_root, up.user_id, filename)
+    if content is not None:
+        (upload_root / rel).write_bytes(content)
+    db.session.add(Submission(
+        file_path=rel,
+        status='approved',
+        user_id=up.user_id,
+        archive_id=program_structure['archive'].id,
+        program_step_id=program_structure['ps'].id,
+        semester=1,
+    ))
+    db.session.flush()
+
+
+def _count_queries(fn):
+    with count_queries() as statements:
+        result = fn()
+    return result, len(statements)
+
+
+class TestCompression:
+    def test_pdf_stored_and_doc_deflated(
+        self, app, applicant_user_factory, make_applicant, postgrad_admin,
+        program_structure, upload_root
+    ):
+        user = applicant_user_factory(suffix='cmp')
+        up, _ = make_applicant(user, status='expired', with_file=True)
+        _add_file(up, program_structure, upload_root, 'legacy.doc', b'x' * 4096)
+        db.session.commit()
+
+        run = svc.create_purge_run(
+            user_program_ids=[up.id],
+            purge_type='admission_expired_with_files',
+            initiated_by_id=postgrad_admin.id,
+        )
+
+        with zipfile.ZipFile(run.archive_path) as zf:
+            infos = {i.filename: i for i in zf.infolist()}
+            assert zf.testzip() is None
+        pdf = infos[f'documents/user_{user.id}/doc.pdf']
+        doc = infos[f'documents/user_{user.id}/legacy.doc']
+        assert pdf.compress_type == zipfile.ZIP_STORED
+        assert doc.compress_type == zipfile.ZIP_DEFLATED
+        assert doc.compress_size < doc.file_size
+
+
+class TestParallelBuild:
+    def test_many_files_intact_and_progress_reported(
+        self, app, applicant_user_factory, make_applicant, postgrad_admin,
+        program_structure, upload_root
+    ):
+        user = applicant_user_factory(suffix='many')
+        up, _ = make_applicant(user, status='expired', with_file=False)
+        n = svc._PARALLEL_MIN_FILES + 14
+        for i in range(n):
+            _add_file(up, program_structure, upload_root, f'f{i:02d}.pdf',
+                      f'%PDF-1.4 file {i}'.encode() * 50)
+        db.session.commit()
+
+        calls = []
+        run = svc.create_purge_run(
+            user_program_ids=[up.id],
+            purge_type='admission_expired_with_files',
+            initiated_by_id=postgrad_admin.id,
+            progress_callback=lambda done, total: calls.append((done, total)),
+        )
+
+        with zipfile.ZipFile(run.archive_path) as zf:
+            assert zf.testzip() is None
+            names = [i for i in zf.namelist() if i.startswith('documents/')]
+            assert len(names) == n
+            assert zf.read(f'documents/user_{user.id}/f07.pdf') == \
+                b'%PDF-1.4 file 7' * 50
+        assert calls[-1] == (n, n)
+        assert all(total == n for _done, total in calls)
+
+
+class TestBulkPrefetch:
+    def test_query_count_independent_of_user_programs(
+        self, app, applicant_user_factory, make_applicant, postgrad_admin
+    ):
+        def _build(count, tag):
+            ids = []
+            for i in range(count):
+                up, _ = make_applicant(
+                    applicant_user_factory(suffix=f'{tag}{i}'),
+                    status='expired', with_file=True,
+                )
+                ids.append(up.id)
+            db.session.commit()
+            return _count_queries(lambda: svc.create_purge_run(
+                user_program_ids=ids,
+                purge_type='admission_expired_with_files',
+                initiated_by_id=postgrad_admin.id,
+            ))[1]
+
+        small = _build(1, 'qa')
+        large = _build(6, 'qb')
+        # log_action valida el usuario por cada UP (identity map en general),
+        # el resto de la construcción no debe crecer con el lote.
+        assert large - small <= 6
+
+
+class TestAsyncStart:
+    def test_async_flag_enqueues_task(
+        self, client, roles, permissions, postgrad_admin,
+        applicant_user_factory, make_applicant
+    ):
+        up, _ = make_applicant(applicant_user_factory(suffix='async'),
+                               status='expired', with_file=True)
+        db.session.commit()
+        token = login(client, postgrad_admin)
+
+        class _FakeResult:
+            id = 'task-123'
+
+        with patch('app.tasks.purge.build_purge_run.apply_async',
+                   return_value=_FakeResult()) as enqueue:
+            resp = client.post(f'{BASE}/start', json={
+                'user_program_ids': [up.id],
+                'purge_type': 'admission_expired_with_files',
+                'async': True,
+            }, headers=csrf(token))
+
+        assert resp.status_code == 202
+        body = resp.get_json()
+        assert body['data']['task_id'] == 'task-123'
+        assert body['data']['status_url'] == f'{BASE}/tasks/task-123'
+        kwargs = enqueue.call_args.kwargs['kwargs']
+        assert kwargs['user_program_ids'] == [up.id]
+        assert kwargs['initiated_by_id'] == postgrad_admin.id
+
+    def test_task_status_rejects_other_task_ids(
+        self, client, roles, permissions, postgrad_admin,
+    ):
+        login(client, postgrad_admin)
+
+        class _FakeAsyncResult:
+            state = 'SUCCESS'
+            name = 'app.tasks.students.import_students_csv'
+            result = {'created': 3}
+
+        with patch('app.extensions.celery.AsyncResult', return_value=_FakeAsyncResult()):
+            resp = client.get(f'{BASE}/tasks/task-999')
+
+        assert resp.status_code == 404
+        assert resp.get_json()['data'] is None
+
+    def test_task_status_reports_own_task_progress(
+        self, client, roles, permissions, postgrad_admin,
+    ):
+        login(client, postgrad_admin)
+
+        class _FakeAsyncResult:
+            state = 'PROGRESS'
+            name = 'app.tasks.purge.build_purge_run'
+            info = {'done': 1, 'total': 4}
+
+        with patch('app.extensions.celery.AsyncResult', return_value=_FakeAsyncResult()):
+            resp = client.get(f'{BASE}/tasks/task-123')
+
+        assert resp.status_code == 200
+        assert resp.get_json()['data']['progress'] == {'done': 1, 'total': 4}
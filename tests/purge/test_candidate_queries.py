@@ -0,0 +1,142 @@
+# tests/purge/test_candidate_queries.py
+"""
+Consultas de candidatos por conjuntos (app.services.cleanup_candidate_service):
+
+  - cada categoría se resuelve en un número fijo de consultas
+  - periods_elapsed coincide con PeriodCalendar.closed_since
+  - inactive_students distingue sin inscripción / sin confirmar / confirmada
+  - paginación con total y recorrido en streaming
+  - DataCleanupService y GET /candidates exponen el total
+"""
+
+from datetime import timedelta
+
+import pytest
+
+from app import db
+from app.models.retention_policy import RetentionPolicy
+from app.models.semester_enrollment import SemesterEnrollment
+from app.services import cleanup_candidate_service as cand
+from app.services.data_cleanup_service import DataCleanupService
+from app.utils.datetime_utils import now_local
+from app.utils.period_calendar import get_period_calendar
+
+from tests.purge.conftest import login
+from tests.utils import count_queries
+
+
+BASE = '/api/v1/admin/purge'
+
+
+@pytest.fixture
+def populate(app, make_applicant, applicant_user_factory, program_structure, periods):
+    """Agrega `n` candidatos de cada categoría."""
+    db.session.add(RetentionPolicy(
+        archive_id=program_structure['archive'].id, keep_years=1,
+        keep_forever=False, apply_after='rejected',
+    ))
+    db.session.flush()
+
+    def _populate(n):
+        for _ in range(n):
+            make_applicant(applicant_user_factory(), status='expired')
+            make_applicant(applicant_user_factory(), status='in_progress', period_code='20251')
+            make_applicant(applicant_user_factory(), status='enrolled', with_file=False)
+            up, _ = make_applicant(applicant_user_factory(), status='rejected')
+            up.updated_at = now_local() - timedelta(days=800)
+        db.session.commit()
+
+    return _populate
+
+
+@pytest.mark.parametrize('category', cand.CATEGORIES)
+def test_query_count_does_not_grow(app, populate, category):
+    populate(2)
+    get_period_calendar()
+    with count_queries() as few:
+        _, total_few = cand.get_candidates(category)
+
+    populate(15)
+    with count_queries() as many:
+        items, total = cand.get_candidates(category)
+
+    assert total_few == 2
+    assert total == len(items) == 17
+    assert len(many) == len(few)
+
+
+def test_periods_elapsed_matches_calendar(app, make_applicant, applicant_user_factory, periods):
+    for code in periods:
+        make_applicant(applicant_user_factory(), status='deliberation', period_code=code)
+    db.session.commit()
+
+    calendar = get_period_calendar()
+    items, _ = cand.get_candidates('admission_delta3_plus')
+
+    assert [i['admission_period'] for i in items] == ['Period 20251']
+    for item in items:
+        code = item['admission_period'].split()[-1]
+        assert item['periods_elapsed'] == calendar.closed_since(code)
+        assert item['files_count'] == 1
+
+
+def test_inactive_students_enrollment_states(app, make_applicant, applicant_user_factory, periods):
+    active = periods['20263']
+    missing, _ = make_applicant(applicant_user_factory(), status='enrolled', with_file=False)
+    pending, _ = make_applicant(applicant_user_factory(), status='enrolled', with_file=False)
+    confirmed, _ = make_applicant(applicant_user_factory(), status='enrolled', with_file=False)
+    for up, ok in ((pending, False), (confirmed, True)):
+        db.session.add(SemesterEnrollment(
+            user_program_id=up.id, academic_period_id=active.id, semester_number=2,
+            status='confirmed' if ok else 'pending', enrollment_confirmed=ok,
+        ))
+    db.session.commit()
+
+    students, total = DataCleanupService.get_inactive_students()
+
+    assert total == 2
+    by_id = {s['user_program_id']: s for s in students}
+    assert set(by_id) == {missing.id, pending.id}
+    assert by_id[missing.id]['has_enrollment'] is False
+    assert by_id[pending.id]['has_enrollment'] is True
+    assert by_id[pending.id]['enrollment_status'] == 'pending'
+    assert by_id[pending.id]['active_period'] == active.name
+
+
+def test_pagination_and_streaming(app, populate):
+    populate(5)
+    full, total = cand.get_candidates('admission_expired_with_files')
+
+    first, first_total = cand.get_candidates('admission_expired_with_files', page=1, per_page=2)
+    last, _ = cand.get_candidates('admission_expired_with_files', page=3, per_page=2)
+    beyond, beyond_total = cand.get_candidates('admission_expired_with_files', page=9, per_page=2)
+
+    assert total == first_total == beyond_total == 5
+    assert first == full[:2]
+    assert last == full[4:]
+    assert beyond == []
+    assert list(cand.iter_candidates('admission_expired_with_files', batch_size=2)) == full
+
+    expired, expired_total = DataCleanupService.get_expired_candidates(page=1, per_page=3)
+    assert expired_total == 5 and len(expired) == 3
+    assert expired[0]['files_to_delete'] == 1
+    assert expired[0]['enrollment_period'] == 'Period 20251'
+
+    with pytest.raises(cand.UnknownCategory):
+        cand.get_candidates('nope')
+
+
+def test_candidates_endpoint_pages(app, client, permissions, postgrad_admin, populate):
+    populate(3)
+    login(client, postgrad_admin)
+
+    resp = client.get(f'{BASE}/candidates?category=retention_policy&page=2&per_page=2')
+
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert len(body['data']) == 1
+    assert body['data'][0]['policy']['apply_after'] == 'rejected'
+    assert body['meta'] == {
+        'count': 1, 'total': 3, 'category': 'retention_policy',
+        'page': 2, 'per_page': 2, 'pages': 2,
+    }
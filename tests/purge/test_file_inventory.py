@@ -0,0 +1,167 @@
+# tests/purge/test_file_inventory.py
+"""
+Inventario de archivos (app.services.file_inventory_service):
+
+  - save_user_doc + record_file_inventory guardan tamaño, sha256 y mime
+  - reconcile() detecta faltantes, reaparecidos, cambiados, filas sin
+    inventario y huérfanos
+  - los totales para la vista de purga salen de consultas agregadas
+  - GET /storage-report agrupa por programa y tipo
+  - flask reconcile-file-inventory --if-pending rellena filas anteriores
+"""
+
+import hashlib
+import io
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from app import db
+from app.models.submission import Submission
+from app.services import file_inventory_service as inv
+from app.utils.files import record_file_inventory, save_user_doc
+
+from tests.purge.conftest import login
+from tests.utils import count_queries
+
+
+BASE = '/api/v1/admin/purge'
+
+
+@pytest.fixture
+def docs_root(app, upload_root):
+    # make_applicant escribe en upload_root (USER_DOCS_FOLDER)/user_<id>/…
+    return upload_root
+
+
+# ---------------------------------------------------------------------------
+# Subida
+# ---------------------------------------------------------------------------
+
+def test_save_user_doc_records_inventory(app, applicant_user_factory, program_structure):
+    user = applicant_user_factory()
+    payload = b'%PDF-1.4 ' + b'x' * 500
+    upload = FileStorage(stream=io.BytesIO(payload), filename='acta.pdf')
+
+    stored = save_user_doc(upload, user.id, 'admission', 'acta.pdf')
+    sub = Submission(file_path=stored, status='pending', user_id=user.id,
+                     archive_id=program_structure['archive'].id,
+                     program_step_id=program_structure['ps'].id, semester=1)
+    record_file_inventory(sub, stored)
+    db.session.add(sub)
+    db.session.commit()
+
+    assert sub.file_path == f'{user.id}/admission/acta.pdf'
+    assert sub.size_bytes == len(payload)
+    assert sub.sha256 == hashlib.sha256(payload).hexdigest()
+    assert sub.mime == 'application/pdf'
+    assert sub.file_missing is False
+    assert (app.config['USER_DOCS_FOLDER'] / sub.file_path).read_bytes() == payload
+
+
+# ---------------------------------------------------------------------------
+# Reconciliación
+# ---------------------------------------------------------------------------
+
+def test_reconcile_detects_drift(app, docs_root, make_applicant, applicant_user_factory):
+    _, gone = make_applicant(applicant_user_factory())
+    _, edited = make_applicant(applicant_user_factory())
+    _, legacy = make_applicant(applicant_user_factory())
+    legacy.size_bytes = None
+    edited.sha256 = 'stale'
+    db.session.commit()
+    (docs_root / gone.file_path).unlink()
+    (docs_root / edited.file_path).write_bytes(b'%PDF-1.4 reemplazado a mano, otro tamano')
+    (docs_root / 'suelto.pdf').write_bytes(b'%PDF')
+    updated_at = gone.updated_at
+
+    stats = inv.reconcile(chunk_size=2)
+
+    assert stats['submission'] == {
+        'checked': 3, 'missing': 1, 'restored': 0, 'changed': 1, 'backfilled': 1,
+    }
+    assert stats['orphans']['USER_DOCS_FOLDER'] == 1
+    db.session.expire_all()
+    assert db.session.get(Submission, gone.id).file_missing is True
+    assert db.session.get(Submission, gone.id).updated_at == updated_at
+    fresh = db.session.get(Submission, edited.id)
+    assert fresh.sha256 == hashlib.sha256((docs_root / edited.file_path).read_bytes()).hexdigest()
+    assert db.session.get(Submission, legacy.id).size_bytes == \
+        (docs_root / legacy.file_path).stat().st_size
+
+    # El archivo vuelve: se desmarca; una segunda pasada no cambia nada
+    (docs_root / gone.file_path).write_bytes(b'%PDF-1.4 fake content for testing')
+    stats = inv.reconcile()
+    assert stats['submission']['restored'] == 1
+    assert inv.reconcile()['submission'] == {
+        'checked': 3, 'missing': 0, 'restored': 0, 'changed': 0, 'backfilled': 0,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Agregados
+# ---------------------------------------------------------------------------
+
+def test_totals_use_constant_queries(app, docs_root, make_applicant, applicant_user_factory):
+    few = [make_applicant(applicant_user_factory())[0].id for _ in range(2)]
+    db.session.commit()
+    with count_queries() as q_few:
+        inv.file_totals_by_user_program(few)
+
+    many = few + [make_applicant(applicant_user_factory())[0].id for _ in range(20)]
+    missing_up, missing_sub = make_applicant(applicant_user_factory())
+    missing_sub.file_missing = True
+    missing_id = missing_up.id
+    db.session.commit()
+    with count_queries() as q_many:
+        totals = inv.file_totals_by_user_program(many + [missing_id])
+
+    assert len(q_many) == len(q_few) == 1
+    assert len(totals) == 22
+    assert missing_id not in totals
+    assert set(totals.values()) == {(1, len(b'%PDF-1.4 fake content for testing'))}
+
+
+def test_storage_report_endpoint(app, client, permissions, postgrad_admin, program,
+                                 make_applicant, applicant_user_factory):
+    for _ in range(3):
+        make_applicant(applicant_user_factory())
+    _, unknown = make_applicant(applicant_user_factory())
+    unknown.size_bytes = None
+    db.session.commit()
+
+    login(client, postgrad_admin)
+    resp = client.get(f'{BASE}/storage-report')
+
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body['data'] == [{
+        'program_id': program.id, 'program_name': program.name, 'kind': 'submission',
+        'files': 4, 'bytes': 3 * len(b'%PDF-1.4 fake content for testing'), 'pending': 1,
+    }]
+    assert body['meta'] == {'files': 4, 'bytes': body['data'][0]['bytes'], 'pending': 1}
+
+
+def test_deploy_reconcile_backfills_legacy_rows(app, docs_root, make_applicant,
+                                                applicant_user_factory):
+    _, legacy = make_applicant(applicant_user_factory())
+    _, gone = make_applicant(applicant_user_factory())
+    for sub in (legacy, gone):
+        sub.size_bytes = None
+    db.session.commit()
+    (docs_root / gone.file_path).unlink()
+    assert inv.pending_inventory_count() == 2
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['reconcile-file-inventory', '--if-pending'])
+
+    assert result.exit_code == 0, result.output
+    assert inv.pending_inventory_count() == 0
+    db.session.expire_all()
+    assert db.session.get(Submission, legacy.id).size_bytes == \
+        (docs_root / legacy.file_path).stat().st_size
+    assert db.session.get(Submission, gone.id).file_missing is True
+
+    # Sin pendientes solo cuenta
+    result = runner.invoke(args=['reconcile-file-inventory', '--if-pending'])
+    assert 'Nada que reconciliar' in result.output
@@ -174,13 +174,16 @@ class TestListCandidatesExpiredWithFiles:
     def test_excluded_file_not_on_disk(
         self, app, applicant_user_factory, make_applicant, upload_root
     ):
-        """File recorded in Submission but deleted from disk → not counted."""
+        """File deleted from disk → the reconciler flags it → not counted."""
+        from app.services import file_inventory_service
+
         user = applicant_user_factory(suffix='nodisk')
         up, sub = make_applicant(user, status='expired', with_file=True)
         # Remove the file from disk after creating the submission
         full = upload_root / sub.file_path
         full.unlink()
         _commit()
+        file_inventory_service.reconcile()
 
         results = svc.list_candidates('admission_expired_with_files')
         ids = [r['user_program_id'] for r in results]
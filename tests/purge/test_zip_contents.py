@@ -404,8 +404,7 @@ class TestDocumentsInZip:
         up, sub = make_applicant(user, status='expired', with_file=True)
         db.session.commit()
 
-        from app.config import Config
-        disk_path = Path(str(app.config['UPLOAD_FOLDER'])) / sub.file_path
+        disk_path = Path(app.config['USER_DOCS_FOLDER']) / sub.file_path
         original_bytes = disk_path.read_bytes()
 
         run = svc.create_purge_run(
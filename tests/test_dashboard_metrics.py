@@ -0,0 +1,236 @@
+# tests/test_dashboard_metrics.py
+"""
+Tests de las métricas agregadas de DashboardService y de su caché por
+programa (app.utils.dashboard_cache).
+"""
+
+import tempfile
+import unittest
+from datetime import date, datetime, time, timedelta
+from unittest.mock import patch
+
+from sqlalchemy import insert
+
+from app import create_app, db
+from app.models.event import Event, EventSlot, EventWindow
+from app.models.program_step import ProgramStep
+from app.models.submission import Submission
+from app.models.user_program import UserProgram
+from app.services.dashboard_service import DashboardService
+from app.utils import dashboard_cache
+from tests.events.conftest import make_program, make_role, make_test_config, make_user
+from tests.utils import count_queries
+
+
+_NOW = datetime(2026, 3, 2, 10, 0)
+
+
+class _FakeRedis:
+    """Subconjunto de redis-py que usa dashboard_cache."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def mget(self, keys):
+        return [self.data.get(k) for k in keys]
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, *keys):
+        for k in keys:
+            self.data.pop(k, None)
+
+    def pipeline(self, transaction=False):
+        return self
+
+    def execute(self):
+        return []
+
+
+class DashboardMetricsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app(test_config=make_test_config(tempfile.mkdtemp(prefix='siiap_dash_')))
+        self.ctx = self.app.test_request_context()
+        self.ctx.push()
+        db.create_all()
+
+        role = make_role('applicant')
+        self.coordinator = make_user(make_role('program_admin'), 'coord')
+        self.program_a = make_program(self.coordinator, 'prog-a')
+        self.program_b = make_program(self.coordinator, 'prog-b')
+        self.step_a = self._step(self.program_a)
+        self.step_b = self._step(self.program_b)
+        self.users = {name: make_user(role, name) for name in
+                      ('approved', 'rejected', 'review', 'empty', 'declined', 'inactive', 'other')}
+        self.users['inactive'].is_active = False
+
+        # Programa A
+        self._enroll('approved', self.program_a)
+        self._submit('approved', self.step_a, 'approved', 'approved')
+        self._enroll('rejected', self.program_a)
+        self._submit('rejected', self.step_a, 'approved', 'rejected')
+        self._enroll('review', self.program_a)
+        self._submit('review', self.step_a, 'review')
+        self._enroll('empty', self.program_a, 'deliberation')
+        self._enroll('declined', self.program_a, 'rejected')
+        self._enroll('inactive', self.program_a)
+        self._submit('inactive', self.step_a, 'approved')
+        # Un documento en otro programa no cuenta para A
+        self._submit('approved', self.step_b, 'rejected')
+
+        # Programa B
+        self._enroll('other', self.program_b)
+        self._submit('other', self.step_b, 'rejected')
+
+        self._booked_interview(self.program_a)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    # ── helpers ──────────────────────────────────────────────────────────
+
+    def _step(self, program):
+        step = ProgramStep(sequence=1, program_id=program.id, step_id=1)
+        db.session.add(step)
+        db.session.flush()
+        return step
+
+    def _enroll(self, name, program, status='in_progress'):
+        db.session.execute(insert(UserProgram), [{
+            'user_id': self.users[name].id, 'program_id': program.id,
+            'admission_status': status, 'has_conacyt_scholarship': False, 'updated_at': _NOW,
+        }])
+
+    def _submit(self, name, step, *statuses):
+        db.session.execute(insert(Submission.__table__), [
+            {'user_id': self.users[name].id, 'archive_id': i + 1, 'program_step_id': step.id,
+             'status': status, 'is_in_extension': False, 'updated_at': _NOW}
+            for i, status in enumerate(statuses)
+        ])
+
+    def _booked_interview(self, program):
+        event_id = db.session.execute(insert(Event).values(
+            program_id=program.id, type='interview', title='Entrevistas',
+            created_by=self.coordinator.id, visibility='public', visible_to_students=True,
+            capacity_type='single', requires_registration=True,
+            allows_attendance_tracking=False, reminders_enabled=True, status='published',
+            created_at=_NOW, updated_at=_NOW,
+        )).inserted_primary_key[0]
+        window_id = db.session.execute(insert(EventWindow).values(
+            event_id=event_id, date=date(2026, 3, 10), start_time=time(9), end_time=time(10),
+            slot_minutes=30, created_at=_NOW, updated_at=_NOW,
+            slots_generated=True, current_capacity=0,
+        )).inserted_primary_key[0]
+        db.session.execute(insert(EventSlot), [
+            {'event_window_id': window_id, 'starts_at': datetime(2026, 3, 10, 9, m),
+             'ends_at': datetime(2026, 3, 10, 9, m) + timedelta(minutes=30), 'status': status,
+             'created_at': _NOW, 'updated_at': _NOW}
+            for m, status in ((0, 'booked'), (30, 'free'))
+        ])
+
+    # ── tests ────────────────────────────────────────────────────────────
+
+    def test_program_metrics(self):
+        metrics = DashboardService.get_program_admin_metrics(self.program_a.id)
+        self.assertEqual(metrics, {
+            'total_applicants': 4,
+            'pending_reviews': 1,
+            'approved_applications': 1,
+            'rejected_applications': 1,
+            'interviews_scheduled': 1,
+            'total_submissions': 6,
+            'in_process': 2,
+        })
+
+    def test_combined_metrics_add_up_per_program(self):
+        combined = DashboardService.get_combined_program_metrics(
+            [self.program_a.id, self.program_b.id]
+        )
+        self.assertEqual(combined['total_applicants'], 5)
+        self.assertEqual(combined['total_submissions'], 8)
+        self.assertEqual(combined['approved_applications'], 1)
+        self.assertEqual(combined['rejected_applications'], 2)
+        self.assertEqual(combined['in_process'], 2)
+        self.assertEqual(DashboardService.get_combined_program_metrics([])['total_applicants'], 0)
+
+    def test_postgraduate_metrics(self):
+        metrics = DashboardService.get_postgraduate_admin_metrics()
+        self.assertEqual(metrics['total_programs'], 2)
+        # Sin filtro de cuenta activa, como antes
+        self.assertEqual(metrics['total_applicants'], 6)
+        self.assertEqual(metrics['pending_reviews'], 1)
+        stats = {s['slug']: s for s in metrics['programs_stats']}
+        self.assertEqual(stats['prog-a']['applicants'], 5)
+        self.assertEqual(stats['prog-a']['pending_docs'], 1)
+        self.assertEqual(stats['prog-b']['applicants'], 1)
+
+    def test_query_count_does_not_grow_with_applicants(self):
+        program_ids = [self.program_a.id, self.program_b.id]
+        with count_queries() as before:
+            DashboardService.get_combined_program_metrics(program_ids)
+
+        role = make_role('applicant_bulk')
+        for i in range(30):
+            self.users[f'bulk{i}'] = make_user(role, f'bulk{i}')
+            self._enroll(f'bulk{i}', self.program_b)
+            self._submit(f'bulk{i}', self.step_b, 'approved', 'review')
+        db.session.commit()
+
+        with count_queries() as after:
+            metrics = DashboardService.get_combined_program_metrics(program_ids)
+        self.assertEqual(len(after), len(before))
+        self.assertLessEqual(len(after), 4)
+        self.assertEqual(metrics['total_applicants'], 35)
+
+        with count_queries() as postgrad:
+            DashboardService.get_postgraduate_admin_metrics()
+        self.assertLessEqual(len(postgrad), 3)
+
+    def test_cache_is_shared_and_invalidated_on_review(self):
+        fake = _FakeRedis()
+        with patch.object(dashboard_cache, 'get_redis', return_value=fake):
+            first = DashboardService.get_program_admin_metrics(self.program_a.id)
+            with count_queries() as cached:
+                self.assertEqual(DashboardService.get_program_admin_metrics(self.program_a.id), first)
+            self.assertEqual(cached, [])
+
+            pending = Submission.query.filter_by(status='review').one()
+            pending.status = 'approved'
+            db.session.commit()
+            self.assertNotIn(f'siiap:dash:program:{self.program_a.id}', fake.data)
+
+            metrics = DashboardService.get_program_admin_metrics(self.program_a.id)
+            self.assertEqual(metrics['pending_reviews'], 0)
+            self.assertEqual(metrics['approved_applications'], 2)
+
+    def test_cache_invalidated_on_admission_status_change(self):
+        fake = _FakeRedis()
+        with patch.object(dashboard_cache, 'get_redis', return_value=fake):
+            DashboardService.get_program_admin_metrics(self.program_b.id)
+            DashboardService.get_postgraduate_admin_metrics()
+
+            up = UserProgram.query.filter_by(program_id=self.program_b.id).one()
+            up.admission_status = 'expired'
+            db.session.flush()
+            db.session.rollback()
+            self.assertIn(f'siiap:dash:program:{self.program_b.id}', fake.data)
+
+            up = UserProgram.query.filter_by(program_id=self.program_b.id).one()
+            up.admission_status = 'expired'
+            db.session.commit()
+            self.assertEqual(fake.data, {})
+            self.assertEqual(
+                DashboardService.get_program_admin_metrics(self.program_b.id)['total_applicants'], 0
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+# tests/test_file_downloads.py
+"""
+Descargas protegidas (app.routes.api.files_api / app.utils.files.send_stored_file):
+send_file con ETag/Range sin nginx, X-Accel-Redirect con él, el ACL se
+evalúa antes de delegar y los avatares llevan caché larga.
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from app import create_app, db
+from app.utils.files import send_stored_file
+from tests.events.conftest import (
+    grant_permission, login, make_event, make_program, make_role, make_test_config, make_user,
+)
+
+
+class FileDownloadTests(unittest.TestCase):
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp(prefix='siiap_files_'))
+        self.app = create_app(test_config=make_test_config(str(self.root)))
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        self.role = make_role('student')
+        self.owner = make_user(self.role, '_owner')
+        self.other = make_user(self.role, '_other')
+        db.session.commit()
+
+        self.doc = self._write(f'documents/{self.owner.id}/admission/acta.pdf', b'%PDF-' + b'x' * 2000)
+        self.avatar = self._write(f'avatars/{self.owner.id}/0a1b2c.webp', b'RIFFwebp')
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _write(self, rel, data):
+        path = self.root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        return path
+
+    def _accel(self):
+        self.app.config['X_ACCEL_REDIRECT'] = True
+
+    def _get(self, url):
+        # XHR → 403 en JSON en vez del redirect con flash
+        return self.client.get(url, headers={'X-Requested-With': 'XMLHttpRequest'})
+
+    def _doc_url(self, user):
+        return f'/files/doc/{user.id}/admission/acta.pdf'
+
+    # ── sin nginx: send_file ──────────────────────────────────────────────
+
+    def test_fallback_supports_etag_and_range(self):
+        login(self.client, self.owner)
+
+        resp = self.client.get(self._doc_url(self.owner))
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotIn('X-Accel-Redirect', resp.headers)
+        etag = resp.headers['ETag']
+
+        resp = self.client.get(self._doc_url(self.owner), headers={'If-None-Match': etag})
+        self.assertEqual(resp.status_code, 304)
+
+        resp = self.client.get(self._doc_url(self.owner), headers={'Range': 'bytes=0-4'})
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp.data, b'%PDF-')
+
+    def test_avatar_gets_long_lived_private_cache(self):
+        login(self.client, self.other)
+
+        resp = self.client.get(f'/files/avatar/{self.owner.id}/0a1b2c.webp')
+
+        self.assertEqual(resp.status_code, 200)
+        cc = resp.cache_control
+        self.assertEqual(cc.max_age, 365 * 24 * 3600)
+        self.assertTrue(cc.private and cc.immutable)
+        self.assertFalse(cc.public)
+
+    # ── detrás de nginx: X-Accel-Redirect ─────────────────────────────────
+
+    def test_accel_redirect_returns_headers_only(self):
+        self._accel()
+        login(self.client, self.owner)
+
+        resp = self.client.get(self._doc_url(self.owner))
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data, b'')
+        self.assertEqual(resp.headers['X-Accel-Redirect'],
+                         f'/_protected/uploads/documents/{self.owner.id}/admission/acta.pdf')
+        self.assertEqual(resp.mimetype, 'application/pdf')
+        self.assertTrue(resp.headers['Content-Disposition'].startswith('inline'))
+
+    def test_acl_is_checked_before_redirect(self):
+        self._accel()
+        login(self.client, self.other)
+
+        resp = self._get(self._doc_url(self.owner))
+        self.assertEqual(resp.status_code, 403)
+        self.assertNotIn('X-Accel-Redirect', resp.headers)
+
+        grant_permission(self.role, 'files.api.view_doc_others')
+        db.session.commit()
+        resp = self.client.get(self._doc_url(self.owner))
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('X-Accel-Redirect', resp.headers)
+
+    def test_missing_file_is_404_not_redirected(self):
+        self._accel()
+        login(self.client, self.owner)
+
+        resp = self.client.get(f'/files/doc/{self.owner.id}/admission/otro.pdf')
+        self.assertEqual(resp.status_code, 404)
+
+    def test_attachment_and_outside_roots(self):
+        self._accel()
+        outside = Path(tempfile.mkdtemp(prefix='siiap_outside_')) / 'reporte.zip'
+        outside.write_bytes(b'PK')
+
+        with self.app.test_request_context():
+            resp = send_stored_file(self.root / 'documents' / str(self.owner.id) / 'admission' / 'acta.pdf',
+                                    as_attachment=True, download_name='Acta final.pdf')
+            self.assertEqual(resp.headers['Content-Disposition'],
+                             'attachment; filename="Acta final.pdf"')
+            self.assertTrue(resp.cache_control.no_cache)
+
+            # Fuera de UPLOAD_FOLDER/INSTANCE_DIR nginx no lo ve: send_file
+            resp = send_stored_file(outside, as_attachment=True)
+            self.assertNotIn('X-Accel-Redirect', resp.headers)
+            resp.direct_passthrough = False
+            self.assertEqual(resp.get_data(), b'PK')
+            resp.close()
+
+    def test_event_image_respects_visibility(self):
+        coord = make_user(make_role('program_admin'), '_coord')
+        event = make_event(coord.id, program_id=make_program(coord).id, status='draft')
+        db.session.commit()
+        self._write(f'events/{event.id}/cover.webp', b'RIFF')
+        self._accel()
+        login(self.client, self.owner)
+
+        url = f'/files/event/{event.id}/cover/cover.webp'
+        self.assertEqual(self._get(url).status_code, 403)
+
+        event.status = 'published'
+        db.session.commit()
+        resp = self.client.get(url)
+        self.assertEqual(resp.headers['X-Accel-Redirect'],
+                         f'/_protected/uploads/events/{event.id}/cover.webp')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,203 @@
+# tests/test_history_retention.py
+"""
+Limpieza del historial por política de retención (HistoryRetentionService):
+
+  - la vista previa sale de consultas agregadas, en número fijo
+  - el borrado va por bloques, respeta las acciones críticas y reporta progreso
+  - respaldo opcional en JSONL comprimido antes de borrar
+  - reanudación desde after_id (tarea cleanup_user_history)
+"""
+
+import gzip
+import json
+import shutil
+import tempfile
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+from app import create_app, db
+from app.models.user_history import UserHistory
+from app.services import history_retention_service
+from app.services.history_retention_service import HistoryRetentionService
+from app.tasks import maintenance
+from app.utils.datetime_utils import now_local
+
+from tests.permanence.conftest import (
+    make_test_config, make_role, make_user, make_program, make_period, make_user_program,
+)
+from tests.events.conftest import grant_permission, login
+from tests.utils import count_queries
+
+
+class TestHistoryRetention(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app(make_test_config())
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        role = make_role('student')
+        self.coord = make_user(make_role('program_admin'), suffix='_coord')
+        program = make_program(self.coord)
+        period = make_period('20261', date(2026, 1, 15))
+
+        # Activo (con programa): retención de 3 años
+        self.active = make_user(role, suffix='_active')
+        make_user_program(self.active, program, period)
+        # Inactivo: retención de 2 años
+        self.inactive = make_user(role, suffix='_inactive')
+        self.inactive.is_active = False
+        db.session.flush()
+
+        self.expired_ids = []
+        self._history(self.active, 4 * 365, count=4, expired=True)
+        self._history(self.active, 4 * 365, action='role_changed')
+        self._history(self.active, 365, count=2)
+        self._history(self.inactive, 3 * 365, count=3, expired=True)
+        self._history(self.inactive, 30)
+        db.session.commit()
+
+        self.tmp = Path(tempfile.mkdtemp())
+        patcher = patch.object(history_retention_service, '_ARCHIVE_DIR', self.tmp)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _history(self, user, age_days, count=1, action='profile_updated', expired=False):
+        for _ in range(count):
+            entry = UserHistory(
+                user_id=user.id, admin_id=self.coord.id, action=action,
+                details='{}', timestamp=now_local() - timedelta(days=age_days),
+            )
+            db.session.add(entry)
+            db.session.flush()
+            if expired:
+                self.expired_ids.append(entry.id)
+
+    def _remaining_ids(self):
+        return {row_id for (row_id,) in db.session.query(UserHistory.id)}
+
+    def test_preview_counts_by_category(self):
+        stats = HistoryRetentionService.cleanup_old_history(dry_run=True)
+
+        self.assertEqual(stats['entries_to_delete'], 7)
+        self.assertEqual(stats['users_affected'], 2)
+        self.assertEqual(stats['entries_preserved_critical'], 1)
+        self.assertEqual(stats['entries_deleted'], 0)
+        breakdown = stats['breakdown_by_category']
+        self.assertEqual(breakdown['active']['users'], 1)
+        self.assertEqual(breakdown['active']['entries_to_delete'], 4)
+        # El coordinador sin programa también cuenta como inactivo
+        self.assertEqual(breakdown['inactive']['users'], 2)
+        self.assertEqual(breakdown['inactive']['entries_to_delete'], 3)
+        self.assertEqual(len(self._remaining_ids()), 11)
+
+    def test_preview_query_count_is_constant(self):
+        with count_queries() as few:
+            HistoryRetentionService.cleanup_old_history(dry_run=True)
+
+        self._history(self.active, 5 * 365, count=50, expired=True)
+        self._history(self.inactive, 5 * 365, count=50, expired=True)
+        db.session.commit()
+        with count_queries() as many:
+            stats = HistoryRetentionService.cleanup_old_history(dry_run=True)
+
+        self.assertEqual(stats['entries_to_delete'], 107)
+        self.assertEqual(len(many), len(few))
+
+    def test_chunked_delete_keeps_critical_and_recent(self):
+        progress = []
+        stats = HistoryRetentionService.cleanup_old_history(
+            dry_run=False, chunk_size=2,
+            progress_callback=lambda *args: progress.append(args),
+        )
+
+        self.assertEqual(stats['entries_deleted'], 7)
+        self.assertEqual([p[0] for p in progress], [2, 4, 6, 7])
+        self.assertTrue(all(p[1] == 7 for p in progress))
+        self.assertEqual(stats['last_id'], max(self.expired_ids))
+        remaining = self._remaining_ids()
+        self.assertFalse(remaining & set(self.expired_ids))
+        self.assertEqual(len(remaining), 4)
+        self.assertEqual(
+            db.session.query(UserHistory).filter_by(action='role_changed').count(), 1
+        )
+
+    def test_archive_and_resume(self):
+        # Primer intento: solo el primer bloque llega a confirmarse
+        def _fail(done, total, last_id):
+            raise RuntimeError('worker perdido')
+
+        with self.assertRaises(RuntimeError):
+            HistoryRetentionService.cleanup_old_history(
+                dry_run=False, chunk_size=3, archive=True, archive_name='run',
+                progress_callback=_fail,
+            )
+        db.session.rollback()
+        resume_from = sorted(self.expired_ids)[2]
+        self.assertEqual(len(self._remaining_ids()), 8)
+
+        preview = HistoryRetentionService.cleanup_old_history(dry_run=True, after_id=resume_from)
+        self.assertEqual(preview['entries_to_delete'], 4)
+
+        stats = HistoryRetentionService.cleanup_old_history(
+            dry_run=False, chunk_size=3, archive=True, archive_name='run',
+            after_id=resume_from,
+        )
+        self.assertEqual(stats['entries_deleted'], 4)
+
+        with gzip.open(stats['archive_path'], 'rt', encoding='utf-8') as fh:
+            records = [json.loads(line) for line in fh]
+        self.assertEqual([r['id'] for r in records], sorted(self.expired_ids))
+        self.assertEqual(records[0]['action'], 'profile_updated')
+        self.assertEqual(records[0]['admin_id'], self.coord.id)
+        self.assertFalse(self._remaining_ids() & set(self.expired_ids))
+
+    def test_task_reports_progress(self):
+        updates = []
+        with patch.object(maintenance.cleanup_user_history, 'update_state',
+                          side_effect=lambda **kw: updates.append(kw['meta'])):
+            result = maintenance.cleanup_user_history.run(chunk_size=5, archive=True)
+
+        self.assertEqual(result['entries_deleted'], 7)
+        self.assertEqual(updates[-1], {'done': 7, 'total': 7, 'last_id': max(self.expired_ids)})
+        self.assertTrue(Path(result['archive_path']).exists())
+
+    def test_execute_chunk_size_is_validated_and_clamped(self):
+        from app.routes.api.admin import history_api as api
+
+        self.assertEqual(api._chunk_size_arg({}), history_retention_service.DELETE_CHUNK_SIZE)
+        self.assertEqual(api._chunk_size_arg({'chunk_size': '2000'}), 2000)
+        self.assertEqual(api._chunk_size_arg({'chunk_size': 1}), api.MIN_CHUNK_SIZE)
+        self.assertEqual(api._chunk_size_arg({'chunk_size': 10 ** 9}), api.MAX_CHUNK_SIZE)
+        for bad in ('mucho', [500], True):
+            self.assertIsNone(api._chunk_size_arg({'chunk_size': bad}))
+
+    def test_cleanup_task_status_rejects_other_task_ids(self):
+        class _FakeAsyncResult:
+            state = 'SUCCESS'
+            name = 'app.tasks.purge.build_purge_run'
+            result = {'run_id': 'r-1'}
+
+        grant_permission(self.coord.role, 'admin_history.api.cleanup_execute')
+        db.session.commit()
+        client = self.app.test_client()
+        login(client, self.coord)
+
+        with patch('app.extensions.celery.AsyncResult', return_value=_FakeAsyncResult()):
+            resp = client.get('/api/v1/admin/history/cleanup/tasks/task-999')
+
+        self.assertEqual(resp.status_code, 404)
+        self.assertFalse(resp.get_json()['ok'])
+
+
+if __name__ == '__main__':
+    unittest.main()
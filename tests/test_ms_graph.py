@@ -0,0 +1,187 @@
+# tests/test_ms_graph.py
+"""
+Tests del transporte de correo de Microsoft Graph (app.utils.ms_graph)
+contra un servidor Graph falso local: token en memoria, /$batch de 20 en 20
+y espera ante 429/Retry-After.
+"""
+
+import json
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from app import create_app, db
+from app.models.email_queue import EmailQueue
+from app.services.email_service import EmailService
+from app.utils import ms_graph
+from tests.events.conftest import make_role, make_test_config, make_user
+
+
+class _FakeGraph(BaseHTTPRequestHandler):
+    """
+    /$batch responde 200 a cada petición interna salvo que `script` (lista
+    de callables que reciben el cuerpo) decida otra cosa para esa llamada.
+    """
+
+    calls = []
+    script = []
+    failing = set()
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        type(self).calls.append((self.path, self.headers.get('Authorization'), body))
+        status, headers, payload = (
+            self.script.pop(0)(body) if self.script else self._ok(body)
+        )
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    @classmethod
+    def _ok(cls, body):
+        if 'requests' not in body:
+            return 202, {}, {}
+        responses = []
+        for req in body['requests']:
+            to = req['body']['message']['toRecipients'][0]['emailAddress']['address']
+            if to in cls.failing:
+                responses.append({'id': req['id'], 'status': 400,
+                                  'body': {'error': {'code': 'ErrorInvalidRecipients',
+                                                     'message': 'Destinatario inválido'}}})
+            else:
+                responses.append({'id': req['id'], 'status': 202, 'body': {}})
+        return 200, {}, {'responses': responses}
+
+
+def _throttle_first(body):
+    """Primera llamada: 429 al primer mensaje del lote, el resto 202."""
+    responses = [{'id': r['id'], 'status': 202, 'body': {}} for r in body['requests']]
+    responses[0] = {'id': responses[0]['id'], 'status': 429,
+                    'headers': {'Retry-After': '0'}, 'body': {}}
+    return 200, {}, {'responses': responses}
+
+
+def _messages(count):
+    return [
+        {'id': i, 'subject': f'Asunto {i}', 'content_html': '<p>x</p>',
+         'to_list': [f'u{i}@test.local']}
+        for i in range(count)
+    ]
+
+
+class MsGraphTransportTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _FakeGraph)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        config = make_test_config(tempfile.mkdtemp(prefix='siiap_graph_'))
+        config['MS_GRAPH_BASE_URL'] = f'http://127.0.0.1:{self.server.server_port}/v1.0'
+        self.app = create_app(test_config=config)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        _FakeGraph.calls = []
+        _FakeGraph.script = []
+        _FakeGraph.failing = set()
+        ms_graph.reset_token()
+        ms_graph._throttle_until = 0.0
+
+        self.acquired = []
+        acquire = patch.object(ms_graph, '_acquire_token_result', side_effect=self._acquire)
+        acquire.start()
+        self.addCleanup(acquire.stop)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        ms_graph.reset_token()
+
+    def _acquire(self):
+        self.acquired.append(1)
+        return {'access_token': f'tok-{len(self.acquired)}', 'expires_in': 3600}
+
+    def test_token_is_reused_until_near_expiry(self):
+        self.assertEqual(ms_graph.get_access_token(), 'tok-1')
+        self.assertEqual(ms_graph.get_access_token(), 'tok-1')
+        self.assertEqual(len(self.acquired), 1)
+
+        ms_graph._token['expires_at'] -= 3600 - ms_graph.TOKEN_REFRESH_MARGIN
+        self.assertEqual(ms_graph.get_access_token(), 'tok-2')
+
+    def test_batches_twenty_messages_per_request(self):
+        results = ms_graph.send_mail_batch(_messages(45))
+
+        self.assertEqual(results, {i: None for i in range(45)})
+        self.assertEqual([path for path, _, _ in _FakeGraph.calls], ['/v1.0/$batch'] * 3)
+        self.assertEqual([len(body['requests']) for _, _, body in _FakeGraph.calls], [20, 20, 5])
+        self.assertEqual({auth for _, auth, _ in _FakeGraph.calls}, {'Bearer tok-1'})
+        self.assertEqual(len(self.acquired), 1)
+
+    def test_retries_only_throttled_requests(self):
+        _FakeGraph.script = [_throttle_first]
+        results = ms_graph.send_mail_batch(_messages(3))
+
+        self.assertEqual(results, {0: None, 1: None, 2: None})
+        self.assertEqual([len(body['requests']) for _, _, body in _FakeGraph.calls], [3, 1])
+        self.assertEqual(_FakeGraph.calls[1][2]['requests'][0]['id'], '0')
+
+    def test_whole_batch_throttled_waits_for_retry_after(self):
+        _FakeGraph.script = [lambda body: (429, {'Retry-After': '2'}, {})]
+        with patch.object(ms_graph.time, 'sleep') as sleep:
+            results = ms_graph.send_mail_batch(_messages(2))
+
+        self.assertEqual(results, {0: None, 1: None})
+        self.assertEqual(len(_FakeGraph.calls), 2)
+        sleep.assert_called_once()
+        self.assertTrue(1 < sleep.call_args.args[0] <= 2)
+
+    def test_unauthorized_batch_refreshes_token_once(self):
+        _FakeGraph.script = [lambda body: (401, {}, {'error': {'code': 'InvalidAuthenticationToken'}})]
+        results = ms_graph.send_mail_batch(_messages(1))
+
+        self.assertEqual(results, {0: None})
+        self.assertEqual([auth for _, auth, _ in _FakeGraph.calls], ['Bearer tok-1', 'Bearer tok-2'])
+
+    def test_process_queue_drains_through_batches(self):
+        user = make_user(make_role('student'), 'graph')
+        db.session.add_all([
+            EmailQueue(user_id=user.id, recipient_email=f'q{i}@test.local', subject='S',
+                       html_content='<p>x</p>', status='pending', attempts=0)
+            for i in range(25)
+        ])
+        db.session.commit()
+        _FakeGraph.failing = {'q3@test.local'}
+
+        with patch('app.services.email_service.is_connected', return_value=True):
+            result = EmailService.process_queue()
+
+        self.assertEqual(result, {'processed': 25, 'sent': 24, 'failed': 1})
+        self.assertEqual(len(_FakeGraph.calls), 2)
+        failed = EmailQueue.query.filter_by(recipient_email='q3@test.local').one()
+        self.assertEqual((failed.status, failed.attempts), ('pending', 1))
+        self.assertIn('ErrorInvalidRecipients', failed.error_message)
+        self.assertEqual(EmailQueue.query.filter_by(status='sent').count(), 24)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+# tests/test_offload.py
+"""
+Tests de la capa de ejecución fuera del hub (app.utils.offload).
+
+Los casos en línea corren en el proceso de pytest; el caso con eventlet se
+ejecuta en un subproceso porque monkey_patch() no puede deshacerse.
+"""
+
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from app.utils import offload
+
+
+class OffloadInlineTests(unittest.TestCase):
+
+    def setUp(self):
+        offload.reset_offload_stats()
+
+    def tearDown(self):
+        offload.reset_offload_stats()
+
+    def test_runs_inline_without_eventlet(self):
+        self.assertFalse(offload.is_green())
+        self.assertFalse(offload.make_db_driver_green())
+        self.assertEqual(offload.offload_cpu(pow, 2, 10, label='pow'), 1024)
+
+        stats = offload.get_offload_stats()['pow']
+        self.assertEqual(stats['calls'], 1)
+        self.assertEqual(stats['errors'], 0)
+
+    def test_errors_propagate_and_are_counted(self):
+        def boom():
+            raise ValueError('x')
+
+        with self.assertRaises(ValueError):
+            offload.offload_cpu(boom)
+        self.assertEqual(offload.get_offload_stats()['boom']['errors'], 1)
+
+    def test_concurrency_is_bounded(self):
+        offload.DEFAULT_MAX_CONCURRENCY, original = 2, offload.DEFAULT_MAX_CONCURRENCY
+        self.addCleanup(setattr, offload, 'DEFAULT_MAX_CONCURRENCY', original)
+
+        running, peak, lock = [0], [0], threading.Lock()
+
+        def work():
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+
+        threads = [
+            threading.Thread(target=offload.offload_cpu, args=(work,), kwargs={'label': 'work'})
+            for _ in range(6)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(peak[0], 2)
+        stats = offload.get_offload_stats()['work']
+        self.assertEqual(stats['calls'], 6)
+        self.assertGreater(stats['wait_s'], 0)
+
+
+_GREEN_SCRIPT = textwrap.dedent('''
+    import eventlet
+    eventlet.monkey_patch()
+
+    from eventlet import patcher
+    from app.utils.offload import is_green, offload_cpu
+
+    blocking_sleep = patcher.original('time').sleep
+    ticks = []
+
+    def ticker():
+        for _ in range(20):
+            ticks.append(1)
+            eventlet.sleep(0.01)
+
+    assert is_green()
+    gt = eventlet.spawn(ticker)
+    eventlet.sleep(0)
+    # Bloqueo real de 0.3 s (como un render de WeasyPrint)
+    offload_cpu(blocking_sleep, 0.3, label='render')
+    print(len(ticks))
+    gt.wait()
+''')
+
+
+class OffloadGreenTests(unittest.TestCase):
+
+    def test_blocking_work_does_not_freeze_the_hub(self):
+        root = Path(__file__).resolve().parent.parent
+        # Sin REDIS_URL, create_app() (al importar `app`) no espera a Redis
+        env = dict(os.environ, REDIS_URL='')
+        result = subprocess.run(
+            [sys.executable, '-c', _GREEN_SCRIPT],
+            cwd=root, env=env, capture_output=True, text=True, timeout=60,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        # Sin offload el ticker quedaría en 1; con tpool sigue corriendo
+        self.assertGreater(int(result.stdout.strip().splitlines()[-1]), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+# tests/test_period_calendar.py
+"""
+Calendario de periodos en memoria (app.utils.period_calendar):
+
+  - ordinales por start_date, next/previous, delta y closed_since
+  - get_active_period sin query tras la primera carga
+  - invalidación al hacer flush/commit/rollback y desde academic_period_service
+  - versión global en Redis para los demás procesos
+"""
+
+import unittest
+from datetime import date
+from unittest.mock import patch
+
+from app import create_app, db
+from app.models.academic_period import AcademicPeriod
+from app.services import academic_period_service
+from app.services.deferral_service import _get_next_period
+from app.services.semester_transition_service import _delta_periods
+from app.utils import period_calendar
+from app.utils.period_calendar import get_period_calendar
+
+from tests.permanence.conftest import make_period, make_test_config
+from tests.utils import count_queries
+
+
+class _FakeRedis:
+    """Contador compartido como el que verían dos procesos."""
+
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def incr(self, key):
+        self.store[key] = int(self.store.get(key) or 0) + 1
+        return self.store[key]
+
+
+class TestPeriodCalendar(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app(make_test_config())
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        # Creados fuera de orden cronológico a propósito
+        self.p3 = make_period('20253', date(2025, 8, 1), is_active=True)
+        self.p1 = make_period('20251', date(2025, 1, 15))
+        self.p4 = make_period('20261', date(2026, 1, 15))
+        self.p2 = make_period('20252', date(2025, 6, 1))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_ordinal_arithmetic(self):
+        cal = get_period_calendar()
+
+        self.assertEqual(cal.ordered_ids, [self.p1.id, self.p2.id, self.p3.id, self.p4.id])
+        self.assertEqual(cal.ordinal(self.p3.id), 2)
+        self.assertEqual(cal.delta(self.p1.id, self.p4.id), 3)
+        self.assertIsNone(cal.delta(self.p1.id, 999))
+        self.assertEqual(cal.next(self.p2.id).id, self.p3.id)
+        self.assertIsNone(cal.next(self.p4.id))
+        self.assertEqual(cal.previous(self.p3.id).id, self.p2.id)
+        self.assertEqual(cal.active.id, self.p3.id)
+        self.assertEqual(_delta_periods(self.p2.id, self.p4.id), 2)
+        self.assertEqual(_get_next_period(self.p3.id), self.p4)
+
+    def test_closed_since_matches_admission_end_dates(self):
+        cal = get_period_calendar()
+        # admission_end_date = start - 15 días
+        self.assertEqual(cal.closed_since('20251', today=date(2025, 7, 20)), 2)
+        self.assertEqual(cal.closed_since('20251', today=date(2025, 12, 31)), 3)
+        self.assertEqual(cal.closed_since('20251', today=date(2024, 1, 1)), 0)
+        self.assertEqual(cal.closed_since('20261', today=date(2030, 1, 1)), 0)
+
+    def test_active_period_without_queries_after_first_load(self):
+        self.assertEqual(AcademicPeriod.get_active_period(), self.p3)
+        with count_queries() as queries:
+            for _ in range(20):
+                AcademicPeriod.get_active_period()
+            get_period_calendar().closed_since('20251')
+        self.assertEqual(queries, [])
+
+    def test_service_changes_invalidate(self):
+        self.assertEqual(AcademicPeriod.get_active_period().id, self.p3.id)
+
+        academic_period_service.activate_period(self.p4.id)
+        self.assertEqual(AcademicPeriod.get_active_period().id, self.p4.id)
+
+        academic_period_service.deactivate_period(self.p4.id)
+        self.assertIsNone(AcademicPeriod.get_active_period())
+
+        new = academic_period_service.create_academic_period({
+            'code': '20263', 'name': 'Ago-Dic 2026',
+            'start_date': '2026-08-01', 'end_date': '2026-12-15',
+            'admission_start_date': '2026-05-01', 'admission_end_date': '2026-07-01',
+        })
+        self.assertEqual(get_period_calendar().next(self.p4.id).id, new.id)
+
+    def test_uncommitted_changes_visible_until_rollback(self):
+        get_period_calendar()
+        extra = make_period('20262', date(2026, 6, 1))
+        self.assertIn(extra.id, get_period_calendar())
+
+        db.session.rollback()
+        self.assertEqual(len(get_period_calendar().periods), 4)
+
+    def test_remote_version_reloads_other_processes(self):
+        fake = _FakeRedis()
+        with patch.object(period_calendar, 'get_redis', return_value=fake):
+            with self.app.app_context():
+                before = get_period_calendar()
+
+            # Otro proceso cambia un periodo: solo se entera por Redis
+            AcademicPeriod.query.filter_by(id=self.p4.id).update({'is_active': True})
+            AcademicPeriod.query.filter_by(id=self.p3.id).update({'is_active': False})
+            db.session.commit()
+            with self.app.app_context():
+                self.assertIs(get_period_calendar(), before)
+
+            fake.incr('siiap:period:version')
+            with self.app.app_context():
+                self.assertEqual(get_period_calendar().active.id, self.p4.id)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,6 +10,7 @@ Cubre:
   - Permisos vencidos (expires_at)
   - Permisos revocados (is_active=False)
   - Caché por request (flask.g)
+  - Caché compilada entre requests (app.utils.permission_cache)
 """
 
 import unittest
@@ -21,6 +22,8 @@ from app.models.permission import Permission
 from app.models.role_permission import RolePermission, RolePermissionOverride
 from app.models.user_permission import UserPermission
 from app.utils.datetime_utils import now_local
+from app.utils.permission_cache import bump_permission_version
+from tests.utils import count_queries
 
 
 # ---------------------------------------------------------------------------
@@ -301,7 +304,132 @@ class PermissionTestCase(unittest.TestCase):
         self.assertTrue(result_req2)
 
     # ------------------------------------------------------------------
-    # 6. Permiso inexistente
+    # 6. Caché compilada entre requests (permission_cache)
+    # ------------------------------------------------------------------
+
+    def _count_queries(self, fn):
+        with count_queries() as statements:
+            fn()
+        return len(statements)
+
+    def _fresh_request(self):
+        """Request con su propio app context (flask.g vacío)."""
+        from contextlib import ExitStack
+        stack = ExitStack()
+        stack.enter_context(self.app.app_context())
+        stack.enter_context(self.app.test_request_context('/'))
+        return stack
+
+    def test_compiled_cache_avoids_queries_on_next_request(self):
+        """La segunda request no consulta la BD para evaluar permisos."""
+        rp = RolePermission(role_id=self.role_admin.id, permission_id=self.perm_list.id)
+        db.session.add(rp)
+        db.session.commit()
+
+        with self._fresh_request():
+            self.assertTrue(self.admin_user.has_permission('acceptance.api.list_applicants'))
+
+        def _second_request():
+            with self._fresh_request():
+                self.assertTrue(self.admin_user.has_permission('acceptance.api.list_applicants'))
+                self.assertFalse(self.admin_user.has_permission('admin_review.api.decide', program_id=3))
+
+        self.assertEqual(self._count_queries(_second_request), 0)
+
+    def test_commit_invalidates_compiled_cache(self):
+        """Un commit sobre permisos invalida la compilación previa."""
+        with self._fresh_request():
+            self.assertFalse(self.social_user.has_permission('acceptance.api.upload_doc'))
+
+        up = UserPermission(
+            user_id=self.social_user.id,
+            permission_id=self.perm_upload.id,
+            granted_by=self.admin_user.id,
+        )
+        db.session.add(up)
+        db.session.commit()
+
+        with self._fresh_request():
+            self.assertTrue(self.social_user.has_permission('acceptance.api.upload_doc'))
+
+    def test_bump_version_invalidates_inside_request(self):
+        """bump_permission_version descarta también el caché de flask.g."""
+        with self._fresh_request():
+            self.assertFalse(self.admin_user.has_permission('acceptance.api.list_applicants'))
+            db.session.execute(
+                RolePermission.__table__.insert().values(
+                    role_id=self.role_admin.id, permission_id=self.perm_list.id
+                )
+            )
+            bump_permission_version()
+            self.assertTrue(self.admin_user.has_permission('acceptance.api.list_applicants'))
+
+    def test_expiry_evaluated_without_recompiling(self):
+        """Una delegación compilada deja de aplicar al vencer, sin tocar la BD."""
+        soon = now_local() + timedelta(minutes=5)
+        up = UserPermission(
+            user_id=self.social_user.id,
+            permission_id=self.perm_upload.id,
+            granted_by=self.admin_user.id,
+            expires_at=soon,
+        )
+        db.session.add(up)
+        db.session.commit()
+
+        with self._fresh_request():
+            self.assertTrue(self.social_user.has_permission('acceptance.api.upload_doc'))
+
+        from unittest import mock
+        later = soon + timedelta(minutes=1)
+
+        def _after_expiry():
+            with mock.patch('app.utils.datetime_utils.now_local', return_value=later):
+                with self._fresh_request():
+                    self.assertFalse(self.social_user.has_permission('acceptance.api.upload_doc'))
+
+        self.assertEqual(self._count_queries(_after_expiry), 0)
+
+    def test_accessible_programs_from_compiled_grants(self):
+        """get_accessible_program_ids usa las delegaciones compiladas."""
+        up = UserPermission(
+            user_id=self.social_user.id,
+            permission_id=self.perm_upload.id,
+            granted_by=self.admin_user.id,
+            program_id=7,
+        )
+        db.session.add(up)
+        db.session.commit()
+
+        with self._fresh_request():
+            self.assertEqual(self.social_user.get_accessible_program_ids(), {7})
+
+    def test_unverified_version_limits_cache_age(self):
+        """
+        Con Redis configurado pero inaccesible (circuit breaker abierto), la
+        compilación local solo se reutiliza durante
+        PERMISSION_CACHE_UNVERIFIED_MAX_AGE; después se recarga de la BD.
+        """
+        from unittest import mock
+        from app.utils import permission_cache
+
+        self.app.config['REDIS_URL'] = 'redis://redis.invalid:6379/0'
+        self.app.config['PERMISSION_CACHE_UNVERIFIED_MAX_AGE'] = 30
+        start = 1000.0
+
+        def _check(at):
+            def _run():
+                with mock.patch.object(permission_cache, 'get_redis', return_value=None), \
+                        mock.patch.object(permission_cache.time, 'monotonic', return_value=at):
+                    with self._fresh_request():
+                        self.assertFalse(self.admin_user.has_permission('acceptance.api.list_applicants'))
+            return self._count_queries(_run)
+
+        self.assertGreater(_check(start), 0)
+        self.assertEqual(_check(start + 10), 0)
+        self.assertGreater(_check(start + 31), 0)
+
+    # ------------------------------------------------------------------
+    # 7. Permiso inexistente
     # ------------------------------------------------------------------
 
     def test_nonexistent_codename_returns_false(self):
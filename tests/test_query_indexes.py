@@ -0,0 +1,248 @@
+# tests/test_query_indexes.py
+"""
+Regresión de planes de consulta para los filtros más frecuentes.
+
+Crea el esquema desde los modelos en SQLite, siembra un volumen moderado de
+filas y ejecuta ANALYZE. Cada prueba llama al servicio o ruta real, captura
+las sentencias SELECT que emite (before_cursor_execute) y revisa su
+`EXPLAIN QUERY PLAN`: si alguna tabla cae en un recorrido completo
+(`SCAN <tabla>` sin índice), el índice correspondiente se perdió o la
+consulta dejó de aprovecharlo.
+"""
+
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, insert, text
+
+from app import create_app, db
+from app.models.archive import Archive
+from app.models.document_deadline import DocumentDeadline
+from app.models.email_queue import EmailQueue
+from app.models.event import EventAttendance, EventInvitation
+from app.models.notification import Notification
+from app.models.semester_enrollment import SemesterEnrollment
+from app.models.submission import Submission
+from app.models.user_history import UserHistory
+from app.models.user_permission import UserPermission
+from app.models.user_program import UserProgram
+from app.services import permanence_service
+from app.services.email_service import EmailService
+from app.services.events_service import EventsService
+from app.services.notification_service import NotificationService
+from app.services.user_history_service import UserHistoryService
+from app.utils import permission_cache
+from tests.events.conftest import (
+    login, make_academic_period, make_event, make_program, make_role, make_test_config,
+    make_user,
+)
+
+_USERS = 200
+_PER_USER = 5
+
+
+def _fixtures():
+    """
+    Filas reales que necesitan los servicios. Se crean antes de sembrar, así
+    que todas tienen id 1 y las filas sembradas para i = 1 (usuario 1,
+    archivo 1, evento 1, programa 1...) les corresponden. Los seis periodos
+    cubren los academic_period_id de las inscripciones sembradas.
+    """
+    user = make_user(make_role('student'))
+    program = make_program(user)
+    period = make_academic_period()
+    for code in ('20252', '20253', '20261', '20262', '20263'):
+        make_academic_period(is_active=False, code=code)
+    archive = Archive(name='Baja temporal', description='', file_path=None, step_id=1)
+    archive.archive_key = 'leave_request'
+    db.session.add(archive)
+    db.session.flush()
+    db.session.add(DocumentDeadline(
+        archive_id=archive.id, program_id=program.id,
+        academic_period_id=period.id, label='Boleta',
+    ))
+    make_event(created_by=user.id)
+    db.session.commit()
+    return user, program, period
+
+
+def _seed():
+    now = datetime(2026, 1, 1, 12, 0)
+    rows = range(_USERS * _PER_USER)
+    db.session.execute(insert(Notification), [
+        {'user_id': i % _USERS, 'type': 'system', 'title': 't', 'message': 'm',
+         'priority': 'medium', 'is_read': i % 3 == 0, 'is_deleted': i % 7 == 0,
+         'is_actionable': False, 'created_at': now - timedelta(minutes=i)}
+        for i in rows
+    ])
+    db.session.execute(insert(Submission.__table__), [
+        {'user_id': i % _USERS, 'archive_id': i % 40, 'program_step_id': 1,
+         'status': ('pending', 'approved', 'rejected')[i % 3],
+         'document_deadline_id': i % 20 or None, 'is_in_extension': False,
+         'updated_at': now}
+        for i in rows
+    ])
+    db.session.execute(insert(UserProgram), [
+        {'user_id': i, 'program_id': i % 4,
+         'admission_status': ('in_progress', 'enrolled', 'rejected')[i % 3],
+         'has_conacyt_scholarship': False, 'updated_at': now}
+        for i in range(_USERS)
+    ])
+    db.session.execute(insert(SemesterEnrollment), [
+        {'user_program_id': i % _USERS, 'academic_period_id': i % 6 + 1,
+         'semester_number': 1, 'status': 'active', 'enrollment_confirmed': False,
+         'created_at': now, 'updated_at': now}
+        for i in rows
+    ])
+    db.session.execute(insert(EventInvitation), [
+        {'event_id': i % 50, 'user_id': i % _USERS, 'status': 'pending', 'invited_at': now}
+        for i in rows
+    ])
+    db.session.execute(insert(EventAttendance), [
+        {'event_id': i % 50, 'user_id': i % _USERS, 'status': 'registered', 'registered_at': now}
+        for i in rows
+    ])
+    db.session.execute(insert(UserHistory), [
+        {'user_id': i % _USERS, 'action': 'update', 'timestamp': now - timedelta(hours=i),
+         'subject_user_id': (i * 7) % _USERS}
+        for i in rows
+    ])
+    db.session.execute(insert(EmailQueue), [
+        {'user_id': i % _USERS, 'recipient_email': 'x@test', 'subject': 's',
+         'html_content': '<p></p>', 'status': ('sent', 'sent', 'pending', 'failed')[i % 4],
+         'attempts': 0, 'max_attempts': 3, 'created_at': now,
+         'next_retry_at': now + timedelta(minutes=i % 30)}
+        for i in rows
+    ])
+    db.session.execute(insert(UserPermission.__table__), [
+        {'user_id': i % _USERS, 'permission_id': i // _USERS, 'program_id': None,
+         'granted_by': 1, 'granted_at': now, 'is_active': i % 5 != 0}
+        for i in rows
+    ])
+    db.session.commit()
+    db.session.execute(text('ANALYZE'))
+
+
+def _capture(fn, *args, **kwargs):
+    """Ejecuta `fn` y devuelve las sentencias SELECT (sql, parámetros) que emitió."""
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip()[:6].upper() in ('SELECT', 'WITH A', 'WITH R'):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', _record)
+    try:
+        fn(*args, **kwargs)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', _record)
+    return statements
+
+
+def _plan(statement, parameters):
+    """Devuelve las líneas de `EXPLAIN QUERY PLAN` de una sentencia capturada."""
+    conn = db.session.connection()
+    return [row[3] for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+
+
+class QueryPlanTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app(test_config=make_test_config(tempfile.mkdtemp(prefix='siiap_idx_')))
+        cls.ctx = cls.app.app_context()
+        cls.ctx.push()
+        db.create_all()
+        cls.user, cls.program, cls.period = _fixtures()
+        cls.user_id = cls.user.id
+        _seed()
+        cls.user_program_id = UserProgram.query.filter_by(user_id=cls.user_id).one().id
+
+    @classmethod
+    def tearDownClass(cls):
+        db.session.remove()
+        db.drop_all()
+        cls.ctx.pop()
+
+    def assertUsesIndex(self, statements, table, index=None):
+        plans = [_plan(*stmt) for stmt in statements]
+        rows = [
+            line for plan in plans for line in plan
+            if line.split(' ')[1:2] == [table]
+        ]
+        self.assertTrue(rows, f'{table} no aparece en ningún plan: {plans}')
+        for line in rows:
+            self.assertIn('INDEX', line, f'Recorrido completo de {table}: {plans}')
+        if index:
+            self.assertTrue(
+                any(index in line for line in rows),
+                f'{index} no se usa: {plans}',
+            )
+
+    # ── Notificaciones ────────────────────────────────────────────────────
+
+    def test_notification_unread_count(self):
+        stmts = _capture(NotificationService.get_unread_count, self.user_id)
+        self.assertUsesIndex(stmts, 'notification')
+
+    def test_notification_feed(self):
+        stmts = _capture(NotificationService.get_user_notifications, self.user_id, limit=20)
+        self.assertUsesIndex(stmts, 'notification', 'ix_notification_user_feed')
+
+    # ── Submissions / programas / inscripciones ───────────────────────────
+
+    def test_submission_by_user_archive(self):
+        stmts = _capture(permanence_service.get_student_leave_request, self.user_program_id)
+        self.assertUsesIndex(stmts, 'submission', 'ix_submission_user_archive')
+
+    def test_submission_by_deadline_status(self):
+        stmts = _capture(
+            permanence_service.get_deadlines_for_program, self.program.id, self.period.id,
+        )
+        self.assertUsesIndex(stmts, 'submission', 'ix_submission_deadline_status')
+
+    def test_user_program_by_program_status(self):
+        stmts = _capture(permanence_service.get_enrollment_overview, self.program.id)
+        self.assertUsesIndex(stmts, 'user_program', 'ix_user_program_program_status')
+
+    def test_semester_enrollment_by_period(self):
+        stmts = _capture(permanence_service.get_student_permanence, self.user_program_id)
+        self.assertUsesIndex(stmts, 'semester_enrollment', 'ix_semester_enrollment_up_period')
+
+    # ── Eventos ───────────────────────────────────────────────────────────
+
+    def test_event_ids_for_user(self):
+        stmts = _capture(EventsService.list_public_events, self.user_id)
+        self.assertUsesIndex(stmts, 'event_invitation', 'ix_event_invitation_user_event')
+        self.assertUsesIndex(stmts, 'event_attendance', 'ix_event_attendance_user_event')
+
+    def test_public_event_detail(self):
+        client = self.app.test_client()
+        login(client, self.user)
+        stmts = _capture(client.get, '/api/v1/events/public/1')
+        self.assertUsesIndex(stmts, 'event_invitation')
+        self.assertUsesIndex(stmts, 'event_attendance')
+
+    # ── Historial, correo, permisos ───────────────────────────────────────
+
+    def test_user_history_timeline(self):
+        stmts = _capture(UserHistoryService.get_user_history, self.user_id, limit=50)
+        self.assertUsesIndex(stmts, 'user_history', 'ix_user_history_user_timestamp')
+
+    def test_actions_on_user(self):
+        stmts = _capture(UserHistoryService.get_actions_on_user, self.user_id, limit=50)
+        self.assertUsesIndex(stmts, 'user_history')
+
+    def test_email_queue_stats(self):
+        stmts = _capture(EmailService.get_queue_stats)
+        self.assertUsesIndex(stmts, 'email_queue', 'ix_email_queue_status_retry')
+
+    def test_active_user_permissions(self):
+        permission_cache._get_cache().clear()
+        stmts = _capture(permission_cache.user_grants, self.user_id)
+        self.assertUsesIndex(stmts, 'user_permission', 'ix_user_permission_user_active')
+
+
+if __name__ == '__main__':
+    unittest.main()
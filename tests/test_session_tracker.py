@@ -0,0 +1,89 @@
+# tests/test_session_tracker.py
+"""
+Tests del índice de presencia (app.utils.session_tracker).
+
+Usa un doble en memoria de los comandos ZSET que necesita el módulo para no
+depender de un Redis real.
+"""
+
+import unittest
+from unittest.mock import patch
+
+from app.utils import session_tracker as tracker
+
+
+class _FakeZsetRedis:
+    def __init__(self):
+        self.zsets = {}
+        self.writes = 0
+
+    def zadd(self, key, mapping):
+        self.writes += 1
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    def zremrangebyscore(self, key, lo, hi):
+        z = self.zsets.get(key, {})
+        lo = float('-inf') if lo == '-inf' else lo
+        for m in [m for m, s in z.items() if lo <= s <= hi]:
+            del z[m]
+
+    def zcount(self, key, lo, hi):
+        hi = float('inf') if hi == '+inf' else hi
+        return sum(1 for s in self.zsets.get(key, {}).values() if lo <= s <= hi)
+
+    def zrevrangebyscore(self, key, hi, lo, start=0, num=None):
+        hi = float('inf') if hi == '+inf' else hi
+        items = sorted(
+            ((m, s) for m, s in self.zsets.get(key, {}).items() if lo <= s <= hi),
+            key=lambda x: x[1], reverse=True,
+        )
+        return [m for m, _ in items[start:start + num if num else None]]
+
+
+class SessionTrackerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = _FakeZsetRedis()
+        tracker._last_tracked.clear()
+        tracker._last_trim = 0.0
+        self.patcher = patch.object(tracker, 'get_redis', return_value=self.fake)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        tracker._last_tracked.clear()
+
+    def test_tracked_users_are_counted_and_listed(self):
+        with patch.object(tracker.time, 'time', return_value=10_000.0):
+            tracker.track_user_session(1)
+            tracker.track_user_session(2)
+            self.assertEqual(tracker.get_online_users_count(), 2)
+            self.assertEqual(sorted(tracker.get_online_users()), [1, 2])
+
+    def test_writes_are_throttled_per_user(self):
+        tracker.track_user_session(7)
+        tracker.track_user_session(7)
+        tracker.track_user_session(7)
+        self.assertEqual(self.fake.writes, 1)
+
+    def test_users_outside_window_are_not_counted(self):
+        with patch.object(tracker.time, 'time', return_value=1_000.0):
+            tracker.track_user_session(1)
+        later = 1_000.0 + tracker.SESSION_TTL + 1
+        with patch.object(tracker.time, 'time', return_value=later):
+            tracker._last_tracked.clear()
+            tracker.track_user_session(2)
+            self.assertEqual(tracker.get_online_users_count(), 1)
+            self.assertEqual(tracker.get_online_users(), [2])
+        # El trim periódico eliminó la entrada vencida
+        self.assertNotIn('1', self.fake.zsets[tracker._ZSET_KEY])
+
+    def test_without_redis_returns_defaults(self):
+        with patch.object(tracker, 'get_redis', return_value=None):
+            tracker.track_user_session(3)
+            self.assertEqual(tracker.get_online_users_count(), 0)
+            self.assertEqual(tracker.get_online_users(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+# tests/test_socketio_queue.py
+"""
+Tests de la resolución del message queue de Socket.IO por rol
+(app.sockets.message_queue).
+"""
+
+import unittest
+from unittest.mock import patch
+
+from flask import Flask
+
+from app.sockets import message_queue as mq
+
+_URL = 'redis://redis.test:6379/0'
+
+
+def _app(**config):
+    app = Flask(__name__)
+    app.config.update({
+        'REDIS_URL': _URL,
+        'SOCKETIO_MQ_RETRIES': 4,
+        'SOCKETIO_MQ_RETRY_DELAY': 0,
+    }, **config)
+    return app
+
+
+class _FlakyPing:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self, url):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError('Redis no responde')
+
+
+class MessageQueueTests(unittest.TestCase):
+
+    def test_retries_until_redis_answers(self):
+        ping = _FlakyPing(failures=2)
+        with patch.object(mq, '_ping', ping):
+            self.assertEqual(mq.resolve_message_queue(_app(WEB_ROLE='http')), _URL)
+        self.assertEqual(ping.calls, 3)
+
+    def test_required_queue_fails_instead_of_downgrading(self):
+        ping = _FlakyPing(failures=99)
+        for role in ('http', 'socketio'):
+            with self.subTest(role=role), patch.object(mq, '_ping', ping):
+                with self.assertRaises(RuntimeError):
+                    mq.resolve_message_queue(_app(WEB_ROLE=role))
+
+    def test_single_process_mode_downgrades_after_few_attempts(self):
+        ping = _FlakyPing(failures=99)
+        with patch.object(mq, '_ping', ping):
+            self.assertIsNone(mq.resolve_message_queue(_app(WEB_ROLE='all', SOCKETIO_MQ_RETRIES=10)))
+        self.assertEqual(ping.calls, mq._OPTIONAL_RETRIES)
+
+    def test_explicit_requirement_overrides_role(self):
+        ping = _FlakyPing(failures=99)
+        with patch.object(mq, '_ping', ping):
+            with self.assertRaises(RuntimeError):
+                mq.resolve_message_queue(_app(WEB_ROLE='all', SOCKETIO_REQUIRE_MQ=True))
+
+    def test_http_role_uses_write_only_redis_manager(self):
+        with patch.object(mq, '_ping', _FlakyPing(failures=0)):
+            options = mq.socketio_options(_app(WEB_ROLE='http'))
+        self.assertEqual(options['async_mode'], 'threading')
+        self.assertNotIn('message_queue', options)
+        self.assertTrue(options['client_manager'].write_only)
+
+    def test_socketio_role_subscribes_to_queue(self):
+        with patch.object(mq, '_ping', _FlakyPing(failures=0)):
+            options = mq.socketio_options(_app(WEB_ROLE='socketio'))
+        self.assertEqual(options['message_queue'], _URL)
+        self.assertEqual(options['async_mode'], 'eventlet')
+
+    def test_invalid_role_is_rejected(self):
+        with self.assertRaises(RuntimeError):
+            mq.web_role(_app(WEB_ROLE='workers'))
+
+    def test_testing_skips_redis(self):
+        with patch.object(mq, '_ping', side_effect=AssertionError('no debe llamar')):
+            options = mq.socketio_options(_app(TESTING=True, WEB_ROLE='http'))
+        self.assertEqual(options, {'async_mode': 'threading', 'message_queue': None})
+
+
+if __name__ == '__main__':
+    unittest.main()
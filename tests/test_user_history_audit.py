@@ -0,0 +1,121 @@
+# tests/test_user_history_audit.py
+"""
+Tests de los detalles estructurados de UserHistory (details_json /
+subject_user_id) y de la paginación por cursor de las consultas de auditoría.
+"""
+
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from app import create_app, db
+from app.models.user_history import UserHistory
+from app.services.user_history_service import UserHistoryService
+from tests.events.conftest import make_role, make_test_config, make_user
+
+
+class UserHistoryAuditTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app(test_config=make_test_config(tempfile.mkdtemp(prefix='siiap_hist_')))
+        self.ctx = self.app.test_request_context()
+        self.ctx.push()
+        db.create_all()
+        role = make_role('coordinator')
+        self.coordinator = make_user(role, 'coord')
+        self.students = [make_user(role, f's{i}') for i in range(12)]
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _log_review(self, student, when):
+        entry = UserHistoryService.log_action(
+            user_id=self.coordinator.id,
+            action='document_reviewed',
+            details={'student_id': student.id, 'status': 'approved'},
+            admin_id=self.coordinator.id,
+        )
+        entry.timestamp = when
+        return entry
+
+    def test_log_action_stores_structured_details(self):
+        entry = self._log_review(self.students[0], datetime(2026, 1, 1))
+        db.session.commit()
+
+        self.assertEqual(entry.details_json, {'student_id': self.students[0].id, 'status': 'approved'})
+        self.assertEqual(entry.subject_user_id, self.students[0].id)
+        self.assertIn('"student_id"', entry.details)
+
+    def test_explicit_subject_and_plain_text_details(self):
+        entry = UserHistoryService.log_action(
+            user_id=self.coordinator.id,
+            action='document_reviewed',
+            details='Revisión manual',
+            subject_user_id=self.students[3].id,
+        )
+        db.session.commit()
+        self.assertIsNone(entry.details_json)
+        self.assertEqual(entry.subject_user_id, self.students[3].id)
+
+    def test_actions_on_user_has_no_prefix_false_positives(self):
+        first, twelfth = self.students[0], self.students[11]
+        # Fuerza ids con prefijo común (p.ej. 2 y 12) en los detalles
+        UserHistoryService.log_action(
+            user_id=self.coordinator.id, action='document_reviewed',
+            details={'student_id': int(f'{first.id}{first.id}')},
+        )
+        self._log_review(first, datetime(2026, 1, 2))
+        self._log_review(twelfth, datetime(2026, 1, 3))
+        db.session.commit()
+
+        entries = UserHistoryService.get_actions_on_user(first.id)
+        self.assertEqual([e.subject_user_id for e in entries], [first.id])
+
+    def test_keyset_pagination_walks_all_entries_once(self):
+        student = self.students[1]
+        base = datetime(2026, 3, 1, 9, 0)
+        # Dos entradas por timestamp para ejercitar el desempate por id
+        for i in range(7):
+            self._log_review(student, base + timedelta(hours=i // 2))
+        db.session.commit()
+
+        seen, before = [], None
+        while True:
+            page = UserHistoryService.get_actions_on_user(student.id, limit=3, before=before)
+            seen.extend(e.id for e in page)
+            if len(page) < 3:
+                break
+            before = UserHistoryService.encode_cursor(page[-1])
+
+        expected = [
+            e.id for e in UserHistory.query
+            .filter_by(subject_user_id=student.id)
+            .order_by(UserHistory.timestamp.desc(), UserHistory.id.desc())
+        ]
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(seen), 7)
+
+    def test_admin_activity_is_paginated(self):
+        for i in range(4):
+            self._log_review(self.students[i], datetime(2026, 4, 1) + timedelta(minutes=i))
+        db.session.commit()
+
+        first_page = UserHistoryService.get_admin_activity(self.coordinator.id, limit=3)
+        rest = UserHistoryService.get_admin_activity(
+            self.coordinator.id, limit=3,
+            before=UserHistoryService.encode_cursor(first_page[-1]),
+        )
+        self.assertEqual(len(first_page), 3)
+        self.assertEqual(len(rest), 1)
+        self.assertEqual(rest[0].subject_user_id, self.students[0].id)
+
+    def test_invalid_cursor_raises(self):
+        with self.assertRaises(ValueError):
+            UserHistoryService.get_actions_on_user(self.students[0].id, before='no-es-cursor')
+
+
+if __name__ == '__main__':
+    unittest.main()
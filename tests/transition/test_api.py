@@ -4,6 +4,7 @@ Tests de los endpoints de la transición y del self-pago del estudiante.
 """
 
 from io import BytesIO
+from unittest.mock import patch
 import pytest
 
 from app import db
@@ -117,6 +118,58 @@ def test_execute_endpoint_runs(app, client, periods, permissions, postgrad_admin
         assert key in stats
 
 
+def test_execute_endpoint_async_enqueues_task(app, client, periods, permissions,
+                                             postgrad_admin, monkeypatch):
+    """Con async=true se encola app.tasks.transition y responde 202."""
+    from app.tasks import transition as transition_tasks
+
+    queued = {}
+
+    class _Result:
+        id = 'task-123'
+
+    def _fake_apply_async(kwargs=None, **kw):
+        queued.update(kwargs)
+        return _Result()
+
+    monkeypatch.setattr(transition_tasks.run_semester_transition, 'apply_async', _fake_apply_async)
+    token = _login(client, postgrad_admin)
+    resp = client.post(
+        '/api/v1/permanence/transition/execute',
+        json={
+            'source_period_id': periods['20263'].id,
+            'target_period_id': periods['20271'].id,
+            'async': True,
+        },
+        headers=_csrf(token),
+    )
+    assert resp.status_code == 202
+    data = resp.get_json()['data']
+    assert data['task_id'] == 'task-123'
+    assert data['status_url'].endswith('/transition/tasks/task-123')
+    assert queued['program_id'] is None
+    assert queued['coordinator_id'] == postgrad_admin.id
+
+
+
+@pytest.mark.parametrize('name, status', [
+    ('app.tasks.transition.build_transition_preview', 200),
+    ('app.tasks.transition.run_semester_transition', 200),
+    ('app.tasks.students.import_students_csv', 404),
+])
+def test_task_status_only_reports_transition_tasks(app, client, permissions, postgrad_admin,
+                                                   name, status):
+    class _FakeAsyncResult:
+        state = 'SUCCESS'
+        result = {'advanced': 1}
+
+    _FakeAsyncResult.name = name
+    _login(client, postgrad_admin)
+    with patch('app.extensions.celery.AsyncResult', return_value=_FakeAsyncResult()):
+        resp = client.get('/api/v1/permanence/transition/tasks/task-123')
+
+    assert resp.status_code == status
+
 def test_execute_endpoint_missing_periods_returns_400(app, client, permissions, postgrad_admin):
     token = _login(client, postgrad_admin)
     resp = client.post('/api/v1/permanence/transition/execute', json={}, headers=_csrf(token))
@@ -0,0 +1,115 @@
+# tests/transition/test_bulk_engine.py
+"""
+Tests de la carga masiva de la transición semestral: número de consultas
+constante, escritura en bloque de historial/notificaciones y reporte de
+avance desde la tarea Celery.
+"""
+
+from app import db
+from app.models.notification import Notification
+from app.models.user_history import UserHistory
+from app.services import semester_transition_service as tsvc
+from app.utils.period_calendar import get_period_calendar
+from tests.utils import count_queries
+
+
+def _students(student_factory, make_submission, archives, deadline, prefix, count):
+    """Crea `count` estudiantes; los pares con su documento aprobado."""
+    created = []
+    for i in range(count):
+        user, up, se = student_factory(suffix=f'{prefix}{i}')
+        if i % 2 == 0:
+            make_submission(user.id, archives['boleta'].id, archives['ps9'].id,
+                            deadline_id=deadline.id, status='approved')
+        created.append(up)
+    db.session.commit()
+    return created
+
+
+def test_preview_query_count_does_not_grow_with_students(app, periods, program, archives,
+                                                          deadlines_source, student_factory,
+                                                          make_submission):
+    src, tgt = periods['20263'].id, periods['20271'].id
+    _students(student_factory, make_submission, archives, deadlines_source, 'a', 2)
+    db.session.expire_all()
+    get_period_calendar()  # la carga única del calendario no cuenta
+    with count_queries() as small:
+        tsvc.preview_global(src, tgt)
+
+    _students(student_factory, make_submission, archives, deadlines_source, 'b', 12)
+    db.session.expire_all()
+    with count_queries() as large:
+        out = tsvc.preview_global(src, tgt)
+
+    assert len(large) == len(small)
+    assert out['stats']['will_advance'] == 7
+    assert out['stats']['will_block'] == 7
+
+
+def test_bulk_evaluation_matches_evaluate_student(app, periods, program, archives,
+                                                  deadlines_source, student_factory,
+                                                  make_submission):
+    src, tgt = periods['20263'].id, periods['20271'].id
+    ups = _students(student_factory, make_submission, archives, deadlines_source, 'm', 4)
+
+    out = tsvc.preview_program(program.id, src, tgt)
+    rows = {r['user_program']['id']: r for r in out['will_advance'] + out['will_block']}
+    for up in ups:
+        single = tsvc.evaluate_student(up.id, src, tgt)
+        assert rows[up.id]['can_advance'] == single['can_advance']
+        assert rows[up.id]['blockers'] == single['blockers']
+
+
+def test_execute_writes_history_and_notifications_in_bulk(app, periods, program, archives,
+                                                          deadlines_source, student_factory,
+                                                          make_submission, postgrad_admin,
+                                                          permissions, monkeypatch):
+    ups = _students(student_factory, make_submission, archives, deadlines_source, 'x', 6)
+    monkeypatch.setattr(tsvc, 'PROGRESS_EVERY', 1)
+    progress = []
+
+    stats = tsvc.execute_program_transition(
+        program.id, periods['20263'].id, periods['20271'].id,
+        coordinator_id=postgrad_admin.id,
+        progress_callback=lambda done, total: progress.append((done, total)),
+    )
+
+    assert stats['advanced'] == 3
+    assert stats['blocked'] == 3
+    advanced_users = {up.user_id for up in ups[::2]}
+
+    history = UserHistory.query.filter_by(action='semester_advanced').all()
+    assert {h.user_id for h in history} == advanced_users
+    assert all(h.admin_id == postgrad_admin.id for h in history)
+
+    notifications = Notification.query.filter_by(type='semester_advanced').all()
+    assert {n.user_id for n in notifications} == advanced_users
+    assert notifications[0].title == 'Avanzaste al semestre 2'
+
+    assert progress[-1] == (6, 6)
+    assert [done for done, _ in progress[:6]] == list(range(1, 7))
+
+
+def test_transition_task_reports_progress_and_returns_stats(app, periods, program, archives,
+                                                             deadlines_source, student_factory,
+                                                             make_submission, postgrad_admin,
+                                                             permissions, monkeypatch):
+    from app.tasks import transition as transition_tasks
+
+    _students(student_factory, make_submission, archives, deadlines_source, 't', 2)
+    states = []
+    monkeypatch.setattr(
+        transition_tasks.run_semester_transition, 'update_state',
+        lambda state=None, meta=None, **kw: states.append((state, meta)),
+    )
+
+    # .run() evita el ContextTask (ligado a la app con la que se inicializó Celery)
+    result = transition_tasks.run_semester_transition.run(
+        source_period_id=periods['20263'].id,
+        target_period_id=periods['20271'].id,
+        coordinator_id=postgrad_admin.id,
+    )
+
+    assert result['total']['advanced'] == 1
+    assert result['archive'] is None
+    assert states[-1] == ('PROGRESS', {'stage': 'programs', 'done': 1, 'total': 1})
@@ -0,0 +1,31 @@
+# tests/utils.py
+"""
+Utilidades compartidas por los tests.
+"""
+
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app import db
+
+
+@contextmanager
+def count_queries():
+    """
+    Registra el SQL que se ejecuta contra db.engine dentro del bloque.
+
+        with count_queries() as statements:
+            ...
+        assert len(statements) <= 3
+    """
+    statements = []
+
+    def _record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', _record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', _record)